@@ -1,36 +1,45 @@
 # LinkedIn 프로필 검색 에이전트
-from dotenv import load_dotenv  # .env 파일에서 API 키 같은 환경 변수를 로드
-load_dotenv()  # 환경 변수 불러오기
+# 📌 .env 를 프로세스당 한 번만 읽는 설정 로더 (API 키가 필요한 에이전트를 만들 때 호출)
+from config import load_env
 
-# 📌 LangChain 관련 라이브러리
-from langchain_openai import ChatOpenAI  # OpenAI GPT 모델 사용
-from langchain.prompts.prompt import PromptTemplate  # 프롬프트 템플릿을 생성하는 클래스
-from langchain_core.tools import Tool  # AI가 사용할 도구 (검색 기능 포함)
-from langchain.agents import create_react_agent, AgentExecutor  # ReAct 기반 에이전트 생성 및 실행
-from langchain import hub  # LangChain의 미리 정의된 프롬프트를 가져오는 라이브러리
+# 📌 LangChain 관련 라이브러리 (에이전트 / OpenAI 모델은 build_lookup_executor 안에서 import)
+from langchain_core.prompts import PromptTemplate  # 프롬프트 템플릿을 생성하는 클래스
 
 # 📌 검색 도구 (Google에서 LinkedIn URL 찾기)
 from tools.tools import get_profile_url_tavily  # Tavily 검색 API를 이용해 LinkedIn URL을 가져오는 함수
 
-# 📌 LinkedIn 프로필 URL 검색 함수
-def lookup(name: str) -> str:
-    """
-    입력된 이름(name)에 대해 Google 검색을 수행하여 LinkedIn 프로필 URL을 찾는 함수.
-    """
-    
+# 📌 조회 결과 캐시 (같은 이름은 에이전트를 다시 실행하지 않음)
+from caching.result_cache import normalize_name, profile_url_cache
+
+# 📌 프로세스당 한 번만 만드는 컴포넌트 레지스트리 / 저장된 Hub 프롬프트
+from registry import load_hub_prompt, registry
+
+# 🔹 프롬프트 템플릿 (검색 요청을 위한 입력 문장 생성)
+template = """given the full name {name_of_person} I want you to get me a link to their Linkedin profile page.
+                  Your answer should contain only a URL"""
+prompt_template = PromptTemplate(
+    template=template, input_variables=["name_of_person"]
+)
+
+
+# 📌 LinkedIn 검색 에이전트 실행기 생성 (레지스트리가 프로세스당 한 번만 호출)
+def build_lookup_executor():
+    from langchain.agents import AgentExecutor, create_react_agent  # ReAct 기반 에이전트 생성 및 실행
+    from langchain_core.tools import Tool  # AI가 사용할 도구 (검색 기능 포함)
+    from langchain_openai import ChatOpenAI  # OpenAI GPT 모델 사용
+
+    # 📌 LLM 응답 캐시 (ReAct 단계마다 같은 프롬프트 + 관찰 결과면 모델을 호출하지 않음)
+    from caching.llm_cache import install_llm_cache
+
+    load_env()  # OPENAI_API_KEY / TAVILY_API_KEY
+    install_llm_cache()
+
     # 🔹 OpenAI 기반 언어 모델 (GPT-3.5 사용)
     llm = ChatOpenAI(
         temperature=0,  # 결과의 랜덤성을 줄이고 일관된 답변을 생성 (0이면 항상 동일한 답변 가능)
         model_name="gpt-3.5-turbo",  # 사용할 모델 지정
     )
 
-    # 🔹 프롬프트 템플릿 (검색 요청을 위한 입력 문장 생성)
-    template = """given the full name {name_of_person} I want you to get me a link to their Linkedin profile page.
-                  Your answer should contain only a URL"""
-    prompt_template = PromptTemplate(
-        template=template, input_variables=["name_of_person"]
-    )
-
     # 🔹 검색 도구 (Google 검색을 활용해 LinkedIn 프로필 URL 찾기)
     tools_for_agent = [
         Tool(
@@ -40,17 +49,30 @@ def lookup(name: str) -> str:
         )
     ]
 
-    # 🔹 LangChain Hub에서 ReAct 프롬프트 템플릿 가져오기
-    react_prompt = hub.pull("hwchase17/react")
+    # 🔹 ReAct 프롬프트 템플릿 (prompts/ 에 저장된 hwchase17/react, 없을 때만 Hub 에서 가져옴)
+    react_prompt = load_hub_prompt("hwchase17/react")
 
     # 🔹 ReAct 기반 에이전트 생성 (검색 도구 활용 가능)
     agent = create_react_agent(llm=llm, tools=tools_for_agent, prompt=react_prompt)
 
     # 🔹 에이전트 실행기 (실제 실행을 담당)
-    agent_executor = AgentExecutor(agent=agent, tools=tools_for_agent, verbose=True)
+    return AgentExecutor(agent=agent, tools=tools_for_agent, verbose=True)
+
+
+registry.register("linkedin_lookup_agent", build_lookup_executor)
+
+
+# 📌 LinkedIn 프로필 URL 검색 함수
+@profile_url_cache.memoize(key_fn=normalize_name)
+def lookup(name: str) -> str:
+    """
+    입력된 이름(name)에 대해 Google 검색을 수행하여 LinkedIn 프로필 URL을 찾는 함수.
+    - 결과는 이름 기준으로 캐시되고, 같은 이름의 동시 요청은 에이전트를 한 번만 실행.
+    - 에이전트 실행기는 프로세스당 한 번만 만들어서 재사용.
+    """
 
     # 🔹 에이전트 실행 및 검색 수행
-    result = agent_executor.invoke(
+    result = registry.get("linkedin_lookup_agent").invoke(
         input={"input": prompt_template.format_prompt(name_of_person=name)}
     )
 
@@ -1,9 +1,29 @@
-from flask import Flask, render_template, request, jsonify
+import json
+import os
+import time
 
-from linkedin_runner import ice_break
+from flask import Flask, render_template, request, jsonify, Response, stream_with_context
+
+from config import load_env
+
+load_env()  # 다른 모듈이 import 할 때 읽는 환경 변수(캐시 / HTTP 설정 등)보다 먼저 .env 적용
+
+from batch_runner import run_batch, to_ndjson
+from caching.result_cache import cache_stats
+from linkedin_runner import ice_break, ice_break_stream
+from registry import registry
 
 app = Flask(__name__)
 
+BATCH_MAX_NAMES = int(os.environ.get("BATCH_MAX_NAMES", 1000))  # /process/batch 한 번에 받는 최대 이름 수
+
+# 🔹 에이전트 / 프롬프트 / LLM 클라이언트를 미리 만들어서 첫 요청도 바로 실행되도록 함
+#   - APP_WARM_UP=background (기본): 별도 스레드에서 만들고 서버는 바로 요청을 받음 (만드는 중에 온 요청은 끝날 때까지 기다림)
+#   - eager: import 할 때 다 만들고 시작 / off: 첫 요청에서 만듦
+_warm_up = os.environ.get("APP_WARM_UP", "background")
+if _warm_up != "off":
+    registry.warm_up(background=_warm_up == "background")
+
 
 @app.route("/")
 def index():
@@ -15,16 +35,67 @@ def process():
     name = request.form["name"]
     person_info, profile_pic_url = ice_break(name=name)
 
-    return jsonify(
-        {
-            "summary": person_info.summary,
-            "interests": person_info.topics_of_interest,
-            "facts": person_info.facts,
-            "ice_breakers": person_info.ice_breakers,
-            "picture_url": profile_pic_url,
-        }
+    return jsonify({**person_info.to_dict(), "picture_url": profile_pic_url})
+
+
+# 📌 스트리밍 버전: Server-Sent Events 로 단계별 결과를 바로 전달
+@app.route("/process/stream", methods=["GET", "POST"])
+def process_stream():
+    # EventSource 는 GET 만 지원하므로 쿼리스트링 / 폼 둘 다 허용
+    name = request.values["name"]
+    started = time.perf_counter()
+
+    def sse(event, data):
+        # 모든 이벤트에 요청 시작부터의 경과 시간(ms)을 붙여서 단계별 지연을 측정할 수 있게 함
+        data = {**data, "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)}
+        return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+    def events():
+        # 🔹 첫 이벤트를 바로 보내서 응답 헤더와 첫 바이트가 즉시 나가도록 함 (TTFB)
+        yield sse("open", {"name": name})
+        try:
+            for event, data in ice_break_stream(name=name):
+                yield sse(event, data)
+        except Exception as e:  # 중간에 실패해도 이미 보낸 결과는 유지하고 에러 이벤트로 알림
+            app.logger.exception("ice_break_stream failed")
+            yield sse("failed", {"message": str(e)})
+        yield sse("done", {})
+
+    return Response(
+        stream_with_context(events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},  # 프록시 버퍼링 방지
+    )
+
+
+# 📌 여러 이름을 한 번에 처리: 결과를 끝나는 순서대로 NDJSON 으로 전달
+@app.route("/process/batch", methods=["POST"])
+def process_batch():
+    # JSON {"names": [...]} 또는 한 줄에 한 명씩 적은 텍스트 본문
+    payload = request.get_json(silent=True)
+    if isinstance(payload, dict):
+        names = payload.get("names")
+    else:
+        names = request.get_data(as_text=True).splitlines()
+    if not isinstance(names, list) or not all(isinstance(name, str) for name in names):
+        return jsonify({"error": "expected {\"names\": [\"...\"]} or one name per line"}), 400
+    if len(names) > BATCH_MAX_NAMES:
+        return jsonify({"error": f"at most {BATCH_MAX_NAMES} names per request"}), 413
+
+    return Response(
+        stream_with_context(to_ndjson(run_batch(names))),
+        mimetype="application/x-ndjson",
+        headers={"X-Accel-Buffering": "no"},
     )
 
 
+# 📌 조회 캐시 / LLM 응답 캐시 적중률 확인용
+@app.route("/cache/stats")
+def cache_stats_view():
+    from caching.llm_cache import llm_cache_stats  # langchain_core 를 import 하므로 필요할 때만
+
+    return jsonify({**cache_stats(), "llm": llm_cache_stats()})
+
+
 if __name__ == "__main__":
     app.run(host="0.0.0.0", debug=True)
\ No newline at end of file
@@ -0,0 +1,138 @@
+# 여러 인물에 대한 Ice Breaker 일괄 생성
+# - 같은 이름(대소문자 / 공백 차이 무시)은 한 번만 처리
+# - LinkedIn / Twitter 조회는 크기가 정해진 스레드 풀에서 동시에 실행
+# - 요약 단계는 조회가 끝난 것부터 모아서 LLM batch 호출 한 번으로 처리
+# - 결과는 끝나는 순서대로 한 줄에 하나씩 (NDJSON) 전달하고, 실패한 이름은 해당 줄에만 error 로 기록
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from caching.result_cache import normalize_name
+from linkedin_runner import gather_profiles
+from registry import registry
+
+BATCH_WORKERS = int(os.environ.get("BATCH_WORKERS", 8))  # 동시에 조회하는 이름 수
+SUMMARY_BATCH_SIZE = int(os.environ.get("SUMMARY_BATCH_SIZE", 16))  # LLM batch 한 번에 보내는 요약 수
+
+
+# 📌 중복 이름 제거
+def dedupe_names(names: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    - return: {정규화된 이름: {"name": 처음 나온 원래 이름, "indices": [입력 순번, ...]}} (입력 순서 유지)
+    - 빈 문자열은 건너뜀.
+    """
+    unique: Dict[str, Dict[str, Any]] = {}
+    for index, name in enumerate(names):
+        key = normalize_name(name)
+        if not key:
+            continue
+        unique.setdefault(key, {"name": name.strip(), "indices": []})["indices"].append(index)
+    return unique
+
+
+def _error_item(entry: Dict[str, Any], stage: str, error: BaseException) -> Dict[str, Any]:
+    return {**entry, "ok": False, "stage": stage, "error": f"{type(error).__name__}: {error}"}
+
+
+# 📌 요약 단계: 모인 조회 결과를 LLM batch 한 번으로 요약
+def _summarize(ready: List[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    inputs = [{"information": item["linkedin_data"], "twitter_posts": item["tweets"]} for item in ready]
+    results = registry.get("summary_chain").batch(inputs, return_exceptions=True)
+    for item, result in zip(ready, results):
+        entry = {"name": item["name"], "indices": item["indices"]}
+        if isinstance(result, Exception):
+            yield _error_item(entry, "summary", result)
+        else:
+            yield {**entry, "ok": True, **result.to_dict(), "picture_url": item["linkedin_data"].get("profile_pic_url")}
+
+
+# 📌 여러 이름에 대한 Ice Breaker 생성 (결과가 나오는 대로 하나씩 yield)
+def run_batch(
+    names: Iterable[str],
+    workers: int = BATCH_WORKERS,
+    summary_batch_size: int = SUMMARY_BATCH_SIZE,
+    timeouts: Optional[Dict[str, float]] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    - names: 인물 이름 목록 (중복 허용, 중복은 결과 한 줄의 indices 에 모두 기록)
+    - workers: 동시에 조회하는 이름 수 (외부 API 부하 제한). 이름마다 LinkedIn / Twitter 두 단계를
+      linkedin_runner 의 공용 스레드 풀(16개)에서 실행하므로 8 이하를 권장.
+    - summary_batch_size: 조회가 끝난 이름이 이만큼 모이면 (또는 남은 조회가 없으면) LLM batch 로 요약.
+      요약하는 동안에도 나머지 이름의 조회는 스레드 풀에서 계속 진행됨.
+    - yield: {"name", "indices", "ok": True, "summary", "facts", "picture_url"}
+             또는 {"name", "indices", "ok": False, "stage": "lookup" | "summary", "error"}
+    """
+    unique = dedupe_names(names)
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ice-batch")
+    futures = {pool.submit(gather_profiles, entry["name"], timeouts): entry for entry in unique.values()}
+    pending = set(futures)
+    ready: List[Dict[str, Any]] = []
+    try:
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                entry = futures[future]
+                try:
+                    profiles = future.result()
+                except Exception as e:  # 한 이름의 실패가 전체 배치를 멈추지 않도록 해당 줄에만 기록
+                    yield _error_item(entry, "lookup", e)
+                    continue
+                ready.append({
+                    **entry,
+                    "linkedin_data": (profiles["linkedin"] or {}).get("data", {}),
+                    "tweets": (profiles["twitter"] or {}).get("tweets", []),
+                })
+
+            # 🔹 충분히 모였거나 더 기다릴 조회가 없으면 요약
+            while len(ready) >= summary_batch_size or (ready and not pending):
+                chunk, ready = ready[:summary_batch_size], ready[summary_batch_size:]
+                yield from _summarize(chunk)
+    finally:
+        # 🔹 중간에 멈춘 경우 (NDJSON 클라이언트 연결 끊김 -> GeneratorExit) 남은 조회를 기다리지 않음
+        #   아직 시작하지 않은 조회는 취소하고, 실행 중인 조회는 끝나면 버려짐
+        for future in pending:
+            future.cancel()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+# 📌 결과를 NDJSON 줄로 변환
+def to_ndjson(items: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    for item in items:
+        yield json.dumps(item, ensure_ascii=False) + "\n"
+
+
+# 📌 CLI: 이름 목록 파일(한 줄에 한 명) 또는 표준 입력을 받아 NDJSON 을 표준 출력으로 출력
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Generate ice breakers for many names (NDJSON output).")
+    parser.add_argument("names_file", nargs="?", help="file with one name per line (default: stdin)")
+    parser.add_argument("--workers", type=int, default=BATCH_WORKERS)
+    parser.add_argument("--summary-batch-size", type=int, default=SUMMARY_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    if args.names_file:
+        with open(args.names_file, encoding="utf-8") as f:
+            names = f.read().splitlines()
+    else:
+        names = sys.stdin.read().splitlines()
+
+    started = time.perf_counter()
+    failed = total = 0
+    for item in run_batch(names, args.workers, args.summary_batch_size):
+        sys.stdout.writelines(to_ndjson([item]))
+        sys.stdout.flush()
+        total += 1
+        failed += not item["ok"]
+    print(f"{total} names ({failed} failed) in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    from config import load_env
+
+    load_env()
+    # 이름 목록을 읽는 동안 에이전트 / 요약 체인을 미리 만들어 둠 (--help 는 기다리지 않음)
+    registry.warm_up(background=True)
+    main()
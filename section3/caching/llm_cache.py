@@ -0,0 +1,344 @@
+# LLM 응답 캐시
+# - ice_breaker.py (ChatOllama), linkedin_runner.py (gpt-4o-mini), LinkedIn 조회 ReAct 에이전트는 모두 temperature=0 이고
+#   같은 프롬프트를 자주 다시 보내므로, 모델 응답을 (모델 + 파라미터 + 프롬프트 해시) 키로 저장해서 재사용
+# - 1단계: 프로세스 메모리 LRU / 2단계: 로컬 SQLite 파일 (result_cache 의 저장소를 그대로 사용)
+# - LangChain 의 BaseCache 로 구현해서 set_llm_cache 한 번으로 모든 체인 / 에이전트의 LLM 호출에 적용
+#   (모델별로 끄려면 ChatOpenAI(..., cache=False))
+# - 같은 키의 동시 요청은 한 번만 모델로 보내고 나머지는 그 결과를 기다림 (in-flight coalescing)
+#   먼저 보낸 호출이 실패하면 on_llm_error 콜백에서 자리를 바로 풀어서, 기다리던 요청 중 하나가 이어서 호출
+# - replay 모드: 저장된 응답만 사용하고, 없는 프롬프트는 모델을 호출하지 않고 LLMCacheMiss 예외
+#   (통합 테스트 / 벤치마크를 네트워크 없이 실행)
+import hashlib
+import os
+import time
+import warnings
+from contextvars import ContextVar
+from threading import Event, Lock
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.globals import get_llm_cache, set_llm_cache
+from langchain_core.load import dumps, loads
+from langchain_core.runnables.config import run_in_executor
+from langchain_core.tracers.context import register_configure_hook
+
+from caching.result_cache import MemoryBackend, SQLiteBackend
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "llm_cache.sqlite")
+
+
+class LLMCacheMiss(LookupError):
+    """replay 모드에서 저장된 응답이 없는 프롬프트를 호출한 경우"""
+
+
+# 📌 메모리 LRU + SQLite 2단계 LLM 응답 캐시
+class LLMResponseCache(BaseCache):
+    """
+    - memory: 1단계 저장소 (MemoryBackend), store: 2단계 저장소 (SQLiteBackend, None 이면 메모리만 사용)
+    - ttl: 응답을 보관하는 시간 (초, None 이면 만료 없음)
+    - replay: True 면 저장소를 읽기만 하고, 없는 프롬프트는 LLMCacheMiss
+    - coalesce_timeout: 같은 키를 먼저 요청한 호출을 기다리는 최대 시간 (초).
+      먼저 보낸 호출이 예외로 끝나면 on_llm_error 에서 바로 자리를 풀고, 이 시간은 응답 없이 멈춘 호출에만 적용됨.
+    - 키: sha256(llm_string + 프롬프트). llm_string 에는 모델 이름 / temperature / stop 등 호출 파라미터가 들어 있음.
+    - 값: Generation 목록을 langchain_core.load.dumps 로 직렬화한 JSON 문자열 목록.
+    """
+
+    def __init__(
+        self,
+        memory: Optional[MemoryBackend] = None,
+        store: Optional[SQLiteBackend] = None,
+        ttl: Optional[float] = None,
+        replay: bool = False,
+        coalesce_timeout: float = 60.0,
+    ):
+        self.memory = memory if memory is not None else MemoryBackend()
+        self.store = store
+        self.ttl = ttl
+        self.replay = replay
+        self.coalesce_timeout = coalesce_timeout
+        self._lock = Lock()
+        self._inflight: Dict[str, Event] = {}
+        self.memory_hits = 0
+        self.store_hits = 0
+        self.misses = 0
+        self.coalesced = 0  # 다른 요청의 응답을 기다려서 받은 횟수
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return "llm:" + hashlib.sha256(f"{llm_string}\x00{prompt}".encode("utf-8")).hexdigest()
+
+    def _get(self, key: str, count: bool = True) -> Optional[RETURN_VAL_TYPE]:
+        now = time.time()
+        entry = self.memory.get(key)
+        tier = "memory"
+        if entry is None and self.store is not None:
+            entry = self.store.get(key)
+            tier = "store"
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at < now:
+            self.memory.delete(key)
+            if self.store is not None:
+                self.store.delete(key)
+            return None
+        if tier == "store":
+            self.memory.set(key, value, expires_at)  # 다음 조회는 메모리에서
+        if count:
+            with self._lock:
+                if tier == "memory":
+                    self.memory_hits += 1
+                else:
+                    self.store_hits += 1
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")  # loads 의 beta 경고
+            return [loads(item) for item in value]
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        value, lease = self._lookup(prompt, llm_string)
+        self._hold(lease)
+        return value
+
+    async def alookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        # 기다리는 동안 이벤트 루프를 막지 않도록 스레드에서 실행
+        value, lease = await run_in_executor(None, self._lookup, prompt, llm_string)
+        self._hold(lease)
+        return value
+
+    # 🔹 모델로 보낼 자리를 이번 LLM 실행의 목록에 기록 (실패하면 _ReleaseOnError 가 풀어줌)
+    #   (BaseLLM.generate 는 on_llm_start 전에 lookup 하므로 목록이 없으면 여기서 만듦)
+    def _hold(self, lease: Optional[Tuple[str, Event]]) -> None:
+        if lease is None:
+            return
+        leases = _leases.get()
+        if leases is None:
+            leases = []
+            _leases.set(leases)
+        # update 로 끝난 자리(이벤트가 set 됨)는 지움 (같은 context 에서 계속 호출해도 목록이 커지지 않음)
+        leases[:] = [held for held in leases if not held[2].is_set()]
+        leases.append((self, *lease))
+
+    # 📌 return: (저장된 응답, None) 또는 이 호출이 모델로 보내야 하면 (None, (키, 이벤트))
+    def _lookup(self, prompt: str, llm_string: str) -> Tuple[Optional[RETURN_VAL_TYPE], Optional[Tuple[str, Event]]]:
+        key = self._key(prompt, llm_string)
+        value = self._get(key)
+        if value is not None:
+            return value, None
+        if self.replay:
+            with self._lock:
+                self.misses += 1
+            raise LLMCacheMiss(f"no recorded response for prompt {key[4:16]} (replay mode)")
+
+        while True:
+            # 🔹 같은 키를 처리 중인 호출이 없으면 이 호출이 모델로 보냄 (None 반환 → update 로 저장)
+            with self._lock:
+                event = self._inflight.get(key)
+                if event is None:
+                    event = self._inflight[key] = Event()
+                    self.misses += 1
+                    return None, (key, event)
+                self.coalesced += 1
+            # 🔹 있으면 그 호출이 update 할 때까지 기다렸다가 저장된 응답을 사용
+            finished = event.wait(self.coalesce_timeout)
+            value = self._get(key, count=False)  # coalesced 로 이미 집계
+            if value is not None:
+                return value, None
+            with self._lock:
+                self.coalesced -= 1
+                if not finished and self._inflight.get(key) is event:
+                    # 먼저 보낸 호출이 응답 없이 너무 오래 걸림 → 자리를 넘겨받고, 같이 기다리던 요청도 깨움
+                    self._inflight.pop(key)
+                    event.set()
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        key = self._key(prompt, llm_string)
+        if not self.replay:
+            value = [dumps(generation) for generation in return_val]
+            expires_at = time.time() + self.ttl if self.ttl is not None else float("inf")
+            self.memory.set(key, value, expires_at)
+            if self.store is not None:
+                self.store.set(key, value, expires_at)
+        with self._lock:
+            event = self._inflight.pop(key, None)
+        if event is not None:
+            event.set()
+
+    # 🔹 먼저 보낸 호출이 실패 → 자리를 비우고 기다리던 요청을 깨움 (그중 하나가 다시 모델을 호출)
+    def release(self, key: str, event: Event) -> None:
+        with self._lock:
+            if self._inflight.get(key) is not event:  # 이미 update 됐거나 다른 요청이 넘겨받음
+                return
+            self._inflight.pop(key)
+        event.set()
+
+    def clear(self, **kwargs: Any) -> None:
+        self.memory.clear()
+        if self.store is not None:
+            self.store.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self.memory_hits + self.store_hits
+        total = hits + self.misses + self.coalesced
+        return {
+            "mode": "replay" if self.replay else "on",
+            "memory_hits": self.memory_hits,
+            "store_hits": self.store_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": round((hits + self.coalesced) / total, 4) if total else 0.0,
+        }
+
+
+# 🔹 지금 실행 중인 LLM 호출이 모델로 보내려고 잡은 자리 목록 [(캐시, 키, 이벤트)]
+#   - 채팅 모델: on_chat_model_start 에서 새 목록을 만들고, lookup 이 거기에 추가 (agenerate 는 프롬프트마다
+#     task 를 만들어서 그 안에서 바꾼 ContextVar 는 밖에서 보이지 않으므로, 바깥 context 에 만든 목록 객체를 공유)
+#   - completion LLM: on_llm_start 보다 lookup 이 먼저이므로 _hold 가 목록을 만듦
+_leases: ContextVar[Optional[List[Tuple["LLMResponseCache", str, Event]]]] = ContextVar("llm_cache_leases",
+                                                                                       default=None)
+
+
+# 📌 모델 호출이 예외로 끝나면 그 호출이 잡은 자리를 풀어주는 콜백 (모든 LLM 실행에 자동으로 붙음)
+class _ReleaseOnError(BaseCallbackHandler):
+    """
+    - 자리를 풀지 않으면 같은 프롬프트의 다음 요청이 coalesce_timeout 동안 기다림.
+    - 이미 update 로 끝난 자리는 release 에서 무시되므로, on_llm_error 가 올 때 목록 전체를 풀어도 됨
+      (generate / agenerate 는 모든 프롬프트가 끝난 뒤 on_llm_error 를 호출).
+    """
+
+    run_inline = True  # async 실행에서도 같은 context 에서 바로 호출
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: Any, **kwargs: Any) -> None:
+        _leases.set([])
+
+    def on_llm_error(self, error: BaseException, **kwargs: Any) -> None:
+        leases = _leases.get()
+        while leases:
+            cache, key, event = leases.pop()
+            cache.release(key, event)
+
+
+_release_handler: ContextVar[Optional[BaseCallbackHandler]] = ContextVar("llm_cache_release_handler",
+                                                                         default=_ReleaseOnError())
+register_configure_hook(_release_handler, inheritable=True)
+
+
+# 📌 환경 변수로 캐시를 만드는 헬퍼
+def cache_from_env() -> Optional[LLMResponseCache]:
+    """
+    - LLM_CACHE=on (기본) | off | replay
+    - LLM_CACHE_PATH: SQLite 파일 경로 (기본 section3/llm_cache.sqlite, 빈 문자열이면 메모리만 사용)
+    - LLM_CACHE_SIZE: 메모리 LRU 최대 항목 수 / LLM_CACHE_MAX_ROWS: SQLite 최대 항목 수
+    - LLM_CACHE_TTL: 보관 시간 (초, 기본 만료 없음)
+    """
+    mode = os.environ.get("LLM_CACHE", "on")
+    if mode == "off":
+        return None
+    path = os.environ.get("LLM_CACHE_PATH", DEFAULT_CACHE_PATH)
+    ttl = os.environ.get("LLM_CACHE_TTL")
+    return LLMResponseCache(
+        memory=MemoryBackend(maxsize=int(os.environ.get("LLM_CACHE_SIZE", 1024))),
+        store=SQLiteBackend(path, maxsize=int(os.environ.get("LLM_CACHE_MAX_ROWS", 100_000))) if path else None,
+        ttl=float(ttl) if ttl else None,
+        replay=mode == "replay",
+    )
+
+
+_install_lock = Lock()
+_installed = False
+
+
+# 📌 프로세스 전체 LLM 호출에 캐시 적용 (여러 모듈에서 호출해도 한 번만 설정)
+def install_llm_cache() -> Optional[LLMResponseCache]:
+    global _installed
+    with _install_lock:
+        if not _installed:
+            cache = cache_from_env()
+            if cache is not None:
+                set_llm_cache(cache)
+            _installed = True
+    cache = get_llm_cache()
+    return cache if isinstance(cache, LLMResponseCache) else None
+
+
+def is_replaying() -> bool:
+    """
+    - LangChain 의 .stream() 은 캐시를 확인하지 않으므로, replay 모드에서는 스트리밍 체인의 모델에
+      disable_streaming=True 를 줘서 invoke (캐시 사용) 로 처리하도록 함.
+    """
+    cache = install_llm_cache()
+    return cache is not None and cache.replay
+
+
+def llm_cache_stats() -> Dict[str, Any]:
+    cache = get_llm_cache()
+    return cache.stats() if isinstance(cache, LLMResponseCache) else {"mode": "off"}
+
+
+# 🔹 직접 실행하는 경우: 가짜 모델(호출마다 100ms)로 캐시 없음 / 캐시 / replay 비교
+#   python -m caching.llm_cache
+#   - 요청 200개 = 서로 다른 프롬프트 20개를 8개 스레드에서 반복 (같은 프롬프트가 동시에 들어오는 경우 포함)
+if __name__ == "__main__":
+    import tempfile
+    from concurrent.futures import ThreadPoolExecutor
+
+    from langchain_core.language_models import BaseChatModel
+    from langchain_core.messages import AIMessage
+    from langchain_core.outputs import ChatGeneration, ChatResult
+    from langchain_core.prompts import PromptTemplate
+
+    class SlowEchoChatModel(BaseChatModel):
+        """프롬프트 길이를 답하는 가짜 모델 (호출마다 latency 초)"""
+
+        model_name: str = "slow-echo"
+        temperature: float = 0.0
+        latency: float = 0.1
+        calls: int = 0
+
+        @property
+        def _llm_type(self) -> str:
+            return "slow-echo"
+
+        @property
+        def _identifying_params(self) -> Dict[str, Any]:
+            return {"model_name": self.model_name, "temperature": self.temperature}
+
+        def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+            self.calls += 1
+            time.sleep(self.latency)
+            text = f"{len(messages[-1].content)} characters"
+            return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    prompt = PromptTemplate.from_template("Summarize what you know about {name} in two sentences.")
+    names = [f"person {i % 20}" for i in range(200)]
+
+    def run(label: str, llm: SlowEchoChatModel, cache: Optional[LLMResponseCache]) -> Sequence[str]:
+        set_llm_cache(cache)
+        chain = prompt | llm
+        started = time.perf_counter()
+        with ThreadPoolExecutor(8) as pool:
+            outputs = list(pool.map(lambda name: chain.invoke({"name": name}).content, names))
+        elapsed = time.perf_counter() - started
+        print(f"{label:>22}: {elapsed:6.2f}s ({len(names) / elapsed:7.1f} requests/sec), model calls {llm.calls:3d}"
+              + (f", {cache.stats()}" if cache else ""))
+        return outputs
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "llm_cache.sqlite")
+        baseline = run("no cache", SlowEchoChatModel(), None)
+        recorded = run("memory + sqlite (cold)", SlowEchoChatModel(), LLMResponseCache(store=SQLiteBackend(path)))
+        warm = run("sqlite (restart)", SlowEchoChatModel(), LLMResponseCache(store=SQLiteBackend(path)))
+        replayed = run("replay", SlowEchoChatModel(), LLMResponseCache(store=SQLiteBackend(path), replay=True))
+        print("same outputs:", baseline == recorded == warm == replayed)
+
+        # 🔹 파라미터가 다르면 다른 키 / 모델별로 캐시 끄기 / replay 에서 없는 프롬프트
+        cache = LLMResponseCache(store=SQLiteBackend(path), replay=True)
+        set_llm_cache(cache)
+        for label, llm in (("temperature=0.7", SlowEchoChatModel(temperature=0.7)),
+                           ("cache=False", SlowEchoChatModel(cache=False))):
+            try:
+                (prompt | llm).invoke({"name": "person 1"})
+                print(f"{label}: model called {llm.calls} time(s)")
+            except LLMCacheMiss as e:
+                print(f"{label}: LLMCacheMiss ({e})")
+        set_llm_cache(None)
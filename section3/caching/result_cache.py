@@ -0,0 +1,262 @@
+# 조회 결과 캐시
+# - 같은 이름을 반복해서 검색할 때 ReAct 에이전트(hub.pull + 여러 번의 LLM 호출 + Tavily 검색)와
+#   프로필 스크래핑을 다시 실행하지 않도록 결과를 TTL / 크기 제한이 있는 캐시에 저장
+# - 저장소(backend)는 교체 가능: 프로세스 메모리 LRU / 로컬 SQLite / Redis 호환 클라이언트
+# - 같은 키에 대한 동시 요청은 한 번만 실행하고 결과를 나눠 가짐 (single-flight)
+import functools
+import json
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from threading import Lock
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+# 📌 프로세스 메모리 LRU 저장소
+class MemoryBackend:
+    """
+    - maxsize 개를 넘으면 가장 오래 사용되지 않은 항목부터 제거.
+    - 값은 (value, 만료 시각) 형태로 저장.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                self._data.move_to_end(key)
+            return entry
+
+    def set(self, key: str, value: Any, expires_at: float) -> None:
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+# 📌 로컬 SQLite 저장소 (프로세스 재시작 / 여러 워커 간 공유)
+class SQLiteBackend:
+    """
+    - 값은 JSON 으로 저장하므로 문자열 / 딕셔너리 / 리스트 같은 JSON 값만 캐시 가능.
+    - maxsize 를 넘으면 마지막 사용 시각이 가장 오래된 항목부터 삭제.
+    """
+
+    def __init__(self, path: str, maxsize: int = 100_000):
+        self.maxsize = maxsize
+        self._lock = Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, used_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE results SET used_at = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+        return json.loads(row[0]), row[1]
+
+    def set(self, key: str, value: Any, expires_at: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), expires_at, time.time()),
+            )
+            self._conn.execute(
+                "DELETE FROM results WHERE key IN ("
+                "SELECT key FROM results ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+                (self.maxsize,),
+            )
+            self._conn.commit()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM results WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM results")
+            self._conn.commit()
+
+
+# 📌 Redis 호환 저장소 (redis-py 의 get / set(ex=) / delete 를 지원하는 클라이언트면 사용 가능)
+class RedisBackend:
+    """
+    - 만료는 Redis 의 EX 옵션에 맡기고, 크기 제한은 서버의 maxmemory 정책을 따름.
+    """
+
+    def __init__(self, client, prefix: str = "ice_breaker:"):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        raw = self.client.get(self.prefix + key)
+        if raw is None:
+            return None
+        value, expires_at = json.loads(raw)
+        return value, expires_at
+
+    def set(self, key: str, value: Any, expires_at: float) -> None:
+        ttl = max(1, int(expires_at - time.time()))
+        self.client.set(self.prefix + key, json.dumps([value, expires_at], ensure_ascii=False), ex=ttl)
+
+    def delete(self, key: str) -> None:
+        self.client.delete(self.prefix + key)
+
+
+# 📌 TTL + single-flight 캐시
+class ResultCache:
+    """
+    - namespace: 키 앞에 붙는 이름 (예: "linkedin_url"), 같은 저장소를 여러 캐시가 공유할 수 있음
+    - ttl: 결과를 보관하는 시간 (초)
+    - 예외가 난 결과는 캐시하지 않고, 기다리던 요청 모두에게 같은 예외를 전달.
+    """
+
+    def __init__(self, namespace: str, backend=None, ttl: float = 3600.0):
+        self.namespace = namespace
+        self.backend = backend if backend is not None else MemoryBackend()
+        self.ttl = ttl
+        self._lock = Lock()
+        self._inflight: Dict[str, Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0  # 다른 요청의 실행 결과를 기다려서 받은 횟수
+
+    def _lookup(self, key: str) -> Tuple[bool, Any]:
+        entry = self.backend.get(key)
+        if entry is None:
+            return False, None
+        value, expires_at = entry
+        if expires_at < time.time():
+            self.backend.delete(key)
+            return False, None
+        return True, value
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Any:
+        key = f"{self.namespace}:{key}"
+        found, value = self._lookup(key)
+        if found:
+            with self._lock:
+                self.hits += 1
+            return value
+
+        # 🔹 이미 같은 키를 계산 중인 요청이 있으면 그 결과를 기다림
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+            else:
+                self.coalesced += 1
+        if not leader:
+            return future.result()
+
+        try:
+            # 앞선 요청이 방금 저장하고 빠졌을 수 있으므로 한 번 더 확인
+            found, value = self._lookup(key)
+            if found:
+                with self._lock:
+                    self.hits += 1
+            else:
+                with self._lock:
+                    self.misses += 1
+                value = compute()
+                self.backend.set(key, value, time.time() + self.ttl)
+            future.set_result(value)
+            return value
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def peek(self, key: str) -> Tuple[bool, Any]:
+        # 계산 없이 캐시만 확인 (비동기 코드처럼 get_or_compute 로 감쌀 수 없는 경우)
+        found, value = self._lookup(f"{self.namespace}:{key}")
+        with self._lock:
+            if found:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return found, value
+
+    def put(self, key: str, value: Any) -> None:
+        self.backend.set(f"{self.namespace}:{key}", value, time.time() + self.ttl)
+
+    def memoize(self, key_fn: Callable[..., str]):
+        """
+        - 함수 결과를 캐시하는 데코레이터. key_fn 은 함수와 같은 인자를 받아 캐시 키를 반환.
+        - 원래 함수는 __wrapped__ 로 접근 가능 (캐시 없이 호출할 때).
+        """
+
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                return self.get_or_compute(key_fn(*args, **kwargs), lambda: fn(*args, **kwargs))
+
+            wrapper.cache = self
+            return wrapper
+
+        return decorator
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+# 📌 환경 변수로 저장소를 고르는 헬퍼
+def backend_from_env():
+    """
+    - LOOKUP_CACHE_BACKEND=memory (기본) | sqlite
+    - LOOKUP_CACHE_SIZE: 최대 항목 수 / LOOKUP_CACHE_PATH: sqlite 파일 경로
+    """
+    kind = os.environ.get("LOOKUP_CACHE_BACKEND", "memory")
+    size = int(os.environ.get("LOOKUP_CACHE_SIZE", 1024))
+    if kind == "sqlite":
+        return SQLiteBackend(os.environ.get("LOOKUP_CACHE_PATH", "lookup_cache.sqlite"), maxsize=size)
+    return MemoryBackend(maxsize=size)
+
+
+# 🔹 프로세스 전체에서 공유하는 캐시 (저장소는 하나를 함께 사용)
+_shared_backend = backend_from_env()
+_ttl = float(os.environ.get("LOOKUP_CACHE_TTL", 24 * 3600))
+profile_url_cache = ResultCache("linkedin_url", _shared_backend, ttl=_ttl)  # 이름 → LinkedIn URL
+profile_data_cache = ResultCache("linkedin_profile", _shared_backend, ttl=_ttl)  # URL → 스크래핑 결과
+
+
+def normalize_name(name: str) -> str:
+    # 대소문자 / 공백 차이는 같은 사람으로 취급
+    return " ".join(name.lower().split())
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    return {cache.namespace: cache.stats() for cache in (profile_url_cache, profile_data_cache)}
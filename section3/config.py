@@ -0,0 +1,23 @@
+# 설정 로더
+# - .env 는 프로세스당 한 번만 읽음 (예전에는 여러 모듈이 import 될 때마다 load_dotenv() 로 .env 를 찾아서 다시 읽었음)
+# - 진입점(app.py / CLI 스크립트)은 시작할 때, API 키가 필요한 함수는 키를 읽기 직전에 load_env() 를 호출
+import functools
+import os
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+# 📌 .env 를 한 번만 읽는 함수
+@functools.lru_cache(maxsize=None)
+def load_env() -> bool:
+    """
+    - section3/.env 가 있으면 그 파일, 없으면 현재 폴더부터 위로 찾은 .env 를 읽음.
+    - 이미 설정된 환경 변수는 덮어쓰지 않음 (load_dotenv 기본 동작).
+    - return: .env 를 찾아서 읽었는지
+    """
+    from dotenv import find_dotenv, load_dotenv
+
+    path = os.path.join(PROJECT_DIR, ".env")
+    if not os.path.exists(path):
+        path = find_dotenv(usecwd=True)
+    return bool(path) and load_dotenv(path)
@@ -1,6 +1,6 @@
 # 🔹 OS 모듈과 dotenv 로드
 import os  # 운영체제(OS) 관련 기능을 다룰 수 있는 모듈
-from dotenv import load_dotenv  # .env 파일에서 환경변수를 불러오는 라이브러리
+from config import load_env  # .env 파일을 프로세스당 한 번만 불러오는 설정 로더
 
 # 🔹 LangChain 관련 모듈
 from langchain_core.prompts import PromptTemplate  # 프롬프트 템플릿을 만드는 모듈
@@ -12,8 +12,14 @@ from langchain_core.prompts import PromptTemplate  # 프롬프트 템플릿을 
 from langchain_ollama import ChatOllama # swap to ollama instead
 from langchain_core.output_parsers import StrOutputParser
 
+# 🔹 LLM 응답 캐시 (같은 정보로 다시 실행하면 Ollama 를 호출하지 않고 저장된 요약 사용)
+from caching.llm_cache import install_llm_cache
+
+# 🔹 Ollama 요청 스케줄러 (동시에 여러 번 호출해도 로컬 서버가 처리할 수 있는 개수만큼만 전달)
+from third_parties.ollama_scheduler import scheduled_ollama
+
 # 🔹 .env 파일 로드 (환경 변수 불러오기)
-load_dotenv()  # .env 파일에 저장된 API 키를 불러와서 환경 변수로 설정
+load_env()  # .env 파일에 저장된 API 키를 불러와서 환경 변수로 설정
 
 # 📌 요약할 대상의 정보 (Elon Musk에 대한 텍스트)
 information="""
@@ -26,15 +32,17 @@ In 2004, Musk was an early investor in electric vehicle manufacturer Tesla Motor
 Musk's actions and expressed views have made him a polarizing figure. He has been criticized for making unscientific and misleading statements, including COVID-19 misinformation, affirming antisemitic and transphobic comments, and promoting conspiracy theories. His acquisition of Twitter was controversial due to large employee layoffs, an increase in hate speech, the spread of misinformation and disinformation on the service, and changes to various service features including verification. Musk has engaged in political activities in several countries, including as a vocal and financial supporter of U.S. president Donald Trump, becoming the largest donor in the 2024 United States presidential election. In January 2025, Musk was appointed head of the Department of Government Efficiency, while at Trump's inauguration he made a controversial gesture that received widespread criticism
 """
 
-if __name__ == "__main__":
-    # 1️⃣ 요약 프롬프트 템플릿 만들기
-    # 🔹 `{information}`: 중괄호 `{}` 안에 변수 값을 넣을 수 있도록 만든 템플릿
-    summary_template = """
-        given the information {information} about a person from I want you to provide : 
-        1. a short summary
-        2. two interesting facts about them
-    """
+# 1️⃣ 요약 프롬프트 템플릿 만들기
+# 🔹 `{information}`: 중괄호 `{}` 안에 변수 값을 넣을 수 있도록 만든 템플릿
+summary_template = """
+    given the information {information} about a person from I want you to provide : 
+    1. a short summary
+    2. two interesting facts about them
+"""
+
 
+# 📌 요약 체인 생성 (여러 스레드에서 동시에 invoke 해도 Ollama 로는 스케줄러가 정한 개수만큼만 전달)
+def build_chain(llm=None):
     # 2️⃣ PromptTemplate 객체 생성
     summary_prompt_template = PromptTemplate(input_variables=['information'], template=summary_template)
 
@@ -43,12 +51,18 @@ if __name__ == "__main__":
     # llm = ChatOpenAI(temperature=0, model_name="gpt-4o-mini")
     # 🔹 temperature=0: 답변을 더 **일관되게** 출력하도록 설정 (값이 클수록 랜덤성이 높아짐)
     #  model_name="gpt-4o-mini": 사용 모델 선택
-    # 🔹 Ollmam class 사용 설정
-    llm = ChatOllama(model="llama3.2")
+    # 🔹 Ollmam class 사용 설정 (temperature=0: 같은 프롬프트면 같은 답 → 응답 캐시 사용 가능)
+    llm = llm or ChatOllama(model="llama3.2", temperature=0)
+    install_llm_cache()
 
-    # 5️⃣ 체인 실행 
+    # 4️⃣ 스케줄러: 마감 시간(OLLAMA_TIMEOUT) / 대기열 길이(OLLAMA_MAX_QUEUE) / 동시 요청 수(OLLAMA_MAX_PARALLEL)
     # chain = summary_prompt_template | llm
-    chain = summary_prompt_template | llm | StrOutputParser()
+    return summary_prompt_template | scheduled_ollama(llm) | StrOutputParser()
+
+
+if __name__ == "__main__":
+    # 5️⃣ 체인 실행 
+    chain = build_chain()
     res = chain.invoke(input={"information": information})
 
     # 6️⃣ 결과 출력
@@ -1,38 +1,25 @@
-from dotenv import load_dotenv
+import importlib.util
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterator, Optional, Tuple
 
-# 📌 LangChain 관련 라이브러리
-from langchain.prompts.prompt import PromptTemplate  # 프롬프트 템플릿을 생성하는 클래스
-from langchain_openai import ChatOpenAI  # OpenAI 기반 LLM (GPT-4o-mini 사용)
+# 📌 .env 를 프로세스당 한 번만 읽는 설정 로더
+from config import load_env
 
-# 📌 출력 형식 변환을 위한 Pydantic 기반 출력 파서
-from output_parsers import summary_parser
+# 📌 LLM 클라이언트 / 체인을 프로세스당 한 번만 만드는 레지스트리
+from registry import registry
 
-# 📌 외부 API 또는 크롤링을 통해 데이터를 가져오는 함수
-from third_parties.linkedin import scrape_linkedin_profile  # LinkedIn 프로필 정보 스크래핑
-from agents.linkedin_lookup_agent import lookup as linkedin_lookup_agent  # LinkedIn 프로필 검색
-from agents.twitter_lookup_agent import lookup as twitter_lookup_agent  # Twitter 프로필 검색
-from third_parties.twitter import scrape_user_tweets  # Twitter에서 최근 트윗 가져오기
+# 📌 LangChain / OpenAI / 출력 파서 / 에이전트 / 스크래퍼는 import 에 수 초가 걸리므로 여기서 import 하지 않고
+#    실제로 사용하는 함수 안에서 import (앱 / CLI 시작 시간 단축, 두 번째부터는 sys.modules 에서 바로 가져옴)
+#    - langchain_core.prompts.PromptTemplate: 프롬프트 템플릿 (langchain.prompts 와 같은 클래스, import 가 훨씬 가벼움)
+#    - langchain_openai.ChatOpenAI: OpenAI 기반 LLM (GPT-4o-mini 사용)
+#    - output_parsers: Summary 출력 파서 (스트리밍 중 부분 결과 / 잘린 JSON 복구)
+#    - caching.llm_cache: LLM 응답 캐시 (같은 프로필 정보로 요약을 다시 요청하면 모델을 호출하지 않음)
 
 
-# 📌 특정 인물에 대한 정보를 분석하고 Ice Breaker 생성
-def ice_break_with(name: str) -> str:
-    """
-    - 주어진 인물(name)에 대해 LinkedIn 및 Twitter에서 정보를 가져온 후,
-    - AI를 이용해 해당 인물의 요약 및 흥미로운 사실을 생성하는 함수.
-    """
-
-    # 🔹 LinkedIn 프로필 조회 및 데이터 수집
-    linkedin_username = linkedin_lookup_agent(name=name)  # LinkedIn 프로필 URL 검색
-    linkedin_data = scrape_linkedin_profile(
-        linkedin_profile_url=linkedin_username, mock=True  # mock=True -> 테스트용 데이터 사용 가능
-    )
-
-    # 🔹 Twitter 프로필 조회 및 최근 트윗 가져오기
-    twitter_username = twitter_lookup_agent(name=name)  # Twitter 사용자명 검색
-    tweets = scrape_user_tweets(username=twitter_username, mock=True)  # 최근 트윗 가져오기
-
-    # 🔹 AI 모델이 사용할 프롬프트 템플릿 정의
-    summary_template = """
+# 🔹 AI 모델이 사용할 프롬프트 템플릿 정의
+summary_template = """
     Given the information about a person from LinkedIn {information},
     and their latest Twitter posts {twitter_posts}, I want you to create:
     1. A short summary
@@ -41,32 +28,234 @@ def ice_break_with(name: str) -> str:
     Use both information from Twitter and LinkedIn
     \n{format_instructions}
     """
-    
-    # 🔹 프롬프트 템플릿 생성 (Twitter 및 LinkedIn 데이터를 AI 모델이 처리하도록 설정)
-    summary_prompt_template = PromptTemplate(
+
+
+# 📌 요약 프롬프트 템플릿 생성 (Twitter 및 LinkedIn 데이터를 AI 모델이 처리하도록 설정)
+def build_summary_prompt():
+    from langchain_core.prompts import PromptTemplate
+    from output_parsers import streaming_summary_parser
+
+    return PromptTemplate(
         input_variables=["information", "twitter_posts"],  # 프롬프트에서 사용할 입력 변수
         template=summary_template,  # 위에서 정의한 템플릿 사용
         partial_variables={
-            "format_instructions": summary_parser.get_format_instructions()  # 출력 형식을 지정하는 부분
+            "format_instructions": streaming_summary_parser.get_format_instructions()  # 출력 형식을 지정하는 부분
         },
     )
 
+
+# 📌 요약 체인 생성 (레지스트리가 프로세스당 한 번만 호출)
+def build_summary_chain(parser=None):
+    """
+    - 프롬프트 -> GPT 모델 실행 -> 결과 파싱 순서의 체인.
+    - parser: streaming_summary_parser (Summary 객체, 잘린 JSON 은 다시 요청하지 않고 복구)
+      또는 StrOutputParser (스트리밍용 원문 토큰)
+    - replay 모드에서는 스트리밍을 끄고 저장된 응답을 한 번에 전달 (.stream() 은 캐시를 확인하지 않음)
+    """
+    from langchain_openai import ChatOpenAI
+
+    from caching.llm_cache import install_llm_cache, is_replaying
+    from output_parsers import streaming_summary_parser
+
+    load_env()  # OPENAI_API_KEY
+    install_llm_cache()
     # 🔹 GPT-4o-mini 모델 설정 (온도 값 0으로 설정하여 응답의 일관성을 높임)
-    llm = ChatOpenAI(temperature=0, model_name="gpt-4o-mini")
+    llm = ChatOpenAI(temperature=0, model_name="gpt-4o-mini", disable_streaming=is_replaying())
+    return build_summary_prompt() | llm | (parser or streaming_summary_parser)
+
+
+# 📌 스트리밍용 요약 체인 (LLM 출력을 문자열 토큰 그대로 전달)
+def build_summary_stream_chain():
+    from langchain_core.output_parsers import StrOutputParser
+
+    return build_summary_chain(StrOutputParser())
+
+
+registry.register("summary_chain", build_summary_chain)
+registry.register("summary_stream_chain", build_summary_stream_chain)
+# 에이전트 모듈(langchain.agents / OpenAI / Tavily)은 처음 만들 때 import
+registry.register_lazy("linkedin_lookup_agent", "agents.linkedin_lookup_agent:build_lookup_executor")
+
+
+logger = logging.getLogger(__name__)
+
+# 🔹 LinkedIn / Twitter 조회를 동시에 실행하는 스레드 풀 (Flask 요청 여러 개가 함께 사용)
+_branch_pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix="ice-break")
+
+# 🔹 단계별 제한 시간 (초). 시간 안에 끝나지 않은 쪽은 결과 없이 진행
+BRANCH_TIMEOUTS = {"linkedin": 30.0, "twitter": 20.0}
+
+
+# 📌 LinkedIn 단계: 프로필 URL 검색 → 프로필 스크래핑
+def _linkedin_branch(name: str) -> Dict[str, Any]:
+    from agents.linkedin_lookup_agent import lookup as linkedin_lookup_agent  # LinkedIn 프로필 검색
+    from third_parties.linkedin import scrape_linkedin_profile  # LinkedIn 프로필 정보 스크래핑
+
+    linkedin_url = linkedin_lookup_agent(name=name)  # LinkedIn 프로필 URL 검색
+    linkedin_data = scrape_linkedin_profile(
+        linkedin_profile_url=linkedin_url, mock=True  # mock=True -> 테스트용 데이터 사용 가능
+    )
+    return {"url": linkedin_url, "data": linkedin_data}
+
+
+# 📌 Twitter 단계: 사용자명 검색 → 최근 트윗 가져오기
+def _twitter_branch(name: str) -> Dict[str, Any]:
+    from agents.twitter_lookup_agent import lookup as twitter_lookup_agent  # Twitter 프로필 검색
+    from third_parties.twitter import scrape_user_tweets  # Twitter에서 최근 트윗 가져오기
+
+    twitter_username = twitter_lookup_agent(name=name)  # Twitter 사용자명 검색
+    tweets = scrape_user_tweets(username=twitter_username, mock=True)  # 최근 트윗 가져오기
+    return {"username": twitter_username, "tweets": tweets}
+
+
+_BRANCHES = {"linkedin": _linkedin_branch, "twitter": _twitter_branch}
+
+# 🔹 단계마다 필요한 모듈 (Twitter 조회 모듈은 저장소에 없으므로 없으면 그 단계는 끈 것으로 처리)
+_BRANCH_MODULES = {
+    "linkedin": ("agents.linkedin_lookup_agent", "third_parties.linkedin"),
+    "twitter": ("agents.twitter_lookup_agent", "third_parties.twitter"),
+}
+_enabled: Dict[str, bool] = {}
+
+
+# 📌 단계를 실행할 수 있는지 (모듈이 있는지 프로세스당 한 번만 확인)
+def branch_enabled(key: str) -> bool:
+    """
+    - 모듈이 없으면 요청마다 ImportError 를 로그로 남기지 않고, 처음 한 번만 알리고 그 단계는 결과 없음(None) 으로 처리.
+    - find_spec 은 모듈을 실행하지 않으므로 무거운 import 없이 확인.
+    """
+    if key not in _enabled:
+        missing = [module for module in _BRANCH_MODULES.get(key, ()) if importlib.util.find_spec(module) is None]
+        if missing:
+            logger.info("%s lookup disabled: %s not found", key, ", ".join(missing))
+        _enabled[key] = not missing
+    return _enabled[key]
+
+
+def _iter_branches(name: str, timeouts: Optional[Dict[str, float]] = None) -> Iterator[Tuple[str, Optional[Dict[str, Any]]]]:
+    """
+    - LinkedIn 과 Twitter 조회를 동시에 시작하고, 먼저 끝나는 쪽부터 (이름, 결과) 를 yield.
+    - 제한 시간을 넘기거나 예외가 난 쪽은 결과 대신 None 을 yield (부분 결과로 계속 진행).
+    - 꺼진 단계 (branch_enabled 가 False) 는 실행하지 않고 바로 None 을 yield.
+    - 스레드는 강제로 멈출 수 없으므로, 시간 초과된 작업은 백그라운드에서 끝날 때까지 실행됨.
+    """
+    timeouts = {**BRANCH_TIMEOUTS, **(timeouts or {})}
+    started = time.monotonic()
+    futures = {_branch_pool.submit(branch, name): key for key, branch in _BRANCHES.items() if branch_enabled(key)}
+    for key in _BRANCHES:
+        if not branch_enabled(key):
+            yield key, None
+    deadlines = {future: started + timeouts[key] for future, key in futures.items()}
+    pending = set(futures)
+
+    while pending:
+        # 🔹 가장 가까운 제한 시간까지만 기다리고, 끝난 쪽부터 전달
+        next_deadline = min(deadlines[future] for future in pending)
+        done, pending = wait(pending, timeout=max(0.0, next_deadline - time.monotonic()),
+                             return_when=FIRST_COMPLETED)
+        for future in done:
+            key = futures[future]
+            try:
+                yield key, future.result()
+            except Exception:
+                logger.exception("%s lookup for %r failed", key, name)
+                yield key, None
+
+        # 🔹 제한 시간이 지난 쪽은 None 으로 처리
+        now = time.monotonic()
+        for future in [future for future in pending if deadlines[future] <= now]:
+            pending.discard(future)
+            future.cancel()
+            key = futures[future]
+            logger.warning("%s lookup for %r exceeded %.1fs", key, name, timeouts[key])
+            yield key, None
+
+
+# 📌 두 단계를 동시에 실행하고 결과를 모으는 함수
+def gather_profiles(name: str, timeouts: Optional[Dict[str, float]] = None) -> Dict[str, Optional[Dict[str, Any]]]:
+    """
+    - return: {"linkedin": {...} 또는 None, "twitter": {...} 또는 None}
+    - 전체 소요 시간은 두 단계의 합이 아니라 더 느린 쪽 (최대 제한 시간) 으로 제한됨.
+    - 두 단계가 모두 실패하면 요약할 정보가 없으므로 RuntimeError.
+    """
+    results = dict(_iter_branches(name, timeouts))
+    if not any(results.values()):
+        raise RuntimeError(f"both LinkedIn and Twitter lookups failed for {name!r}")
+    return results
 
-    # 🔹 AI 체인 생성 (프롬프트 -> GPT 모델 실행 -> 결과 파싱)
-    chain = summary_prompt_template | llm | summary_parser
+
+# 📌 특정 인물에 대한 정보를 분석하고 Ice Breaker 생성
+def ice_break_with(name: str, timeouts: Optional[Dict[str, float]] = None):
+    """
+    - 주어진 인물(name)에 대해 LinkedIn 및 Twitter에서 정보를 동시에 가져온 후,
+    - AI를 이용해 해당 인물의 요약 및 흥미로운 사실을 생성하는 함수.
+    - 한쪽 조회가 실패하거나 시간을 넘기면 나머지 정보만으로 요약.
+    - return: (Summary 객체, 프로필 사진 URL)
+    """
+
+    # 🔹 LinkedIn / Twitter 조회를 동시에 실행
+    profiles = gather_profiles(name, timeouts)
+    linkedin_data = (profiles["linkedin"] or {}).get("data", {})
+    tweets = (profiles["twitter"] or {}).get("tweets", [])
+
+    # 🔹 AI 체인 (프롬프트 -> GPT 모델 실행 -> 결과 파싱), 프로세스당 한 번만 생성
+    chain = registry.get("summary_chain")
 
     # 🔹 AI 실행 및 결과 생성
     res = chain.invoke(input={"information": linkedin_data, "twitter_posts": tweets})
+    return res, linkedin_data.get("profile_pic_url")
+
+
+# app.py 에서 사용하는 이름
+ice_break = ice_break_with
+
+
+# 📌 ice_break_with 의 스트리밍 버전
+def ice_break_stream(name: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    - 각 단계의 결과가 나오는 즉시 (이벤트 이름, 데이터) 를 하나씩 yield 하는 제너레이터.
+    - status → (linkedin_url, profile / twitter: 먼저 끝나는 순서) → token (여러 번) → summary 순서로 전달.
+    - 한쪽 조회가 실패하면 partial 이벤트를 보내고 나머지 정보만으로 요약.
+    - token 은 LLM 이 생성하는 원문(JSON) 조각이고, summary 는 끝까지 받은 뒤 검증한 Summary 필드.
+    - summary_partial: 토큰을 받는 동안 summary 가 끝났을 때와 facts 항목이 하나씩 끝날 때마다 지금까지의 필드.
+    """
+
+    # 🔹 LinkedIn / Twitter 조회를 동시에 시작하고, 먼저 끝나는 쪽부터 전달
+    yield "status", {"stage": "lookup"}
+    linkedin_data, tweets = {}, []
+    for key, result in _iter_branches(name):
+        if result is None:
+            yield "partial", {"missing": key}
+        elif key == "linkedin":
+            linkedin_data = result["data"]
+            yield "linkedin_url", {"url": result["url"]}
+            yield "profile", {"picture_url": linkedin_data.get("profile_pic_url"), "data": linkedin_data}
+        else:
+            tweets = result["tweets"]
+            yield "twitter", {"username": result["username"]}
+    if not linkedin_data and not tweets:
+        raise RuntimeError(f"both LinkedIn and Twitter lookups failed for {name!r}")
+
+    # 🔹 요약 생성: 토큰이 나오는 대로 전달하면서 새로 받은 부분만 파싱하고, 필드가 끝나면 부분 결과 전달
+    yield "status", {"stage": "summary"}
+    chain = registry.get("summary_stream_chain")
+
+    from output_parsers import IncrementalJSONParser, StreamingSummaryParser
+
+    parser = IncrementalJSONParser()
+    for token in chain.stream({"information": linkedin_data, "twitter_posts": tweets}):
+        yield "token", {"text": token}
+        if any(StreamingSummaryParser.is_milestone(path) for path in parser.feed(token)):
+            yield "summary_partial", StreamingSummaryParser.partial(parser).to_dict()
 
-    # 🔹 결과 출력
-    print(res)
+    summary = StreamingSummaryParser.finish(parser)
+    yield "summary", summary.to_dict()
 
 
 # 📌 실행하는 경우 (환경 변수 로드 후 특정 인물에 대해 Ice Breaker 생성)
 if __name__ == "__main__":
-    load_dotenv()  # .env 파일에서 환경 변수 불러오기
+    load_env()  # .env 파일에서 환경 변수 불러오기
 
     print("Ice Breaker Enter")  # 실행 시작 메시지
-    ice_break_with(name="Harrison Chase")  # "Harrison Chase"라는 인물에 대해 Ice Breaker 생성
+    summary, _ = ice_break_with(name="Harrison Chase")  # "Harrison Chase"라는 인물에 대해 Ice Breaker 생성
+    print(summary)
@@ -1,7 +1,12 @@
 # 필수 라이브러리 임포트
-from typing import List, Dict, Any  # 타입 힌팅을 위한 모듈
+import json
+import re
+from typing import List, Dict, Any, AsyncIterator, Iterator, Optional, Tuple, Union  # 타입 힌팅을 위한 모듈
+from langchain_core.exceptions import OutputParserException  # 파싱 실패 시 LangChain 이 사용하는 예외
+from langchain_core.messages import BaseMessage
 from langchain_core.output_parsers import PydanticOutputParser  # LangChain의 Pydantic 기반 출력 파서
-from pydantic import BaseModel, Field  # 데이터 모델 검증을 위한 Pydantic 라이브러리
+from langchain_core.output_parsers.transform import BaseTransformOutputParser  # 스트리밍 입력을 받는 파서
+from pydantic import BaseModel, Field, ValidationError  # 데이터 모델 검증을 위한 Pydantic 라이브러리
 
 # 📌 요약 결과를 저장할 데이터 모델 정의 (Pydantic 사용)
 class Summary(BaseModel):
@@ -25,8 +30,295 @@ class Summary(BaseModel):
 summary_parser = PydanticOutputParser(pydantic_object=Summary)
 
 
+_LITERAL_RE = re.compile(r"-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?|true|false|null")
+_TOKEN_RE = re.compile(r'[^\s,:\[\]{}"]+')  # 숫자 / true / false / null 후보 (구분자 전까지)
+_LITERALS = {"true": True, "false": False, "null": None}
+_SKIP = " \t\r\n:,"
+
+
+# 📌 토큰이 들어오는 대로 한 번씩만 읽는 JSON 파서
+class IncrementalJSONParser:
+    """
+    - feed(text): 새로 받은 조각만 읽어서 값을 만들고, 이번에 끝난 값의 경로 목록을 반환
+      (예: ("summary",) / ("facts", 0) / ("facts",)). 이미 읽은 부분은 다시 읽지 않고, 버퍼에는 아직 끝나지 않은
+      부분(숫자 / 이스케이프 중인 역슬래시)만 남김. 숫자는 뒤에 구분자(, ] } 공백)가 와야 끝난 것으로 봄.
+    - root: 지금까지 만든 최상위 객체. 딕셔너리 / 리스트는 열릴 때 부모에 붙이므로 끝나기 전에도 내용이 보임.
+    - close(): 스트림이 끝났을 때 열린 문자열 / 괄호를 닫아서 잘린 출력도 값으로 만듦 (repair).
+    - 관대한 파싱: 첫 { 앞의 글(```json 등)과 최상위 객체 뒤의 글은 무시, 끝에 붙은 쉼표 허용,
+      문자열 안의 줄바꿈 같은 제어 문자 허용.
+    """
+
+    def __init__(self):
+        self.root: Any = None
+        self.done = False
+        self._chunks: List[str] = []  # 받은 조각 전체 (오류 메시지용, 합치지 않고 보관)
+        self._buffer = ""  # 아직 끝나지 않은 뒷부분
+        self._frames: List[list] = []  # [컨테이너, 대기 중인 키, 경로]
+        self._string: Optional[List[str]] = None  # 열린 문자열에서 이미 읽은 부분 (문자열 밖이면 None)
+
+    @property
+    def text(self) -> str:
+        return "".join(self._chunks)
+
+    def _path(self, key: Any) -> Tuple:
+        return self._frames[-1][2] + (key,) if self._frames else ()
+
+    def _attach(self, value: Any) -> Tuple:
+        # 🔹 완성된 값(또는 방금 열린 컨테이너)을 부모에 붙이고 경로를 반환
+        if not self._frames:
+            self.root = value
+            return ()
+        frame = self._frames[-1]
+        container = frame[0]
+        if isinstance(container, list):
+            container.append(value)
+            return self._path(len(container) - 1)
+        if frame[1] is None:
+            return None  # 딕셔너리의 키 (값이 아님)
+        key, frame[1] = frame[1], None
+        container[key] = value
+        return self._path(key)
+
+    @staticmethod
+    def _decode(raw: str) -> str:
+        try:
+            return json.loads(f'"{raw}"', strict=False)
+        except ValueError:
+            # 잘못된 이스케이프 (\\x 등): 역슬래시를 글자 그대로 사용
+            return json.loads('"' + raw.replace("\\", "\\\\").replace('"', '\\"') + '"', strict=False)
+
+    def _string_done(self, raw: str) -> Optional[Tuple]:
+        value = self._decode(raw)
+        frame = self._frames[-1] if self._frames else None
+        if frame is not None and isinstance(frame[0], dict) and frame[1] is None:
+            frame[1] = value  # 키
+            return None
+        return self._attach(value)
+
+    def feed(self, chunk: str) -> List[Tuple]:
+        self._chunks.append(chunk)
+        text, pos, completed = self._buffer + chunk, 0, []
+        while pos < len(text) and not self.done:
+            if self._string is not None:
+                # 🔹 열린 문자열: 이스케이프되지 않은 닫는 따옴표를 찾음
+                end = text.find('"', pos)
+                while end != -1:
+                    backslash = end
+                    while backslash > pos and text[backslash - 1] == "\\":
+                        backslash -= 1
+                    if (end - backslash) % 2 == 0:
+                        break
+                    end = text.find('"', end + 1)
+                if end == -1:
+                    # 끝에 붙은 역슬래시는 다음 따옴표와 짝을 맞춰야 하므로 버퍼에 남김
+                    cut = max(pos, len(text.rstrip("\\")))
+                    self._string.append(text[pos:cut])
+                    pos = cut
+                    break
+                self._string.append(text[pos:end])
+                path = self._string_done("".join(self._string))
+                if path is not None:
+                    completed.append(path)
+                self._string = None
+                pos = end + 1
+                continue
+
+            char = text[pos]
+            if self.root is None and not self._frames and char != "{":
+                # 🔹 첫 { 앞의 글은 건너뜀
+                start = text.find("{", pos)
+                pos = len(text) if start == -1 else start
+                continue
+            if char in _SKIP:
+                pos += 1
+            elif char == '"':
+                self._string = []
+                pos += 1
+            elif char in "{[":
+                container: Any = {} if char == "{" else []
+                path = self._attach(container)
+                self._frames.append([container, None, path if path is not None else ()])
+                pos += 1
+            elif char in "}]":
+                if self._frames:
+                    frame = self._frames.pop()
+                    completed.append(frame[2])
+                    if not self._frames:
+                        self.done = True
+                pos += 1
+            else:
+                token = _TOKEN_RE.match(text, pos)
+                if token is None:
+                    pos += 1  # _SKIP 에 없는 공백 (\f 등)
+                    continue
+                if token.end() == len(text):
+                    break  # 다음 조각에서 이어질 수 있음 ("1." / "1e" / "tr") -> 구분자가 올 때까지 기다림
+                pos = token.end()
+                match = _LITERAL_RE.match(token.group())
+                if match is None:
+                    continue  # 알 수 없는 글은 무시
+                literal = match.group()
+                value = _LITERALS[literal] if literal in _LITERALS else json.loads(literal)
+                path = self._attach(value)
+                if path is not None:
+                    completed.append(path)
+        self._buffer = text[pos:] if not self.done else ""
+        return completed
+
+    def close(self) -> List[Tuple]:
+        # 🔹 스트림 끝: 기다리던 숫자 / 열린 문자열 / 열린 괄호를 마무리
+        completed = self.feed(" ")
+        if self._string is not None:
+            raw = ("".join(self._string) + self._buffer).rstrip()
+            if raw.endswith("\\") and (len(raw) - len(raw.rstrip("\\"))) % 2:
+                raw = raw[:-1]
+            path = self._string_done(raw)
+            if path is not None:
+                completed.append(path)
+            self._string = None
+        while self._frames:
+            completed.append(self._frames.pop()[2])
+        self._buffer = ""
+        self.done = True
+        return completed
+
+
+# 📌 Summary 를 스트리밍으로 파싱하는 파서
+class StreamingSummaryParser(BaseTransformOutputParser[Summary]):
+    """
+    - prompt | llm | streaming_summary_parser 를 stream 하면, summary 가 끝났을 때와 facts 항목이 하나씩 끝날 때마다
+      지금까지의 Summary 를 yield 하고, 마지막에 검증까지 끝난 Summary 를 한 번 더 yield.
+    - 중간 Summary 는 model_construct 로 만든 부분 결과 (아직 없는 필드는 "" / []).
+    - invoke / batch 에서는 parse 한 번: 잘리거나 앞뒤에 글이 붙은 JSON 도 닫아서 검증 (다시 요청하지 않음).
+    - 출력 형식 안내문은 summary_parser 와 같음.
+    """
+
+    def get_format_instructions(self) -> str:
+        return summary_parser.get_format_instructions()
+
+    @property
+    def _type(self) -> str:
+        return "streaming_summary"
+
+    @staticmethod
+    def partial(parser: IncrementalJSONParser) -> Summary:
+        root = parser.root if isinstance(parser.root, dict) else {}
+        summary = root.get("summary")
+        facts = root.get("facts")
+        return Summary.model_construct(
+            summary=summary if isinstance(summary, str) else "",
+            facts=[fact for fact in facts if isinstance(fact, str)] if isinstance(facts, list) else [],
+        )
+
+    @staticmethod
+    def is_milestone(path: Tuple) -> bool:
+        return path == ("summary",) or (len(path) == 2 and path[0] == "facts")
+
+    @staticmethod
+    def finish(parser: IncrementalJSONParser) -> Summary:
+        parser.close()
+        if not isinstance(parser.root, dict):
+            raise OutputParserException("no JSON object in the model output", llm_output=parser.text)
+        data = dict(parser.root)
+        if isinstance(data.get("facts"), str):
+            data["facts"] = [data["facts"]]  # 사실 하나를 문자열로 준 경우
+        try:
+            return Summary.model_validate(data)
+        except ValidationError as e:
+            raise OutputParserException(f"invalid Summary: {e}", llm_output=parser.text) from e
+
+    def parse(self, text: str) -> Summary:
+        parser = IncrementalJSONParser()
+        parser.feed(text)
+        return self.finish(parser)
+
+    def _transform(self, input: Iterator[Union[str, BaseMessage]]) -> Iterator[Summary]:
+        parser = IncrementalJSONParser()
+        for chunk in input:
+            text = chunk.content if isinstance(chunk, BaseMessage) else chunk
+            if any(self.is_milestone(path) for path in parser.feed(text)):
+                yield self.partial(parser)
+        yield self.finish(parser)
+
+    async def _atransform(self, input: AsyncIterator[Union[str, BaseMessage]]) -> AsyncIterator[Summary]:
+        parser = IncrementalJSONParser()
+        async for chunk in input:
+            text = chunk.content if isinstance(chunk, BaseMessage) else chunk
+            if any(self.is_milestone(path) for path in parser.feed(text)):
+                yield self.partial(parser)
+        yield self.finish(parser)
+
+
+streaming_summary_parser = StreamingSummaryParser()
+
+
 # Examples
 # parsed_output = summary_parser.parse('{"summary": "Elon Musk is a visionary entrepreneur...", "facts": ["Founded SpaceX", "CEO of Tesla"]}')
 # print(parsed_output.summary)  # "Elon Musk is a visionary entrepreneur..."
 # print(parsed_output.facts)  # ["Founded SpaceX", "CEO of Tesla"]
 
+
+
+# 🔹 직접 실행하는 경우: 토큰(4글자)마다 파싱하는 비용 비교
+#   - JsonOutputParser: 토큰마다 지금까지의 전체 출력을 parse_partial_json 으로 다시 파싱 (LangChain 스트리밍 방식)
+#   - 전체 재파싱: 토큰마다 지금까지의 전체 출력을 IncrementalJSONParser 로 처음부터 다시 파싱
+#   - 증분 파싱: 새 토큰만 읽음
+#   python output_parsers.py
+if __name__ == "__main__":
+    import time
+
+    from langchain_core.output_parsers import JsonOutputParser
+    from langchain_core.outputs import Generation
+
+    def sample_output(facts: int) -> str:
+        sentence = "Harrison Chase is the co-founder and CEO of LangChain, an open-source framework for LLM apps. "
+        summary = Summary(summary=sentence * 4, facts=[f"Fact {i}: " + sentence.strip() for i in range(facts)])
+        return "```json\n" + json.dumps(summary.to_dict(), indent=2) + "\n```"
+
+    def cumulative(tokens: List[str]) -> int:
+        parser, text, outputs = JsonOutputParser(), "", 0
+        for token in tokens:
+            text += token
+            parsed = parser.parse_result([Generation(text=text)], partial=True)
+            outputs += parsed is not None
+        summary_parser.parse(text)
+        return outputs
+
+    def reparse(tokens: List[str]) -> int:
+        text, outputs = "", 0
+        for token in tokens:
+            text += token
+            parser = IncrementalJSONParser()
+            parser.feed(text)
+            parser.close()
+            outputs += parser.root is not None
+        streaming_summary_parser.parse(text)
+        return outputs
+
+    def incremental(tokens: List[str]) -> int:
+        parser, outputs = IncrementalJSONParser(), 0
+        for token in tokens:
+            outputs += any(StreamingSummaryParser.is_milestone(path) for path in parser.feed(token))
+        StreamingSummaryParser.finish(parser)
+        return outputs
+
+    for facts in (2, 5, 20):
+        text = sample_output(facts)
+        tokens = [text[i : i + 4] for i in range(0, len(text), 4)]
+        # summary 가 처음 보이는 토큰 위치 (PydanticOutputParser 는 마지막 토큰 이후에만 가능)
+        probe = IncrementalJSONParser()
+        first = next(i for i, token in enumerate(tokens, 1) if ("summary",) in probe.feed(token))
+        row = [f"{len(text):>6} chars / {len(tokens):>5} tokens"]
+        for label, fn in (("JsonOutputParser", cumulative), ("full re-parse", reparse), ("incremental", incremental)):
+            runs = max(1, (200 if fn is cumulative else 2000) // len(tokens))
+            start = time.perf_counter()
+            for _ in range(runs):
+                fn(tokens)
+            row.append(f"{label} {(time.perf_counter() - start) / runs / len(tokens) * 1e6:8.1f} µs/token")
+        row.append(f"summary ready at token {first}/{len(tokens)}")
+        print(", ".join(row))
+
+    # 🔹 repair: 잘린 출력 / 끝 쉼표 / 앞뒤 설명 글
+    for broken in ('{"summary": "ok", "facts": ["a", "b",],}',
+                   'Sure! Here it is:\n```json\n{"summary": "ok", "facts": ["a", "cut off mid-sent'):
+        print(repr(broken[:40]), "->", streaming_summary_parser.parse(broken))
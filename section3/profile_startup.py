@@ -0,0 +1,100 @@
+# 시작 시간 측정
+# - 진입점마다 새 프로세스를 띄워서 (인터프리터 시작 포함) 첫 응답 / 컴포넌트 준비까지 걸리는 시간을 측정
+# - python -X importtime 결과를 최상위 패키지별로 묶어서 어떤 import 가 시작 시간을 쓰는지 보고
+#   python profile_startup.py [--runs 3] [--root 다른_체크아웃/section3] [--report importtime.txt]
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# 🔹 실제 API 를 호출하지 않으므로 가짜 키 사용, LLM 응답 캐시는 메모리만 사용 (파일을 만들지 않음)
+CHILD_ENV = {"OPENAI_API_KEY": "sk-startup", "TAVILY_API_KEY": "tvly-startup", "LLM_CACHE_PATH": ""}
+
+# 🔹 측정할 진입점: (이름, 실행할 코드 또는 인자, 환경 변수)
+#   자식 프로세스는 측정 지점에서 "ready" 를 출력하고, 부모는 프로세스를 띄운 시점부터 그 줄을 받을 때까지를 잼
+_FIRST_RESPONSE = """
+import app
+client = app.app.test_client()
+assert client.get("/").status_code == 200
+print("ready", flush=True)
+"""
+_COMPONENTS_READY = """
+import threading
+import app
+for thread in threading.enumerate():
+    if thread.name == "registry-warm-up":
+        thread.join()
+print("ready", flush=True)
+"""
+SCENARIOS: List[Tuple[str, List[str]]] = [
+    ("app: first response (GET /)", ["-c", _FIRST_RESPONSE]),
+    ("app: agent + chains ready", ["-c", _COMPONENTS_READY]),
+    ("import linkedin_runner", ["-c", "import linkedin_runner; print('ready', flush=True)"]),
+    ("batch_runner.py --help", ["batch_runner.py", "--help"]),
+]
+
+
+# 📌 새 프로세스에서 진입점을 실행하고 "ready" 까지 걸린 시간(초)
+def time_to_ready(root: str, args: List[str]) -> float:
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, *args], cwd=root, env={**os.environ, **CHILD_ENV},
+                               stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    for line in process.stdout:
+        if line.startswith(("ready", "usage:")):
+            elapsed = time.perf_counter() - started
+            break
+    else:
+        raise RuntimeError(f"{args} exited without reaching ready (code {process.wait()})")
+    process.stdout.close()
+    process.kill()
+    process.wait()
+    return elapsed
+
+
+# 📌 -X importtime 결과를 최상위 패키지별 자체 시간(self) 합계로 묶음
+def import_report(root: str, code: str = "import app") -> Tuple[int, Dict[str, int], str]:
+    """
+    - return: (전체 import 시간 µs, {최상위 패키지: 자체 시간 합계 µs}, importtime 원문)
+    - 앱의 import 자체만 보려고 APP_WARM_UP=off 로 실행 (미리 만들기는 위의 시간 측정에 포함됨)
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=root,
+                            env={**os.environ, **CHILD_ENV, "APP_WARM_UP": "off"},
+                            capture_output=True, text=True, check=True)
+    by_package: Dict[str, int] = defaultdict(int)
+    total = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, module = line[len("import time:"):].split("|")
+        by_package[module.strip().split(".")[0]] += int(self_us)
+        total += int(self_us)
+    return total, dict(by_package), result.stderr
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure cold-start time of the section3 entry points.")
+    parser.add_argument("--runs", type=int, default=3, help="runs per entry point (median is reported)")
+    parser.add_argument("--root", default=HERE, help="section3 folder to measure (e.g. an older checkout)")
+    parser.add_argument("--report", help="write the raw -X importtime output of `import app` to this file")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{args.root} ({os.cpu_count()} CPU, median of {args.runs} runs)")
+    for label, child_args in SCENARIOS:
+        times = [time_to_ready(args.root, child_args) for _ in range(args.runs)]
+        print(f"{label:>30}: {statistics.median(times) * 1000:7.0f} ms")
+
+    total, by_package, raw = import_report(args.root)
+    print(f"\nimport app: {total / 1000:.0f} ms of imports, top packages by self time:")
+    for package, self_us in sorted(by_package.items(), key=lambda item: -item[1])[: args.top]:
+        print(f"{package:>30}: {self_us / 1000:7.1f} ms ({self_us / total:5.1%})")
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            f.write(raw)
+        print(f"raw report: {args.report}")
@@ -0,0 +1,130 @@
+# 컴포넌트 레지스트리
+# - LLM 클라이언트, 프롬프트, 에이전트, 체인을 요청마다 새로 만들지 않고
+#   프로세스당 한 번만 만들어서 Flask 스레드들이 함께 사용
+# - LangChain Hub 프롬프트는 prompts/ 폴더에 저장된 파일을 사용하므로 요청 중에 hub.pull 을 하지 않음
+import importlib
+import logging
+import os
+from threading import RLock, Thread
+from typing import Any, Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+PROMPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "prompts")
+
+
+# 📌 프로세스 단위 컴포넌트 레지스트리
+class ComponentRegistry:
+    """
+    - register(name, factory): 컴포넌트를 만드는 함수 등록 (이 시점에는 만들지 않음)
+    - register_lazy(name, "모듈:함수"): 모듈 import 까지 처음 만들 때로 미룸 (무거운 모듈을 시작할 때 import 하지 않음)
+    - get(name): 처음 호출될 때 한 번만 만들고, 이후에는 같은 객체를 반환
+    - warm_up(): 서버 시작 시 등록된 컴포넌트를 미리 만들어서 첫 요청이 느려지지 않도록 함
+      (background=True 면 별도 스레드에서 만들고 바로 반환 → 서버는 먼저 요청을 받기 시작)
+    - 등록되는 컴포넌트는 여러 스레드에서 동시에 호출해도 안전해야 함
+      (ChatOpenAI, PromptTemplate, Runnable 체인, AgentExecutor 는 호출마다 상태를 따로 가짐)
+    """
+
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._instances: Dict[str, Any] = {}
+        self._lock = RLock()  # 만드는 중에 import 된 모듈이 register 를 호출해도 막히지 않도록 RLock
+
+    def register(self, name: str, factory: Callable[[], Any]) -> None:
+        with self._lock:
+            self._factories[name] = factory
+            self._instances.pop(name, None)
+
+    def register_lazy(self, name: str, target: str) -> None:
+        module_name, _, attr = target.partition(":")
+
+        def factory() -> Any:
+            return getattr(importlib.import_module(module_name), attr)()
+
+        self.register(name, factory)
+
+    def get(self, name: str) -> Any:
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+        with self._lock:
+            # 다른 스레드가 먼저 만들었을 수 있으므로 한 번 더 확인
+            if name not in self._instances:
+                self._instances[name] = self._factories[name]()
+            return self._instances[name]
+
+    def warm_up(self, names: Optional[Iterable[str]] = None, background: bool = False) -> Optional[Thread]:
+        names = list(names or self._factories)
+        if background:
+            thread = Thread(target=self._warm_up_logged, args=(names,), name="registry-warm-up", daemon=True)
+            thread.start()
+            return thread
+        for name in names:
+            self.get(name)
+        return None
+
+    def _warm_up_logged(self, names: Iterable[str]) -> None:
+        # 백그라운드에서 실패해도 요청 처리 중에 get 으로 다시 만들어 보므로 기록만 함
+        for name in names:
+            try:
+                self.get(name)
+            except Exception:
+                logger.exception("warm-up of %r failed", name)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._instances.clear()
+
+
+# 🔹 프로세스 전체에서 하나만 사용하는 레지스트리
+registry = ComponentRegistry()
+
+
+# 📌 LangChain Hub 프롬프트를 디스크에서 불러오기
+def load_hub_prompt(repo: str):
+    """
+    - repo: "hwchase17/react" 같은 Hub 프롬프트 이름
+    - prompts/<owner>__<name>.txt 가 있으면 그 파일로 PromptTemplate 을 만들고 (네트워크 호출 없음),
+      없을 때만 hub.pull 로 받아서 파일로 저장.
+    """
+    from langchain_core.prompts import PromptTemplate
+
+    path = os.path.join(PROMPTS_DIR, repo.replace("/", "__") + ".txt")
+    if not os.path.exists(path):
+        from langchain import hub
+
+        pulled = hub.pull(repo)
+        os.makedirs(PROMPTS_DIR, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(pulled.template)
+    with open(path, encoding="utf-8") as f:
+        return PromptTemplate.from_template(f.read())
+
+
+# 🔹 직접 실행하는 경우: 요청마다 새로 만드는 방식과 레지스트리 재사용 방식의 요청당 준비 시간 비교
+#   (hub.pull 네트워크 호출은 제외. 실제로는 요청마다 왕복 시간이 추가로 들어감)
+if __name__ == "__main__":
+    import time
+
+    os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")  # 클라이언트 생성만 하므로 실제 키가 필요 없음
+    os.environ.setdefault("TAVILY_API_KEY", "tvly-benchmark")
+
+    from agents.linkedin_lookup_agent import build_lookup_executor
+    from linkedin_runner import build_summary_chain
+    from registry import registry  # 직접 실행 시 __main__ 이 아닌, 컴포넌트가 등록된 모듈의 레지스트리
+
+    def per_request():
+        build_lookup_executor()
+        build_summary_chain()
+
+    def from_registry():
+        registry.get("linkedin_lookup_agent")
+        registry.get("summary_chain")
+
+    for label, setup in (("per-request build", per_request), ("registry", from_registry)):
+        setup()  # import / 첫 생성 비용 제외
+        runs = 50
+        start = time.perf_counter()
+        for _ in range(runs):
+            setup()
+        print(f"{label:>17}: {(time.perf_counter() - start) / runs * 1000:.2f} ms/request")
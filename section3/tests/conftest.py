@@ -0,0 +1,5 @@
+# section3 폴더를 import 경로에 추가 (app.py 를 section3 에서 실행할 때와 같은 이름으로 import)
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
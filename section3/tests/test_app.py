@@ -0,0 +1,20 @@
+import os
+
+os.environ.setdefault("APP_WARM_UP", "off")  # 테스트에서는 에이전트 / 체인을 미리 만들지 않음
+
+import app as app_module  # noqa: E402
+from output_parsers import Summary  # noqa: E402
+
+
+def test_process_returns_summary_fields(monkeypatch):
+    def ice_break(name):
+        return Summary(summary=f"About {name}", facts=["a", "b"]), "https://example.com/pic.png"
+
+    monkeypatch.setattr(app_module, "ice_break", ice_break)
+    response = app_module.app.test_client().post("/process", data={"name": "Harrison Chase"})
+    assert response.status_code == 200
+    assert response.get_json() == {
+        "summary": "About Harrison Chase",
+        "facts": ["a", "b"],
+        "picture_url": "https://example.com/pic.png",
+    }
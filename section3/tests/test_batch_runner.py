@@ -0,0 +1,33 @@
+import threading
+import time
+
+import batch_runner
+
+
+def test_closing_stream_does_not_wait_for_pending_lookups(monkeypatch):
+    release = threading.Event()
+    started = []
+
+    # 첫 이름은 바로 실패하고, 나머지는 release 될 때까지 멈춰 있는 가짜 조회
+    def gather_profiles(name, timeouts=None):
+        started.append(name)
+        if name == "fail":
+            raise RuntimeError("lookup failed")
+        release.wait(5)
+        return {"linkedin": None, "twitter": None}
+
+    monkeypatch.setattr(batch_runner, "gather_profiles", gather_profiles)
+    stream = batch_runner.run_batch(["fail", "a", "b", "c", "d"], workers=2)
+    try:
+        first = next(stream)
+        assert first["ok"] is False and first["stage"] == "lookup"
+
+        # 🔹 클라이언트 연결이 끊긴 것처럼 스트림을 닫음 -> 남은 조회(최대 5초)를 기다리지 않아야 함
+        closed = time.monotonic()
+        stream.close()
+        assert time.monotonic() - closed < 0.5
+        time.sleep(0.1)
+        # 워커 2개가 모두 멈춰 있으므로 c / d 는 시작 전에 취소됨
+        assert "c" not in started and "d" not in started
+    finally:
+        release.set()
@@ -0,0 +1,141 @@
+import asyncio
+import json
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from third_parties.http_client import AsyncHttpClient, HttpClient, RetryPolicy, _parse_retry_after
+
+FAST = RetryPolicy(retries=3, backoff_base=0.001, backoff_max=0.01)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """경로별로 미리 정한 상태 코드를 차례로 돌려주는 스텁 서버 (/slow 는 0.2초 걸림)"""
+
+    protocol_version = "HTTP/1.1"  # keep-alive 지원
+    disable_nagle_algorithm = True
+
+    def respond(self):
+        state = self.server.state
+        with state["lock"]:
+            state["hits"].append((self.command, self.path))
+            state["connections"].add(self.client_address)
+            script = state["scripts"].get(self.path, [])
+            status = script.pop(0) if script else 200
+            state["running"] += 1
+            state["max_running"] = max(state["max_running"], state["running"])
+        if self.path == "/slow":
+            time.sleep(0.2)
+        with state["lock"]:
+            state["running"] -= 1
+        body = json.dumps({"path": self.path}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = respond
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    httpd.daemon_threads = True
+    httpd.state = {"lock": threading.Lock(), "hits": [], "connections": set(), "scripts": {},
+                   "running": 0, "max_running": 0}
+    threading.Thread(target=httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    httpd.base = f"http://127.0.0.1:{httpd.server_address[1]}"
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_get_retries_retryable_status(server):
+    server.state["scripts"]["/flaky"] = [503, 429]
+    response = HttpClient(retry=FAST).get(f"{server.base}/flaky")
+    assert response.status_code == 200
+    assert server.state["hits"] == [("GET", "/flaky")] * 3
+
+
+def test_last_response_returned_when_retries_run_out(server):
+    server.state["scripts"]["/down"] = [503] * 10
+    response = HttpClient(retry=FAST).get(f"{server.base}/down")
+    assert response.status_code == 503
+    assert len(server.state["hits"]) == FAST.retries + 1
+
+
+def test_post_is_not_retried_on_status(server):
+    server.state["scripts"]["/submit"] = [503, 200]
+    response = HttpClient(retry=FAST).request("post", f"{server.base}/submit", json={"a": 1})
+    assert response.status_code == 503
+    assert server.state["hits"] == [("POST", "/submit")]
+
+
+def test_connection_errors_retry_only_idempotent_methods(monkeypatch):
+    client = HttpClient(retry=FAST)
+    calls = []
+
+    def refuse(method, url, **kwargs):
+        calls.append(method)
+        raise requests.ConnectionError("connection refused")
+
+    monkeypatch.setattr(client.session, "request", refuse)
+    with pytest.raises(requests.ConnectionError):
+        client.get("http://stub.invalid/profile")
+    assert calls == ["GET"] * (FAST.retries + 1)
+
+    calls.clear()
+    with pytest.raises(requests.ConnectionError):
+        client.request("POST", "http://stub.invalid/profile")
+    assert calls == ["POST"]
+
+
+def test_keep_alive_reuses_one_connection(server):
+    client = HttpClient(retry=FAST)
+    for i in range(20):
+        assert client.get(f"{server.base}/profile/{i}").json() == {"path": f"/profile/{i}"}
+    assert len(server.state["connections"]) == 1
+
+
+def test_per_host_limit(server):
+    client = HttpClient(retry=FAST, per_host_limit=2)
+    threads = [threading.Thread(target=client.get, args=(f"{server.base}/slow",)) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(server.state["hits"]) == 6
+    assert server.state["max_running"] == 2
+
+
+def test_retry_after():
+    assert _parse_retry_after("2") == 2.0
+    assert _parse_retry_after(None) is None and _parse_retry_after("soon") is None
+    assert 8 <= _parse_retry_after(formatdate(time.time() + 10, usegmt=True)) <= 10
+    policy = RetryPolicy(backoff_base=1.0, backoff_max=5.0)
+    assert policy.delay(0, "3") == 3.0
+    assert policy.delay(0, "60") == 5.0  # backoff_max 를 넘지 않음
+    assert all(0 <= policy.delay(attempt) <= min(5.0, 2 ** attempt) for attempt in range(6))
+
+
+def test_async_client_retries_get_but_not_post(server):
+    server.state["scripts"]["/flaky"] = [503]
+    server.state["scripts"]["/submit"] = [503, 200]
+
+    async def main():
+        async with AsyncHttpClient(retry=FAST) as client:
+            data = await client.get_json(f"{server.base}/flaky")
+            with pytest.raises(client._aiohttp.ClientResponseError):
+                await client.request_json("POST", f"{server.base}/submit")
+            return data
+
+    assert asyncio.run(main()) == {"path": "/flaky"}
+    assert server.state["hits"] == [("GET", "/flaky"), ("GET", "/flaky"), ("POST", "/submit")]
@@ -0,0 +1,80 @@
+import logging
+import time
+from typing import Any, Dict
+
+import pytest
+
+import linkedin_runner
+
+
+def sleeper(delay: float, result: Any = None, error: Exception = None):
+    # 지연 후 결과를 반환하거나 예외를 내는 가짜 조회 함수
+    def branch(name: str) -> Dict[str, Any]:
+        time.sleep(delay)
+        if error is not None:
+            raise error
+        return result if result is not None else {"name": name}
+
+    return branch
+
+
+@pytest.fixture
+def branches(monkeypatch):
+    # 실제 에이전트 / 스크래퍼 대신 가짜 조회 함수를 쓰고, 두 단계 모두 켠 상태로 시작
+    monkeypatch.setattr(linkedin_runner, "_enabled", {"linkedin": True, "twitter": True})
+
+    def install(linkedin, twitter):
+        monkeypatch.setitem(linkedin_runner._BRANCHES, "linkedin", linkedin)
+        monkeypatch.setitem(linkedin_runner._BRANCHES, "twitter", twitter)
+
+    return install
+
+
+def test_branches_run_concurrently(branches):
+    branches(sleeper(0.3, {"data": {"full_name": "A"}}), sleeper(0.3, {"tweets": ["t"]}))
+    started = time.monotonic()
+    profiles = linkedin_runner.gather_profiles("A")
+    elapsed = time.monotonic() - started
+    assert profiles == {"linkedin": {"data": {"full_name": "A"}}, "twitter": {"tweets": ["t"]}}
+    assert elapsed < 0.5  # 합(0.6초)이 아니라 느린 쪽(0.3초)
+
+
+def test_results_arrive_in_completion_order(branches):
+    branches(sleeper(0.3), sleeper(0.05))
+    assert [key for key, _ in linkedin_runner._iter_branches("A")] == ["twitter", "linkedin"]
+
+
+def test_slow_branch_times_out_with_partial_result(branches, caplog):
+    branches(sleeper(0.05, {"data": {}}), sleeper(2.0))
+    started = time.monotonic()
+    profiles = linkedin_runner.gather_profiles("A", timeouts={"twitter": 0.2})
+    assert profiles == {"linkedin": {"data": {}}, "twitter": None}
+    assert time.monotonic() - started < 1.0
+    assert "twitter lookup for 'A' exceeded 0.2s" in caplog.text
+
+
+def test_failed_branch_is_partial(branches):
+    branches(sleeper(0.05, error=ValueError("no profile")), sleeper(0.05, {"tweets": []}))
+    assert linkedin_runner.gather_profiles("A") == {"linkedin": None, "twitter": {"tweets": []}}
+
+
+def test_both_failed_raises(branches):
+    branches(sleeper(0, error=ValueError("x")), sleeper(0.5))
+    with pytest.raises(RuntimeError):
+        linkedin_runner.gather_profiles("A", timeouts={"twitter": 0.1})
+
+
+def test_missing_module_disables_branch_quietly(branches, monkeypatch, caplog):
+    monkeypatch.setattr(linkedin_runner, "_enabled", {})
+    monkeypatch.setitem(linkedin_runner._BRANCH_MODULES, "linkedin", ())
+    monkeypatch.setitem(linkedin_runner._BRANCH_MODULES, "twitter", ("third_parties.no_such_module",))
+    called = []
+    branches(sleeper(0, {"data": {}}), lambda name: called.append(name))
+
+    with caplog.at_level(logging.INFO, logger="linkedin_runner"):
+        for _ in range(3):
+            assert linkedin_runner.gather_profiles("A") == {"linkedin": {"data": {}}, "twitter": None}
+    # 꺼진 단계는 실행하지 않고, 예외 로그 없이 처음 한 번만 알림
+    assert called == []
+    assert [r.levelno for r in caplog.records] == [logging.INFO]
+    assert "twitter lookup disabled" in caplog.records[0].getMessage()
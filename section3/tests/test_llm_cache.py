@@ -0,0 +1,145 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+import pytest
+from langchain_core.language_models import BaseChatModel, LLM
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from caching.llm_cache import LLMResponseCache, _leases
+
+
+class FlakyChatModel(BaseChatModel):
+    """첫 호출은 latency 초 뒤 실패, 그다음부터는 응답하는 가짜 모델"""
+
+    latency: float = 0.2
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "flaky"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        self.calls += 1
+        first = self.calls == 1
+        time.sleep(self.latency)
+        if first:
+            raise RuntimeError("model unavailable")
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="ok"))])
+
+
+def test_failed_leader_releases_waiters():
+    llm = FlakyChatModel(cache=LLMResponseCache(coalesce_timeout=30))
+
+    def call(delay: float) -> Any:
+        time.sleep(delay)
+        try:
+            return llm.invoke("hello").content
+        except RuntimeError as e:
+            return str(e)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(4) as pool:
+        results = list(pool.map(call, [0, 0.05, 0.05, 0.05]))
+    elapsed = time.perf_counter() - started
+
+    # 기다리던 요청은 coalesce_timeout(30초)까지 기다리지 않고, 하나가 이어서 모델을 호출
+    assert results == ["model unavailable", "ok", "ok", "ok"]
+    assert llm.calls == 2
+    assert elapsed < 2
+    assert not llm.cache._inflight
+
+
+def test_failed_leader_releases_waiters_async():
+    llm = FlakyChatModel(cache=LLMResponseCache(coalesce_timeout=30))
+
+    async def call(delay: float) -> Any:
+        await asyncio.sleep(delay)
+        try:
+            return (await llm.ainvoke("hello")).content
+        except RuntimeError as e:
+            return str(e)
+
+    async def main():
+        return await asyncio.gather(*(call(delay) for delay in [0, 0.05, 0.05]))
+
+    started = time.perf_counter()
+    assert asyncio.run(main()) == ["model unavailable", "ok", "ok"]
+    assert time.perf_counter() - started < 2
+    assert not llm.cache._inflight
+
+
+def test_failed_call_does_not_block_retry():
+    llm = FlakyChatModel(latency=0, cache=LLMResponseCache(coalesce_timeout=30))
+    with pytest.raises(RuntimeError):
+        llm.invoke("hello")
+    started = time.perf_counter()
+    assert llm.invoke("hello").content == "ok"
+    assert time.perf_counter() - started < 1
+
+
+class FlakyLLM(LLM):
+    """completion 방식 (BaseLLM: on_llm_start 전에 캐시를 조회) 의 FlakyChatModel"""
+
+    latency: float = 0.2
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "flaky-completion"
+
+    def _call(self, prompt: str, stop=None, run_manager=None, **kwargs: Any) -> str:
+        self.calls += 1
+        first = self.calls == 1
+        time.sleep(self.latency)
+        if first:
+            raise RuntimeError("model unavailable")
+        return "ok"
+
+
+def test_failed_leader_releases_waiters_completion_llm():
+    llm = FlakyLLM(cache=LLMResponseCache(coalesce_timeout=5))
+
+    def call(delay: float) -> Any:
+        time.sleep(delay)
+        try:
+            return llm.invoke("hello")
+        except RuntimeError as e:
+            return str(e)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(3) as pool:
+        results = list(pool.map(call, [0, 0.05, 0.05]))
+    assert results == ["model unavailable", "ok", "ok"]
+    assert llm.calls == 2
+    assert time.perf_counter() - started < 2
+    assert not llm.cache._inflight
+
+
+def test_failed_leader_releases_waiters_completion_llm_async():
+    llm = FlakyLLM(cache=LLMResponseCache(coalesce_timeout=5))
+
+    async def call(delay: float) -> Any:
+        await asyncio.sleep(delay)
+        try:
+            return await llm.ainvoke("hello")
+        except RuntimeError as e:
+            return str(e)
+
+    async def main():
+        return await asyncio.gather(*(call(delay) for delay in [0, 0.05, 0.05]))
+
+    started = time.perf_counter()
+    assert asyncio.run(main()) == ["model unavailable", "ok", "ok"]
+    assert time.perf_counter() - started < 2
+    assert not llm.cache._inflight
+
+
+def test_successful_calls_do_not_grow_lease_list():
+    llm = FlakyLLM(latency=0, calls=1, cache=LLMResponseCache())
+    for i in range(5):
+        assert llm.invoke(f"prompt {i}") == "ok"
+    leases = _leases.get()
+    assert len(leases) <= 1 and all(event.is_set() for _, _, event in leases)  # 끝난 자리는 다음 lookup 에서 지워짐
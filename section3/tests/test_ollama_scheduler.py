@@ -0,0 +1,126 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from langchain_core.prompts import PromptTemplate
+from langchain_ollama import ChatOllama
+
+from third_parties.ollama_scheduler import (
+    DeadlineExceeded,
+    QueueFullError,
+    _fake_ollama_server,
+    scheduled_chat_model,
+)
+
+PROMPT = PromptTemplate.from_template("summarize {information}")
+
+
+@pytest.fixture
+def server(monkeypatch):
+    # 요청 하나에 0.4초 걸리는 가짜 Ollama 서버 (max_parallel=1 이라 동시에 하나씩만 처리)
+    monkeypatch.setenv("NO_PROXY", "127.0.0.1")
+    server, state = _fake_ollama_server(base=0.4, alpha=1.0)
+    yield server, state
+    server.shutdown()
+
+
+def chain_for(server, **kwargs):
+    llm = ChatOllama(model="llama3.2", base_url=f"http://127.0.0.1:{server[0].server_port}", cache=False)
+    model = scheduled_chat_model(llm, **kwargs)
+    return PROMPT | model, model.scheduler
+
+
+def wait_until(condition, timeout: float = 5.0) -> None:
+    stop = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < stop, "condition not reached"
+        time.sleep(0.005)
+
+
+def test_deadline_expires_in_queue_without_calling_server(server):
+    chain, scheduler = chain_for(server, timeout=0.6)
+    with ThreadPoolExecutor(3) as pool:
+        futures = [pool.submit(chain.invoke, {"information": f"p{i}"}) for i in range(3)]
+        outcomes = []
+        for future in futures:
+            try:
+                outcomes.append(future.result().content)
+            except DeadlineExceeded:
+                outcomes.append("deadline")
+    scheduler.close()
+    # 첫 요청만 시간 안에 끝나고, 세 번째는 대기열에서 마감이 지나서 서버로 보내지 않음
+    assert outcomes[0].startswith("summary of") and outcomes[1:] == ["deadline", "deadline"]
+    assert server[1]["requests"] == 2
+    assert scheduler.stats()["expired"] == 1
+
+
+def test_identical_prompts_are_deduplicated(server):
+    chain, scheduler = chain_for(server, timeout=5)
+    with ThreadPoolExecutor(8) as pool:
+        first = pool.submit(chain.invoke, {"information": "warmup"})
+        wait_until(lambda: server[1]["requests"] == 1)  # 서버가 바쁜 동안 같은 프롬프트가 몰림
+        same = [pool.submit(chain.invoke, {"information": "same"}) for _ in range(6)]
+        answers = {future.result().content for future in same}
+        first.result()
+    scheduler.close()
+    assert len(answers) == 1
+    assert server[1]["requests"] == 2
+    assert scheduler.stats()["deduplicated"] == 5
+
+
+def test_full_queue_rejects_without_blocking(server):
+    chain, scheduler = chain_for(server, timeout=5, max_queue=1, block=False)
+    with ThreadPoolExecutor(2) as pool:
+        running = pool.submit(chain.invoke, {"information": "a"})
+        wait_until(lambda: scheduler.stats()["dispatched"] == 1)
+        queued = pool.submit(chain.invoke, {"information": "b"})
+        wait_until(lambda: scheduler.stats()["queued"] == 1)
+        started = time.monotonic()
+        with pytest.raises(QueueFullError):
+            chain.invoke({"information": "c"})
+        assert time.monotonic() - started < 0.1
+        running.result(), queued.result()
+    scheduler.close()
+    assert scheduler.stats()["rejected"] == 1
+
+
+def test_earliest_deadline_is_sent_first(server):
+    chain, scheduler = chain_for(server)
+    with ThreadPoolExecutor(4) as pool:
+        busy = pool.submit(chain.invoke, {"information": "busy"})
+        wait_until(lambda: server[1]["requests"] == 1)
+        # 서버가 바쁜 동안 마감이 늦은 순서로 넣어도 마감이 빠른 순서로 보냄
+        futures = [pool.submit(lambda t=t: scheduler.submit(PROMPT.invoke({"information": f"t{t}"}),
+                                                            timeout=t).result())
+                   for t in (30, 20, 10)]
+        wait_until(lambda: scheduler.stats()["queued"] == 3)
+        busy.result()
+        for future in futures:
+            future.result()
+    scheduler.close()
+    assert server[1]["prompts"] == ["summarize busy", "summarize t10", "summarize t20", "summarize t30"]
+
+
+@pytest.mark.parametrize("asynchronous", [False, True])
+def test_timeout_includes_time_spent_waiting_for_a_slot(server, asynchronous):
+    # a 처리 중(0~0.4s), b 대기, c 는 자리가 날 때까지 submit 에서 기다림 → 0.8s 에 보내지고 1.2s 에 끝남
+    chain, scheduler = chain_for(server, timeout=1.0, max_queue=1)
+
+    def invoke_c():
+        if asynchronous:
+            return asyncio.run(chain.ainvoke({"information": "c"}))
+        return chain.invoke({"information": "c"})
+
+    with ThreadPoolExecutor(2) as pool:
+        a = pool.submit(chain.invoke, {"information": "a"})
+        wait_until(lambda: scheduler.stats()["dispatched"] == 1)
+        b = pool.submit(chain.invoke, {"information": "b"})
+        wait_until(lambda: scheduler.stats()["queued"] == 1)
+        started = time.monotonic()
+        with pytest.raises(DeadlineExceeded):
+            invoke_c()
+        elapsed = time.monotonic() - started
+        a.result(), b.result()
+    scheduler.close()
+    assert elapsed < 1.15  # timeout 이 두 번 적용되면 응답(약 1.2s 뒤)을 기다려서 그대로 반환함
@@ -0,0 +1,58 @@
+import json
+
+import pytest
+
+from output_parsers import IncrementalJSONParser, streaming_summary_parser
+
+DOCUMENTS = [
+    '{"n": 1.5, "m": [1e5, 22]}',
+    '{"a": -12.25e-3, "b": [true, false, null], "c": {"d": [0, -0, 1E+2]}, "e": 7}',
+    '{"s": "quote \\" slash \\\\ tab\\t unicode \\u00e9 \\\\", "t": ["\\\\\\"", ""]}',
+    '{"summary": "Harrison Chase builds LangChain.", "facts": ["Fact 1", "Fact 2", "Fact 3"]}',
+    '{\n  "nested": [[1, 2], [3, [4.0, {"x": 10}]]],\n  "last": 123456789\n}',
+]
+
+
+def feed_in_chunks(document: str, size: int) -> IncrementalJSONParser:
+    parser = IncrementalJSONParser()
+    for start in range(0, len(document), size):
+        parser.feed(document[start : start + size])
+    parser.close()
+    return parser
+
+
+@pytest.mark.parametrize("document", DOCUMENTS)
+def test_every_chunk_size_matches_json_loads(document):
+    expected = json.loads(document)
+    for size in range(1, len(document) + 1):
+        assert feed_in_chunks(document, size).root == expected, size
+
+
+def test_numbers_wait_for_a_delimiter():
+    parser = IncrementalJSONParser()
+    assert parser.feed('{"n": 1') == []
+    assert parser.feed(".5") == []  # 아직 끝나지 않은 숫자
+    assert parser.feed(",") == [("n",)]
+    assert parser.root == {"n": 1.5}
+
+
+def test_number_at_end_of_stream_is_committed_on_close():
+    parser = IncrementalJSONParser()
+    parser.feed('{"n": 12')
+    assert parser.close() == [("n",), ()]
+    assert parser.root == {"n": 12}
+
+
+def test_buffer_keeps_only_the_unread_tail():
+    parser = IncrementalJSONParser()
+    document = '{"summary": "' + "word " * 200 + '", "facts": ["a", 3'
+    for start in range(0, len(document), 4):
+        parser.feed(document[start : start + 4])
+        assert len(parser._buffer) < 4  # 읽은 부분은 버퍼에 남지 않음
+    assert parser.text == document
+
+
+def test_truncated_output_is_repaired():
+    summary = streaming_summary_parser.parse('Sure:\n```json\n{"summary": "ok", "facts": ["a", "cut off mid-sent')
+    assert summary.summary == "ok"
+    assert summary.facts == ["a", "cut off mid-sent"]
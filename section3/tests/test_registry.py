@@ -0,0 +1,89 @@
+import logging
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from registry import ComponentRegistry, load_hub_prompt
+
+
+@pytest.fixture
+def slow_module(tmp_path, monkeypatch):
+    # 🔹 import 와 생성이 느린 가짜 모듈 (생성 횟수를 셈)
+    (tmp_path / "slow_component.py").write_text(
+        "import time\n"
+        "built = []\n"
+        "def build():\n"
+        "    time.sleep(0.2)\n"
+        "    built.append(object())\n"
+        "    return built[-1]\n",
+        encoding="utf-8",
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield "slow_component"
+    sys.modules.pop("slow_component", None)
+
+
+def test_register_lazy_builds_once_under_concurrent_get(slow_module):
+    registry = ComponentRegistry()
+    registry.register_lazy("component", f"{slow_module}:build")
+    assert slow_module not in sys.modules  # 등록만으로는 import 하지 않음
+
+    with ThreadPoolExecutor(8) as pool:
+        instances = list(pool.map(lambda _: registry.get("component"), range(8)))
+
+    built = sys.modules[slow_module].built
+    assert len(built) == 1
+    assert all(instance is built[0] for instance in instances)
+
+
+def test_background_warm_up_makes_callers_wait(slow_module):
+    registry = ComponentRegistry()
+    registry.register_lazy("component", f"{slow_module}:build")
+    started = time.perf_counter()
+    thread = registry.warm_up(background=True)
+    assert time.perf_counter() - started < 0.1  # 바로 반환
+
+    time.sleep(0.05)  # 백그라운드 스레드가 만들기 시작한 뒤
+    instance = registry.get("component")  # 끝날 때까지 기다렸다가 같은 객체를 받음
+    thread.join()
+    assert sys.modules[slow_module].built == [instance]
+
+
+def test_failed_background_warm_up_is_logged_and_retried(caplog):
+    registry = ComponentRegistry()
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("no API key yet")
+        return "component"
+
+    registry.register("component", flaky)
+    with caplog.at_level(logging.ERROR, logger="registry"):
+        registry.warm_up(background=True).join()
+    assert "warm-up of 'component' failed" in caplog.text
+    assert registry.get("component") == "component"
+    assert len(attempts) == 2
+
+
+def test_register_replaces_and_reset_rebuilds():
+    registry = ComponentRegistry()
+    registry.register("value", lambda: ["first"])
+    first = registry.get("value")
+    assert registry.get("value") is first
+    registry.reset()
+    assert registry.get("value") is not first
+    registry.register("value", lambda: ["second"])
+    assert registry.get("value") == ["second"]
+    with pytest.raises(KeyError):
+        registry.get("missing")
+
+
+def test_load_hub_prompt_reads_vendored_file(monkeypatch):
+    # prompts/ 에 있는 프롬프트는 hub.pull 없이 읽음
+    monkeypatch.setitem(sys.modules, "langchain.hub", None)
+    prompt = load_hub_prompt("hwchase17/react")
+    assert {"input", "agent_scratchpad", "tools", "tool_names"} <= set(prompt.input_variables)
@@ -0,0 +1,119 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import caching.result_cache as result_cache
+from caching.result_cache import MemoryBackend, ResultCache, SQLiteBackend, normalize_name
+
+
+class FakeClock:
+    """result_cache 의 time 대신 쓰는 시계 (TTL 테스트에서 시간을 직접 움직임)"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self) -> float:
+        return self.now
+
+
+def run_concurrently(fn, count: int):
+    with ThreadPoolExecutor(count) as pool:
+        futures = [pool.submit(fn) for _ in range(count)]
+        return [future.exception() or future.result() for future in futures]
+
+
+def test_concurrent_callers_share_one_execution():
+    cache = ResultCache("test")
+    started, release, calls = threading.Event(), threading.Event(), []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return {"url": "https://linkedin.com/in/someone"}
+
+    def call():
+        return cache.get_or_compute("someone", compute)
+
+    with ThreadPoolExecutor(8) as pool:
+        futures = [pool.submit(call) for _ in range(8)]
+        assert started.wait(5)
+        time.sleep(0.1)  # 나머지 요청이 모두 기다리는 상태가 되도록
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert len(calls) == 1
+    assert all(result == {"url": "https://linkedin.com/in/someone"} for result in results)
+    assert cache.stats()["misses"] == 1 and cache.coalesced == 7
+    assert not cache._inflight
+
+
+def test_leader_error_reaches_every_waiter_and_is_not_cached():
+    cache = ResultCache("test")
+    calls = []
+
+    def failing():
+        calls.append(1)
+        time.sleep(0.2)
+        raise RuntimeError("search API down")
+
+    results = run_concurrently(lambda: cache.get_or_compute("someone", failing), 5)
+    assert len(calls) == 1
+    assert all(isinstance(result, RuntimeError) and str(result) == "search API down" for result in results)
+    assert not cache._inflight
+
+    # 실패는 캐시하지 않으므로 다음 요청은 다시 실행
+    assert cache.get_or_compute("someone", lambda: "ok") == "ok"
+
+
+def test_ttl_expiry(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(result_cache, "time", clock)
+    cache = ResultCache("test", ttl=60)
+    assert cache.get_or_compute("k", lambda: "first") == "first"
+    clock.now += 59
+    assert cache.get_or_compute("k", lambda: "second") == "first"
+    clock.now += 2
+    assert cache.get_or_compute("k", lambda: "second") == "second"
+    assert cache.peek("k") == (True, "second")
+    assert (cache.hits, cache.misses) == (2, 2)
+
+
+def test_memoize_normalizes_keys():
+    cache = ResultCache("linkedin_url")
+    calls = []
+
+    @cache.memoize(key_fn=normalize_name)
+    def lookup(name: str) -> str:
+        calls.append(name)
+        return f"url for {name}"
+
+    assert lookup("Harrison Chase") == "url for Harrison Chase"
+    assert lookup("  harrison   CHASE ") == "url for Harrison Chase"  # 대소문자 / 공백 차이는 같은 키
+    assert lookup("Eden Marco") == "url for Eden Marco"
+    assert calls == ["Harrison Chase", "Eden Marco"]
+    assert lookup.__wrapped__("x") == "url for x" and lookup.cache is cache
+
+
+def test_namespaces_share_a_backend_without_collisions(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "cache.sqlite"))
+    urls, profiles = ResultCache("url", backend), ResultCache("profile", backend)
+    urls.put("a", "url-a")
+    profiles.put("a", {"name": "A"})
+    assert urls.peek("a") == (True, "url-a") and profiles.peek("a") == (True, {"name": "A"})
+
+
+def test_memory_backend_lru():
+    backend = MemoryBackend(maxsize=2)
+    backend.set("a", 1, float("inf"))
+    backend.set("b", 2, float("inf"))
+    backend.get("a")
+    backend.set("c", 3, float("inf"))
+    assert backend.get("b") is None and backend.get("a") == (1, float("inf"))
+
+
+@pytest.mark.parametrize("name, key", [("Harrison Chase", "harrison chase"), ("\tEden  MARCO\n", "eden marco"), ("", "")])
+def test_normalize_name(name, key):
+    assert normalize_name(name) == key
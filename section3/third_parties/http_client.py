@@ -0,0 +1,273 @@
+# third_parties 공용 HTTP 클라이언트
+# - 커넥션 풀(keep-alive) 을 재사용해서 요청마다 DNS / TCP / TLS 연결을 새로 맺지 않음
+# - 멱등 요청(GET 등)의 429 / 5xx 응답과 연결 오류는 지수 백오프 + 지터(jitter) 를 두고 재시도 (Retry-After 헤더 우선)
+# - 호스트별 동시 요청 수 제한 (외부 API 의 rate limit 보호)
+# - 여러 프로필을 한 번에 가져올 때 사용할 asyncio 버전 (aiohttp 필요)
+import asyncio
+import logging
+import os
+import random
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from threading import BoundedSemaphore, Lock
+from typing import Dict, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+Timeout = Union[float, Tuple[float, float]]
+
+
+# 📌 재시도 정책
+@dataclass
+class RetryPolicy:
+    """
+    - retries: 첫 요청 이후 최대 재시도 횟수
+    - backoff_base / backoff_max: n 번째 재시도는 0 ~ min(backoff_max, backoff_base * 2^n) 초 사이에서 무작위로 대기 (full jitter)
+    - retry_statuses: 재시도할 HTTP 상태 코드
+    - 재시도는 GET 같은 멱등(idempotent) 요청만 (POST 가 서버에서 이미 처리됐을 수 있으므로 상태 코드 / 연결 오류 모두).
+    """
+
+    retries: int = 3
+    backoff_base: float = 0.5
+    backoff_max: float = 10.0
+    retry_statuses: Tuple[int, ...] = (429, 500, 502, 503, 504)
+    idempotent_methods: Tuple[str, ...] = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+
+    def delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        parsed = _parse_retry_after(retry_after)
+        if parsed is not None:
+            return min(parsed, self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    @classmethod
+    def from_env(cls) -> "RetryPolicy":
+        return cls(
+            retries=int(os.environ.get("HTTP_RETRIES", 3)),
+            backoff_base=float(os.environ.get("HTTP_BACKOFF_BASE", 0.5)),
+            backoff_max=float(os.environ.get("HTTP_BACKOFF_MAX", 10.0)),
+        )
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    # Retry-After 는 초 단위 숫자 또는 HTTP 날짜 형식
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+# 📌 동기 HTTP 클라이언트 (requests.Session 기반)
+class HttpClient:
+    """
+    - pool_maxsize: 호스트당 유지하는 keep-alive 연결 수 (Flask 스레드 수 이상 권장)
+    - per_host_limit: 호스트당 동시에 보내는 요청 수 (초과한 요청은 대기)
+    - timeout: 기본 (연결, 읽기) 제한 시간. 요청마다 timeout= 으로 바꿀 수 있음
+    - requests.Session 은 여러 스레드가 함께 사용해도 되므로 프로세스당 하나를 공유.
+    """
+
+    def __init__(
+        self,
+        retry: Optional[RetryPolicy] = None,
+        pool_maxsize: int = 32,
+        per_host_limit: int = 8,
+        timeout: Timeout = (3.05, 10.0),
+        session: Optional[requests.Session] = None,
+    ):
+        self.retry = retry or RetryPolicy()
+        self.per_host_limit = per_host_limit
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._host_limits: Dict[str, BoundedSemaphore] = {}
+        self._lock = Lock()
+
+    def _host_limit(self, url: str) -> BoundedSemaphore:
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._host_limits:
+                self._host_limits[host] = BoundedSemaphore(self.per_host_limit)
+            return self._host_limits[host]
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        - requests.Session.request 와 같은 인자를 받음.
+        - 재시도 횟수를 모두 쓰면 마지막 응답을 그대로 반환하거나 (상태 코드 확인은 호출하는 쪽에서),
+          연결 오류라면 마지막 예외를 다시 발생시킴.
+        """
+        method = method.upper()
+        kwargs.setdefault("timeout", self.timeout)
+        limit = self._host_limit(url)
+        attempt = 0
+        while True:
+            try:
+                with limit:
+                    response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= self.retry.retries or method not in self.retry.idempotent_methods:
+                    raise
+                delay = self.retry.delay(attempt)
+                logger.warning("%s %s failed (%s), retrying in %.2fs", method, url, e, delay)
+            else:
+                if (response.status_code not in self.retry.retry_statuses or attempt >= self.retry.retries
+                        or method not in self.retry.idempotent_methods):
+                    return response
+                delay = self.retry.delay(attempt, response.headers.get("Retry-After"))
+                logger.warning("%s %s -> %s, retrying in %.2fs", method, url, response.status_code, delay)
+                response.close()  # 연결을 풀에 돌려줌
+            time.sleep(delay)
+            attempt += 1
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def close(self) -> None:
+        self.session.close()
+
+
+# 📌 비동기 HTTP 클라이언트 (aiohttp 기반, 여러 프로필을 한 번에 가져올 때 사용)
+class AsyncHttpClient:
+    """
+    - async with AsyncHttpClient() as client: data = await client.get_json(url)
+    - 재시도 정책과 호스트별 동시 요청 제한은 HttpClient 와 같음.
+    - 세션은 이벤트 루프에 묶이므로 루프마다 (async with 블록마다) 새로 만듦.
+    """
+
+    def __init__(
+        self,
+        retry: Optional[RetryPolicy] = None,
+        pool_maxsize: int = 100,
+        per_host_limit: int = 8,
+        timeout: float = 10.0,
+    ):
+        self.retry = retry or RetryPolicy()
+        self.pool_maxsize = pool_maxsize
+        self.per_host_limit = per_host_limit
+        self.timeout = timeout
+        self._session = None
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+
+    async def __aenter__(self) -> "AsyncHttpClient":
+        import aiohttp  # 비동기 버전을 쓸 때만 필요
+
+        self._aiohttp = aiohttp
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.pool_maxsize, limit_per_host=self.per_host_limit),
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        )
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self._session.close()
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.per_host_limit)
+        return self._host_limits[host]
+
+    async def request_json(self, method: str, url: str, **kwargs):
+        """
+        - aiohttp.ClientSession.request 와 같은 인자를 받고, 응답 본문을 JSON 으로 반환.
+        - 재시도 후에도 실패하면 aiohttp.ClientResponseError / ClientError 를 발생시킴.
+        """
+        method = method.upper()
+        aiohttp = self._aiohttp
+        attempt = 0
+        while True:
+            try:
+                async with self._host_limit(url):
+                    async with self._session.request(method, url, **kwargs) as response:
+                        if (response.status not in self.retry.retry_statuses or attempt >= self.retry.retries
+                                or method not in self.retry.idempotent_methods):
+                            response.raise_for_status()
+                            return await response.json(content_type=None)
+                        delay = self.retry.delay(attempt, response.headers.get("Retry-After"))
+                        logger.warning("%s %s -> %s, retrying in %.2fs", method, url, response.status, delay)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if attempt >= self.retry.retries or method not in self.retry.idempotent_methods:
+                    raise
+                delay = self.retry.delay(attempt)
+                logger.warning("%s %s failed (%r), retrying in %.2fs", method, url, e, delay)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def get_json(self, url: str, **kwargs):
+        return await self.request_json("GET", url, **kwargs)
+
+
+# 🔹 프로세스 전체에서 공유하는 클라이언트
+http_client = HttpClient(
+    retry=RetryPolicy.from_env(),
+    per_host_limit=int(os.environ.get("HTTP_PER_HOST_LIMIT", 8)),
+)
+
+
+# 🔹 직접 실행하는 경우: 로컬 스텁 서버로 연결 재사용 효과와 재시도 동작 확인
+if __name__ == "__main__":
+    import json
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive 지원
+        disable_nagle_algorithm = True  # 헤더와 본문을 따로 보낼 때 생기는 지연(delayed ACK) 방지
+        flaky = {"count": 0}
+
+        def do_GET(self):
+            # /flaky 는 처음 두 번 503, 그다음부터 200
+            if self.path == "/flaky" and self.flaky["count"] < 2:
+                self.flaky["count"] += 1
+                status, body = 503, b"{}"
+            else:
+                status, body = 200, json.dumps({"path": self.path}).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    runs = 500
+    start = time.perf_counter()
+    for i in range(runs):
+        requests.get(f"{base}/profile/{i}", timeout=10).json()
+    bare = (time.perf_counter() - start) / runs * 1000
+
+    client = HttpClient(retry=RetryPolicy(backoff_base=0.05))
+    start = time.perf_counter()
+    for i in range(runs):
+        client.get(f"{base}/profile/{i}").json()
+    pooled = (time.perf_counter() - start) / runs * 1000
+    print(f"requests.get (new connection each): {bare:.3f} ms/request")
+    print(f"HttpClient (keep-alive pool):       {pooled:.3f} ms/request")
+    print("(TLS 를 쓰는 실제 API 에서는 요청마다 핸드셰이크가 추가되므로 차이가 더 커짐)")
+
+    print("flaky endpoint:", client.get(f"{base}/flaky").status_code, "after", StubHandler.flaky["count"], "retries")
+
+    async def fetch_all():
+        async with AsyncHttpClient(per_host_limit=8) as async_client:
+            return await asyncio.gather(*(async_client.get_json(f"{base}/profile/{i}") for i in range(runs)))
+
+    start = time.perf_counter()
+    results = asyncio.run(fetch_all())
+    print(f"AsyncHttpClient: {len(results)} requests in {(time.perf_counter() - start) * 1000:.1f} ms")
+    server.shutdown()
@@ -1,37 +1,29 @@
 # Linkedin 프로필 정보 scrapping
+import asyncio
 import os  # 환경 변수 사용을 위한 OS 모듈
-import requests  # HTTP 요청을 보낼 때 사용하는 라이브러리
-from dotenv import load_dotenv  # 환경 변수(.env 파일) 로드
+from typing import Any, Dict, List, Tuple
 
-# 🔹 환경 변수 로드 (.env에서 API 키를 불러오기 위함)
-load_dotenv()
+from caching.result_cache import profile_data_cache  # 스크래핑 결과 캐시
+from third_parties.http_client import AsyncHttpClient, http_client  # 커넥션 풀 / 재시도가 있는 공용 HTTP 클라이언트
+from config import load_env  # .env 를 프로세스당 한 번만 읽는 설정 로더
 
-# 📌 LinkedIn 프로필 정보를 스크래핑하는 함수
-def scrape_linkedin_profile(linkedin_profile_url: str, mock: bool = False):
-    """
-    LinkedIn 프로필 페이지에서 정보를 수집하는 함수.
-    - mock=True: 실제 API 호출 대신 미리 저장된 JSON 파일을 불러옴 (테스트 용도)
-    - mock=False: Proxycurl API를 사용하여 LinkedIn 데이터를 가져옴
-    """
+_MOCK_PROFILE_URL = "https://gist.githubusercontent.com/emarco177/.../eden-marco.json"
+_PROXYCURL_ENDPOINT = "https://nubela.co/proxycurl/api/v2/linkedin"
 
+
+# 📌 요청할 URL 과 인자 (mock 여부에 따라 테스트용 JSON 또는 Proxycurl API)
+def _request_for(linkedin_profile_url: str, mock: bool) -> Tuple[str, Dict[str, Any]]:
     if mock:
         # 🔹 테스트용 JSON 데이터 사용
-        linkedin_profile_url = "https://gist.githubusercontent.com/emarco177/.../eden-marco.json"
-        response = requests.get(linkedin_profile_url, timeout=10)
-    else:
-        # 🔹 실제 Proxycurl API를 사용하여 LinkedIn 프로필 데이터 요청
-        api_endpoint = "https://nubela.co/proxycurl/api/v2/linkedin"
-        header_dic = {"Authorization": f'Bearer {os.environ.get("PROXYCURL_API_KEY")}'}
-        response = requests.get(
-            api_endpoint,
-            headers=header_dic,
-            params={"url": linkedin_profile_url},
-            timeout=10,
-        )
+        return _MOCK_PROFILE_URL, {}
+    # 🔹 실제 Proxycurl API를 사용하여 LinkedIn 프로필 데이터 요청 (.env 에서 API 키를 불러오기 위함)
+    load_env()
+    header_dic = {"Authorization": f'Bearer {os.environ.get("PROXYCURL_API_KEY")}'}
+    return _PROXYCURL_ENDPOINT, {"headers": header_dic, "params": {"url": linkedin_profile_url}}
 
-    # 🔹 API 응답을 JSON 형식으로 변환
-    data = response.json()
 
+# 📌 API 응답 정리
+def _clean_profile(data: Dict[str, Any]) -> Dict[str, Any]:
     # 🔹 불필요한 항목 제거 (빈 값 및 특정 필드)
     data = {
         k: v for k, v in data.items()
@@ -46,6 +38,43 @@ def scrape_linkedin_profile(linkedin_profile_url: str, mock: bool = False):
     return data
 
 
+# 📌 LinkedIn 프로필 정보를 스크래핑하는 함수 (URL 기준으로 결과 캐시)
+@profile_data_cache.memoize(key_fn=lambda linkedin_profile_url, mock=False: f"{mock}:{linkedin_profile_url}")
+def scrape_linkedin_profile(linkedin_profile_url: str, mock: bool = False):
+    """
+    LinkedIn 프로필 페이지에서 정보를 수집하는 함수.
+    - mock=True: 실제 API 호출 대신 미리 저장된 JSON 파일을 불러옴 (테스트 용도)
+    - mock=False: Proxycurl API를 사용하여 LinkedIn 데이터를 가져옴
+    - 공용 HTTP 클라이언트를 사용하므로 연결을 재사용하고, 429 / 5xx 는 백오프 후 재시도.
+    """
+    url, kwargs = _request_for(linkedin_profile_url, mock)
+    response = http_client.get(url, **kwargs)
+
+    # 🔹 API 응답을 JSON 형식으로 변환
+    return _clean_profile(response.json())
+
+
+# 📌 여러 프로필을 한 번에 가져오는 비동기 버전 (배치 스크래핑용)
+async def scrape_linkedin_profiles_async(linkedin_profile_urls: List[str], mock: bool = False) -> List[Any]:
+    """
+    - 입력 순서대로 결과 리스트를 반환. 실패한 프로필은 예외 객체가 들어감.
+    - 호스트별 동시 요청 수는 HTTP_PER_HOST_LIMIT 로 제한.
+    - scrape_linkedin_profile 과 같은 캐시를 사용 (있으면 요청하지 않고, 새로 가져온 결과는 저장).
+    """
+    async with AsyncHttpClient(per_host_limit=int(os.environ.get("HTTP_PER_HOST_LIMIT", 8))) as client:
+
+        async def scrape(linkedin_profile_url: str):
+            found, cached = profile_data_cache.peek(f"{mock}:{linkedin_profile_url}")
+            if found:
+                return cached
+            url, kwargs = _request_for(linkedin_profile_url, mock)
+            data = _clean_profile(await client.get_json(url, **kwargs))
+            profile_data_cache.put(f"{mock}:{linkedin_profile_url}", data)
+            return data
+
+        return await asyncio.gather(*(scrape(url) for url in linkedin_profile_urls), return_exceptions=True)
+
+
 # 🔹 테스트 실행
 if __name__ == "__main__":
     linkedin_profile_url = "https://www.linkedin.com/in/eden-marco/"
@@ -0,0 +1,434 @@
+# 로컬 Ollama 모델용 요청 스케줄러 (micro-batching)
+# - 로컬 Ollama 서버는 OLLAMA_NUM_PARALLEL 개(CPU 추론이면 보통 1개)까지만 동시에 처리하고,
+#   그보다 많이 보내면 요청끼리 CPU 를 나눠 써서 전체 처리량이 오히려 떨어짐
+# - 서버가 바쁜 동안 (또는 짧은 시간 batch_window 동안) 들어온 체인 호출을 대기열에 모아서:
+#   - 같은 프롬프트는 한 번만 보내고 결과를 나눠 줌
+#   - 마감 시간(deadline)이 지난 요청은 모델로 보내지 않고 바로 실패 처리
+#   - 마감 시간이 빠른 요청부터, 서버가 처리할 수 있는 개수(max_parallel)만큼만 보냄
+# - 대기열이 max_queue 를 넘으면 호출한 쪽을 기다리게 하거나(backpressure) QueueFullError 로 거절
+# - Ollama chat API 는 프롬프트 여러 개를 한 요청으로 받지 않으므로 chat 은 요청 단위로 보내고,
+#   batch_fn 이 목록을 한 번에 받으므로 여러 입력을 받는 API(/api/embed 등)는 한 요청으로 묶어서 보낼 수 있음
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from threading import Condition, Thread
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+
+class QueueFullError(RuntimeError):
+    """대기열이 가득 차서 요청을 받지 못한 경우"""
+
+
+class DeadlineExceeded(TimeoutError):
+    """마감 시간 안에 응답을 받지 못한 경우 (대기 중에 지나면 모델로 보내지 않음)"""
+
+
+# 📌 대기열의 요청 하나 (같은 프롬프트의 요청은 futures 에 함께 모음)
+class _Pending:
+    __slots__ = ("deadline", "group", "dedupe_key", "payload", "futures", "enqueued_at")
+
+    def __init__(self, deadline: float, group: Hashable, dedupe_key: Hashable, payload: Any):
+        self.deadline = deadline
+        self.group = group
+        self.dedupe_key = dedupe_key
+        self.payload = payload
+        self.futures: List[Tuple[Future, float]] = []  # (결과를 받을 Future, 그 요청의 마감 시간)
+        self.enqueued_at = time.monotonic()
+
+
+# 📌 micro-batching 스케줄러
+class MicroBatchScheduler:
+    """
+    - batch_fn(payloads) -> 결과 목록 (같은 순서, 실패한 항목은 예외 객체를 값으로 반환)
+    - max_parallel: 동시에 실행하는 batch_fn 호출 수 (Ollama 의 OLLAMA_NUM_PARALLEL 에 맞춤)
+    - max_batch: batch_fn 한 번에 넣는 서로 다른 요청 수 (chat 은 1, 목록을 받는 API 는 더 크게)
+    - batch_window: 서버가 놀고 있을 때 첫 요청 뒤에 같은 batch 로 모으려고 기다리는 최대 시간 (초).
+      서버가 바쁜 동안에는 이미 대기열에서 기다린 시간으로 치므로 지연이 더 늘지 않음.
+    - max_queue: 대기 중인 요청 수 제한. 넘으면 submit(block=True) 는 자리가 날 때까지 (마감 시간까지) 기다리고,
+      block=False 면 바로 QueueFullError.
+    - default_timeout: submit 에 timeout 이 없을 때 사용하는 마감 시간 (초, None 이면 제한 없음)
+    - 같은 group 의 요청끼리만 한 batch 로 묶고 (예: stop 시퀀스가 같은 요청), 같은 dedupe_key 는 한 번만 실행.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Any]], Sequence[Any]],
+        max_parallel: int = 1,
+        max_batch: int = 1,
+        batch_window: float = 0.005,
+        max_queue: int = 64,
+        default_timeout: Optional[float] = None,
+    ):
+        self.batch_fn = batch_fn
+        self.max_parallel = max_parallel
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self.max_queue = max_queue
+        self.default_timeout = default_timeout
+        self._cond = Condition()
+        self._heap: List[Tuple[float, int, _Pending]] = []  # (마감 시간, 순번, 요청): 마감이 빠른 순
+        self._by_key: Dict[Tuple[Hashable, Hashable], _Pending] = {}
+        self._seq = itertools.count()
+        self._queued = 0  # 대기 중인 호출 수 (중복 요청 포함)
+        self._closed = False
+        self.submitted = 0
+        self.deduplicated = 0
+        self.expired = 0
+        self.rejected = 0
+        self.batches = 0
+        self.dispatched = 0
+        self._workers = [Thread(target=self._worker, name=f"ollama-scheduler-{i}", daemon=True)
+                         for i in range(max_parallel)]
+        for worker in self._workers:
+            worker.start()
+
+    # 📌 요청 추가
+    def submit(self, payload: Any, group: Hashable = None, dedupe_key: Hashable = None,
+               timeout: Optional[float] = None, block: bool = True) -> Future:
+        """
+        - return: 결과를 받을 Future. 마감 시간이 지나면 DeadlineExceeded 로 끝남.
+        - dedupe_key: 같은 값이면 같은 요청으로 보고 한 번만 실행 (None 이면 합치지 않음)
+        """
+        timeout = self.default_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout if timeout is not None else float("inf")
+        future: Future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("scheduler is closed")
+            self.submitted += 1
+            key = (group, dedupe_key)
+            pending = self._by_key.get(key) if dedupe_key is not None else None
+            if pending is not None:
+                # 🔹 같은 프롬프트가 이미 대기 중이면 결과만 나눠 받음 (대기열 자리를 쓰지 않음)
+                self.deduplicated += 1
+                pending.futures.append((future, deadline))
+                if deadline > pending.deadline:
+                    pending.deadline = deadline  # 가장 늦은 마감까지는 보낼 가치가 있음 (순서는 처음 마감 기준)
+                return future
+            # 🔹 backpressure: 대기열이 가득 차면 자리가 날 때까지 (마감 시간까지) 기다림
+            while self._queued >= self.max_queue:
+                remaining = deadline - time.monotonic()
+                if not block or remaining <= 0:
+                    self.rejected += 1
+                    raise QueueFullError(f"{self._queued} requests already queued (max_queue={self.max_queue})")
+                self._cond.wait(min(remaining, 1.0))
+            pending = _Pending(deadline, group, dedupe_key, payload)
+            pending.futures.append((future, deadline))
+            heapq.heappush(self._heap, (deadline, next(self._seq), pending))
+            if dedupe_key is not None:
+                self._by_key[key] = pending
+            self._queued += 1
+            self._cond.notify_all()
+        return future
+
+    def _remove(self, pending: _Pending) -> None:
+        if pending.dedupe_key is not None:
+            self._by_key.pop((pending.group, pending.dedupe_key), None)
+        self._queued -= 1
+
+    def _expire(self, pending: _Pending, now: float) -> bool:
+        # 🔹 마감이 지난 호출은 실패 처리. 전부 지났으면 True (모델로 보내지 않음)
+        alive = []
+        for future, deadline in pending.futures:
+            if future.done():  # acall 이 시간 초과로 취소한 요청
+                continue
+            if deadline <= now:
+                self.expired += 1
+                future.set_exception(DeadlineExceeded("deadline passed while queued"))
+            else:
+                alive.append((future, deadline))
+        pending.futures = alive
+        return not alive
+
+    # 📌 대기열에서 다음 batch 를 꺼냄 (마감이 가장 빠른 요청 + 같은 group 의 다음 요청들)
+    def _take_batch(self) -> Optional[List[_Pending]]:
+        with self._cond:
+            while True:
+                while not self._heap and not self._closed:
+                    self._cond.wait()
+                if not self._heap:
+                    return None
+                # 🔹 첫 요청이 들어온 지 batch_window 가 지나거나 batch 가 찰 때까지 기다림
+                oldest = min(entry[2].enqueued_at for entry in self._heap)
+                while (len(self._heap) < self.max_batch and not self._closed
+                       and time.monotonic() - oldest < self.batch_window):
+                    self._cond.wait(self.batch_window - (time.monotonic() - oldest))
+                now = time.monotonic()
+                batch: List[_Pending] = []
+                skipped: List[Tuple[float, int, _Pending]] = []
+                while self._heap and len(batch) < self.max_batch:
+                    entry = heapq.heappop(self._heap)
+                    pending = entry[2]
+                    if self._expire(pending, now):
+                        self._remove(pending)
+                        continue
+                    if batch and pending.group != batch[0].group:
+                        skipped.append(entry)
+                        continue
+                    self._remove(pending)
+                    batch.append(pending)
+                for entry in skipped:
+                    heapq.heappush(self._heap, entry)
+                self._cond.notify_all()  # 자리가 났으므로 기다리던 submit 을 깨움
+                if batch:
+                    self.batches += 1
+                    self.dispatched += len(batch)
+                    return batch
+
+    def _worker(self) -> None:
+        while True:
+            batch = self._take_batch()
+            if batch is None:
+                return
+            try:
+                results = list(self.batch_fn([pending.payload for pending in batch]))
+                if len(results) != len(batch):
+                    raise RuntimeError(f"batch_fn returned {len(results)} results for {len(batch)} inputs")
+            except BaseException as e:  # batch 전체 실패: 모든 호출에 같은 예외 전달
+                results = [e] * len(batch)
+            for pending, result in zip(batch, results):
+                for future, _ in pending.futures:
+                    if future.done():
+                        continue
+                    if isinstance(result, BaseException):
+                        future.set_exception(result)
+                    else:
+                        future.set_result(result)
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        for worker in self._workers:
+            worker.join()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "queued": self._queued,
+                "submitted": self.submitted,
+                "deduplicated": self.deduplicated,
+                "expired": self.expired,
+                "rejected": self.rejected,
+                "batches": self.batches,
+                "dispatched": self.dispatched,
+            }
+
+
+# 📌 결과를 마감 시간까지만 기다림
+def wait_result(future: Future, timeout: Optional[float]) -> Any:
+    try:
+        return future.result(timeout)
+    except DeadlineExceeded:
+        raise
+    except FutureTimeoutError:
+        # 이미 보낸 요청은 멈출 수 없으므로 결과는 버리고 호출한 쪽에는 시간 초과를 알림
+        raise DeadlineExceeded(f"no response within {timeout:.3f}s") from None
+
+
+# 📌 채팅 모델 호출을 스케줄러에 넣는 Runnable (prompt | scheduled_chat_model(llm) | parser)
+def scheduled_chat_model(llm, max_parallel: int = 1, max_queue: int = 64,
+                         timeout: Optional[float] = None, block: bool = True):
+    """
+    - llm: ChatOllama 등 채팅 모델. 같은 프롬프트는 대기 중에 한 번으로 합침.
+    - chat 은 요청 하나씩 보내므로 (max_batch=1) 서버가 놀 때는 기다리지 않고 바로 보내고,
+      서버가 바쁜 동안 쌓인 요청을 마감 순서 / 중복 제거 / 마감 지난 요청 제외를 거쳐 max_parallel 개씩 보냄.
+    - timeout: 요청마다의 마감 시간 (초). 대기열에서 지나면 보내지 않고, 응답이 늦으면 DeadlineExceeded.
+    - block: 대기열이 가득 찼을 때 기다릴지 (True, backpressure) 바로 QueueFullError 를 낼지 (False)
+    - 반환되는 Runnable 의 .scheduler 로 통계 / close 사용.
+    """
+    from langchain_core.runnables import RunnableLambda
+
+    def batch_fn(prompts: List[Any]) -> List[Any]:
+        return llm.batch(prompts, return_exceptions=True)
+
+    scheduler = MicroBatchScheduler(batch_fn, max_parallel=max_parallel, max_batch=1,
+                                    max_queue=max_queue, default_timeout=timeout)
+
+    def submit(prompt) -> Future:
+        return scheduler.submit(prompt, dedupe_key=repr(prompt), block=block)
+
+    # 🔹 마감까지 남은 시간 (submit 에서 자리를 기다린 시간도 timeout 에 포함)
+    def remaining(started: float) -> Optional[float]:
+        return None if timeout is None else max(0.0, started + timeout - time.monotonic())
+
+    def call(prompt):
+        started = time.monotonic()
+        future = submit(prompt)
+        return wait_result(future, remaining(started))
+
+    async def acall(prompt):
+        started = time.monotonic()
+        # submit 은 대기열이 가득 차면 기다리므로 이벤트 루프를 막지 않도록 스레드에서 실행
+        future = await asyncio.to_thread(submit, prompt)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), remaining(started))
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded(f"no response within {timeout}s") from None
+
+    runnable = RunnableLambda(call, afunc=acall, name="scheduled_chat_model")
+    runnable.scheduler = scheduler
+    return runnable
+
+
+# 📌 환경 변수로 설정하는 Ollama 용 스케줄러
+def scheduled_ollama(llm):
+    """
+    - OLLAMA_MAX_PARALLEL: 동시에 보내는 요청 수 (기본 1, Ollama 서버의 OLLAMA_NUM_PARALLEL 과 같게)
+    - OLLAMA_MAX_QUEUE: 대기열 길이 (기본 64)
+    - OLLAMA_TIMEOUT: 요청별 마감 시간 (초, 기본 120)
+    """
+    return scheduled_chat_model(
+        llm,
+        max_parallel=int(os.environ.get("OLLAMA_MAX_PARALLEL", 1)),
+        max_queue=int(os.environ.get("OLLAMA_MAX_QUEUE", 64)),
+        timeout=float(os.environ.get("OLLAMA_TIMEOUT", 120)),
+    )
+
+
+# 📌 가짜 Ollama 서버 (/api/chat) 로 처리량 / 지연 시간 측정
+# - 요청 하나를 혼자 처리하면 base 초가 걸리고, 동시에 n 개를 처리하면 CPU 를 나눠 쓰면서
+#   (메모리 대역폭 / 캐시 경합) 전체 처리 속도가 n ** (1 - alpha) 로 떨어지는 CPU 추론을 흉내 냄
+#   python -m third_parties.ollama_scheduler [--base 0.05] [--alpha 1.3] [--deadline 2] [--requests 64]
+def _fake_ollama_server(base: float, alpha: float):
+    import json
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    state = {"active": 0, "requests": 0, "prompts": []}  # prompts: 서버가 받은 순서
+    lock = threading.Lock()
+    tick = 0.005
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            with lock:
+                state["active"] += 1
+                state["requests"] += 1
+                state["prompts"].append(body["messages"][-1]["content"])
+            try:
+                # 🔹 processor sharing: 동시에 처리 중인 요청 수에 따라 진행 속도가 느려짐
+                progress = 0.0
+                while progress < base:
+                    time.sleep(tick)
+                    with lock:
+                        active = state["active"]
+                    progress += tick / active ** alpha
+            finally:
+                with lock:
+                    state["active"] -= 1
+            prompt = body["messages"][-1]["content"]
+            message = {"role": "assistant", "content": f"summary of {len(prompt)} chars"}
+            done = {"model": body["model"], "created_at": "2025-01-01T00:00:00Z", "done": True,
+                    "done_reason": "stop", "eval_count": 8, "prompt_eval_count": len(prompt) // 4}
+            if body.get("stream", True):
+                lines = [{**done, "message": message, "done": False},
+                         {**done, "message": {"role": "assistant", "content": ""}}]
+                payload = "".join(json.dumps(line) + "\n" for line in lines).encode()
+                content_type = "application/x-ndjson"
+            else:
+                payload = json.dumps({**done, "message": message}).encode()
+                content_type = "application/json"
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    Thread(target=server.serve_forever, daemon=True).start()
+    return server, state
+
+
+# 📌 동시 사용자 concurrency 명이 각자 응답을 받으면 다음 요청을 보내는 부하 (closed loop)
+def _load_test(chain, prompts: List[str], concurrency: int, deadline: float) -> Dict[str, Any]:
+    from concurrent.futures import ThreadPoolExecutor
+
+    latencies: List[float] = []
+    failures: Dict[str, int] = {}
+
+    def one(prompt: str) -> None:
+        started = time.monotonic()
+        try:
+            chain.invoke({"information": prompt})
+        except Exception as e:
+            failures[type(e).__name__] = failures.get(type(e).__name__, 0) + 1
+            return
+        latencies.append(time.monotonic() - started)
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, prompts))
+    elapsed = time.monotonic() - started
+    latencies.sort()
+    on_time = sum(1 for latency in latencies if latency <= deadline)
+
+    def percentile(q: float) -> float:
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))] if latencies else float("nan")
+
+    return {"rps": len(latencies) / elapsed, "goodput": on_time / elapsed, "p50": percentile(0.5),
+            "p95": percentile(0.95), "failures": failures}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from langchain_core.globals import set_llm_cache
+    from langchain_core.output_parsers import StrOutputParser
+    from langchain_core.prompts import PromptTemplate
+    from langchain_ollama import ChatOllama
+
+    parser = argparse.ArgumentParser(description="Throughput / latency of direct vs scheduled Ollama calls.")
+    parser.add_argument("--base", type=float, default=0.05, help="seconds per request when served alone")
+    parser.add_argument("--alpha", type=float, default=1.3, help="slowdown exponent under contention")
+    parser.add_argument("--deadline", type=float, default=2.0, help="per-request deadline (seconds)")
+    parser.add_argument("--requests", type=int, default=64, help="requests per run")
+    parser.add_argument("--concurrency", default="1,4,16,32")
+    args = parser.parse_args()
+
+    os.environ.setdefault("NO_PROXY", "127.0.0.1")
+    set_llm_cache(None)  # 모델 호출만 측정
+    server, state = _fake_ollama_server(args.base, args.alpha)
+    llm = ChatOllama(model="llama3.2", temperature=0, base_url=f"http://127.0.0.1:{server.server_port}")
+    prompt = PromptTemplate.from_template("summarize {information}")
+
+    print(f"fake Ollama: {args.base * 1000:.0f} ms/request alone, alpha={args.alpha}, "
+          f"deadline {args.deadline}s, {args.requests} requests per run")
+    print(f"{'mode':>10} {'users':>5} {'req/s':>6} {'on-time/s':>9} {'p50':>7} {'p95':>7}  failures / scheduler")
+    for concurrency in [int(c) for c in args.concurrency.split(",")]:
+        # 🔹 서로 다른 프롬프트 (중복 제거 효과 없이 스케줄링만 비교)
+        prompts = [f"person {concurrency}-{i} " + "x" * 400 for i in range(args.requests)]
+        for mode in ("direct", "scheduled"):
+            model = llm
+            if mode == "scheduled":
+                model = scheduled_chat_model(llm, max_parallel=1, max_queue=16, timeout=args.deadline)
+            result = _load_test(prompt | model | StrOutputParser(), prompts, concurrency, args.deadline)
+            extra = ""
+            if mode == "scheduled":
+                model.scheduler.close()
+                stats = model.scheduler.stats()
+                extra = f" dispatched={stats['dispatched']} expired={stats['expired']}"
+            print(f"{mode:>10} {concurrency:>5} {result['rps']:6.1f} {result['goodput']:9.1f} "
+                  f"{result['p50'] * 1000:5.0f}ms {result['p95'] * 1000:5.0f}ms  {result['failures'] or '-'}{extra}")
+
+    # 🔹 같은 프롬프트가 몰리는 경우 (대기 중인 요청끼리 합침)
+    model = scheduled_chat_model(llm, max_parallel=1, max_queue=16, timeout=args.deadline)
+    before = state["requests"]
+    result = _load_test(prompt | model | StrOutputParser(), [f"person {i % 8}" for i in range(args.requests)],
+                        16, args.deadline)
+    model.scheduler.close()
+    stats = model.scheduler.stats()
+    print(f"\n8 distinct prompts x {args.requests // 8}, 16 users: {result['rps']:.1f} req/s, "
+          f"p95 {result['p95'] * 1000:.0f}ms, {state['requests'] - before} server calls "
+          f"({stats['deduplicated']} deduplicated)")
+    server.shutdown()
@@ -1,8 +1,8 @@
-from langchain_community.tools.tavily_search import TavilySearchResults
-
-
 def get_profile_url_tavily(name: str):
     """Searches for Linkedin or Twitter Profile Page."""
+    # langchain_community 는 import 가 무거우므로 검색을 처음 실행할 때 import
+    from langchain_community.tools.tavily_search import TavilySearchResults
+
     search = TavilySearchResults()
     res = search.run(f"{name}")
     return res[0]["url"]
\ No newline at end of file
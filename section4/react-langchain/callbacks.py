@@ -1,4 +1,12 @@
-from typing import Dict, Any, List
+import bisect
+import json
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List, Optional, Tuple
+from uuid import UUID
+
 from langchain.callbacks.base import BaseCallbackHandler
 from langchain.schema import LLMResult
 
@@ -28,4 +36,291 @@ class AgentCallbackHandler(BaseCallbackHandler):
         :param kwargs: 추가적인 선택적 인자들로, 필요에 따라 다양한 데이터를 전달할 수 있습니다.
         """
         # LLM의 출력 결과를 출력
-        print(f"LLM output: {response.text}")
+        print(f"LLM output: {response.generations[0][0].text}")
+
+
+# ---------------------------------------------------------------------------
+# 📌 운영용 트레이싱 콜백
+# - LLM / 툴 / 체인 실행마다 span(시작~끝) 을 기록: 소요 시간, 토큰 수, 첫 토큰까지 걸린 시간(TTFT), 재시도 횟수
+# - 모델 / 툴 이름별로 지연 시간 히스토그램을 모아서 p50 / p95 / p99 계산
+# - span 은 JSONL 파일로, 집계는 Prometheus 텍스트 형식(/metrics)으로 내보냄
+# - 파일 쓰기는 백그라운드 스레드가 모아서 처리하므로 콜백(hot path) 은 큐에 넣기만 함
+# ---------------------------------------------------------------------------
+# 🔹 히스토그램 구간 (초). Prometheus 기본값에 LLM 호출용 긴 구간을 추가
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+# 📌 고정 구간 히스토그램 (메모리 사용량이 호출 수와 관계없이 일정)
+class LatencyHistogram:
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # 마지막 칸은 +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """
+        - 구간 안에서는 선형 보간으로 근사 (Prometheus histogram_quantile 과 같은 방식)
+        - +Inf 구간에 걸리면 마지막 구간 경계를 반환
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.buckets[-1]
+
+
+# 📌 span 을 JSONL 파일에 모아서 쓰는 writer
+class JsonlSpanWriter:
+    """
+    - write() 는 큐에 넣기만 하고 바로 반환. 백그라운드 스레드가 flush_interval 마다 모아서 기록.
+    - 큐가 가득 차면 (디스크가 느린 경우) 새 span 을 버리고 dropped 에 개수를 기록 (에이전트 실행을 막지 않음).
+    """
+
+    def __init__(self, path: str, flush_interval: float = 1.0, max_queue: int = 10_000):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, name="span-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, span: Dict[str, Any]) -> None:
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            while True:
+                try:
+                    span = self._queue.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    continue
+                batch = [span]
+                while len(batch) < 1000:  # 쌓여 있는 것은 한 번에 기록
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                stop = None in batch
+                f.writelines(json.dumps(s, ensure_ascii=False) + "\n" for s in batch if s is not None)
+                f.flush()
+                if stop:
+                    return
+
+    def close(self) -> None:
+        # 남은 span 을 모두 기록하고 종료
+        self._queue.put(None)
+        self._thread.join()
+
+
+def _model_name(serialized: Optional[Dict[str, Any]], kwargs: Dict[str, Any]) -> str:
+    params = kwargs.get("invocation_params") or {}
+    serialized_kwargs = (serialized or {}).get("kwargs", {})
+    return (
+        params.get("model_name") or params.get("model")
+        or serialized_kwargs.get("model_name") or serialized_kwargs.get("model")
+        or (serialized or {}).get("name") or "unknown"
+    )
+
+
+def _token_usage(response: LLMResult) -> Dict[str, int]:
+    # OpenAI 는 llm_output["token_usage"], 그 외 채팅 모델은 message.usage_metadata 에 기록
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    if usage:
+        return {
+            "prompt": usage.get("prompt_tokens", 0),
+            "completion": usage.get("completion_tokens", 0),
+        }
+    prompt = completion = 0
+    for generations in response.generations:
+        for generation in generations:
+            metadata = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+            prompt += metadata.get("input_tokens", 0)
+            completion += metadata.get("output_tokens", 0)
+    return {"prompt": prompt, "completion": completion}
+
+
+# 📌 트레이싱 콜백 핸들러
+class TracingCallbackHandler(BaseCallbackHandler):
+    """
+    - llm=ChatOpenAI(..., callbacks=[handler]) 또는 invoke(..., config={"callbacks": [handler]}) 로 등록.
+    - 프롬프트 / 출력 원문은 기록하지 않고 길이만 기록 (긴 프롬프트를 복사 / 직렬화하지 않도록).
+    - span: {"run_id", "parent_run_id", "kind": llm|tool|chain, "name", "start", "duration_ms",
+             "status": ok|error, "error", "retries", "ttft_ms", "prompt_tokens", "completion_tokens"}
+    - writer: JsonlSpanWriter (없으면 파일로 내보내지 않고 집계만)
+    - 여러 스레드에서 동시에 호출되므로 내부 상태는 lock 으로 보호.
+    """
+
+    def __init__(self, writer: Optional[JsonlSpanWriter] = None):
+        self.writer = writer
+        self._lock = threading.Lock()
+        self._open: Dict[UUID, Dict[str, Any]] = {}
+        self.latency: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self.ttft: Dict[str, LatencyHistogram] = {}
+        self.tokens: Dict[Tuple[str, str], int] = {}
+        self.errors: Dict[Tuple[str, str], int] = {}
+        self.retries: Dict[Tuple[str, str], int] = {}
+
+    # 🔹 공통: span 시작 / 종료
+    def _start(self, kind: str, name: str, run_id: UUID, parent_run_id: Optional[UUID], **fields) -> None:
+        span = {"run_id": str(run_id), "parent_run_id": str(parent_run_id) if parent_run_id else None,
+                "kind": kind, "name": name, "start": time.time(), "_t0": time.perf_counter(), "retries": 0, **fields}
+        with self._lock:
+            self._open[run_id] = span
+
+    def _end(self, run_id: UUID, error: Optional[BaseException] = None, **fields) -> None:
+        now = time.perf_counter()
+        with self._lock:
+            span = self._open.pop(run_id, None)
+            if span is None:
+                return
+            duration = now - span.pop("_t0")
+            span.update(fields, duration_ms=round(duration * 1000, 3), status="error" if error else "ok")
+            key = (span["kind"], span["name"])
+            self.latency.setdefault(key, LatencyHistogram()).observe(duration)
+            if error is not None:
+                span["error"] = f"{type(error).__name__}: {error}"
+                self.errors[key] = self.errors.get(key, 0) + 1
+            if span["retries"]:
+                self.retries[key] = self.retries.get(key, 0) + span["retries"]
+            if "_first_token" in span:
+                ttft = span.pop("_first_token")
+                span["ttft_ms"] = round(ttft * 1000, 3)
+                self.ttft.setdefault(span["name"], LatencyHistogram()).observe(ttft)
+            for kind in ("prompt", "completion"):
+                if span.get(f"{kind}_tokens"):
+                    token_key = (span["name"], kind)
+                    self.tokens[token_key] = self.tokens.get(token_key, 0) + span[f"{kind}_tokens"]
+        if self.writer is not None:
+            self.writer.write(span)
+
+    # 🔹 LLM
+    def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, **kwargs):
+        self._start("llm", _model_name(serialized, kwargs), run_id, parent_run_id,
+                    prompt_chars=sum(len(p) for p in prompts))
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, **kwargs):
+        chars = sum(len(m.content) if isinstance(m.content, str) else 0 for batch in messages for m in batch)
+        self._start("llm", _model_name(serialized, kwargs), run_id, parent_run_id, prompt_chars=chars)
+
+    def on_llm_new_token(self, token, *, run_id, **kwargs):
+        span = self._open.get(run_id)
+        if span is not None and "_first_token" not in span:
+            span["_first_token"] = time.perf_counter() - span["_t0"]
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        usage = _token_usage(response)
+        self._end(run_id, prompt_tokens=usage["prompt"], completion_tokens=usage["completion"])
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+    def on_retry(self, retry_state, *, run_id, **kwargs):
+        span = self._open.get(run_id)
+        if span is not None:
+            span["retries"] += 1
+
+    # 🔹 툴
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, **kwargs):
+        self._start("tool", (serialized or {}).get("name") or "tool", run_id, parent_run_id)
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+    # 🔹 체인
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, **kwargs):
+        name = kwargs.get("name") or (serialized or {}).get("name") or "chain"
+        self._start("chain", name, run_id, parent_run_id)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+    # 📌 집계 결과
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        - return: {"llm:gpt-4o-mini": {"count", "p50_ms", "p95_ms", "p99_ms", "errors"}, ...}
+        """
+        with self._lock:
+            return {
+                f"{kind}:{name}": {
+                    "count": hist.count,
+                    "p50_ms": round(hist.quantile(0.50) * 1000, 1),
+                    "p95_ms": round(hist.quantile(0.95) * 1000, 1),
+                    "p99_ms": round(hist.quantile(0.99) * 1000, 1),
+                    "errors": self.errors.get((kind, name), 0),
+                }
+                for (kind, name), hist in self.latency.items()
+            }
+
+    def prometheus_text(self) -> str:
+        """Prometheus text exposition 형식 (/metrics 응답 본문)"""
+        lines = []
+
+        def histogram(metric: str, labels: str, hist: LatencyHistogram) -> None:
+            cumulative = 0
+            for bound, count in zip(list(hist.buckets) + ["+Inf"], hist.counts):
+                cumulative += count
+                lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"{metric}_sum{{{labels}}} {hist.sum}")
+            lines.append(f"{metric}_count{{{labels}}} {hist.count}")
+
+        with self._lock:
+            lines.append("# TYPE langchain_span_duration_seconds histogram")
+            for (kind, name), hist in self.latency.items():
+                histogram("langchain_span_duration_seconds", f'kind="{kind}",name="{name}"', hist)
+            lines.append("# TYPE langchain_llm_ttft_seconds histogram")
+            for name, hist in self.ttft.items():
+                histogram("langchain_llm_ttft_seconds", f'name="{name}"', hist)
+            lines.append("# TYPE langchain_llm_tokens_total counter")
+            for (name, kind), count in self.tokens.items():
+                lines.append(f'langchain_llm_tokens_total{{name="{name}",type="{kind}"}} {count}')
+            lines.append("# TYPE langchain_span_errors_total counter")
+            for (kind, name), count in self.errors.items():
+                lines.append(f'langchain_span_errors_total{{kind="{kind}",name="{name}"}} {count}')
+            lines.append("# TYPE langchain_retries_total counter")
+            for (kind, name), count in self.retries.items():
+                lines.append(f'langchain_retries_total{{kind="{kind}",name="{name}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+# 📌 /metrics 를 제공하는 작은 HTTP 서버 (백그라운드 스레드)
+def start_metrics_server(handler: TracingCallbackHandler, port: int = 9464) -> ThreadingHTTPServer:
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+            body = handler.prometheus_text().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("0.0.0.0", port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
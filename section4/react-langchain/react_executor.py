@@ -0,0 +1,246 @@
+# 재사용 가능한 ReAct 실행기
+# - 프롬프트의 고정 부분(질문, 툴 설명)은 실행마다 한 번만 만들고, 스크래치패드는 문자열에 이어 붙이기만 함
+#   (매 단계 format_log_to_str 로 전체를 다시 만들지 않음)
+# - 고정 부분이 항상 프롬프트 맨 앞에 같은 내용으로 오므로 OpenAI 등의 프롬프트 prefix 캐시가 적용됨
+# - 툴은 이름 → 툴 딕셔너리로 찾고, 한 단계에서 여러 툴을 요청하면 동시에 실행
+# - 최대 단계 수 / 최대 토큰 수 제한
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from langchain_core.agents import AgentAction, AgentFinish
+from langchain_core.exceptions import OutputParserException
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import HumanMessage
+from langchain_core.tools import BaseTool
+from langchain.tools.render import render_text_description
+
+# 🔹 기본 ReAct 프롬프트 (main.py 의 템플릿 + 한 단계에서 여러 툴 요청 허용)
+REACT_TEMPLATE = """Answer the following questions as best you can. You have access to the following tools:
+
+{tools}
+
+Use the following format:
+
+Question: the input question you must answer
+Thought: you should always think about what to do
+Action: the action to take, should be one of [{tool_names}]
+Action Input: the input to the action
+Observation: the result of the action
+... (this Thought/Action/Action Input/Observation can repeat N times)
+Thought: I now know the final answer
+Final Answer: the final answer to the original input question
+
+If several actions do not depend on each other, you may write several Action / Action Input pairs before the Observation.
+
+Begin!
+
+Question: {input}
+Thought:{agent_scratchpad}"""
+
+STOP_SEQUENCES = ["\nObservation", "Observation"]
+
+_ACTION_RE = re.compile(
+    r"Action\s*\d*\s*:[\s]*(.*?)[\s]*Action\s*\d*\s*Input\s*\d*\s*:[\s]*(.*?)(?=\n\s*Action\s*\d*\s*:|\Z)",
+    re.DOTALL,
+)
+_FINAL_ANSWER = "Final Answer:"
+
+
+# 📌 LLM 출력 파싱 (Action 여러 개 또는 Final Answer)
+def parse_react_output(text: str) -> Union[List[AgentAction], AgentFinish]:
+    """
+    - Action / Action Input 쌍이 하나 이상이면 AgentAction 리스트 (log 는 첫 번째 액션에만 전체 출력을 담음)
+    - 액션 없이 Final Answer 만 있으면 AgentFinish
+    - 둘 다 없거나 둘 다 있으면 OutputParserException
+    """
+    matches = _ACTION_RE.findall(text)
+    has_final = _FINAL_ANSWER in text
+    if matches and has_final:
+        raise OutputParserException(f"Parsing LLM output produced both a final answer and an action: {text}")
+    if has_final:
+        return AgentFinish({"output": text.split(_FINAL_ANSWER)[-1].strip()}, text)
+    if not matches:
+        raise OutputParserException(f"Could not parse LLM output: `{text}`")
+    return [
+        AgentAction(tool.strip(), tool_input.strip().strip('"'), text if i == 0 else "")
+        for i, (tool, tool_input) in enumerate(matches)
+    ]
+
+
+# 📌 실행 결과 통계
+@dataclass
+class ReActUsage:
+    steps: int = 0
+    tool_calls: int = 0
+    tokens: int = 0  # LLM 이 알려준 사용량 (없으면 글자 수 / 4 로 추정)
+    prompt_chars: int = 0  # LLM 에 보낸 프롬프트 글자 수 합계
+    prefix_chars: int = 0  # 단계마다 같은 내용으로 반복되는 고정 부분 길이 (prefix 캐시 대상)
+    render_seconds: float = 0.0  # 프롬프트를 만드는 데 쓴 시간
+    tool_seconds: float = 0.0
+
+
+@dataclass
+class ReActResult:
+    output: str
+    intermediate_steps: List[Tuple[AgentAction, str]] = field(default_factory=list)
+    stop_reason: str = "finished"  # finished | max_steps | max_tokens
+    usage: ReActUsage = field(default_factory=ReActUsage)
+
+
+# 📌 ReAct 실행기
+class ReActExecutor:
+    """
+    - llm: 채팅 모델 (stop 시퀀스는 실행기가 bind 하므로 model_kwargs 에 따로 넣지 않음)
+    - tools: 사용할 툴 목록 (이름으로 찾을 수 있도록 딕셔너리로 보관)
+    - max_steps / max_tokens: 예산. 넘으면 그때까지의 스크래치패드로 실행을 멈추고 stop_reason 에 기록
+    - max_workers: 한 단계에서 여러 툴을 요청했을 때 동시에 실행하는 개수
+    - callbacks: LLM / 툴 호출에 전달할 콜백 (예: callbacks.TracingCallbackHandler)
+    - cache_prefix: True 면 고정 부분을 별도 content block 으로 보내고 cache_control 을 표시
+      (Anthropic 처럼 명시적인 캐시 표시가 필요한 provider 용. OpenAI 는 같은 prefix 를 자동으로 캐시)
+    """
+
+    def __init__(
+        self,
+        llm: BaseChatModel,
+        tools: Sequence[BaseTool],
+        template: str = REACT_TEMPLATE,
+        max_steps: int = 10,
+        max_tokens: Optional[int] = None,
+        max_workers: int = 4,
+        cache_prefix: bool = False,
+        callbacks: Optional[list] = None,
+    ):
+        self.llm = llm.bind(stop=STOP_SEQUENCES)
+        self.config = {"callbacks": list(callbacks)} if callbacks else {}
+        self.tools: Dict[str, BaseTool] = {t.name: t for t in tools}
+        self.max_steps = max_steps
+        self.max_tokens = max_tokens
+        self.cache_prefix = cache_prefix
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="react-tool")
+
+        # 🔹 툴 설명은 실행기를 만들 때 한 번만 렌더링
+        head, _, self._suffix = template.partition("{agent_scratchpad}")
+        self._head = head.replace("{tools}", render_text_description(list(tools))).replace(
+            "{tool_names}", ", ".join(self.tools)
+        )
+
+    def _messages(self, prefix: str, scratchpad: str) -> List[HumanMessage]:
+        if not self.cache_prefix:
+            return [HumanMessage(content=prefix + scratchpad + self._suffix)]
+        return [HumanMessage(content=[
+            {"type": "text", "text": prefix, "cache_control": {"type": "ephemeral"}},
+            {"type": "text", "text": scratchpad + self._suffix or " "},
+        ])]
+
+    def _run_tool(self, action: AgentAction) -> str:
+        tool = self.tools.get(action.tool)
+        if tool is None:
+            return f"{action.tool} is not a valid tool, try one of [{', '.join(self.tools)}]."
+        try:
+            return str(tool.invoke(str(action.tool_input), config=self.config))
+        except Exception as e:  # 툴 오류는 관찰 결과로 돌려서 LLM 이 다른 방법을 시도할 수 있게 함
+            return f"Error: {type(e).__name__}: {e}"
+
+    def _run_tools(self, actions: List[AgentAction]) -> List[str]:
+        if len(actions) == 1:
+            return [self._run_tool(actions[0])]
+        return list(self._pool.map(self._run_tool, actions))
+
+    def invoke(self, question: str) -> ReActResult:
+        usage = ReActUsage()
+        steps: List[Tuple[AgentAction, str]] = []
+
+        # 🔹 고정 부분: 실행 중에는 바뀌지 않음
+        started = time.perf_counter()
+        prefix = self._head.replace("{input}", question)
+        usage.prefix_chars = len(prefix)
+        scratchpad = ""
+        usage.render_seconds += time.perf_counter() - started
+
+        while True:
+            if usage.steps >= self.max_steps:
+                return ReActResult("Agent stopped due to max steps.", steps, "max_steps", usage)
+            if self.max_tokens is not None and usage.tokens >= self.max_tokens:
+                return ReActResult("Agent stopped due to max tokens.", steps, "max_tokens", usage)
+
+            messages = self._messages(prefix, scratchpad)
+            usage.prompt_chars += len(prefix) + len(scratchpad)
+            message = self.llm.invoke(messages, config=self.config)
+            usage.steps += 1
+            text = message.content if isinstance(message.content, str) else str(message.content)
+            reported = (getattr(message, "usage_metadata", None) or {}).get("total_tokens")
+            usage.tokens += reported if reported else (len(prefix) + len(scratchpad) + len(text)) // 4
+
+            parsed = parse_react_output(text)
+            if isinstance(parsed, AgentFinish):
+                return ReActResult(parsed.return_values["output"], steps, "finished", usage)
+
+            # 🔹 툴 실행 (여러 개면 동시에)
+            started = time.perf_counter()
+            observations = self._run_tools(parsed)
+            usage.tool_seconds += time.perf_counter() - started
+            usage.tool_calls += len(parsed)
+
+            # 🔹 스크래치패드는 이번 단계 내용만 이어 붙임 (format_log_to_str 와 같은 형식)
+            started = time.perf_counter()
+            if len(parsed) == 1:
+                scratchpad += f"{text}\nObservation: {observations[0]}\nThought: "
+            else:
+                lines = "\n".join(f"Observation ({a.tool}: {a.tool_input}): {o}" for a, o in zip(parsed, observations))
+                scratchpad += f"{text}\n{lines}\nThought: "
+            steps.extend(zip(parsed, observations))
+            usage.render_seconds += time.perf_counter() - started
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False)
+
+
+# 🔹 직접 실행하는 경우: 미리 정해둔 답을 내는 가짜 LLM 으로 동작 확인
+#   - 병렬 툴 실행 (0.3초 걸리는 툴 3개)
+#   - 단계가 많을 때 기존 방식(매 단계 PromptTemplate + format_log_to_str)과 프롬프트 준비 시간 비교
+if __name__ == "__main__":
+    from langchain.agents.format_scratchpad import format_log_to_str
+    from langchain_core.language_models import FakeListChatModel
+    from langchain_core.prompts import PromptTemplate
+    from langchain_core.tools import tool
+
+    @tool
+    def slow_length(text: str) -> int:
+        """Returns the length of a text after a slow lookup."""
+        time.sleep(0.3)
+        return len(text)
+
+    scripted = FakeListChatModel(responses=[
+        "I need all three lengths.\nAction: slow_length\nAction Input: DOG\n"
+        "Action: slow_length\nAction Input: ELEPHANT\nAction: slow_length\nAction Input: CAT",
+        "I now know the final answer\nFinal Answer: 3, 8, 3",
+    ])
+    executor = ReActExecutor(scripted, [slow_length])
+    started = time.perf_counter()
+    result = executor.invoke("What are the lengths of DOG, ELEPHANT and CAT?")
+    print(f"{result.output!r} in {time.perf_counter() - started:.2f}s, usage={result.usage}")
+
+    # 🔹 프롬프트 준비 비용 비교 (같은 스크래치패드 N 단계)
+    n_steps = 200
+    action_text = "Thought: keep going\nAction: slow_length\nAction Input: DOG"
+    prompt = PromptTemplate.from_template(REACT_TEMPLATE).partial(
+        tools=render_text_description([slow_length]), tool_names="slow_length"
+    )
+    started = time.perf_counter()
+    history = []
+    for _ in range(n_steps):
+        prompt.format(input="question", agent_scratchpad=format_log_to_str(history))
+        history.append((AgentAction("slow_length", "DOG", action_text), "3"))
+    rebuild = time.perf_counter() - started
+
+    started = time.perf_counter()
+    prefix, scratchpad = executor._head.replace("{input}", "question"), ""
+    for _ in range(n_steps):
+        executor._messages(prefix, scratchpad)
+        scratchpad += f"{action_text}\nObservation: 3\nThought: "
+    incremental = time.perf_counter() - started
+    print(f"{n_steps} steps prompt rendering: rebuild {rebuild * 1000:.1f} ms, incremental {incremental * 1000:.1f} ms")
+    executor.close()
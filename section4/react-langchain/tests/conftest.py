@@ -0,0 +1,5 @@
+# react-langchain 폴더를 import 경로에 추가 (main.py 를 이 폴더에서 실행할 때와 같은 이름으로 import)
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,131 @@
+import json
+import random
+import time
+
+import pytest
+from langchain_core.language_models import FakeListChatModel, GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+from langchain_core.tools import tool
+
+from callbacks import JsonlSpanWriter, LatencyHistogram, TracingCallbackHandler
+
+
+@tool
+def sleepy(seconds: float) -> str:
+    """Sleeps for the given number of seconds."""
+    time.sleep(seconds)
+    return "done"
+
+
+@tool
+def broken(text: str) -> str:
+    """Always fails."""
+    raise ValueError(f"cannot handle {text}")
+
+
+def test_quantile_interpolates_within_bucket():
+    hist = LatencyHistogram(buckets=(1.0, 2.0, 4.0))
+    for _ in range(50):
+        hist.observe(0.5)
+    for _ in range(50):
+        hist.observe(1.5)
+
+    assert hist.count == 100
+    assert hist.sum == pytest.approx(100.0)
+    assert hist.quantile(0.50) == pytest.approx(1.0)
+    assert hist.quantile(0.95) == pytest.approx(1.9)
+    assert hist.quantile(0.99) == pytest.approx(1.98)
+
+
+def test_quantile_edge_cases():
+    hist = LatencyHistogram(buckets=(1.0, 2.0, 4.0))
+    assert hist.quantile(0.5) == 0.0  # 관측값이 없으면 0
+
+    for _ in range(10):
+        hist.observe(100.0)  # +Inf 구간
+    assert hist.counts == [0, 0, 0, 10]
+    assert hist.quantile(0.99) == 4.0
+
+    hist = LatencyHistogram(buckets=(1.0, 2.0, 4.0))
+    hist.observe(2.0)  # 경계값은 아래 구간 (le="2.0") 에 포함
+    assert hist.counts == [0, 1, 0, 0]
+
+
+def test_quantile_stays_in_true_bucket():
+    rng = random.Random(0)
+    values = sorted(rng.lognormvariate(-3, 1.5) for _ in range(5000))
+    hist = LatencyHistogram()
+    for value in values:
+        hist.observe(value)
+
+    bounds = (0.0,) + hist.buckets + (float("inf"),)
+    for q in (0.5, 0.95, 0.99):
+        exact = values[int(q * len(values)) - 1]
+        i = next(i for i in range(1, len(bounds)) if exact <= bounds[i])
+        assert bounds[i - 1] <= hist.quantile(q) <= min(bounds[i], hist.buckets[-1])
+
+
+def test_summary_per_tool_and_errors():
+    tracer = TracingCallbackHandler()
+    for seconds in (0.01, 0.01, 0.05):
+        sleepy.invoke({"seconds": seconds}, config={"callbacks": [tracer]})
+    with pytest.raises(ValueError):
+        broken.invoke({"text": "x"}, config={"callbacks": [tracer]})
+
+    summary = tracer.summary()
+    assert summary["tool:sleepy"]["count"] == 3
+    assert summary["tool:sleepy"]["errors"] == 0
+    assert 10 <= summary["tool:sleepy"]["p50_ms"] <= summary["tool:sleepy"]["p99_ms"] <= 100
+    assert summary["tool:broken"]["count"] == 1
+    assert summary["tool:broken"]["errors"] == 1
+    assert not tracer._open  # 끝난 span 은 남지 않음
+
+
+def test_tokens_and_ttft_metrics():
+    tracer = TracingCallbackHandler()
+    usage = {"input_tokens": 12, "output_tokens": 3, "total_tokens": 15}
+    chat = GenericFakeChatModel(messages=iter([AIMessage(content="hi", usage_metadata=usage)]))
+    chat.invoke("hello", config={"callbacks": [tracer]})
+
+    streaming = FakeListChatModel(responses=["abc"])
+    assert "".join(chunk.content for chunk in streaming.stream("hello", config={"callbacks": [tracer]})) == "abc"
+
+    # 모델 이름이 없으면 serialized 의 클래스 이름으로 집계
+    assert tracer.tokens[("GenericFakeChatModel", "prompt")] == 12
+    assert tracer.tokens[("GenericFakeChatModel", "completion")] == 3
+    assert set(tracer.ttft) == {"FakeListChatModel"}  # stream 에서만 첫 토큰 시간이 기록됨
+    assert tracer.summary()["llm:FakeListChatModel"]["count"] == 1
+
+    text = tracer.prometheus_text()
+    assert 'langchain_llm_tokens_total{name="GenericFakeChatModel",type="prompt"} 12' in text
+    assert "langchain_llm_ttft_seconds_count" in text
+    assert 'le="+Inf"' in text
+
+
+def test_jsonl_writer_records_nested_spans(tmp_path):
+    path = tmp_path / "spans.jsonl"
+    writer = JsonlSpanWriter(str(path), flush_interval=0.05)
+    tracer = TracingCallbackHandler(writer=writer)
+
+    chain = RunnableLambda(lambda x: sleepy.invoke({"seconds": 0.01})).with_config(run_name="outer")
+    chain.invoke("go", config={"callbacks": [tracer]})
+    with pytest.raises(ValueError):
+        broken.invoke({"text": "x"}, config={"callbacks": [tracer]})
+    writer.close()
+
+    spans = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    by_name = {span["name"]: span for span in spans}
+    assert set(by_name) == {"outer", "sleepy", "broken"}
+    assert writer.dropped == 0
+
+    # 툴 span 의 parent 는 바깥 체인 span
+    assert by_name["sleepy"]["kind"] == "tool"
+    assert by_name["sleepy"]["parent_run_id"] == by_name["outer"]["run_id"]
+    assert by_name["outer"]["kind"] == "chain" and by_name["outer"]["parent_run_id"] is None
+    assert by_name["outer"]["duration_ms"] >= by_name["sleepy"]["duration_ms"] >= 10
+
+    assert by_name["broken"]["status"] == "error"
+    assert by_name["broken"]["error"] == "ValueError: cannot handle x"
+    assert by_name["sleepy"]["status"] == "ok" and "error" not in by_name["sleepy"]
+    assert all(not key.startswith("_") for span in spans for key in span)  # 내부 필드는 기록하지 않음
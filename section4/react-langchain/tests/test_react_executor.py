@@ -0,0 +1,103 @@
+import time
+
+import pytest
+from langchain_core.agents import AgentAction, AgentFinish
+from langchain_core.exceptions import OutputParserException
+from langchain_core.language_models import FakeListChatModel
+from langchain_core.tools import tool
+
+from react_executor import ReActExecutor, parse_react_output
+
+TOOL_SECONDS = 0.3
+
+
+@tool
+def slow_length(text: str) -> int:
+    """Returns the length of a text after a slow lookup."""
+    time.sleep(TOOL_SECONDS)
+    return len(text)
+
+
+@tool
+def broken(text: str) -> str:
+    """Always fails."""
+    raise ValueError(f"cannot handle {text}")
+
+
+def action(tool_name: str, tool_input: str) -> str:
+    return f"Action: {tool_name}\nAction Input: {tool_input}"
+
+
+def run(responses, tools=(slow_length,), **kwargs):
+    executor = ReActExecutor(FakeListChatModel(responses=responses), list(tools), **kwargs)
+    try:
+        return executor.invoke("question")
+    finally:
+        executor.close()
+
+
+def test_parallel_tool_calls_in_one_step():
+    words = ["DOG", "ELEPHANT", "CAT"]
+    responses = [
+        "I need all three lengths.\n" + "\n".join(action("slow_length", w) for w in words),
+        "I now know the final answer\nFinal Answer: 3, 8, 3",
+    ]
+    started = time.perf_counter()
+    result = run(responses)
+    elapsed = time.perf_counter() - started
+
+    assert result.stop_reason == "finished"
+    assert result.output == "3, 8, 3"
+    assert [(a.tool, a.tool_input, o) for a, o in result.intermediate_steps] == [
+        ("slow_length", w, str(len(w))) for w in words
+    ]
+    assert result.usage.steps == 2
+    assert result.usage.tool_calls == 3
+    # 🔹 순서대로 실행하면 0.9초, 동시에 실행하면 0.3초 남짓
+    assert elapsed < TOOL_SECONDS * 2
+
+
+def test_max_steps_budget_stops_loop():
+    result = run([action("slow_length", "DOG")] * 5, max_steps=2)
+    assert result.stop_reason == "max_steps"
+    assert result.usage.steps == 2
+    assert len(result.intermediate_steps) == 2
+
+
+def test_max_tokens_budget_stops_loop():
+    # 🔹 FakeListChatModel 은 usage_metadata 가 없어 글자 수 / 4 로 추정 -> 첫 단계에서 바로 예산 초과
+    result = run([action("slow_length", "DOG")] * 5, max_tokens=1)
+    assert result.stop_reason == "max_tokens"
+    assert result.usage.steps == 1
+    assert result.usage.tokens >= 1
+
+
+def test_tool_errors_become_observations():
+    responses = [
+        action("missing", "x") + "\n" + action("broken", "y"),
+        "Final Answer: done",
+    ]
+    result = run(responses, tools=(slow_length, broken))
+    observations = [o for _, o in result.intermediate_steps]
+    assert observations[0] == "missing is not a valid tool, try one of [slow_length, broken]."
+    assert observations[1] == "Error: ValueError: cannot handle y"
+    assert result.output == "done"
+
+
+def test_parse_react_output():
+    actions = parse_react_output("Thought: two\n" + action("a", '"x"') + "\n" + action("b", "y"))
+    assert [(a.tool, a.tool_input) for a in actions] == [("a", "x"), ("b", "y")]
+    assert isinstance(actions[0], AgentAction) and actions[1].log == ""
+
+    finish = parse_react_output("I know it\nFinal Answer: 42")
+    assert isinstance(finish, AgentFinish) and finish.return_values == {"output": "42"}
+
+    with pytest.raises(OutputParserException, match="Could not parse"):
+        parse_react_output("just thinking out loud")
+    with pytest.raises(OutputParserException, match="both a final answer and an action"):
+        parse_react_output(action("a", "x") + "\nFinal Answer: 42")
+
+
+def test_parse_error_propagates_from_invoke():
+    with pytest.raises(OutputParserException):
+        run([action("slow_length", "DOG"), "no action and no answer"])
@@ -0,0 +1,276 @@
+# 비동기(asyncio) 에이전트 실행
+# - initialize_agent + agent.run 대신 create_react_agent + AgentExecutor.ainvoke 사용
+#   → 이벤트 루프 하나에서 여러 질문을 동시에 처리 (LLM / 검색을 기다리는 동안 다른 질문 진행)
+# - LLM / 벡터 검색 호출은 세마포어 기반 제한기를 거쳐서 provider 할당량(동시 요청 수, 초당 요청 수)을 넘지 않음
+# - aiohttp 서버: 클라이언트 연결이 끊기면 처리 중인 에이전트 작업을 취소 (남은 LLM 호출을 보내지 않음)
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+from langchain.agents import AgentExecutor, create_react_agent
+from langchain_core.language_models import BaseLanguageModel
+from langchain_core.prompts import PromptTemplate
+from langchain_core.runnables import RunnableConfig, RunnableLambda
+from langchain_core.tools import BaseTool, Tool
+
+# 🔹 ReAct 프롬프트 (hub.pull("hwchase17/react") 와 같은 내용, 네트워크 없이 사용)
+REACT_PROMPT = PromptTemplate.from_template("""Answer the following questions as best you can. You have access to the following tools:
+
+{tools}
+
+Use the following format:
+
+Question: the input question you must answer
+Thought: you should always think about what to do
+Action: the action to take, should be one of [{tool_names}]
+Action Input: the input to the action
+Observation: the result of the action
+... (this Thought/Action/Action Input/Observation can repeat N times)
+Thought: I now know the final answer
+Final Answer: the final answer to the original input question
+
+Begin!
+
+Question: {input}
+Thought:{agent_scratchpad}""")
+
+
+# 📌 세마포어 기반 호출 제한기
+class AsyncRateLimiter:
+    """
+    - max_concurrency: 동시에 진행할 수 있는 호출 수 (provider 의 동시 요청 제한)
+    - requests_per_second: 초당 시작할 수 있는 호출 수 (None 이면 제한 없음, 호출 시작 간격을 1/rps 로 맞춤)
+    - async with limiter: ... 형태로 사용. 취소되면 자리를 바로 반납.
+    - stats(): 호출 수, 대기한 호출 수, 평균 대기 시간
+    """
+
+    def __init__(self, max_concurrency: int, requests_per_second: Optional[float] = None):
+        self.max_concurrency = max_concurrency
+        self.requests_per_second = requests_per_second
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._pace_lock = asyncio.Lock()
+        self._next_start = 0.0
+        self.calls = 0
+        self.waited = 0
+        self.wait_seconds = 0.0
+
+    async def __aenter__(self) -> "AsyncRateLimiter":
+        started = time.monotonic()
+        await self._semaphore.acquire()
+        try:
+            if self.requests_per_second:
+                async with self._pace_lock:
+                    delay = self._next_start - time.monotonic()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    self._next_start = max(time.monotonic(), self._next_start) + 1.0 / self.requests_per_second
+        except BaseException:
+            self._semaphore.release()
+            raise
+        waited = time.monotonic() - started
+        self.calls += 1
+        if waited > 0.001:
+            self.waited += 1
+            self.wait_seconds += waited
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self._semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "waited": self.waited,
+            "avg_wait_ms": round(self.wait_seconds / self.waited * 1000, 2) if self.waited else 0.0,
+        }
+
+
+# 📌 LLM 호출을 제한기 안에서 실행하는 Runnable
+def rate_limited_llm(llm: BaseLanguageModel, limiter: AsyncRateLimiter) -> RunnableLambda:
+    """
+    - create_react_agent 가 bind 하는 stop 시퀀스 등은 kwargs 로 그대로 전달.
+    - 동기 호출(invoke)은 제한 없이 원래 LLM 을 호출 (CLI 에서 한 번 실행하는 경우).
+    """
+
+    def call(messages, config: RunnableConfig, **kwargs):
+        return llm.invoke(messages, config=config, **kwargs)
+
+    async def acall(messages, config: RunnableConfig, **kwargs):
+        async with limiter:
+            return await llm.ainvoke(messages, config=config, **kwargs)
+
+    return RunnableLambda(call, afunc=acall, name="rate_limited_llm")
+
+
+# 📌 동기 / 비동기 함수를 제한기 안에서 실행하는 툴
+def limited_tool(
+    name: str,
+    description: str,
+    func: Callable[[str], str],
+    coroutine: Callable[[str], Awaitable[str]],
+    limiter: Optional[AsyncRateLimiter] = None,
+) -> Tool:
+    async def run(query: str) -> str:
+        if limiter is None:
+            return await coroutine(query)
+        async with limiter:
+            return await coroutine(query)
+
+    return Tool(name=name, description=description, func=func, coroutine=run)
+
+
+# 📌 비동기로 실행할 에이전트 생성
+def build_agent(llm: BaseLanguageModel, tools: Sequence[BaseTool], llm_limiter: AsyncRateLimiter,
+                max_iterations: int = 6) -> AgentExecutor:
+    agent = create_react_agent(rate_limited_llm(llm, llm_limiter), list(tools), REACT_PROMPT)
+    # AgentExecutor 는 실행마다 상태를 따로 가지므로 여러 질문이 동시에 ainvoke 해도 안전
+    return AgentExecutor(agent=agent, tools=list(tools), max_iterations=max_iterations,
+                         handle_parsing_errors=True)
+
+
+# 📌 aiohttp 서버: POST /ask {"query": "..."} → {"output": "...", "elapsed": 초}
+def create_app(agent: AgentExecutor, timeout: float = 120.0, limiters: Optional[Dict[str, AsyncRateLimiter]] = None):
+    """
+    - 클라이언트가 응답을 받기 전에 연결을 끊으면 handler_cancellation 으로 핸들러가 취소되고,
+      진행 중인 LLM / 툴 호출도 함께 취소됨 (run_app(..., handler_cancellation=True) 로 실행해야 함).
+    - GET /stats: 처리 중 / 완료 / 취소 / 시간 초과 수와 제한기 통계
+    """
+    from aiohttp import web
+
+    counters = {"in_flight": 0, "completed": 0, "cancelled": 0, "timed_out": 0}
+
+    async def ask(request: "web.Request") -> "web.Response":
+        body = await request.json()
+        query = (body.get("query") or "").strip()
+        if not query:
+            return web.json_response({"error": "query is required"}, status=400)
+        started = time.perf_counter()
+        counters["in_flight"] += 1
+        try:
+            result = await asyncio.wait_for(agent.ainvoke({"input": query}), timeout)
+        except asyncio.TimeoutError:
+            counters["timed_out"] += 1
+            return web.json_response({"error": f"timed out after {timeout}s"}, status=504)
+        except asyncio.CancelledError:
+            counters["cancelled"] += 1  # 클라이언트 연결 끊김
+            raise
+        finally:
+            counters["in_flight"] -= 1
+        counters["completed"] += 1
+        return web.json_response({"output": result["output"], "elapsed": round(time.perf_counter() - started, 3)})
+
+    async def stats(request: "web.Request") -> "web.Response":
+        return web.json_response({**counters, **{name: l.stats() for name, l in (limiters or {}).items()}})
+
+    app = web.Application()
+    app.router.add_post("/ask", ask)
+    app.router.add_get("/stats", stats)
+    return app
+
+
+# 🔹 직접 실행하는 경우: 가짜 LLM(호출마다 200ms) + 가짜 벡터 검색(50ms)으로 동시성별 처리량 측정
+#   python async_agent.py [동시 질문 수 ...]
+#   - 질문 하나 = LLM 2번 + 검색 1번 (약 450ms), LLM 동시 호출은 LLM_MAX_CONCURRENCY(기본 64)로 제한
+#   - 마지막에 서버를 띄워서 클라이언트가 연결을 끊으면 에이전트가 취소되는지 확인
+if __name__ == "__main__":
+    import os
+    import sys
+
+    from langchain_core.language_models import BaseChatModel
+    from langchain_core.messages import AIMessage
+    from langchain_core.outputs import ChatGeneration, ChatResult
+
+    class SlowFakeChatModel(BaseChatModel):
+        """프롬프트에 Observation 이 없으면 검색 액션, 있으면 최종 답을 내는 가짜 모델"""
+
+        latency: float = 0.2
+        calls: int = 0
+
+        @property
+        def _llm_type(self) -> str:
+            return "slow-fake"
+
+        def _respond(self, messages) -> ChatResult:
+            self.calls += 1
+            scratchpad = messages[-1].content.split("Question:")[-1]  # 템플릿 설명 부분 제외
+            if "Observation:" in scratchpad:
+                text = "I now know the final answer\nFinal Answer: Pinecone is a managed vector database."
+            else:
+                text = "I should search.\nAction: Vector Search\nAction Input: what is pinecone"
+            return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+        def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+            time.sleep(self.latency)
+            return self._respond(messages)
+
+        async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+            await asyncio.sleep(self.latency)
+            return self._respond(messages)
+
+    async def fake_search(query: str) -> str:
+        await asyncio.sleep(0.05)
+        return "Pinecone is a vector database."
+
+    async def load_test(levels: List[int]) -> None:
+        llm_limiter = AsyncRateLimiter(int(os.environ.get("LLM_MAX_CONCURRENCY", 64)))
+        search_limiter = AsyncRateLimiter(16)
+        llm = SlowFakeChatModel()
+        tools = [limited_tool("Vector Search", "Searches the vector DB.", lambda q: "", fake_search, search_limiter)]
+        agent = build_agent(llm, tools, llm_limiter)
+
+        print("sequential agent.invoke x 4 (before): ", end="", flush=True)
+        started = time.perf_counter()
+        for _ in range(4):
+            agent.invoke({"input": "What is Pinecone?"})
+        print(f"{4 / (time.perf_counter() - started):.2f} queries/sec")
+
+        for concurrency in levels:
+            total = concurrency * 4
+            queue: asyncio.Queue = asyncio.Queue()
+            for _ in range(total):
+                queue.put_nowait("What is Pinecone?")
+            latencies: List[float] = []
+
+            async def worker() -> None:
+                while not queue.empty():
+                    query = queue.get_nowait()
+                    started = time.perf_counter()
+                    result = await agent.ainvoke({"input": query})
+                    assert "vector database" in result["output"]
+                    latencies.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            elapsed = time.perf_counter() - started
+            latencies.sort()
+            print(f"concurrency {concurrency:>4}: {total / elapsed:7.2f} queries/sec, "
+                  f"p50 {latencies[len(latencies) // 2] * 1000:5.0f} ms, p95 {latencies[int(len(latencies) * 0.95)] * 1000:5.0f} ms, "
+                  f"llm limiter {llm_limiter.stats()}")
+
+        await cancellation_check(agent, llm)
+
+    async def cancellation_check(agent: AgentExecutor, llm: SlowFakeChatModel) -> None:
+        import aiohttp
+        from aiohttp import web
+
+        runner = web.AppRunner(create_app(agent), handler_cancellation=True)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        calls_before = llm.calls
+        async with aiohttp.ClientSession() as session:
+            try:
+                # 첫 LLM 호출(200ms) 도중에 연결을 끊음
+                await session.post(f"http://127.0.0.1:{port}/ask", json={"query": "What is Pinecone?"},
+                                   timeout=aiohttp.ClientTimeout(total=0.1))
+            except asyncio.TimeoutError:
+                pass
+            await asyncio.sleep(1.0)  # 취소되지 않았다면 이 사이에 LLM 이 2번 호출됨
+            async with session.get(f"http://127.0.0.1:{port}/stats") as response:
+                stats = await response.json()
+        await runner.cleanup()
+        print(f"client disconnect: cancelled={stats['cancelled']} completed={stats['completed']} "
+              f"llm calls finished after disconnect={llm.calls - calls_before}")
+
+    asyncio.run(load_test([int(n) for n in sys.argv[1:]] or [1, 8, 32, 128]))
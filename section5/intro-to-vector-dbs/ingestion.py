@@ -1,16 +1,25 @@
 # Document loaders can even load notion db !
 # https://python.langchain.com/v0.1/docs/integrations/document_loaders/
 
-# 1. 텍스트 문서를 불러온 후, 1000자 단위로 분할
-# 2. 각 분할된 텍스트에 대해 OpenAI 임베딩을 생성
-# 3. 생성된 임베딩을 Pinecone 벡터 데이터베이스에 저장
+# 1. 매니페스트와 비교해서 새로 생기거나 바뀐 텍스트 문서만 불러온 후, 1000자 단위로 분할
+# 2. 분할된 텍스트를 배치로 묶어서 여러 배치를 동시에 OpenAI 임베딩
+# 3. 생성된 임베딩을 백그라운드에서 Pinecone 벡터 데이터베이스에 저장
+#    (삭제되거나 바뀐 문서의 예전 청크는 Pinecone 에서 삭제)
 import os
+import sys
 from dotenv import load_dotenv  # .env 파일에서 환경 변수를 불러오기 위해 사용
 from langchain_community.document_loaders import TextLoader  # 텍스트 문서를 불러오는 모듈
-from langchain_text_splitters import CharacterTextSplitter  # 문서를 분할하기 위한 모듈
-from langchain_openai import OpenAIEmbeddings  # OpenAI의 임베딩 기능을 사용하기 위한 모듈
 from langchain_pinecone import PineconeVectorStore  # Pinecone에 벡터를 저장하기 위한 모듈
 
+# section5/rag_utils 를 import 할 수 있도록 상위 폴더를 경로에 추가
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from rag_utils.pipeline import expand_paths  # 파일/폴더 경로를 파일 목록으로 펼치는 헬퍼
+from rag_utils.manifest import IngestionManifest, sync_sources  # 증분 재수집
+from rag_utils.embedding_cache import cached_openai_embeddings  # 캐시를 앞에 둔 OpenAI 임베딩
+from rag_utils.token_splitter import SentenceTokenSplitter  # 토큰 수 기준, 문장 경계 우선 분할기
+from rag_utils.hybrid import BM25Index  # 같은 청크로 만드는 키워드(BM25) 색인
+from rag_utils.numpy_store import NumpyVectorStore  # Pinecone 대신 쓸 수 있는 로컬 NumPy 벡터 스토어
+
 # .env 파일에 저장된 환경 변수 불러오기 (예: OPENAI_API_KEY, INDEX_NAME 등)
 load_dotenv()
 
@@ -18,27 +27,54 @@ load_dotenv()
 if __name__ == "__main__":
     print("Ingesting...")
 
-    # 텍스트 파일을 불러옵니다.
-    loader = TextLoader("/Users/edenmarco/Desktop/intro-to-vector-dbs/mediumblog1.txt")
-    document = loader.load()  # 문서 로드
-
-    print("splitting...")
+    # 불러올 텍스트 파일 또는 폴더 목록 (인자로 넘기지 않으면 기본 파일 사용)
+    # --prune: 인자로 넘긴 파일이 수집 대상 전체 → 목록에 없는 예전 파일의 청크도 삭제
+    #          (없으면 디스크에서 사라진 파일과, 인자로 넘긴 폴더 아래에서 없어진 파일만 삭제)
+    prune = "--prune" in sys.argv[1:]
+    paths = [arg for arg in sys.argv[1:] if arg != "--prune"]
+    paths = paths or ["/Users/edenmarco/Desktop/intro-to-vector-dbs/mediumblog1.txt"]
 
-    # 문서를 1000자 크기로 분할하며, 중복(overlap)은 없습니다.
-    text_splitter = CharacterTextSplitter(chunk_size=1000, chunk_overlap=0)
-    texts = text_splitter.split_documents(document)  # 문서 분할
-    print(f"created {len(texts)} chunks")  # 분할된 문서의 수 출력
+    # 문서를 임베딩 모델 토큰 기준 256 토큰(약 1000자) 크기로, 문단 / 문장 경계에서 분할하며, 중복(overlap)은 없습니다.
+    text_splitter = SentenceTokenSplitter(chunk_size=int(os.environ.get("CHUNK_TOKENS", 256)), chunk_overlap=0)
 
     # OpenAI Embeddings 객체 생성 (환경 변수에서 API 키 불러오기)
-    embeddings = OpenAIEmbeddings(openai_api_key=os.environ.get("OPENAI_API_KEY"))
+    # 이미 임베딩한 청크는 로컬 캐시에서 가져오고, 새 청크만 OpenAI 로 전송
+    embeddings = cached_openai_embeddings(openai_api_key=os.environ.get("OPENAI_API_KEY"))
+
+    # 벡터 스토어: 기본은 Pinecone (INDEX_NAME 환경 변수의 인덱스 사용)
+    # VECTOR_STORE=numpy 면 로컬 NumPy 스토어에 저장 (NUMPY_INDEX 폴더, 바뀐 경우에만 save_local)
+    persist_fn = None
+    if os.environ.get("VECTOR_STORE") == "numpy":
+        numpy_index = os.environ.get("NUMPY_INDEX", "numpy_index")
+        vectorstore = NumpyVectorStore.load_local(numpy_index, embeddings)
+        persist_fn = lambda: vectorstore.save_local(numpy_index)
+    else:
+        vectorstore = PineconeVectorStore(index_name=os.environ["INDEX_NAME"], embedding=embeddings)
+
+    # 지난 실행 때 수집한 파일 목록 / 해시 / 청크 id 기록
+    manifest = IngestionManifest(os.environ.get("INGEST_MANIFEST", "ingestion_manifest.json"))
 
-    print("ingesting...")
+    # 하이브리드 검색용 BM25 색인 (main.py 의 검색 도구가 같은 파일을 사용)
+    lexical_index = BM25Index(os.environ.get("BM25_INDEX", "bm25_index.json"))
 
-    # 분할된 문서들을 임베딩한 후, Pinecone 벡터 스토어에 저장
-    PineconeVectorStore.from_documents(
-        texts,  # 분할된 문서 리스트
-        embeddings,  # 임베딩 객체
-        index_name=os.environ["INDEX_NAME"]  # Pinecone 인덱스 이름 (환경 변수에서 불러옴)
+    # 바뀐 파일만 읽고 분할 → 배치 단위 동시 임베딩 → 백그라운드 업서트
+    diff, stats = sync_sources(
+        list(expand_paths(paths)),  # 현재 수집 대상 파일 목록
+        manifest,
+        lambda path: TextLoader(path).lazy_load(),  # 파일을 지연 로딩
+        text_splitter,
+        embeddings,
+        vectorstore,
+        persist_fn=persist_fn,  # NumPy 스토어는 매니페스트보다 먼저 디스크에 저장
+        lexical_index=lexical_index,  # Pinecone 에 올린 청크를 BM25 색인에도 추가 / 삭제
+        roots=[path for path in paths if os.path.isdir(path)],  # 다시 훑은 폴더
+        prune=prune,
+        batch_size=int(os.environ.get("EMBED_BATCH_SIZE", 64)),  # 한 번에 임베딩할 청크 수
+        max_workers=int(os.environ.get("EMBED_WORKERS", 4)),  # 동시에 임베딩할 배치 수
     )
 
+    # 추가 / 수정 / 삭제 / 변경 없음 파일 수 출력
+    print(f"added={len(diff.added)} modified={len(diff.modified)} "
+          f"deleted={len(diff.deleted)} unchanged={len(diff.unchanged)}")
+    print(stats.report())  # 청크 수, chunks/sec, 단계별 소요 시간 출력
     print("finish")  # 작업 완료 메시지 출력
@@ -2,58 +2,99 @@
 # 저장된 벡터 데이터베이스에서 질문에 관련된 문서를 검색
 # 검색된 문서를 결합한 뒤, OpenAI LLM을 통해 질문에 대한 응답을 생성.
 # 필요한 라이브러리 및 모듈 불러오기
+import asyncio
 import os
+import sys
 from dotenv import load_dotenv  # 환경 변수를 로드하기 위한 모듈
-from langchain_openai import OpenAIEmbeddings, ChatOpenAI  # OpenAI 임베딩 및 챗봇 모델
+from langchain_openai import ChatOpenAI  # OpenAI 챗봇 모델
 from langchain_pinecone import PineconeVectorStore  # Pinecone 벡터 스토어와 연동하기 위한 모듈
-from langchain.agents import initialize_agent, Tool  # LangChain 에이전트 및 도구 초기화 모듈
+from langchain.agents import Tool  # LangChain 도구 모듈
+
+# section5/rag_utils 를 import 할 수 있도록 상위 폴더를 경로에 추가
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from rag_utils.embedding_cache import cached_openai_embeddings  # 캐시를 앞에 둔 OpenAI 임베딩
+from rag_utils.hybrid import BM25Index, HybridRetriever  # BM25 + 벡터 하이브리드 검색
+from rag_utils.numpy_store import NumpyVectorStore  # Pinecone 대신 쓸 수 있는 로컬 NumPy 벡터 스토어
+from rag_utils.calculator import calculate  # eval 없이 수식만 계산하는 안전한 계산기
+from async_agent import AsyncRateLimiter, build_agent, create_app, limited_tool  # 비동기 에이전트 실행
 
 # .env 파일에 저장된 환경 변수 불러오기 (예: OPENAI_API_KEY, INDEX_NAME 등)
 load_dotenv()
 
 # OpenAI의 임베딩 모델 초기화 (텍스트 데이터를 벡터로 변환)
-embeddings = OpenAIEmbeddings()
+# 같은 질문은 로컬 캐시에서 벡터를 가져오므로 임베딩 API 를 다시 호출하지 않음
+embeddings = cached_openai_embeddings()
 
 # OpenAI의 챗봇 모델 초기화 (질문에 대한 자연어 응답 생성)
 llm = ChatOpenAI()
 
-# Pinecone 벡터 스토어 초기화
+# 벡터 스토어 초기화
 # 저장된 벡터 데이터베이스에서 문서 검색에 사용
-vectorstore = PineconeVectorStore(
-    index_name=os.environ["INDEX_NAME"],  # 환경 변수에서 Pinecone 인덱스 이름 불러오기
-    embedding=embeddings  # 임베딩 모델을 벡터 스토어에 연결
+if os.environ.get("VECTOR_STORE") == "numpy":
+    # ingestion.py 가 VECTOR_STORE=numpy 로 저장한 로컬 인덱스 (네트워크 왕복 없이 프로세스 안에서 검색)
+    vectorstore = NumpyVectorStore.load_local(os.environ.get("NUMPY_INDEX", "numpy_index"), embeddings)
+else:
+    vectorstore = PineconeVectorStore(
+        index_name=os.environ["INDEX_NAME"],  # 환경 변수에서 Pinecone 인덱스 이름 불러오기
+        embedding=embeddings  # 임베딩 모델을 벡터 스토어에 연결
+    )
+
+# BM25 + 벡터 하이브리드 검색기 (BM25 색인은 ingestion.py 가 같은 청크로 만들어 둔 파일)
+# 키워드 검색 결과가 확실하면 Pinecone / 임베딩 호출 없이 바로 반환
+retriever = HybridRetriever(
+    vectorstore=vectorstore,
+    lexical_index=BM25Index(os.environ.get("BM25_INDEX", "bm25_index.json")),
+    k=3,
+    skip_vector_margin=1.5,
 )
 
 # -------- 벡터 검색 함수 정의 --------
 def pinecone_vector_search(query):
     """
-    Pinecone 벡터 스토어에서 입력된 쿼리와 가장 유사한 문서를 검색하는 함수.
+    Pinecone 벡터 스토어와 BM25 색인에서 입력된 쿼리와 가장 관련 있는 문서를 검색하는 함수.
     - query: 검색하고 싶은 질문(문자열)
-    - return: 검색된 문서 내용 (최대 3개)
+    - return: 검색된 문서 내용 (최대 3개, 두 검색 결과를 RRF 로 합친 순서)
     """
-    results = vectorstore.similarity_search(query, k=3)  # 유사한 상위 3개 문서 검색
+    results = retriever.invoke(query)  # 하이브리드 검색으로 상위 3개 문서 검색
     return "\n".join([doc.page_content for doc in results])  # 검색된 문서 내용을 문자열로 반환
 
 
+async def apinecone_vector_search(query):
+    """
+    pinecone_vector_search 의 비동기 버전 (검색을 기다리는 동안 이벤트 루프가 다른 질문을 처리).
+    """
+    results = await retriever.ainvoke(query)
+    return "\n".join([doc.page_content for doc in results])
+
+
 # -------- 간단한 계산 함수 정의 --------
 def simple_calculator(expression):
     """
     수학 수식을 받아서 결과를 반환하는 간단한 계산 함수.
-    - expression: 계산할 수식 (예: "123 + 456")
+    - expression: 계산할 수식 (예: "123 + 456"). 여러 줄 또는 ';' 로 구분하면 한 번에 모두 계산.
     - return: 계산 결과 (문자열)
+    - eval 대신 숫자 / 사칙연산 / 거듭제곱 / 일부 수학 함수만 허용하는 계산기 사용 (크기 / 시간 제한 포함)
     """
-    try:
-        return str(eval(expression))  # eval()을 사용하여 수식 계산
-    except Exception as e:
-        return f"Error calculating expression: {str(e)}"  # 계산 중 오류 발생 시 에러 메시지 반환
+    return calculate(expression)  # 오류는 "Error calculating expression: ..." 문자열로 반환
+
 
+# -------- provider 할당량 제한 --------
+# LLM: 동시 요청 수(LLM_MAX_CONCURRENCY) + 초당 요청 수(LLM_RPS, 없으면 제한 없음)
+# 벡터 검색: 동시 요청 수(SEARCH_MAX_CONCURRENCY)
+llm_limiter = AsyncRateLimiter(
+    int(os.environ.get("LLM_MAX_CONCURRENCY", 8)),
+    float(os.environ["LLM_RPS"]) if os.environ.get("LLM_RPS") else None,
+)
+search_limiter = AsyncRateLimiter(int(os.environ.get("SEARCH_MAX_CONCURRENCY", 16)))
 
 # -------- LangChain 에이전트 도구 목록 정의 --------
 tools = [
-    Tool(
+    limited_tool(
         name="Pinecone Vector Search",  # 도구 이름
+        description="벡터 DB에서 문서를 검색합니다.",  # 도구 설명
         func=pinecone_vector_search,  # Pinecone 검색 함수 연결
-        description="벡터 DB에서 문서를 검색합니다."  # 도구 설명
+        coroutine=apinecone_vector_search,  # ainvoke 할 때 사용하는 비동기 버전
+        limiter=search_limiter,
     ),
     Tool(
         name="Calculator",  # 도구 이름
@@ -63,20 +104,28 @@ tools = [
 ]
 
 # -------- LangChain 에이전트 초기화 --------
-agent = initialize_agent(
-    tools,  # 에이전트가 사용할 도구 목록
-    llm,  # OpenAI 챗봇 모델
-    agent_type="zero-shot-react-description"  # 에이전트 타입 설정 (지정된 도구를 상황에 맞게 사용)
-)
+# create_react_agent + AgentExecutor (LLM 호출은 llm_limiter 를 거침)
+agent = build_agent(llm, tools, llm_limiter)
 
 # -------- 에이전트 실행 --------
-# 에이전트에게 두 가지 작업을 지시:
-# 1. Pinecone이 무엇인지 설명
-# 2. 123 + 456 계산
-query = "Pinecone이 뭔지 설명해줘, 그리고 123+456 계산해줘"
+# python main.py          : 질문 하나를 실행하고 결과 출력
+# python main.py --serve  : aiohttp 서버 (POST /ask {"query": ...}), 여러 질문을 이벤트 루프 하나에서 동시에 처리
+if __name__ == "__main__":
+    if "--serve" in sys.argv:
+        from aiohttp import web
+
+        limiters = {"llm": llm_limiter, "search": search_limiter}
+        # handler_cancellation: 클라이언트 연결이 끊기면 처리 중인 에이전트 작업 취소
+        web.run_app(create_app(agent, limiters=limiters), port=int(os.environ.get("PORT", 8080)),
+                    handler_cancellation=True)
+    else:
+        # 에이전트에게 두 가지 작업을 지시:
+        # 1. Pinecone이 무엇인지 설명
+        # 2. 123 + 456 계산
+        query = "Pinecone이 뭔지 설명해줘, 그리고 123+456 계산해줘"
 
-# 에이전트가 query에 따라 필요한 도구(Pinecone 검색, 계산기)를 사용하여 결과 생성
-result = agent.run(query)
+        # 에이전트가 query에 따라 필요한 도구(Pinecone 검색, 계산기)를 사용하여 결과 생성
+        result = asyncio.run(agent.ainvoke({"input": query}))
 
-# -------- 결과 출력 --------
-print(result)  # 에이전트가 반환한 최종 결과 출력
+        # -------- 결과 출력 --------
+        print(result["output"])  # 에이전트가 반환한 최종 결과 출력
@@ -5,42 +5,70 @@ import os
 os.environ["OPENAI_API_KEY"] = "xxx"
 
 # --------- 필요한 라이브러리 불러오기 ---------
-from langchain_community.document_loaders import PyPDFLoader  # PDF 파일 로딩 모듈
-from langchain_text_splitters import CharacterTextSplitter  # 텍스트 분할 모듈
-from langchain_openai import OpenAIEmbeddings, OpenAI  # OpenAI 임베딩 및 LLM 모델
-from langchain_community.vectorstores import FAISS  # FAISS 벡터 스토어 (로컬 벡터 검색 엔진)
+import sys
+from langchain_openai import OpenAI  # OpenAI LLM 모델
 from langchain.chains.retrieval import create_retrieval_chain  # 검색 체인 생성 모듈
 from langchain.chains.combine_documents import create_stuff_documents_chain  # 문서 결합 체인 생성 모듈
 from langchain import hub  # LangChain 프롬프트 허브
 
+# section5/rag_utils 를 import 할 수 있도록 상위 폴더를 경로에 추가
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from rag_utils.embedding_cache import cached_openai_embeddings  # 캐시를 앞에 둔 OpenAI 임베딩
+from rag_utils.manifest import IngestionManifest, sync_sources  # 증분 재수집
+from rag_utils.mmap_index import MmapVectorStore  # mmap 기반 로컬 벡터 인덱스 (pickle 없이 로드)
+from rag_utils.quantized_index import QuantizedMmapVectorStore  # int8 / PQ 코드로 검색 + float32 재정렬
+from rag_utils.hybrid import BM25Index, HybridRetriever  # BM25 + 벡터 하이브리드 검색
+from rag_utils.sharded import ShardedRetriever  # 여러 로컬 인덱스를 프로세스 풀에서 동시에 검색
+from rag_utils.token_splitter import SentenceTokenSplitter  # 토큰 수 기준, 문장 경계 우선 분할기
+from rag_utils.pdf_loader import ParallelPDFLoader, PassthroughSplitter  # 페이지 범위 병렬 로딩 + 분할
+from rag_utils.semantic_cache import SemanticAnswerCache, SemanticCachedChain, index_version  # 비슷한 질문 답변 캐시
+
 # --------- 메인 실행 부분 ---------
 if __name__ == "__main__":
     print("hi")
 
-    # --------- 1. PDF 파일 불러오기 ---------
-    pdf_path = "/Users/edenmarco/Desktop/tmp/react.pdf"  # 분석할 PDF 파일 경로
-    loader = PyPDFLoader(file_path=pdf_path)  # PDF 파일 로드
-    documents = loader.load()  # PDF 문서를 텍스트로 변환하여 로드
+    # --------- 1. 분석할 PDF 파일 목록 ---------
+    # --prune: 인자로 넘긴 PDF 가 수집 대상 전체 → 목록에 없는 예전 PDF 의 청크도 삭제 (없으면 디스크에서 사라진 PDF 만)
+    prune = "--prune" in sys.argv[1:]
+    pdf_paths = [arg for arg in sys.argv[1:] if arg != "--prune"]
+    pdf_paths = pdf_paths or ["/Users/edenmarco/Desktop/tmp/react.pdf"]  # 분석할 PDF 파일 경로
+    index_path = "mmap_index_react"  # 로컬 벡터 인덱스 저장 폴더
 
-    # --------- 2. 문서 분할 ---------
-    text_splitter = CharacterTextSplitter(
-        chunk_size=1000,      # 각 텍스트 조각의 크기를 1000자로 설정
-        chunk_overlap=30,     # 문서 조각 간 30자 중복 허용
-        separator="\n"        # 줄바꿈 기준으로 분할
-    )
-    docs = text_splitter.split_documents(documents=documents)  # 문서 분할 실행
-
-    # --------- 3. 문서 임베딩 및 FAISS에 저장 ---------
-    embeddings = OpenAIEmbeddings()  # OpenAI 임베딩 모델 초기화 (문서 → 벡터로 변환)
-    vectorstore = FAISS.from_documents(docs, embeddings)  # 분할된 문서를 FAISS 벡터 스토어에 저장
-    vectorstore.save_local("faiss_index_react")  # 생성된 벡터 인덱스를 로컬에 저장 (faiss_index_react 폴더)
-
-    # --------- 4. 저장된 FAISS 인덱스 불러오기 ---------
-    new_vectorstore = FAISS.load_local(
-        "faiss_index_react",  # 저장된 인덱스 폴더 경로
-        embeddings,           # 동일한 임베딩 모델 사용
-        allow_dangerous_deserialization=True  # 비직렬화 경고 무시 (로컬 파일이므로 안전)
+    # --------- 2. 문서 분할기 ---------
+    text_splitter = SentenceTokenSplitter(
+        chunk_size=int(os.environ.get("CHUNK_TOKENS", 256)),  # 각 텍스트 조각을 임베딩 모델 기준 256 토큰(약 1000자) 이하로
+        chunk_overlap=8,      # 문서 조각 간 8 토큰(약 30자) 중복 허용 (문장 단위)
+    )                         # 문단 → 문장 → 줄 경계 순서로 자름
+
+    # --------- 3. 기존 인덱스 불러오기 (mmap 이라 문서 수와 상관없이 바로 열림) ---------
+    embeddings = cached_openai_embeddings()  # OpenAI 임베딩 모델 초기화 (문서 → 벡터로 변환, 로컬 캐시 사용)
+    # INDEX_QUANTIZATION=int8 / pq 면 작은 코드만 RAM 에서 훑고, 후보만 float32 벡터로 다시 정렬
+    # (같은 폴더에 codes-<세대>.u8 / quantizer.npz 를 추가로 만듦. 처음 열 때 기존 벡터로 코드 생성)
+    quantization = os.environ.get("INDEX_QUANTIZATION", "")
+    if quantization:
+        new_vectorstore = QuantizedMmapVectorStore(index_path, embeddings, quantization=quantization)
+    else:
+        new_vectorstore = MmapVectorStore(index_path, embeddings)  # 벡터와 문서는 디스크에 두고 필요한 부분만 읽음
+    lexical_index = BM25Index(os.path.join(index_path, "bm25.json"))  # 같은 청크로 만든 키워드 색인
+
+    # --------- 4. 바뀐 PDF 만 다시 분할 / 임베딩해서 인덱스 갱신 ---------
+    # 매니페스트(mmap_index_react/manifest.json)와 비교해서
+    # 새 PDF 는 추가, 바뀐 PDF 는 예전 청크 삭제 후 다시 추가, 디스크에서 사라진 PDF 는 청크 삭제
+    manifest = IngestionManifest(os.path.join(index_path, "manifest.json"))
+    diff, stats = sync_sources(
+        pdf_paths,
+        manifest,
+        # PDF 를 페이지 범위 단위로 여러 프로세스에서 파싱 + 분할하고, 끝난 범위부터 순서대로 청크를 넘김
+        # (PDF_WORKERS 로 프로세스 수 조절, 이미 분할된 청크이므로 PassthroughSplitter 사용)
+        lambda path: ParallelPDFLoader(path, text_splitter).lazy_load(),
+        PassthroughSplitter(),
+        embeddings,
+        new_vectorstore,  # 추가/삭제가 바로 디스크에 기록되므로 save_local 이 필요 없음
+        lexical_index=lexical_index,  # BM25 색인도 함께 갱신 / 저장
+        prune=prune,
     )
+    print(f"added={len(diff.added)} modified={len(diff.modified)} "
+          f"deleted={len(diff.deleted)} unchanged={len(diff.unchanged)}")
 
     # --------- 5. LangChain 프롬프트 및 체인 설정 ---------
     retrieval_qa_chat_prompt = hub.pull("langchain-ai/retrieval-qa-chat")  
@@ -51,13 +79,40 @@ if __name__ == "__main__":
     )
     # 검색된 문서를 결합하고 OpenAI LLM을 통해 최종 응답 생성
 
+    # INDEX_SHARDS=다른_컬렉션_인덱스,... 면 이 인덱스와 함께 모든 샤드를 동시에 벡터 검색
+    # (BM25 색인은 컬렉션마다 따로라서 샤드 검색에서는 사용하지 않음, SEARCH_BUDGET_MS 가 지나면 끝난 샤드 결과만 사용)
+    extra_shards = [path for path in os.environ.get("INDEX_SHARDS", "").split(",") if path]
+    if extra_shards:
+        retriever = ShardedRetriever(
+            shard_paths=[index_path, *extra_shards],
+            embedding=embeddings,
+            k=3,
+            quantization=quantization,
+            budget=float(os.environ["SEARCH_BUDGET_MS"]) / 1000 if os.environ.get("SEARCH_BUDGET_MS") else None,
+        )
+    else:
+        retriever = HybridRetriever(vectorstore=new_vectorstore, lexical_index=lexical_index)  # BM25 + 벡터 검색을 RRF 로 합침
+
     retrieval_chain = create_retrieval_chain(
-        new_vectorstore.as_retriever(),  # FAISS 벡터 스토어를 검색기로 사용
+        retriever,
         combine_docs_chain               # 검색된 문서를 결합하는 체인
     )
 
-    # --------- 6. 질문하고 답변 받기 ---------
-    res = retrieval_chain.invoke({"input": "Give me the gist of ReAct in 3 sentences"})
-    # "ReAct(Reasoning and Acting)"에 대한 요약 요청
+    # --------- 6. 의미 기반 답변 캐시 ---------
+    # 표현만 조금 다른 질문은 검색 / LLM 호출 없이 예전 답변과 근거 문서를 반환
+    # 인덱스가 다시 수집되면 (index.json 이 바뀌면) 캐시를 비움
+    answer_cache = SemanticAnswerCache(
+        embeddings,
+        threshold=float(os.environ.get("ANSWER_CACHE_THRESHOLD", 0.92)),
+        version_fn=lambda: index_version(new_vectorstore),
+    )
+    cached_chain = SemanticCachedChain(retrieval_chain, answer_cache)
+
+    # --------- 7. 질문하고 답변 받기 ---------
+    for question in ["Give me the gist of ReAct in 3 sentences", "Give me the gist of ReAct in three sentences"]:
+        res = cached_chain.invoke({"input": question})
+        # "ReAct(Reasoning and Acting)"에 대한 요약 요청
 
-    print(res["answer"])  # 최종 답변 출력
+        print(res["answer"])  # 최종 답변 출력
+        print(f"cache_hit={res['cache_hit']} similarity={res['similarity']}")
+    print(answer_cache.stats())  # 적중률, 절약된 시간
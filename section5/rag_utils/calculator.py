@@ -0,0 +1,450 @@
+# 안전한 사칙연산 계산기 (eval 대체)
+# - LLM 이 만든 문자열을 eval 하지 않고, AST 를 허용된 노드(숫자, 사칙연산, 거듭제곱, 일부 수학 함수)만 남는지 검사한 뒤
+#   파이썬 함수(클로저) 트리로 컴파일해서 실행
+# - 숫자만 다른 수식은 같은 템플릿으로 보고 컴파일 결과를 재사용 ("12+3" 과 "45+6" 은 같은 프로그램)
+# - 크기 제한: 수식 길이 / 노드 수 / 정수 크기(비트 수) / 지수 / 계산 시간 → "9**9**9" 같은 수식도 바로 오류 반환
+# - 수식 여러 개는 템플릿별로 묶어서 NumPy 배열로 한 번에 계산 (정확하지 않을 수 있는 값만 다시 하나씩 계산)
+import ast
+import math
+import operator
+import re
+import time
+from typing import Any, Callable, Dict, List, Sequence, Tuple, Union
+
+import numpy as np
+
+MAX_EXPRESSION_LENGTH = 1000  # 수식 최대 글자 수
+MAX_NODES = 256  # AST 노드 최대 개수
+MAX_INT_BITS = 4096  # 정수 피연산자 / 결과 최대 비트 수 (약 1233자리)
+MAX_EXPONENT = 10_000  # 거듭제곱 지수 최대 절댓값
+TIME_BUDGET = 0.05  # 수식 하나의 계산 시간 제한 (초)
+VECTORIZE_MIN = 16  # 같은 템플릿 수식이 이 개수 이상이면 NumPy 로 한 번에 계산
+
+Number = Union[int, float]
+
+
+class CalculatorError(ValueError):
+    """허용되지 않은 수식, 크기 / 시간 제한 초과, 0 으로 나누기 등"""
+
+
+# 🔹 크기를 먼저 확인하는 연산 (계산하기 전에 결과가 너무 커지는지 판단)
+def _check_int(value: Number) -> Number:
+    if isinstance(value, int) and value.bit_length() > MAX_INT_BITS:
+        raise CalculatorError(f"result exceeds {MAX_INT_BITS} bits")
+    return value
+
+
+def _mul(a: Number, b: Number) -> Number:
+    if isinstance(a, int) and isinstance(b, int) and a.bit_length() + b.bit_length() > MAX_INT_BITS + 1:
+        raise CalculatorError(f"result exceeds {MAX_INT_BITS} bits")
+    return _check_int(a * b)
+
+
+def _pow(base: Number, exponent: Number) -> Number:
+    if abs(exponent) > MAX_EXPONENT:
+        raise CalculatorError(f"exponent {exponent} exceeds {MAX_EXPONENT}")
+    if isinstance(base, int) and isinstance(exponent, int) and exponent > 0 \
+            and (base.bit_length() - 1) * exponent > MAX_INT_BITS:
+        raise CalculatorError(f"result exceeds {MAX_INT_BITS} bits")
+    result = base ** exponent
+    if isinstance(result, complex):
+        raise CalculatorError("complex result")
+    return _check_int(result)
+
+
+def _round(value: Number, digits: int = 0) -> Number:
+    return round(value, int(digits)) if digits else round(value)
+
+
+_SCALAR_BINOPS: Dict[type, Callable[[Any, Any], Any]] = {
+    ast.Add: lambda a, b: _check_int(a + b),
+    ast.Sub: lambda a, b: _check_int(a - b),
+    ast.Mult: _mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: _pow,
+}
+_ARRAY_BINOPS: Dict[type, Callable[[Any, Any], Any]] = {
+    ast.Add: np.add,
+    ast.Sub: np.subtract,
+    ast.Mult: np.multiply,
+    ast.Div: np.true_divide,
+    ast.FloorDiv: np.floor_divide,
+    ast.Mod: np.mod,
+    ast.Pow: np.power,
+}
+_UNARYOPS = {ast.UAdd: operator.pos, ast.USub: operator.neg}
+
+_SCALAR_FUNCTIONS: Dict[str, Callable] = {
+    "abs": abs, "round": _round, "min": min, "max": max,
+    "sqrt": math.sqrt, "exp": math.exp, "log": math.log, "log10": math.log10,
+    "sin": math.sin, "cos": math.cos, "tan": math.tan, "floor": math.floor, "ceil": math.ceil,
+}
+_ARRAY_FUNCTIONS: Dict[str, Callable] = {
+    "abs": np.abs, "round": lambda x, d=0: np.round(x, int(d)),
+    "min": lambda *xs: np.minimum.reduce(np.broadcast_arrays(*xs)),
+    "max": lambda *xs: np.maximum.reduce(np.broadcast_arrays(*xs)),
+    "sqrt": np.sqrt, "exp": np.exp, "log": lambda x, base=math.e: np.log(x) / np.log(base), "log10": np.log10,
+    "sin": np.sin, "cos": np.cos, "tan": np.tan, "floor": np.floor, "ceil": np.ceil,
+}
+_CONSTANTS = {"pi": math.pi, "e": math.e}
+
+Program = Callable[[Sequence[Any], float], Any]
+
+
+# 숫자 리터럴 (식별자 안의 숫자 "log10", 16진수 / 복소수 / 밑줄 리터럴은 제외 → 템플릿에 그대로 남음)
+_NUMBER_RE = re.compile(r"(?<![\w.])(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?(?![\w.])")
+
+
+def _number(text: str) -> Number:
+    return float(text) if any(c in text for c in ".eE") else int(text)
+
+
+# 📌 숫자를 뺀 수식 구조 (검사 / 컴파일은 템플릿마다 한 번)
+class _Template:
+    """
+    - 허용되지 않은 노드가 있으면 CalculatorError.
+    - 상수 자리 번호는 수식에 나오는 순서 (정규식으로 꺼낸 숫자 순서와 같음).
+    - programs: 모드별(scalar / array) 컴파일된 실행 함수
+    """
+
+    def __init__(self, text: str):
+        try:
+            self.tree = ast.parse(text, mode="eval")
+        except (SyntaxError, ValueError, RecursionError, MemoryError) as e:
+            raise CalculatorError(f"invalid expression: {e}") from None
+        nodes = list(ast.walk(self.tree))
+        if len(nodes) > MAX_NODES:
+            raise CalculatorError(f"expression has more than {MAX_NODES} nodes")
+        for node in nodes:
+            if isinstance(node, ast.Constant):
+                if type(node.value) not in (int, float):
+                    raise CalculatorError(f"unsupported constant: {node.value!r}")
+                _check_int(node.value)
+            elif isinstance(node, ast.BinOp):
+                if type(node.op) not in _SCALAR_BINOPS:
+                    raise CalculatorError(f"unsupported operator: {type(node.op).__name__}")
+            elif isinstance(node, ast.UnaryOp):
+                if type(node.op) not in _UNARYOPS:
+                    raise CalculatorError(f"unsupported operator: {type(node.op).__name__}")
+            elif isinstance(node, ast.Call):
+                if not isinstance(node.func, ast.Name) or node.func.id not in _SCALAR_FUNCTIONS or node.keywords:
+                    raise CalculatorError(f"unsupported function call: {ast.unparse(node.func)}")
+            elif isinstance(node, ast.Name):
+                if node.id not in _CONSTANTS and node.id not in _SCALAR_FUNCTIONS:
+                    raise CalculatorError(f"unknown name: {node.id}")
+            elif not isinstance(node, (ast.Expression, ast.operator, ast.unaryop, ast.Load)):
+                raise CalculatorError(f"unsupported syntax: {type(node).__name__}")
+
+        constants = sorted((n for n in nodes if isinstance(n, ast.Constant)), key=lambda n: (n.lineno, n.col_offset))
+        self.slots = {id(node): slot for slot, node in enumerate(constants)}
+        self.literal_constants = tuple(node.value for node in constants)
+        self.programs: Dict[str, Program] = {}
+
+    # 📌 실행 함수 만들기 (scalar: 파이썬 숫자, 크기 확인 / array: NumPy 배열 + 행별 정수 여부)
+    def program(self, mode: str) -> Program:
+        if mode not in self.programs:
+            self.programs[mode] = self._build(self.tree.body) if mode == "scalar" else self._build_array(self.tree.body)
+        return self.programs[mode]
+
+    def _build(self, node: ast.AST) -> Program:
+        if isinstance(node, ast.Constant):
+            slot = self.slots[id(node)]
+            return lambda c, deadline: c[slot]
+        if isinstance(node, ast.Name):
+            value = _CONSTANTS[node.id]
+            return lambda c, deadline: value
+        if isinstance(node, ast.UnaryOp):
+            op, operand = _UNARYOPS[type(node.op)], self._build(node.operand)
+            return lambda c, deadline: op(operand(c, deadline))
+        if isinstance(node, ast.BinOp):
+            op = _SCALAR_BINOPS[type(node.op)]
+            left, right = self._build(node.left), self._build(node.right)
+
+            def binop(c, deadline):
+                result = op(left(c, deadline), right(c, deadline))
+                if time.perf_counter() > deadline:
+                    raise CalculatorError(f"evaluation exceeded {TIME_BUDGET}s")
+                return result
+
+            return binop
+        # ast.Call (검사에서 허용된 함수 이름만 남음)
+        func, args = _SCALAR_FUNCTIONS[node.func.id], [self._build(arg) for arg in node.args]
+        return lambda c, deadline: func(*(arg(c, deadline) for arg in args))
+
+    def _build_array(self, node: ast.AST) -> Program:
+        """
+        - 노드마다 (float64 값, 파이썬으로 계산했다면 int 인지, 지금까지 나온 정수 중간값 절댓값의 최댓값) 을 행별 배열로 반환.
+        - 정수 중간값이 하나라도 2**53 이상이면 float64 로는 정확하지 않음 → 최댓값(peak) 으로 행마다 판단.
+        - 파이썬과 결과 / 오류가 달라질 수 있는 행(큰 지수, 인자 수가 맞지 않는 min / max 등)은 peak 를 inf 로 표시.
+        """
+        if isinstance(node, ast.Constant):
+            slot = self.slots[id(node)]
+            return lambda c, deadline: c[slot]
+        if isinstance(node, ast.Name):
+            value = _CONSTANTS[node.id]
+            return lambda c, deadline: (value, False, 0.0)
+        if isinstance(node, ast.UnaryOp):
+            op, operand = _UNARYOPS[type(node.op)], self._build_array(node.operand)
+
+            def unaryop(c, deadline):
+                value, is_int, peak = operand(c, deadline)
+                return op(value), is_int, peak
+
+            return unaryop
+        if isinstance(node, ast.BinOp):
+            kind, op = type(node.op), _ARRAY_BINOPS[type(node.op)]
+            left, right = self._build_array(node.left), self._build_array(node.right)
+
+            def binop(c, deadline):
+                (a, a_int, a_peak), (b, b_int, b_peak) = left(c, deadline), right(c, deadline)
+                value, peak = op(a, b), np.maximum(a_peak, b_peak)
+                if kind is ast.Div:
+                    is_int = False
+                elif kind is ast.Pow:
+                    # int ** 음수 는 파이썬에서도 float / 지수 제한은 _pow 와 같게
+                    is_int = a_int & b_int & (b >= 0)
+                    peak = np.where(np.abs(b) > MAX_EXPONENT, math.inf, peak)
+                else:
+                    is_int = a_int & b_int
+                return value, is_int, np.maximum(peak, np.where(is_int, np.abs(value), 0.0))
+
+            return binop
+        name, args = node.func.id, [self._build_array(arg) for arg in node.args]
+
+        def call(c, deadline):
+            values, ints, peaks = zip(*(arg(c, deadline) for arg in args)) if args else ((), (), ())
+            peak = np.maximum.reduce(np.broadcast_arrays(0.0, *peaks))
+            if name in ("min", "max"):
+                if len(args) < 2:  # min(x) 는 파이썬에서 TypeError
+                    return 0.0, False, math.inf
+                value = _ARRAY_FUNCTIONS[name](*values)
+                # 정수 / 실수가 섞인 행은 어느 인자가 골라지는지에 따라 타입이 달라짐
+                is_int = np.logical_and.reduce(np.broadcast_arrays(*ints))
+                peak = np.where(is_int == np.logical_or.reduce(np.broadcast_arrays(*ints)), peak, math.inf)
+            elif name == "round" and len(args) == 2:
+                # 자릿수가 행마다 다르면 np.round 로 한 번에 계산할 수 없음
+                digits = np.broadcast_to(values[1], np.shape(peak))
+                if digits.size and not np.all(digits == digits.flat[0]):
+                    return 0.0, False, math.inf
+                value = np.round(values[0], int(digits.flat[0]) if digits.size else 0)
+                is_int = ints[0] | (values[1] == 0)  # _round: 자릿수가 0 이면 round(x) → int
+            else:
+                value = _ARRAY_FUNCTIONS[name](*values)
+                is_int = True if name in ("floor", "ceil", "round") else ints[0] if name == "abs" else False
+            return value, is_int, np.maximum(peak, np.where(is_int, np.abs(value), 0.0))
+
+        return call
+
+
+_templates: Dict[str, _Template] = {}  # 숫자를 '#' 으로 바꾼 수식 → 템플릿
+_MAX_TEMPLATES = 4096
+
+
+# 📌 수식 → (템플릿, 숫자 상수 목록)
+def _parse(expression: str) -> Tuple[_Template, Tuple[Number, ...]]:
+    """
+    - 숫자를 '#' 으로 바꾼 문자열이 같으면 같은 템플릿 → 처음 한 번만 ast.parse / 검사 / 컴파일.
+    - '^' 는 거듭제곱으로 처리 (LLM 이 2^10 처럼 쓰는 경우가 많음).
+    """
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        raise CalculatorError(f"expression longer than {MAX_EXPRESSION_LENGTH} characters")
+    text = expression.strip().replace("^", "**")
+    key = _NUMBER_RE.sub("#", text)
+    template = _templates.get(key)
+    if template is None:
+        template = _templates.get(text)
+        if template is not None:
+            return template, template.literal_constants
+        template = _Template(text)
+        if len(_templates) >= _MAX_TEMPLATES:
+            _templates.clear()
+        # 정규식이 찾지 못한 리터럴(0x1F 등)이 있으면 숫자를 바꿔 끼울 수 없으므로 수식 전체를 키로 사용
+        if len(template.slots) != len(_NUMBER_RE.findall(text)):
+            _templates[text] = template
+            return template, template.literal_constants
+        _templates[key] = template
+    try:
+        return template, tuple(_check_int(_number(m)) for m in _NUMBER_RE.findall(text))
+    except ValueError as e:  # 너무 긴 정수 리터럴
+        raise CalculatorError(str(e)) from None
+
+
+# 📌 수식 하나 계산
+def evaluate(expression: str, time_budget: float = TIME_BUDGET) -> Number:
+    template, constants = _parse(expression)
+    program = template.program("scalar")
+    try:
+        return program(constants, time.perf_counter() + time_budget)
+    except CalculatorError:
+        raise
+    except ZeroDivisionError:
+        raise CalculatorError("division by zero") from None
+    except (ArithmeticError, ValueError, TypeError) as e:  # OverflowError, math domain error, 잘못된 인자 수 등
+        raise CalculatorError(f"{type(e).__name__}: {e}") from None
+
+
+# 📌 수식 여러 개 계산 (결과 또는 CalculatorError 를 같은 순서로 반환)
+def evaluate_many(expressions: Sequence[str], time_budget: float = TIME_BUDGET) -> List[Union[Number, CalculatorError]]:
+    """
+    - 같은 템플릿이 VECTORIZE_MIN 개 이상이면 상수를 열(column)별 float64 배열로 모아 NumPy 로 한 번에 계산.
+    - 결과가 int 인지 float 인지는 행마다 파이썬 규칙대로 판단 (같은 템플릿이어도 "2*3" 은 6, "2.0*3" 은 6.0).
+    - 정수 피연산자 / 중간값이 2**53 이상이거나 inf / nan 이 나온 행은 하나씩 다시 계산해서
+      evaluate() 와 결과가 항상 같음.
+    """
+    results: List[Union[Number, CalculatorError, None]] = [None] * len(expressions)
+    groups: Dict[int, List[Tuple[int, Tuple[Number, ...]]]] = {}
+    templates: Dict[int, _Template] = {}
+    for i, expression in enumerate(expressions):
+        try:
+            template, constants = _parse(expression)
+        except CalculatorError as e:
+            results[i] = e
+            continue
+        templates.setdefault(id(template), template)
+        groups.setdefault(id(template), []).append((i, constants))
+
+    for key, members in groups.items():
+        pending = members
+        if len(members) >= VECTORIZE_MIN and members[0][1]:
+            pending = _evaluate_vectorized(templates[key], members, results)
+        for i, _ in pending:
+            try:
+                results[i] = evaluate(expressions[i], time_budget)
+            except CalculatorError as e:
+                results[i] = e
+    return results
+
+
+def _evaluate_vectorized(template: _Template, members, results) -> List[Tuple[int, Tuple[Number, ...]]]:
+    # return: NumPy 결과를 그대로 쓸 수 없어서 하나씩 다시 계산해야 하는 항목
+    rows = [constants for _, constants in members]
+    try:
+        columns = np.array(rows, dtype=np.float64).T
+        int_columns = np.array([[isinstance(value, int) for value in constants] for constants in rows], dtype=bool).T
+        inputs = [(column, ints, np.where(ints, np.abs(column), 0.0)) for column, ints in zip(columns, int_columns)]
+        with np.errstate(all="ignore"):
+            values, is_int, peak = (np.broadcast_to(x, (len(members),))
+                                    for x in template.program("array")(inputs, math.inf))
+    except (ArithmeticError, ValueError, TypeError, IndexError):  # float64 로 바꿀 수 없는 정수, 잘못된 인자 수 등
+        return members
+    # 정수 중간값이 모두 2**53 미만일 때만 float64 결과가 파이썬 int 계산과 같음 (int / float 은 행마다 판단)
+    safe = np.isfinite(values) & (peak < 2.0 ** 53)
+    retry = []
+    for (i, constants), value, row_int, ok in zip(members, values.tolist(), is_int.tolist(), safe.tolist()):
+        if not ok:
+            retry.append((i, constants))
+        else:
+            results[i] = int(value) if row_int else value
+    return retry
+
+
+# 📌 에이전트 툴용: 결과를 문자열로 (여러 줄 또는 ';' 로 구분된 수식은 한 번에 계산)
+def calculate(text: str) -> str:
+    expressions = [part.strip() for part in text.replace(";", "\n").split("\n") if part.strip()]
+    if len(expressions) <= 1:
+        try:
+            return str(evaluate(text))
+        except CalculatorError as e:
+            return f"Error calculating expression: {e}"
+    results = evaluate_many(expressions)
+    return "\n".join(
+        f"{expression} = {f'Error: {result}' if isinstance(result, CalculatorError) else result}"
+        for expression, result in zip(expressions, results)
+    )
+
+
+# 🔹 직접 실행하는 경우: eval 과 속도 비교 + 퍼징(fuzzing)
+#   python -m rag_utils.calculator [퍼징 횟수]
+#   - 무작위 수식: eval 과 같은 결과(또는 둘 다 오류)인지 확인
+#   - 무작위 문자열 / 공격용 수식: CalculatorError 외의 예외가 없고 시간 제한 안에 끝나는지 확인
+if __name__ == "__main__":
+    import random
+    import string
+    import sys
+
+    rng = random.Random(0)
+
+    def random_expression(depth: int = 0) -> str:
+        roll = rng.random()
+        if depth > 4 or roll < 0.3:
+            return str(rng.choice([rng.randint(0, 99), rng.randint(-9, 9), round(rng.uniform(0, 100), 2)]))
+        if roll < 0.4:
+            return f"-{random_expression(depth + 1)}"
+        if roll < 0.45:
+            return f"abs({random_expression(depth + 1)})"
+        op = rng.choice(["+", "-", "*", "/", "//", "%", "**"])
+        right = str(rng.randint(0, 5)) if op == "**" else random_expression(depth + 1)
+        return f"({random_expression(depth + 1)} {op} {right})"
+
+    def same(a: Any, b: Any) -> bool:
+        if isinstance(a, float) or isinstance(b, float):
+            return math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-12) or (math.isnan(a) and math.isnan(b))
+        return a == b
+
+    # 🔹 1. 속도 비교
+    sample = [f"{rng.randint(1, 999)} * {rng.randint(1, 999)} + {rng.randint(1, 999)} / 7" for _ in range(10_000)]
+
+    def bench(label: str, fn) -> None:
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+        print(f"{label:>38}: {elapsed * 1000:8.1f} ms  ({elapsed / len(sample) * 1e6:6.2f} us/expr)")
+
+    print(f"{len(sample)} expressions like {sample[0]!r}")
+    bench("eval", lambda: [eval(s) for s in sample])
+    _templates.clear()
+    bench("evaluate (cold: parse + compile)", lambda: [evaluate(s) for s in sample])
+    bench("evaluate (cached)", lambda: [evaluate(s) for s in sample])
+    bench("evaluate_many (vectorized, cached)", lambda: evaluate_many(sample))
+    assert all(same(a, b) for a, b in zip(evaluate_many(sample), [eval(s) for s in sample]))
+
+    # 🔹 2. 퍼징: eval 과 결과 비교
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    mismatches = 0
+    for _ in range(runs):
+        expression = random_expression()
+        try:
+            expected = eval(expression)
+        except (ArithmeticError, ValueError):
+            expected = "error"
+        try:
+            actual = evaluate(expression)
+        except CalculatorError:
+            actual = "error"
+        if isinstance(expected, complex) or (isinstance(expected, int) and expected.bit_length() > MAX_INT_BITS):
+            expected = "error"
+        if (expected == "error") != (actual == "error") or (expected != "error" and not same(expected, actual)):
+            mismatches += 1
+            print("mismatch:", expression, expected, actual)
+    batch = [random_expression() for _ in range(2000)]
+    batch_results = evaluate_many(batch)
+    for expression, result in zip(batch, batch_results):
+        try:
+            single = evaluate(expression)
+        except CalculatorError as e:
+            single = e
+        if isinstance(single, CalculatorError) != isinstance(result, CalculatorError) or \
+                (not isinstance(single, CalculatorError) and not same(single, result)):
+            mismatches += 1
+            print("batch mismatch:", expression, single, result)
+    print(f"fuzz vs eval: {runs} expressions + {len(batch)} batched, {mismatches} mismatches")
+
+    # 🔹 3. 퍼징: 무작위 문자열 + 공격용 수식
+    attacks = ["9**9**9", "10**10**10", "2**4096 * 2**4096", "(1+1)**99999", "__import__('os').system('id')",
+               "().__class__.__bases__", "[1]*10**9", "'a'*10**9", "(" * 300 + "1" + ")" * 300,
+               "1" * 5000, "1e308*10", "sqrt(-1)", "log(0)", "max()", "lambda: 1", "x", "1/0", "2^10"]
+    alphabet = string.digits + "+-*/%().^ e" + string.ascii_letters[:6]
+    garbage = ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 40))) for _ in range(runs)]
+    slowest = 0.0
+    for expression in attacks + garbage:
+        started = time.perf_counter()
+        try:
+            evaluate(expression)
+        except CalculatorError:
+            pass
+        slowest = max(slowest, time.perf_counter() - started)
+    print(f"fuzz garbage: {len(attacks) + len(garbage)} inputs, no unexpected exceptions, slowest {slowest * 1000:.2f} ms")
+    for expression in attacks[:4] + attacks[-1:]:
+        print(f"  {expression!r:>34} -> {calculate(expression)}")
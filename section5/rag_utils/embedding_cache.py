@@ -0,0 +1,208 @@
+# 임베딩 캐시
+# - (모델 이름 + 텍스트 내용 해시) 를 키로 임베딩 벡터를 저장
+# - 1단계: 프로세스 메모리의 LRU 캐시 / 2단계: 로컬 SQLite 파일 (float32 BLOB)
+# - 캐시에 없는 텍스트만 실제 임베딩 모델(OpenAIEmbeddings 등)로 전송
+import hashlib
+import os
+import sqlite3
+from array import array
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from langchain_core.embeddings import Embeddings  # 임베딩 인터페이스
+
+# intro-to-vector-dbs 와 pdf 스크립트가 같은 캐시 파일을 공유하도록 section5 폴더에 저장
+DEFAULT_CACHE_PATH = os.environ.get(
+    "EMBEDDING_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".embedding_cache.sqlite"),
+)
+_SQLITE_MAX_VARIABLES = 500  # 한 번의 IN (...) 쿼리에 넣는 키 개수
+
+
+# 📌 스레드 안전한 메모리 LRU 캐시
+class LRUCache:
+    """
+    - maxsize 개를 넘으면 가장 오래 사용되지 않은 항목부터 제거.
+    - 임베딩 파이프라인의 여러 스레드에서 동시에 접근하므로 Lock 사용.
+    """
+
+    def __init__(self, maxsize: int = 10_000):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: str) -> Optional[List[float]]:
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: List[float]) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+# 📌 SQLite 에 임베딩을 float32 바이트로 저장하는 저장소
+class SQLiteEmbeddingStore:
+    """
+    - 테이블 하나(key TEXT PRIMARY KEY, vector BLOB)에 임베딩을 저장.
+    - 벡터는 array('f') 로 float32 직렬화 (1536차원 = 6KB).
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH):
+        self.path = path
+        self._lock = Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+        )
+        self._conn.commit()
+
+    def mget(self, keys: Sequence[str]) -> Dict[str, List[float]]:
+        found: Dict[str, List[float]] = {}
+        with self._lock:
+            for i in range(0, len(keys), _SQLITE_MAX_VARIABLES):
+                part = keys[i : i + _SQLITE_MAX_VARIABLES]
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(part))})",
+                    part,
+                )
+                for key, blob in rows:
+                    found[key] = array("f", blob).tolist()
+        return found
+
+    def mset(self, items: Iterable[tuple]) -> None:
+        rows = [(key, array("f", vector).tobytes()) for key, vector in items]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?)", rows)
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+# 📌 기존 임베딩 모델 앞에 두는 캐시 래퍼
+class CachedEmbeddings(Embeddings):
+    """
+    - underlying: 실제 임베딩 모델 (예: OpenAIEmbeddings())
+    - embed_documents / embed_query 모두 캐시를 먼저 조회하고, 없는 텍스트만 모델로 전송.
+    - Embeddings 인터페이스를 그대로 따르므로 FAISS.from_documents, PineconeVectorStore 등
+      기존 호출 코드는 수정할 필요 없음.
+    - 임베딩 파이프라인의 여러 스레드에서 동시에 호출되므로 hits / misses 는 Lock 으로 보호.
+    """
+
+    def __init__(
+        self,
+        underlying: Embeddings,
+        store: Optional[SQLiteEmbeddingStore] = None,
+        model_name: Optional[str] = None,
+        memory_size: int = 10_000,
+    ):
+        self.underlying = underlying
+        self.store = store if store is not None else SQLiteEmbeddingStore()
+        self.model_name = model_name or _model_name_of(underlying)
+        self.memory = LRUCache(memory_size)
+        self.hits = 0
+        self.misses = 0
+        self._lock = Lock()
+
+    def _key(self, text: str) -> str:
+        # 모델 이름이 다르면 같은 텍스트라도 다른 벡터이므로 키에 포함
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [self._key(text) for text in texts]
+        vectors: Dict[str, List[float]] = {}
+
+        # 🔹 1단계: 메모리 LRU
+        for key in keys:
+            vector = self.memory.get(key)
+            if vector is not None:
+                vectors[key] = vector
+
+        # 🔹 2단계: SQLite 일괄 조회
+        missing = [key for key in dict.fromkeys(keys) if key not in vectors]
+        if missing:
+            for key, vector in self.store.mget(missing).items():
+                vectors[key] = vector
+                self.memory.put(key, vector)
+
+        # 🔹 캐시에 없는 텍스트만 모델로 전송 (같은 텍스트는 한 번만)
+        to_embed = {key: text for key, text in zip(keys, texts) if key not in vectors}
+        if to_embed:
+            embedded = self.underlying.embed_documents(list(to_embed.values()))
+            new_items = list(zip(to_embed.keys(), embedded))
+            self.store.mset(new_items)
+            for key, vector in new_items:
+                vectors[key] = vector
+                self.memory.put(key, vector)
+
+        with self._lock:
+            self.misses += len(to_embed)
+            self.hits += len(texts) - len(to_embed)
+        return [vectors[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    @property
+    def hit_rate(self) -> float:
+        with self._lock:
+            hits, total = self.hits, self.hits + self.misses
+        return hits / total if total else 0.0
+
+
+def _model_name_of(embeddings: Embeddings) -> str:
+    # OpenAIEmbeddings 는 model, 다른 구현은 model_name 을 쓰는 경우가 많음
+    for attr in ("model", "model_name"):
+        value = getattr(embeddings, attr, None)
+        if isinstance(value, str):
+            return value
+    return type(embeddings).__name__
+
+
+# 📌 스크립트에서 OpenAIEmbeddings() 대신 사용하는 헬퍼
+def cached_openai_embeddings(cache_path: str = DEFAULT_CACHE_PATH, **kwargs) -> CachedEmbeddings:
+    """
+    - OpenAIEmbeddings(**kwargs) 를 만들고 SQLite 캐시로 감싸서 반환.
+    """
+    from langchain_openai import OpenAIEmbeddings  # OpenAI 임베딩 모델
+
+    return CachedEmbeddings(OpenAIEmbeddings(**kwargs), store=SQLiteEmbeddingStore(cache_path))
+
+
+# 🔹 직접 실행하는 경우: 가짜 임베딩으로 캐시 적중률 확인
+if __name__ == "__main__":
+    import tempfile
+    import time
+
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+
+    class CountingFakeEmbeddings(DeterministicFakeEmbedding):
+        calls: int = 0
+
+        def embed_documents(self, texts: List[str]) -> List[List[float]]:
+            self.calls += len(texts)
+            time.sleep(0.001 * len(texts))  # 텍스트당 1ms 지연
+            return super().embed_documents(texts)
+
+    texts = [f"chunk {i}" for i in range(2000)]
+    with tempfile.TemporaryDirectory() as tmp:
+        fake = CountingFakeEmbeddings(size=1536)
+        path = os.path.join(tmp, "cache.sqlite")
+        cold = CachedEmbeddings(fake, store=SQLiteEmbeddingStore(path))
+        warm = CachedEmbeddings(fake, store=SQLiteEmbeddingStore(path))  # 새 프로세스를 흉내 (메모리 비어 있음)
+        for label, cache in (("cold", cold), ("warm (sqlite)", warm), ("warm (memory)", warm)):
+            start = time.perf_counter()
+            cache.embed_documents(texts)
+            print(f"{label}: {time.perf_counter() - start:.3f}s, model calls so far={fake.calls}")
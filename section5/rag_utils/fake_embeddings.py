@@ -0,0 +1,34 @@
+# 데모 / 벤치마크용 가짜 임베딩
+# - 단어를 해시로 차원에 나눠 담는 bag-of-words 벡터라서, 단어가 많이 겹치는 문장끼리 유사도가 높음
+#   (DeterministicFakeEmbedding 은 글자가 하나만 달라도 전혀 다른 벡터가 나와서 검색 품질 비교에 쓸 수 없음)
+# - latency: embed_query 마다 API 왕복 시간을 흉내 내는 지연 (초)
+import math
+import re
+import time
+import zlib
+from typing import List
+
+from langchain_core.embeddings import Embeddings  # 임베딩 인터페이스
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class HashingEmbeddings(Embeddings):
+    def __init__(self, size: int = 256, latency: float = 0.0):
+        self.size = size
+        self.latency = latency
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.size
+        for term in _TOKEN_RE.findall(text.lower()):
+            vector[zlib.crc32(term.encode()) % self.size] += 1.0
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        if self.latency:
+            time.sleep(self.latency)
+        return self._embed(text)
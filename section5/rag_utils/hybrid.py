@@ -0,0 +1,255 @@
+# 하이브리드 검색 (BM25 + 벡터)
+# - 수집할 때 같은 청크로 프로세스 내 역색인(inverted index) 을 만들어 BM25 로 키워드 검색
+# - 벡터 검색 결과와 Reciprocal Rank Fusion(RRF) 으로 합침
+# - 키워드 검색 결과가 확실하면 (1등 점수가 2등보다 충분히 높으면) 임베딩 API 호출 없이 바로 반환
+import heapq
+import json
+import math
+import os
+import re
+import time
+from collections import Counter
+from threading import Lock
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents import Document  # LangChain 문서 객체
+from langchain_core.retrievers import BaseRetriever  # 검색기 인터페이스
+from langchain_core.vectorstores import VectorStore  # 벡터 스토어 인터페이스
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    # 소문자 + 단어 문자(한글 포함) 단위로 분리
+    return _TOKEN_RE.findall(text.lower())
+
+
+# 📌 BM25 역색인
+class BM25Index:
+    """
+    - path: 저장할 JSON 파일 경로 (없으면 메모리에만 유지). pickle 을 쓰지 않고 원문과 메타데이터만 저장하고,
+      불러올 때 역색인을 다시 만듦.
+    - 문서는 청크 id 로 구분하며, 같은 id 를 다시 추가하면 교체 (증분 재수집과 함께 사용).
+    - k1 / b: BM25 파라미터 (단어 빈도 포화 정도 / 문서 길이 보정 정도)
+    """
+
+    def __init__(self, path: Optional[str] = None, k1: float = 1.5, b: float = 0.75):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[int, int]] = {}  # 단어 → {문서 번호: 등장 횟수}
+        self._lengths: Dict[int, int] = {}  # 문서 번호 → 단어 수
+        self._docs: Dict[int, Document] = {}
+        self._row_of: Dict[str, int] = {}  # 청크 id → 문서 번호
+        self._next_row = 0
+        self._total_length = 0
+        self._lock = Lock()  # 업서트 스레드가 여러 개여도 색인이 깨지지 않도록 보호
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                saved = json.load(f)
+            self.add_documents(
+                [Document(page_content=t, metadata=m) for t, m in zip(saved["texts"], saved["metadatas"])],
+                saved["ids"],
+            )
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def add_documents(self, documents: Sequence[Document], ids: Sequence[str]) -> None:
+        with self._lock:
+            self._delete([_id for _id in ids if _id in self._row_of])
+            for _id, doc in zip(ids, documents):
+                self._add(_id, doc)
+
+    def delete(self, ids: Iterable[str]) -> None:
+        with self._lock:
+            self._delete(ids)
+
+    def _add(self, _id: str, doc: Document) -> None:
+        row = self._next_row
+        self._next_row += 1
+        terms = Counter(tokenize(doc.page_content))
+        for term, tf in terms.items():
+            self._postings.setdefault(term, {})[row] = tf
+        length = sum(terms.values())
+        self._lengths[row] = length
+        self._total_length += length
+        self._docs[row] = Document(id=_id, page_content=doc.page_content, metadata=dict(doc.metadata))
+        self._row_of[_id] = row
+
+    def _delete(self, ids: Iterable[str]) -> None:
+        for _id in ids:
+            row = self._row_of.pop(_id, None)
+            if row is None:
+                continue
+            for term in set(tokenize(self._docs[row].page_content)):
+                postings = self._postings.get(term)
+                if postings is not None:
+                    postings.pop(row, None)
+                    if not postings:
+                        del self._postings[term]
+            self._total_length -= self._lengths.pop(row)
+            del self._docs[row]
+
+    def search(self, query: str, k: int = 4) -> List[Tuple[Document, float]]:
+        """
+        - 질의 단어가 하나라도 들어 있는 문서만 점수를 계산 (역색인 덕분에 전체 문서를 보지 않음).
+        - return: [(문서, BM25 점수)] 점수 내림차순
+        """
+        n_docs = len(self._docs)
+        if not n_docs:
+            return []
+        avg_length = self._total_length / n_docs
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for row, tf in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[row] / avg_length)
+                scores[row] = scores.get(row, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        top = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [(self._docs[row], score) for row, score in top]
+
+    def save(self, path: Optional[str] = None) -> None:
+        path = path or self.path
+        docs = list(self._docs.values())
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "ids": [doc.id for doc in docs],
+                "texts": [doc.page_content for doc in docs],
+                "metadatas": [doc.metadata for doc in docs],
+            }, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+
+def _doc_key(doc: Document) -> str:
+    # 벡터 스토어와 BM25 결과를 같은 청크로 맞추기 위한 키
+    return doc.id or doc.metadata.get("chunk_id") or doc.page_content
+
+
+# 📌 Reciprocal Rank Fusion
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[Document]], k: int = 4, rrf_k: int = 60) -> List[Document]:
+    """
+    - 각 순위 목록에서 rank 번째 문서에 1 / (rrf_k + rank) 점을 주고 합산.
+    - 점수 크기가 다른 BM25 / 벡터 유사도를 정규화 없이 합칠 수 있음.
+    """
+    scores: Dict[str, float] = {}
+    docs: Dict[str, Document] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, start=1):
+            key = _doc_key(doc)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank)
+            docs.setdefault(key, doc)
+    return [docs[key] for key in sorted(scores, key=scores.get, reverse=True)[:k]]
+
+
+# 📌 하이브리드 검색기
+class HybridRetriever(BaseRetriever):
+    """
+    - vectorstore: 기존 벡터 스토어 (Pinecone / FAISS / MmapVectorStore / NumpyVectorStore)
+    - lexical_index: 같은 청크로 만든 BM25Index
+    - k: 반환할 문서 수 / fetch_k: 각 검색에서 가져와 합칠 후보 수
+    - skip_vector_margin: BM25 1등 점수가 2등의 이 배수 이상이고 skip_vector_min_score 이상이면
+      벡터 검색(임베딩 API 호출)을 건너뜀. None 이면 항상 두 검색을 모두 수행.
+    - stats: 검색 횟수, 벡터 검색을 건너뛴 횟수
+    """
+
+    vectorstore: VectorStore
+    lexical_index: Any
+    k: int = 3
+    fetch_k: int = 20
+    rrf_k: int = 60
+    skip_vector_margin: Optional[float] = None
+    skip_vector_min_score: float = 5.0
+    stats: Dict[str, int] = {}
+
+    def model_post_init(self, __context: Any) -> None:
+        self.stats = {"queries": 0, "vector_skipped": 0}
+
+    def _lexical_is_confident(self, lexical: List[Tuple[Document, float]]) -> bool:
+        if self.skip_vector_margin is None or not lexical:
+            return False
+        top = lexical[0][1]
+        second = lexical[1][1] if len(lexical) > 1 else 0.0
+        return top >= self.skip_vector_min_score and top >= self.skip_vector_margin * second
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        self.stats["queries"] += 1
+        lexical = self.lexical_index.search(query, k=self.fetch_k)
+        if self._lexical_is_confident(lexical):
+            self.stats["vector_skipped"] += 1
+            return [doc for doc, _ in lexical[: self.k]]
+        dense = self.vectorstore.similarity_search(query, k=self.fetch_k)
+        return reciprocal_rank_fusion([[doc for doc, _ in lexical], dense], k=self.k, rrf_k=self.rrf_k)
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        # BM25 는 프로세스 안에서 바로 계산하고, 벡터 검색(네트워크 / 임베딩 API)만 await
+        self.stats["queries"] += 1
+        lexical = self.lexical_index.search(query, k=self.fetch_k)
+        if self._lexical_is_confident(lexical):
+            self.stats["vector_skipped"] += 1
+            return [doc for doc, _ in lexical[: self.k]]
+        dense = await self.vectorstore.asimilarity_search(query, k=self.fetch_k)
+        return reciprocal_rank_fusion([[doc for doc, _ in lexical], dense], k=self.k, rrf_k=self.rrf_k)
+
+
+# 🔹 직접 실행하는 경우: mediumblog1.txt 로 검색 품질(recall@3)과 지연 시간 비교
+#   python -m rag_utils.hybrid (section5 폴더에서, rag_utils 패키지를 import 하므로 -m 으로 실행)
+#   - 임베딩은 단어 해시 기반의 가짜 임베딩 (rag_utils.fake_embeddings) + 질의마다 30ms 지연 (API 왕복 흉내)
+#   - 질의는 임의 청크에서 뽑은 문장 일부의 단어를 섞고 일부를 뺀 것, 정답은 원래 청크
+if __name__ == "__main__":
+    import random
+
+    from langchain_core.vectorstores import InMemoryVectorStore
+    from langchain_text_splitters import CharacterTextSplitter
+
+    from rag_utils.fake_embeddings import HashingEmbeddings
+
+    sample = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "intro-to-vector-dbs", "mediumblog1.txt")
+    with open(sample, encoding="utf-8") as f:
+        text = f.read()
+    chunks = CharacterTextSplitter(chunk_size=300, chunk_overlap=0, separator=" ").create_documents([text])
+    ids = [f"chunk:{i}" for i in range(len(chunks))]
+    for chunk, _id in zip(chunks, ids):
+        chunk.id = _id
+
+    embeddings = HashingEmbeddings(latency=0.03)
+    store = InMemoryVectorStore(embeddings)
+    store.add_documents(chunks, ids=ids)
+    bm25 = BM25Index()
+    bm25.add_documents(chunks, ids)
+
+    rng = random.Random(0)
+    queries = []
+    for _ in range(100):
+        target = rng.randrange(len(chunks))
+        words = chunks[target].page_content.split()
+        start = rng.randrange(max(1, len(words) - 8))
+        picked = [w for w in words[start : start + 8] if rng.random() > 0.3]
+        rng.shuffle(picked)
+        queries.append((" ".join(picked) or words[0], ids[target]))
+
+    def evaluate(label: str, search) -> None:
+        hits = 0
+        started = time.perf_counter()
+        for query, expected in queries:
+            hits += expected in [_doc_key(doc) for doc in search(query)]
+        elapsed = (time.perf_counter() - started) / len(queries) * 1000
+        print(f"{label:>26}: recall@3={hits / len(queries):.2f}  {elapsed:6.2f} ms/query")
+
+    print(f"{len(chunks)} chunks from mediumblog1.txt, {len(queries)} queries")
+    evaluate("vector only", lambda q: store.similarity_search(q, k=3))
+    evaluate("bm25 only", lambda q: [doc for doc, _ in bm25.search(q, k=3)])
+    evaluate("hybrid (rrf)", HybridRetriever(vectorstore=store, lexical_index=bm25).invoke)
+    skipping = HybridRetriever(vectorstore=store, lexical_index=bm25, skip_vector_margin=1.5)
+    evaluate("hybrid + lexical skip", skipping.invoke)
+    print(f"vector search skipped for {skipping.stats['vector_skipped']}/{skipping.stats['queries']} queries")
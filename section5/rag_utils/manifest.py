@@ -0,0 +1,221 @@
+# 증분(incremental) 재수집
+# - 매니페스트(JSON)에 원본 파일 경로, 수정 시각(mtime), 크기, 내용 해시, 만들어진 청크 id 를 기록
+# - 다시 실행하면 새로 생기거나 바뀐 파일만 분할/임베딩하고,
+#   삭제되거나 바뀐 파일의 예전 청크는 벡터 스토어(FAISS / Pinecone)에서 삭제
+# - 이번 실행에 넘기지 않은 파일은 디스크에서 사라졌거나 다시 훑은 폴더 아래에 있을 때만 삭제로 처리
+#   (파일 하나만 넘겨서 다시 수집해도 다른 파일의 청크가 지워지지 않음, 목록 밖 파일까지 지우려면 prune=True)
+import hashlib
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from langchain_core.documents import Document  # LangChain 문서 객체
+from langchain_core.embeddings import Embeddings  # 임베딩 인터페이스
+from langchain_core.vectorstores import VectorStore  # 벡터 스토어 인터페이스
+
+from rag_utils.pipeline import IngestionStats, ingest_documents
+
+_DELETE_BATCH_SIZE = 1000  # Pinecone delete 요청 한 번에 보내는 id 개수
+
+
+# 📌 파일 하나에 대한 매니페스트 기록
+@dataclass
+class FileRecord:
+    mtime: float
+    size: int
+    sha256: str
+    chunk_ids: List[str] = field(default_factory=list)
+
+
+# 📌 이전 실행과 비교한 변경 사항
+@dataclass
+class ManifestDiff:
+    added: List[str] = field(default_factory=list)
+    modified: List[str] = field(default_factory=list)
+    deleted: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.modified or self.deleted)
+
+
+def file_sha256(path: str, block_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(block_size):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# 📌 수집 매니페스트
+class IngestionManifest:
+    """
+    - path: 매니페스트 JSON 파일 경로 (예: faiss_index_react/manifest.json)
+    - records: {원본 파일 경로: FileRecord}
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.records: Dict[str, FileRecord] = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.records = {k: FileRecord(**v) for k, v in json.load(f).items()}
+
+    def save(self) -> None:
+        # 임시 파일에 쓴 뒤 교체해서, 중간에 죽어도 매니페스트가 깨지지 않도록 함
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({k: asdict(v) for k, v in self.records.items()}, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.path)
+
+    def diff(self, paths: Iterable[str], roots: Iterable[str] = (), prune: bool = False) -> ManifestDiff:
+        """
+        - mtime 과 크기가 같으면 해시 계산 없이 '변경 없음' 으로 판단 (1만 개 파일도 stat 만 수행).
+        - mtime 만 바뀌고 내용 해시가 같으면 (예: touch) 기록만 갱신하고 재임베딩하지 않음.
+        - 기록에는 있지만 paths 에 없는 파일은 디스크에 없거나 roots(이번에 훑은 폴더) 아래에 있을 때만 삭제.
+          prune=True 면 paths 에 없는 파일을 모두 삭제 (paths 가 수집 대상 전체일 때).
+        """
+        result = ManifestDiff()
+        scanned = tuple(os.path.join(os.path.abspath(root), "") for root in roots)
+        seen = set()
+        for path in paths:
+            path = os.path.abspath(path)
+            seen.add(path)
+            stat = os.stat(path)
+            record = self.records.get(path)
+            if record is None:
+                result.added.append(path)
+            elif record.mtime == stat.st_mtime and record.size == stat.st_size:
+                result.unchanged.append(path)
+            elif file_sha256(path) == record.sha256:
+                record.mtime, record.size = stat.st_mtime, stat.st_size
+                result.unchanged.append(path)
+            else:
+                result.modified.append(path)
+        result.deleted = [
+            path for path in self.records
+            if path not in seen and (prune or path.startswith(scanned) or not os.path.exists(path))
+        ]
+        return result
+
+
+# 📌 청크에 결정적인(deterministic) id 를 붙이는 분할기 래퍼
+class _ChunkIdSplitter:
+    """
+    - 원본 분할기의 결과에 '<경로 해시>:<순번>' 형태의 chunk_id 를 메타데이터로 추가하고,
+      파일별로 만들어진 id 목록을 모아둠 (매니페스트에 기록하기 위해).
+    - PDF 처럼 한 파일이 여러 Document(페이지)로 나뉘어도 순번은 파일 단위로 이어짐.
+    """
+
+    def __init__(self, text_splitter, source_of: Callable[[Document], str]):
+        self.text_splitter = text_splitter
+        self.source_of = source_of
+        self.chunk_ids: Dict[str, List[str]] = {}
+
+    def split_documents(self, documents: List[Document]) -> List[Document]:
+        chunks = self.text_splitter.split_documents(documents)
+        for chunk in chunks:
+            source = self.source_of(chunk)
+            ids = self.chunk_ids.setdefault(source, [])
+            prefix = hashlib.sha1(source.encode("utf-8")).hexdigest()[:16]
+            chunk.metadata["chunk_id"] = f"{prefix}:{len(ids)}"
+            ids.append(chunk.metadata["chunk_id"])
+        return chunks
+
+
+def delete_chunks(vectorstore: VectorStore, ids: List[str]) -> None:
+    """
+    - 벡터 스토어에서 청크 id 들을 삭제.
+    - FAISS 는 없는 id 를 지우려 하면 예외가 나므로 실제로 존재하는 id 만 골라서 삭제.
+    """
+    if hasattr(vectorstore, "index_to_docstore_id"):
+        existing = set(vectorstore.index_to_docstore_id.values())
+        ids = [_id for _id in ids if _id in existing]
+    for i in range(0, len(ids), _DELETE_BATCH_SIZE):
+        vectorstore.delete(ids=ids[i : i + _DELETE_BATCH_SIZE])
+
+
+# 📌 매니페스트를 기준으로 벡터 스토어를 원본 파일과 동기화
+def sync_sources(
+    paths: Iterable[str],
+    manifest: IngestionManifest,
+    load_fn: Callable[[str], Iterable[Document]],
+    text_splitter,
+    embeddings: Embeddings,
+    vectorstore: VectorStore,
+    persist_fn: Optional[Callable[[], None]] = None,
+    lexical_index=None,
+    roots: Iterable[str] = (),
+    prune: bool = False,
+    **pipeline_kwargs,
+) -> tuple:
+    """
+    - paths: 이번에 수집할 파일 목록
+    - roots: paths 를 만들려고 훑은 폴더 (이 아래에 기록된 파일이 paths 에 없으면 삭제된 것으로 처리)
+    - prune: True 면 paths 에 없는 파일의 청크를 모두 삭제 (False 면 디스크에서 사라진 파일만 삭제)
+    - load_fn: 파일 경로 → Document 이터러블 (예: lambda p: TextLoader(p).lazy_load())
+    - persist_fn: 바뀐 벡터 스토어를 디스크에 저장하는 함수 (예: FAISS.save_local).
+      매니페스트보다 먼저 저장해야 '매니페스트에는 있는데 인덱스에는 없는' 상태가 생기지 않음.
+      Pinecone 처럼 바로 반영되는 스토어는 None.
+    - lexical_index: 벡터 스토어와 같은 청크를 유지할 BM25Index (path 가 있으면 persist_fn 과 함께 저장)
+    - pipeline_kwargs: ingest_documents 에 전달할 옵션 (batch_size, max_workers 등)
+    - return: (ManifestDiff, IngestionStats)
+    """
+    diff = manifest.diff(paths, roots=roots, prune=prune)
+
+    def persist() -> None:
+        if persist_fn:
+            persist_fn()
+        if lexical_index is not None and lexical_index.path:
+            lexical_index.save()
+
+    # 🔹 1. 바뀌었거나 삭제된 파일의 예전 청크 삭제
+    for path in diff.modified + diff.deleted:
+        delete_chunks(vectorstore, manifest.records[path].chunk_ids)
+        if lexical_index is not None:
+            lexical_index.delete(manifest.records[path].chunk_ids)
+        del manifest.records[path]
+    if diff.modified or diff.deleted:
+        persist()
+        manifest.save()  # 여기서 실패해도 다음 실행 때 '새 파일' 로 다시 수집됨
+
+    # 🔹 2. 새로 생기거나 바뀐 파일만 분할 → 임베딩 → 업서트
+    to_ingest = diff.added + diff.modified
+    if not to_ingest:
+        manifest.save()  # touch 만 된 파일의 mtime 갱신 내용 저장
+        return diff, IngestionStats()
+
+    # 임베딩 도중 파일이 또 바뀌어도 다음 실행 때 감지되도록, 읽기 전의 상태를 기록
+    snapshots = {path: (os.stat(path), file_sha256(path)) for path in to_ingest}
+
+    def documents() -> Iterator[Document]:
+        for path in to_ingest:
+            for document in load_fn(path):
+                document.metadata["source"] = path  # 청크 id 와 매니페스트 키를 같은 경로로 맞춤
+                yield document
+
+    splitter = _ChunkIdSplitter(text_splitter, source_of=lambda doc: doc.metadata["source"])
+    stats = ingest_documents(
+        documents(),
+        splitter,
+        embeddings,
+        vectorstore,
+        id_fn=lambda doc: doc.metadata["chunk_id"],
+        lexical_index=lexical_index,
+        **pipeline_kwargs,
+    )
+
+    # 🔹 3. 저장이 끝난 파일을 매니페스트에 기록
+    for path, (stat, sha256) in snapshots.items():
+        manifest.records[path] = FileRecord(
+            mtime=stat.st_mtime,
+            size=stat.st_size,
+            sha256=sha256,
+            chunk_ids=splitter.chunk_ids.get(path, []),
+        )
+    persist()
+    manifest.save()
+    return diff, stats
@@ -0,0 +1,400 @@
+# 메모리 맵(mmap) 기반 로컬 벡터 인덱스
+# - FAISS.save_local / load_local 은 docstore 전체를 pickle 로 저장/복원하므로
+#   로드할 때 모든 문서가 RAM 에 올라가고, gunicorn 워커마다 복사본을 가짐.
+# - 이 인덱스는 벡터를 float32 원시 파일로, 문서는 오프셋 인덱스가 있는 JSONL 파일로 저장하고
+#   둘 다 mmap 으로 열기 때문에 여러 프로세스가 같은 페이지 캐시를 공유함.
+# - 문서 본문은 검색 결과 top-k 에 대해서만 읽어옴.
+#
+# 폴더 구성
+#   index.json   : {"dimension": D, "count": N, "deleted": [삭제된(tombstone) 행 번호]}
+#                  (마지막에 한 번에 바꿔 씀 = 커밋 지점. upsert 의 새 행과 예전 행 삭제가 함께 확정됨)
+#   vectors.f32  : N x D float32
+#   norms.f32    : N 개 벡터의 제곱 노름 (L2 거리 계산용)
+#   docs.jsonl   : 한 줄에 문서 하나 {"id", "page_content", "metadata"}
+#   offsets.i64  : 각 문서가 docs.jsonl 에서 시작하는 바이트 위치
+#   ids.txt      : 행 번호 순서의 문서 id 목록 (한 줄에 하나)
+#   deleted.json : 예전 형식의 삭제 목록 (index.json 에 deleted 가 없을 때만 읽음)
+import json
+import os
+import uuid
+from threading import Lock
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document  # LangChain 문서 객체
+from langchain_core.embeddings import Embeddings  # 임베딩 인터페이스
+from langchain_core.vectorstores import VectorStore  # 벡터 스토어 인터페이스
+
+
+def _write_json_atomic(path: str, value: Any) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(value, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+# 📌 mmap 기반 벡터 스토어
+class MmapVectorStore(VectorStore):
+    """
+    - folder_path: 인덱스 폴더 (없으면 생성)
+    - embedding: 질문(query)을 벡터로 바꿀 임베딩 모델
+    - 검색은 FAISS IndexFlatL2 와 같은 정확한(exact) L2 거리 검색. 점수가 낮을수록 유사.
+    - 추가(add)는 파일 끝에 이어 쓰고, 삭제(delete)는 tombstone 으로 표시 (compact 로 정리).
+    - 쓰기는 한 프로세스에서만 한다고 가정. 읽기 프로세스는 refresh() 로 새 데이터를 반영.
+    """
+
+    # 인덱스 폴더에 만드는 파일 (compact 에서 지우고 다시 씀)
+    _FILES: Tuple[str, ...] = ("vectors.f32", "norms.f32", "docs.jsonl", "offsets.i64", "ids.txt",
+                               "deleted.json", "index.json")
+
+    def __init__(self, folder_path: str, embedding: Embeddings):
+        self.folder_path = folder_path
+        self.embedding = embedding
+        self._lock = Lock()
+        self._truncated = False
+        os.makedirs(folder_path, exist_ok=True)
+        self.refresh()
+
+    # 🔹 파일 경로 헬퍼
+    def _path(self, name: str) -> str:
+        return os.path.join(self.folder_path, name)
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.embedding
+
+    def __len__(self) -> int:
+        return self.count - len(self._deleted)
+
+    # 📌 디스크의 현재 상태로 mmap 다시 열기
+    def refresh(self) -> None:
+        header = {"dimension": 0, "count": 0}
+        if os.path.exists(self._path("index.json")):
+            with open(self._path("index.json"), encoding="utf-8") as f:
+                header = json.load(f)
+        self.dimension: int = header["dimension"]
+        self.count: int = header["count"]
+
+        self._ids: List[str] = []
+        self._deleted: set = set(header.get("deleted", []))
+        if self.count:
+            with open(self._path("ids.txt"), encoding="utf-8") as f:
+                self._ids = f.read().split("\n")[: self.count]
+            if "deleted" not in header and os.path.exists(self._path("deleted.json")):
+                with open(self._path("deleted.json"), encoding="utf-8") as f:
+                    self._deleted = set(json.load(f))
+        self._row_of: Dict[str, int] = {
+            _id: row for row, _id in enumerate(self._ids) if row not in self._deleted
+        }
+        self._remap()
+
+    # 🔹 벡터 / 노름 / 오프셋은 읽기 전용 mmap 으로 열기 (실제로 읽을 때만 페이지가 올라옴)
+    def _remap(self) -> None:
+        if self.count:
+            self._vectors = np.memmap(self._path("vectors.f32"), dtype=np.float32, mode="r",
+                                      shape=(self.count, self.dimension))
+            self._norms = np.memmap(self._path("norms.f32"), dtype=np.float32, mode="r",
+                                    shape=(self.count,))
+            self._offsets = np.memmap(self._path("offsets.i64"), dtype=np.int64, mode="r",
+                                      shape=(self.count + 1,))
+            with open(self._path("docs.jsonl"), "rb") as f:
+                self._docs = np.memmap(f, dtype=np.uint8, mode="r")
+        else:
+            self._vectors = np.zeros((0, self.dimension), dtype=np.float32)
+            self._norms = np.zeros((0,), dtype=np.float32)
+            self._offsets = np.zeros((1,), dtype=np.int64)
+            self._docs = np.zeros((0,), dtype=np.uint8)
+
+    # 📌 행 번호로 문서 하나 읽기 (docs.jsonl 의 해당 바이트 범위만 읽음)
+    def _document_at(self, row: int) -> Document:
+        start, end = int(self._offsets[row]), int(self._offsets[row + 1])
+        record = json.loads(self._docs[start:end].tobytes())
+        return Document(id=record["id"], page_content=record["page_content"], metadata=record["metadata"])
+
+    # 📌 미리 계산한 임베딩 추가 (FAISS.add_embeddings 와 같은 형태)
+    def add_embeddings(
+        self,
+        text_embeddings: Iterable[Tuple[str, List[float]]],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        pairs = list(text_embeddings)
+        if not pairs:
+            return []
+        texts, vectors = zip(*pairs)
+        matrix = np.asarray(vectors, dtype=np.float32)
+        metadatas = metadatas or [{} for _ in texts]
+        ids = ids or [str(uuid.uuid4()) for _ in texts]
+
+        with self._lock:
+            if self.dimension and matrix.shape[1] != self.dimension:
+                raise ValueError(f"expected {self.dimension}-dim vectors, got {matrix.shape[1]}")
+            if not self._truncated:
+                self._truncate_to_committed()
+            # 같은 id 가 이미 있으면 예전 행은 tombstone 처리 (upsert)
+            replaced = [self._row_of[_id] for _id in ids if _id in self._row_of]
+
+            # 🔹 문서를 JSONL 로 이어 쓰고, 각 문서의 시작 오프셋 계산
+            lines = [
+                json.dumps({"id": _id, "page_content": text, "metadata": metadata},
+                           ensure_ascii=False).encode("utf-8") + b"\n"
+                for _id, text, metadata in zip(ids, texts, metadatas)
+            ]
+            base = int(self._offsets[-1])
+            offsets = base + np.cumsum([len(line) for line in lines], dtype=np.int64)
+            if self.count == 0:
+                offsets = np.concatenate([[0], offsets]).astype(np.int64)
+
+            with open(self._path("docs.jsonl"), "ab") as f:
+                f.writelines(lines)
+            with open(self._path("vectors.f32"), "ab") as f:
+                f.write(matrix.tobytes())
+            with open(self._path("norms.f32"), "ab") as f:
+                f.write(np.einsum("ij,ij->i", matrix, matrix).astype(np.float32).tobytes())
+            with open(self._path("offsets.i64"), "ab") as f:
+                f.write(offsets.tobytes())
+            with open(self._path("ids.txt"), "a", encoding="utf-8") as f:
+                f.write("".join(("\n" if row else "") + _id for row, _id in enumerate(ids, self.count)))
+
+            # 🔹 메모리 상태를 이어서 갱신 (전체 파일을 다시 읽지 않음)
+            for row, _id in enumerate(ids, self.count):
+                self._ids.append(_id)
+                self._row_of[_id] = row
+            self.dimension = matrix.shape[1]
+            self.count = len(self._ids)
+            self._deleted |= set(replaced)
+            self._on_append(matrix)
+            self._commit()
+        return list(ids)
+
+    # 🔹 새 행을 파일에 쓴 뒤, 커밋 전에 호출 (하위 클래스가 벡터에서 만든 추가 파일을 함께 쓸 때 사용)
+    def _on_append(self, matrix: np.ndarray) -> None:
+        pass
+
+    # 📌 이전 쓰기가 커밋 전에 중단됐다면, 파일 끝에 남은 부분을 잘라냄
+    def _truncate_to_committed(self) -> None:
+        for name, size in self._committed_sizes().items():
+            if os.path.exists(self._path(name)) and os.path.getsize(self._path(name)) > size:
+                with open(self._path(name), "r+b") as f:
+                    f.truncate(size)
+        self._truncated = True
+
+    # 🔹 커밋된 행 수 기준으로 각 파일이 가져야 할 크기 (바이트)
+    def _committed_sizes(self) -> Dict[str, int]:
+        return {
+            "vectors.f32": self.count * self.dimension * 4,
+            "norms.f32": self.count * 4,
+            "offsets.i64": (self.count + 1) * 8 if self.count else 0,
+            "docs.jsonl": int(self._offsets[-1]),
+            "ids.txt": len("\n".join(self._ids).encode("utf-8")),
+        }
+
+    # 📌 index.json 을 마지막에 갱신해서 추가/삭제를 확정
+    #   (행 수와 삭제 목록을 파일 하나에 써야 중간에 멈춰도 upsert 로 지운 예전 행만 사라지는 일이 없음)
+    def _commit(self) -> None:
+        _write_json_atomic(self._path("index.json"),
+                           {"dimension": self.dimension, "count": self.count, "deleted": sorted(self._deleted)})
+        self._remap()
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        vectors = self.embedding.embed_documents(texts)
+        return self.add_embeddings(zip(texts, vectors), metadatas=metadatas, ids=ids)
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        # 없는 id 는 무시 (매니페스트 기반 재수집에서 중복 삭제가 일어날 수 있음)
+        with self._lock:
+            rows = {self._row_of.pop(_id) for _id in ids or [] if _id in self._row_of}
+            if rows:
+                self._deleted |= rows
+                self._commit()
+        return True
+
+    def get_by_ids(self, ids: Sequence[str], /) -> List[Document]:
+        return [self._document_at(self._row_of[_id]) for _id in ids if _id in self._row_of]
+
+    # 📌 tombstone 을 실제로 지우고 파일을 다시 쓰기
+    def compact(self) -> None:
+        with self._lock:
+            rows = [row for row in range(self.count) if row not in self._deleted]
+            documents = [self._document_at(row) for row in rows]
+            vectors = np.array(self._vectors[rows]) if rows else None
+            for name in self._FILES:
+                if os.path.exists(self._path(name)):
+                    os.remove(self._path(name))
+            self.refresh()
+        if documents:
+            self.add_embeddings(
+                zip([doc.page_content for doc in documents], vectors),
+                metadatas=[doc.metadata for doc in documents],
+                ids=[doc.id for doc in documents],
+            )
+
+    # 📌 L2 거리 기준 top-k 검색 (벡터는 mmap, 문서는 top-k 만 읽음)
+    def similarity_search_with_score_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[Callable[[dict], bool]] = None,
+        fetch_k: int = 20,
+        **kwargs: Any,
+    ) -> List[Tuple[Document, float]]:
+        """
+        - filter: 메타데이터 딕셔너리를 받아 bool 을 반환하는 함수 (dict 면 값이 모두 같은 문서만)
+        - filter 가 있으면 가까운 fetch_k 개 후보 중에서 조건에 맞는 문서만 남김.
+        """
+        if len(self) == 0:
+            return []
+        query = np.asarray(embedding, dtype=np.float32)
+        n = (k if filter is None else max(k, fetch_k))
+        top, distances = self._nearest(query, min(n, len(self)))
+
+        if isinstance(filter, dict):
+            expected = filter
+            filter = lambda metadata: all(metadata.get(key) == value for key, value in expected.items())
+
+        results = []
+        for row, distance in zip(top, distances):
+            document = self._document_at(int(row))
+            if filter is None or filter(document.metadata):
+                results.append((document, float(distance)))
+            if len(results) == k:
+                break
+        return results
+
+    # 📌 가까운 n 개 행 번호와 L2 거리 (가까운 순서)
+    def _nearest(self, query: np.ndarray, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        # ||x - q||^2 = ||x||^2 - 2 x·q + ||q||^2
+        distances = self._norms - 2.0 * (self._vectors @ query) + float(query @ query)
+        if self._deleted:
+            distances[list(self._deleted)] = np.inf
+        top = np.argpartition(distances, n - 1)[:n]
+        top = top[np.argsort(distances[top])]
+        return top, distances[top]
+
+    def similarity_search_with_score(
+        self, query: str, k: int = 4, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(self.embedding.embed_query(query), k, **kwargs)
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k, **kwargs)]
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, **kwargs)]
+
+    def _select_relevance_score_fn(self) -> Callable[[float], float]:
+        return self._euclidean_relevance_score_fn
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        folder_path: str = "mmap_index",
+        **kwargs: Any,
+    ) -> "MmapVectorStore":
+        store = cls(folder_path, embedding)
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        return store
+
+    # 📌 기존 FAISS 인덱스(faiss_index_react 등)를 mmap 형식으로 변환
+    @classmethod
+    def from_faiss(cls, faiss_store, folder_path: str) -> "MmapVectorStore":
+        store = cls(folder_path, faiss_store.embeddings)
+        total = faiss_store.index.ntotal
+        if total:
+            vectors = faiss_store.index.reconstruct_n(0, total)
+            ids = [faiss_store.index_to_docstore_id[i] for i in range(total)]
+            documents = [faiss_store.docstore.search(_id) for _id in ids]
+            store.add_embeddings(
+                zip([doc.page_content for doc in documents], vectors),
+                metadatas=[doc.metadata for doc in documents],
+                ids=ids,
+            )
+        return store
+
+
+# 🔹 직접 실행하는 경우: FAISS.load_local(pickle) 과 로드 시간 / 메모리(RSS) 비교
+#   python mmap_index.py [문서 수]
+if __name__ == "__main__":
+    import subprocess
+    import sys
+    import tempfile
+    import time
+
+    def rss_mb() -> Dict[str, float]:
+        # RssAnon: 프로세스 전용 메모리 / RssFile: 파일 페이지 (mmap 은 여러 프로세스가 공유)
+        usage = {}
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(("RssAnon:", "RssFile:")):
+                    usage[line.split(":")[0]] = int(line.split()[1]) / 1024
+        return usage
+
+    class _FixedQueryEmbeddings(Embeddings):
+        def __init__(self, dimension: int):
+            self.dimension = dimension
+
+        def embed_documents(self, texts: List[str]) -> List[List[float]]:
+            rng = np.random.default_rng(len(texts))
+            return rng.standard_normal((len(texts), self.dimension), dtype=np.float32).tolist()
+
+        def embed_query(self, text: str) -> List[float]:
+            return self.embed_documents([text])[0]
+
+    # 🔹 자식 프로세스: 새 프로세스에서 인덱스를 열고 질문 하나를 검색 (cold start 측정)
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        kind, folder, dimension = sys.argv[2], sys.argv[3], int(sys.argv[4])
+        embeddings = _FixedQueryEmbeddings(dimension)
+        before = rss_mb()
+        start = time.perf_counter()
+        if kind == "faiss":
+            from langchain_community.vectorstores import FAISS
+
+            store = FAISS.load_local(folder, embeddings, allow_dangerous_deserialization=True)
+        else:
+            store = MmapVectorStore(folder, embeddings)
+        loaded = time.perf_counter()
+        store.similarity_search("query", k=3)
+        done = time.perf_counter()
+        after = rss_mb()
+        print(json.dumps({"load_s": loaded - start, "first_query_s": done - loaded,
+                          **{key: after[key] - before[key] for key in after}}))
+        sys.exit(0)
+
+    from langchain_community.vectorstores import FAISS
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    dimension = 1536
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        texts = [f"chunk {i} " + "lorem ipsum " * 80 for i in range(count)]  # 청크당 약 1KB
+        vectors = rng.standard_normal((count, dimension), dtype=np.float32)
+        faiss_store = FAISS.from_embeddings(zip(texts, vectors.tolist()), _FixedQueryEmbeddings(dimension))
+        faiss_store.save_local(os.path.join(tmp, "faiss"))
+        MmapVectorStore.from_faiss(faiss_store, os.path.join(tmp, "mmap"))
+        del faiss_store, vectors
+
+        print(f"{count} chunks x {dimension} dims")
+        for kind in ("faiss", "mmap"):
+            out = subprocess.run(
+                [sys.executable, __file__, "--child", kind, os.path.join(tmp, kind), str(dimension)],
+                capture_output=True, text=True, check=True,
+                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            )
+            result = json.loads(out.stdout)
+            print(f"{kind:>5}: load={result['load_s'] * 1000:.1f}ms "
+                  f"first_query={result['first_query_s'] * 1000:.1f}ms "
+                  f"private(RssAnon)+{result['RssAnon']:.1f}MB shared(RssFile)+{result['RssFile']:.1f}MB")
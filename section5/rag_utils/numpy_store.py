@@ -0,0 +1,349 @@
+# NumPy 만 사용하는 정확한(exact) 벡터 검색 스토어
+# - 수십만 청크 이하에서는 Pinecone 왕복 시간이 검색 지연의 대부분이고, FAISS 는 무거운 네이티브 의존성이 필요함
+# - 벡터는 미리 정규화해서 연속된 float32 행렬 하나에 보관 → 코사인 유사도 = 행렬 곱 한 번
+# - top-k 는 argpartition 으로 k 개만 고른 뒤 그 안에서만 정렬 (전체 정렬 없음)
+# - 여러 질문을 한 번에 검색하면 (질문 수 x D) @ (D x N) 행렬 곱 한 번으로 처리
+# - 메타데이터 필터는 (키, 값) 별 bool 마스크를 한 번 만들어서 재사용
+#
+# 저장 형식 (save_local / load_local, pickle 없음)
+#   vectors.npy    : N x D float32 (정규화된 벡터)
+#   docstore.json  : {"ids": [...], "texts": [...], "metadatas": [...]}
+import json
+import os
+import uuid
+from threading import Lock
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from langchain_core.documents import Document  # LangChain 문서 객체
+from langchain_core.embeddings import Embeddings  # 임베딩 인터페이스
+from langchain_core.vectorstores import VectorStore  # 벡터 스토어 인터페이스
+
+MetadataFilter = Union[Dict[str, Any], Callable[[dict], bool], None]
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0  # 0 벡터는 그대로 둠
+    return matrix / norms
+
+
+# 📌 NumPy 벡터 스토어
+class NumpyVectorStore(VectorStore):
+    """
+    - embedding: 문서 / 질문을 벡터로 바꿀 임베딩 모델
+    - 점수는 코사인 유사도 (클수록 유사). OpenAI 임베딩처럼 길이가 1인 벡터에서는 FAISS IndexFlatL2 와 순위가 같음.
+    - 삭제는 마지막 행을 빈 자리로 옮겨서 행렬을 항상 빈틈없이 유지 (tombstone / compact 없음).
+    - 검색과 쓰기는 같은 lock 을 사용 (검색 도중 행이 옮겨지지 않도록).
+    - Pinecone / FAISS 자리에 그대로 넣을 수 있도록 add_embeddings / delete / get_by_ids /
+      save_local / load_local 을 FAISS 와 같은 형태로 제공.
+    """
+
+    def __init__(self, embedding: Embeddings, dimension: Optional[int] = None):
+        self.embedding = embedding
+        self.dimension = dimension
+        self._matrix = np.zeros((0, dimension or 0), dtype=np.float32)  # 앞의 _count 행만 유효 (뒤는 여유 공간)
+        self._count = 0
+        self._ids: List[str] = []
+        self._texts: List[str] = []
+        self._metadatas: List[dict] = []
+        self._row_of: Dict[str, int] = {}
+        self._masks: Dict[Tuple[str, Any], np.ndarray] = {}  # (메타데이터 키, 값) → bool 마스크
+        self._lock = Lock()
+        self.version = 0  # 추가 / 삭제마다 증가 (semantic_cache.index_version 에서 사용)
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.embedding
+
+    # 🔹 행렬 용량이 부족하면 두 배로 늘림 (추가할 때마다 전체를 복사하지 않도록)
+    def _reserve(self, rows: int) -> None:
+        needed = self._count + rows
+        if needed <= len(self._matrix):
+            return
+        grown = np.zeros((max(needed, 2 * len(self._matrix), 1024), self.dimension), dtype=np.float32)
+        grown[: self._count] = self._matrix[: self._count]
+        self._matrix = grown
+
+    def _changed(self) -> None:
+        self._masks.clear()
+        self.version += 1
+
+    # 📌 미리 계산한 임베딩 추가 (FAISS.add_embeddings 와 같은 형태, 같은 id 는 교체)
+    def add_embeddings(
+        self,
+        text_embeddings: Iterable[Tuple[str, List[float]]],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        pairs = list(text_embeddings)
+        if not pairs:
+            return []
+        texts, vectors = zip(*pairs)
+        matrix = _normalize(np.asarray(vectors, dtype=np.float32))
+        metadatas = metadatas or [{} for _ in texts]
+        ids = list(ids or [str(uuid.uuid4()) for _ in texts])
+
+        with self._lock:
+            if self.dimension is None or self._count == 0:
+                if self.dimension != matrix.shape[1]:
+                    self.dimension = matrix.shape[1]
+                    self._matrix = np.zeros((0, self.dimension), dtype=np.float32)
+            elif matrix.shape[1] != self.dimension:
+                raise ValueError(f"expected {self.dimension}-dim vectors, got {matrix.shape[1]}")
+            self._delete_rows([self._row_of[_id] for _id in ids if _id in self._row_of])
+            self._reserve(len(ids))
+            self._matrix[self._count : self._count + len(ids)] = matrix
+            for row, (_id, text, metadata) in enumerate(zip(ids, texts, metadatas), self._count):
+                self._ids.append(_id)
+                self._texts.append(text)
+                self._metadatas.append(dict(metadata))
+                self._row_of[_id] = row
+            self._count += len(ids)
+            self._changed()
+        return ids
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        vectors = self.embedding.embed_documents(texts)
+        return self.add_embeddings(zip(texts, vectors), metadatas=metadatas, ids=ids)
+
+    # 🔹 행 삭제: 뒤쪽 행부터 지우면서 마지막 행을 빈 자리로 옮김
+    def _delete_rows(self, rows: Iterable[int]) -> None:
+        for row in sorted(set(rows), reverse=True):
+            last = self._count - 1
+            del self._row_of[self._ids[row]]
+            if row != last:
+                self._matrix[row] = self._matrix[last]
+                self._ids[row] = self._ids[last]
+                self._texts[row] = self._texts[last]
+                self._metadatas[row] = self._metadatas[last]
+                self._row_of[self._ids[row]] = row
+            self._ids.pop()
+            self._texts.pop()
+            self._metadatas.pop()
+            self._count = last
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        # 없는 id 는 무시 (매니페스트 기반 재수집에서 중복 삭제가 일어날 수 있음)
+        with self._lock:
+            rows = [self._row_of[_id] for _id in ids or [] if _id in self._row_of]
+            if rows:
+                self._delete_rows(rows)
+                self._changed()
+        return True
+
+    def get_by_ids(self, ids: Sequence[str], /) -> List[Document]:
+        return [self._document_at(self._row_of[_id]) for _id in ids if _id in self._row_of]
+
+    def _document_at(self, row: int) -> Document:
+        return Document(id=self._ids[row], page_content=self._texts[row], metadata=dict(self._metadatas[row]))
+
+    # 📌 메타데이터 필터 → bool 마스크
+    def _mask(self, filter: MetadataFilter) -> Optional[np.ndarray]:
+        """
+        - dict: {키: 값} 이면 값이 같은 문서, {키: [값, ...]} 이면 값 중 하나와 같은 문서 (조건끼리는 AND)
+          (키, 값) 별 마스크는 다음 추가 / 삭제 전까지 캐시
+        - 함수: 메타데이터를 받아 bool 을 반환 (매번 전체 문서에 대해 호출)
+        """
+        if filter is None:
+            return None
+        if callable(filter):
+            return np.fromiter((bool(filter(m)) for m in self._metadatas), dtype=bool, count=self._count)
+        mask = np.ones(self._count, dtype=bool)
+        for key, value in filter.items():
+            values = tuple(value) if isinstance(value, (list, tuple, set)) else (value,)
+            for one in values:
+                if (key, one) not in self._masks:
+                    self._masks[(key, one)] = np.fromiter(
+                        (m.get(key) == one for m in self._metadatas), dtype=bool, count=self._count
+                    )
+            mask &= np.logical_or.reduce([self._masks[(key, one)] for one in values])
+        return mask
+
+    # 📌 여러 질문 벡터를 한 번에 검색
+    def search_by_vectors(
+        self, embeddings: Sequence[List[float]], k: int = 4, filter: MetadataFilter = None
+    ) -> List[List[Tuple[Document, float]]]:
+        """
+        - embeddings: 질문 벡터 목록 (Q x D)
+        - return: 질문마다 [(문서, 코사인 유사도)] 유사도 내림차순
+        """
+        queries = _normalize(np.atleast_2d(np.asarray(embeddings, dtype=np.float32)))
+        with self._lock:
+            if self._count == 0:
+                return [[] for _ in queries]
+            matrix = self._matrix[: self._count]
+            rows = None
+            mask = self._mask(filter)
+            if mask is not None:
+                rows = np.flatnonzero(mask)
+                if len(rows) == 0:
+                    return [[] for _ in queries]
+                matrix = matrix[rows]  # 조건에 맞는 행만 모아서 계산
+
+            scores = queries @ matrix.T  # Q x N
+            k = min(k, scores.shape[1])
+            # 🔹 질문마다 상위 k 개만 고르고 (argpartition), 그 k 개만 정렬
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k] if k < scores.shape[1] else \
+                np.tile(np.arange(scores.shape[1]), (len(queries), 1))
+            top_scores = np.take_along_axis(scores, top, axis=1)
+            order = np.argsort(-top_scores, axis=1)
+            top = np.take_along_axis(top, order, axis=1)
+            top_scores = np.take_along_axis(top_scores, order, axis=1)
+            if rows is not None:
+                top = rows[top]
+            return [
+                [(self._document_at(int(row)), float(score)) for row, score in zip(row_ids, row_scores)]
+                for row_ids, row_scores in zip(top, top_scores)
+            ]
+
+    # 📌 여러 질문을 한 번에 임베딩(embed_documents 한 번) + 검색
+    def batch_similarity_search_with_score(
+        self, queries: Sequence[str], k: int = 4, filter: MetadataFilter = None
+    ) -> List[List[Tuple[Document, float]]]:
+        return self.search_by_vectors(self.embedding.embed_documents(list(queries)), k, filter)
+
+    def batch_similarity_search(
+        self, queries: Sequence[str], k: int = 4, filter: MetadataFilter = None
+    ) -> List[List[Document]]:
+        return [[doc for doc, _ in hits] for hits in self.batch_similarity_search_with_score(queries, k, filter)]
+
+    def similarity_search_with_score_by_vector(
+        self, embedding: List[float], k: int = 4, filter: MetadataFilter = None, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        return self.search_by_vectors([embedding], k, filter)[0]
+
+    def similarity_search_with_score(
+        self, query: str, k: int = 4, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(self.embedding.embed_query(query), k, **kwargs)
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k, **kwargs)]
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, **kwargs)]
+
+    def _select_relevance_score_fn(self) -> Callable[[float], float]:
+        # 코사인 유사도 [-1, 1] → 관련도 [0, 1]
+        return lambda score: (score + 1.0) / 2.0
+
+    # 📌 저장 / 불러오기 (.npy + JSON docstore)
+    def save_local(self, folder_path: str) -> None:
+        os.makedirs(folder_path, exist_ok=True)
+        with self._lock:
+            vectors_tmp = os.path.join(folder_path, "vectors.tmp.npy")
+            np.save(vectors_tmp, self._matrix[: self._count])
+            docstore_tmp = os.path.join(folder_path, "docstore.json.tmp")
+            with open(docstore_tmp, "w", encoding="utf-8") as f:
+                json.dump({"ids": self._ids, "texts": self._texts, "metadatas": self._metadatas}, f,
+                          ensure_ascii=False)
+        os.replace(vectors_tmp, os.path.join(folder_path, "vectors.npy"))
+        os.replace(docstore_tmp, os.path.join(folder_path, "docstore.json"))
+
+    @classmethod
+    def load_local(cls, folder_path: str, embeddings: Embeddings, **kwargs: Any) -> "NumpyVectorStore":
+        """
+        - 폴더가 없으면 빈 스토어를 반환 (처음 수집할 때).
+        - FAISS.load_local 과 같은 형태로 부를 수 있도록 나머지 인자(allow_dangerous_deserialization 등)는 무시.
+        """
+        store = cls(embeddings)
+        vectors_path = os.path.join(folder_path, "vectors.npy")
+        if not os.path.exists(vectors_path):
+            return store
+        matrix = np.load(vectors_path)
+        with open(os.path.join(folder_path, "docstore.json"), encoding="utf-8") as f:
+            saved = json.load(f)
+        store.dimension = matrix.shape[1]
+        store._matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        store._count = len(saved["ids"])
+        store._ids, store._texts, store._metadatas = saved["ids"], saved["texts"], saved["metadatas"]
+        store._row_of = {_id: row for row, _id in enumerate(store._ids)}
+        return store
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> "NumpyVectorStore":
+        store = cls(embedding)
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        return store
+
+    @classmethod
+    def from_embeddings(
+        cls,
+        text_embeddings: Iterable[Tuple[str, List[float]]],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> "NumpyVectorStore":
+        store = cls(embedding)
+        store.add_embeddings(text_embeddings, metadatas=metadatas, ids=ids)
+        return store
+
+
+# 🔹 직접 실행하는 경우: FAISS IndexFlatIP(정확한 검색)와 지연 시간 / 결과 비교
+#   python -m rag_utils.numpy_store [문서 수] [차원]
+if __name__ == "__main__":
+    import sys
+    import time
+
+    import faiss
+
+    from rag_utils.fake_embeddings import HashingEmbeddings
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    dimension = int(sys.argv[2]) if len(sys.argv) > 2 else 384
+    rng = np.random.default_rng(0)
+    vectors = _normalize(rng.standard_normal((count, dimension), dtype=np.float32))
+    queries = _normalize(rng.standard_normal((64, dimension), dtype=np.float32))
+    texts = [f"chunk {i}" for i in range(count)]
+    metadatas = [{"source": f"doc{i % 50}.pdf"} for i in range(count)]
+
+    store = NumpyVectorStore(HashingEmbeddings(size=dimension))
+    started = time.perf_counter()
+    store.add_embeddings(zip(texts, vectors), metadatas=metadatas)
+    print(f"{count} chunks x {dimension} dims, add: {time.perf_counter() - started:.2f}s")
+    flat = faiss.IndexFlatIP(dimension)
+    flat.add(vectors)
+
+    def timed(label: str, fn, repeat: int) -> Any:
+        fn()  # 워밍업
+        started = time.perf_counter()
+        for _ in range(repeat):
+            result = fn()
+        print(f"{label:>34}: {(time.perf_counter() - started) / repeat * 1000:8.2f} ms")
+        return result
+
+    k = 4
+    timed("faiss flat, 1 query", lambda: flat.search(queries[:1], k), 20)
+    timed("numpy, 1 query", lambda: store.search_by_vectors(queries[:1], k), 20)
+    _, faiss_top = timed("faiss flat, 64 queries (batch)", lambda: flat.search(queries, k), 5)
+    numpy_hits = timed("numpy, 64 queries (batch)", lambda: store.search_by_vectors(queries, k), 5)
+    timed("numpy, 64 queries (one by one)", lambda: [store.search_by_vectors([q], k) for q in queries], 2)
+    timed("numpy, 64 queries + filter (2%)", lambda: store.search_by_vectors(queries, k, {"source": "doc7.pdf"}), 5)
+
+    same = np.mean([
+        [int(doc.page_content.split()[1]) for doc, _ in hits] == list(top)
+        for hits, top in zip(numpy_hits, faiss_top)
+    ])
+    print(f"same top-{k} as faiss: {same:.0%}")
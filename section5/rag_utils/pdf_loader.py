@@ -0,0 +1,219 @@
+# 페이지 병렬 PDF 로더
+# - PyPDFLoader.load() 는 PDF 전체를 한 프로세스에서 파싱해서 모든 페이지를 리스트로 만듦
+# - 이 로더는 페이지 범위(예: 16페이지씩)를 프로세스 풀에 나눠서 텍스트 추출 + 분할을 하고,
+#   끝난 범위부터 순서대로 청크를 하나씩 yield 함 (전체 문서 리스트를 만들지 않음)
+# - 청크 순서와 메타데이터(PDF 문서 정보 + source / page / page_label / total_pages)는 PyPDFLoader + 페이지별 분할과 같음
+import os
+from datetime import datetime
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from langchain_core.document_loaders import BaseLoader  # LangChain 문서 로더 인터페이스
+from langchain_core.documents import Document  # LangChain 문서 객체
+
+_pool: Optional[ProcessPoolExecutor] = None
+_readers: Dict[Tuple[str, int], object] = {}  # 프로세스마다 (경로, 수정 시각) → PdfReader
+
+
+# 🔹 PdfReader 는 열 때 페이지 트리 전체를 펼치므로 (페이지 수에 비례) 범위마다 다시 열지 않고 프로세스마다 한 번만 엶
+def _reader(path: str):
+    from pypdf import PdfReader
+
+    key = (path, os.stat(path).st_mtime_ns)
+    if key not in _readers:
+        _readers.clear()  # 최근 PDF 하나만 유지 (메모리 사용량 일정)
+        _readers[key] = PdfReader(path)
+    return _readers[key]
+
+
+# 🔹 프로세스 풀은 처음 사용할 때 한 번만 만들어서 여러 PDF 가 함께 사용 (프로세스 시작 비용 절약)
+#   CPU 가 하나뿐이면 (PDF_WORKERS=1) 풀을 만들지 않고 현재 프로세스에서 범위 단위로 처리
+def _shared_pool() -> Optional[ProcessPoolExecutor]:
+    global _pool
+    workers = int(os.environ.get("PDF_WORKERS", os.cpu_count() or 1))
+    if _pool is None and workers > 1:
+        _pool = ProcessPoolExecutor(max_workers=workers)
+    return _pool
+
+
+# 🔹 PyPDFLoader 와 같은 문서 메타데이터: PDF 문서 정보(/Producer, /Title ...)를 소문자 키로 바꾸고 source / total_pages 를 덧붙임
+#   (langchain_community PyPDFParser + _purge_metadata 와 같은 규칙)
+def _document_metadata(reader, path: str) -> Dict:
+    info = {"producer": "PyPDF", "creator": "PyPDF", "creationdate": ""} | (reader.metadata or {})
+    metadata: Dict = {}
+    for key, value in (info | {"source": path, "total_pages": len(reader.pages)}).items():
+        if type(value) not in (str, int):
+            value = str(value)
+        key = key.lstrip("/").lower()
+        if key in ("creationdate", "moddate"):
+            try:  # 예: D:20240101120000+09'00' -> 2024-01-01T12:00:00+09:00
+                value = datetime.strptime(value.replace("'", ""), "D:%Y%m%d%H%M%S%z").isoformat("T")
+            except ValueError:
+                pass
+        metadata[key] = value.strip() if isinstance(value, str) else value
+    return metadata
+
+
+# 📌 워커 프로세스에서 실행: 페이지 범위의 텍스트를 추출하고 페이지별로 분할
+def _parse_pages(path: str, start: int, end: int, text_splitter) -> List[Tuple[str, Dict]]:
+    """
+    - return: [(청크 본문, 메타데이터)] (Document 보다 가볍게 부모 프로세스로 전달)
+    - text_splitter 가 None 이면 페이지 하나가 청크 하나.
+    """
+    reader = _reader(path)
+    doc_metadata = _document_metadata(reader, path)
+    page_labels = reader.page_labels  # 매번 전체 페이지 라벨을 계산하므로 한 번만 가져옴
+    results = []
+    for number in range(start, end):
+        page = reader.pages[number]
+        metadata = doc_metadata | {"page": number, "page_label": page_labels[number]}
+        page_doc = Document(page_content=page.extract_text(extraction_mode="plain"), metadata=metadata)
+        chunks = text_splitter.split_documents([page_doc]) if text_splitter else [page_doc]
+        results.extend((chunk.page_content, chunk.metadata) for chunk in chunks)
+    return results
+
+
+# 📌 페이지 병렬 PDF 로더
+class ParallelPDFLoader(BaseLoader):
+    """
+    - file_path: PDF 경로
+    - text_splitter: 페이지별로 적용할 분할기 (워커 프로세스로 전달되므로 pickle 가능해야 함, 예: CharacterTextSplitter)
+    - pages_per_task: 워커 하나가 한 번에 처리하는 페이지 수
+    - executor: 사용할 프로세스 풀 (없으면 PDF_WORKERS 크기의 공용 풀, 워커가 1개면 풀 없이 현재 프로세스에서 처리)
+    - 동시에 처리 중인 범위는 워커 수 * 2 개로 제한해서 큰 PDF 도 메모리 사용량이 일정함.
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        text_splitter=None,
+        pages_per_task: int = 16,
+        executor: Optional[Executor] = None,
+    ):
+        self.file_path = file_path
+        self.text_splitter = text_splitter
+        self.pages_per_task = pages_per_task
+        self.executor = executor
+
+    def lazy_load(self) -> Iterator[Document]:
+        from pypdf import PdfReader
+
+        executor = self.executor or _shared_pool()
+        if executor is None:
+            # 🔹 풀 없이: 범위 하나씩 파싱 / 분할해서 바로 yield (프로세스 간 전송 비용 없음)
+            total_pages = len(_reader(self.file_path).pages)
+            for start in range(0, total_pages, self.pages_per_task):
+                end = min(start + self.pages_per_task, total_pages)
+                for page_content, metadata in _parse_pages(self.file_path, start, end, self.text_splitter):
+                    yield Document(page_content=page_content, metadata=metadata)
+            _readers.clear()  # 다 읽은 PDF 는 메모리에서 내림
+            return
+
+        # 부모 프로세스에서는 페이지 수만 확인 (페이지 내용은 파싱하지 않음)
+        total_pages = len(PdfReader(self.file_path).pages)
+        max_pending = getattr(executor, "_max_workers", os.cpu_count() or 1) * 2
+
+        ranges = iter(range(0, total_pages, self.pages_per_task))
+        pending: deque = deque()
+
+        def submit_next() -> bool:
+            start = next(ranges, None)
+            if start is None:
+                return False
+            end = min(start + self.pages_per_task, total_pages)
+            pending.append(executor.submit(_parse_pages, self.file_path, start, end, self.text_splitter))
+            return True
+
+        while len(pending) < max_pending and submit_next():
+            pass
+        # 🔹 제출한 순서대로 결과를 꺼내서 청크 순서를 항상 같게 유지
+        while pending:
+            for page_content, metadata in pending.popleft().result():
+                yield Document(page_content=page_content, metadata=metadata)
+            submit_next()
+
+
+# 📌 이미 분할된 청크를 그대로 통과시키는 분할기 (ParallelPDFLoader 결과를 ingest_documents / sync_sources 에 넘길 때)
+class PassthroughSplitter:
+    def split_documents(self, documents: List[Document]) -> List[Document]:
+        return list(documents)
+
+
+# 🔹 직접 실행하는 경우: 생성한 로컬 PDF 로 pages/sec 와 최대 메모리(peak RSS) 비교
+#   python -m rag_utils.pdf_loader [페이지 수]
+#   각 방식을 새 프로세스에서 실행해서 peak RSS 가 서로 영향을 주지 않도록 함
+if __name__ == "__main__":
+    import json
+    import resource
+    import subprocess
+    import sys
+    import tempfile
+    import time
+
+    def write_sample_pdf(path: str, pages: int, lines_per_page: int = 45) -> None:
+        """텍스트만 있는 간단한 PDF 를 직접 생성 (외부 라이브러리 없이)"""
+        words = "retrieval augmented generation splits documents into chunks before embedding them".split()
+        objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+        page_ids = []
+        for number in range(pages):
+            lines = [" ".join(words[(number + i + j) % len(words)] for j in range(12)) for i in range(lines_per_page)]
+            text = "".join(f"({line}) Tj T* " for line in [f"Page {number + 1}"] + lines)
+            stream = f"BT /F1 10 Tf 12 TL 40 800 Td {text}ET"
+            objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+            objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                           f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+            page_ids.append(len(objects))
+        objects[1] = f"<< /Type /Pages /Kids [{' '.join(f'{i} 0 R' for i in page_ids)}] /Count {pages} >>"
+        out, offsets = b"%PDF-1.4\n", []
+        for i, body in enumerate(objects, start=1):
+            offsets.append(len(out))
+            out += f"{i} 0 obj\n{body}\nendobj\n".encode("latin-1")
+        xref = len(out)
+        out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+        out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+        out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+        with open(path, "wb") as f:
+            f.write(out)
+
+    def run_mode(mode: str, path: str) -> None:
+        from langchain_community.document_loaders import PyPDFLoader
+        from langchain_text_splitters import CharacterTextSplitter
+
+        splitter = CharacterTextSplitter(chunk_size=1000, chunk_overlap=30, separator="\n")
+        started = time.perf_counter()
+        if mode == "pypdf_load":
+            # 기존 방식: 전체 로드 후 한 번에 분할
+            chunks = splitter.split_documents(PyPDFLoader(file_path=path).load())
+            count, digest = len(chunks), hash(tuple((c.page_content, c.metadata["page"]) for c in chunks))
+        else:
+            # parallel: 프로세스 풀 (CPU 수만큼, 최소 2개) / streaming: 풀 없이 범위 단위 스트리밍
+            executor = ProcessPoolExecutor(max(2, os.cpu_count() or 1)) if mode == "parallel" else None
+            os.environ["PDF_WORKERS"] = "1"
+            count, digest_items = 0, []
+            for chunk in ParallelPDFLoader(path, splitter, executor=executor).lazy_load():
+                count += 1
+                digest_items.append((chunk.page_content, chunk.metadata["page"]))  # 순서 / 내용 비교용
+            digest = hash(tuple(digest_items))
+        elapsed = time.perf_counter() - started
+        peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss + resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+        print(json.dumps({"chunks": count, "elapsed": elapsed, "peak_mb": peak_kb / 1024, "digest": digest}))
+
+    if len(sys.argv) == 3 and sys.argv[1] in ("pypdf_load", "streaming", "parallel"):
+        run_mode(sys.argv[1], sys.argv[2])
+        sys.exit()
+
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "manual.pdf")
+        write_sample_pdf(path, pages)
+        print(f"{pages}-page PDF ({os.path.getsize(path) / 1e6:.1f} MB), {os.cpu_count()} CPUs")
+        env = {**os.environ, "PYTHONHASHSEED": "0"}
+        results = {}
+        for mode in ("pypdf_load", "streaming", "parallel"):
+            output = subprocess.run([sys.executable, "-m", "rag_utils.pdf_loader", mode, path],
+                                    capture_output=True, text=True, check=True, env=env).stdout
+            results[mode] = json.loads(output.strip().splitlines()[-1])
+            r = results[mode]
+            print(f"{mode:>11}: {r['chunks']} chunks, {pages / r['elapsed']:7.1f} pages/sec, peak RSS {r['peak_mb']:.0f} MB")
+        print("same chunks in same order:", len({r["digest"] for r in results.values()}) == 1)
@@ -0,0 +1,244 @@
+# 스트리밍 임베딩 파이프라인
+# 1. 파일을 하나씩 지연(lazy) 로딩하고 바로 분할
+# 2. 분할된 청크를 batch_size 단위로 묶어서 스레드 풀에서 동시에 임베딩
+# 3. 임베딩이 끝난 배치는 백그라운드 스레드에서 벡터 스토어에 업서트(upsert)
+import glob
+import os
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from itertools import islice
+from threading import Lock
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from langchain_core.documents import Document  # LangChain 문서 객체
+from langchain_core.embeddings import Embeddings  # 임베딩 인터페이스
+from langchain_core.vectorstores import VectorStore  # 벡터 스토어 인터페이스
+
+
+# 📌 단계별 처리 시간과 처리량을 기록하는 통계 객체
+@dataclass
+class IngestionStats:
+    """
+    - 파이프라인 실행 결과를 저장하는 통계 객체.
+    - stage_seconds: 단계별(load_split / embed / upsert) 누적 소요 시간 (초)
+    - embed / upsert 시간은 워커 스레드들의 합이므로 전체 실행 시간보다 클 수 있음.
+    """
+
+    documents: int = 0
+    chunks: int = 0
+    batches: int = 0
+    elapsed: float = 0.0
+    stage_seconds: Dict[str, float] = field(
+        default_factory=lambda: {"load_split": 0.0, "embed": 0.0, "upsert": 0.0}
+    )
+    _lock: Lock = field(default_factory=Lock, repr=False, compare=False)
+
+    def add_stage_time(self, stage: str, seconds: float) -> None:
+        # 여러 워커 스레드에서 동시에 호출되므로 Lock 으로 보호
+        with self._lock:
+            self.stage_seconds[stage] = self.stage_seconds.get(stage, 0.0) + seconds
+
+    @property
+    def chunks_per_sec(self) -> float:
+        return self.chunks / self.elapsed if self.elapsed else 0.0
+
+    def report(self) -> str:
+        stages = ", ".join(f"{k}={v:.2f}s" for k, v in self.stage_seconds.items())
+        return (
+            f"{self.documents} docs, {self.chunks} chunks, {self.batches} batches "
+            f"in {self.elapsed:.2f}s ({self.chunks_per_sec:.1f} chunks/sec) [{stages}]"
+        )
+
+
+# 📌 경로 목록(파일 또는 디렉터리)에서 텍스트 문서를 하나씩 읽어오는 제너레이터
+def iter_text_documents(
+    paths: Iterable[str], pattern: str = "*.txt", encoding: Optional[str] = None
+) -> Iterator[Document]:
+    """
+    - paths: 파일 경로 또는 디렉터리 경로 목록 (디렉터리는 pattern 으로 파일을 찾음)
+    - 파일 전체 목록을 메모리에 올리지 않고, 필요할 때마다 한 파일씩 로드.
+    """
+    from langchain_community.document_loaders import TextLoader  # 텍스트 문서를 불러오는 모듈
+
+    for file_path in expand_paths(paths, pattern):
+        yield from TextLoader(file_path, encoding=encoding).lazy_load()
+
+
+# 📌 파일/디렉터리 경로 목록을 파일 경로 목록으로 펼치는 헬퍼
+def expand_paths(paths: Iterable[str], pattern: str = "*.txt") -> Iterator[str]:
+    for path in paths:
+        if os.path.isdir(path):
+            yield from sorted(glob.glob(os.path.join(path, "**", pattern), recursive=True))
+        else:
+            yield path
+
+
+# 📌 문서를 하나씩 분할해서 청크 단위로 흘려보내는 제너레이터
+def iter_chunks(documents: Iterable[Document], text_splitter) -> Iterator[Document]:
+    """
+    - text_splitter: split_documents 메서드를 가진 LangChain 텍스트 분할기
+    - 문서 한 개씩 분할하므로 전체 청크 리스트를 만들지 않음.
+    """
+    for document in documents:
+        yield from text_splitter.split_documents([document])
+
+
+# 📌 이터러블을 size 개씩 묶어주는 헬퍼
+def batched(iterable: Iterable, size: int) -> Iterator[list]:
+    if size < 1:
+        raise ValueError("batch size must be at least 1")
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+# 📌 이미 계산된 임베딩을 벡터 스토어에 바로 저장하는 함수
+def add_embedded_documents(
+    vectorstore: VectorStore,
+    documents: Sequence[Document],
+    vectors: Sequence[List[float]],
+    ids: Optional[List[str]] = None,
+) -> List[str]:
+    """
+    - 벡터 스토어의 add_documents 는 내부에서 다시 임베딩을 하므로,
+      미리 계산한 벡터를 그대로 넣을 수 있는 경로를 스토어 종류별로 사용.
+    - FAISS: add_embeddings / Pinecone: index.upsert / InMemoryVectorStore: store 딕셔너리
+    - 위에 해당하지 않는 스토어는 add_documents 로 대체 (이 경우 임베딩이 한 번 더 발생).
+    """
+    texts = [doc.page_content for doc in documents]
+    metadatas = [dict(doc.metadata) for doc in documents]
+    ids = ids or [str(uuid.uuid4()) for _ in documents]
+
+    # 🔹 FAISS 처럼 (텍스트, 벡터) 쌍을 직접 받는 스토어
+    if hasattr(vectorstore, "add_embeddings"):
+        return vectorstore.add_embeddings(list(zip(texts, vectors)), metadatas=metadatas, ids=ids)
+
+    # 🔹 Pinecone: 메타데이터에 원문 텍스트를 함께 넣어서 업서트
+    if hasattr(vectorstore, "index") and hasattr(vectorstore, "_text_key"):
+        for metadata, text in zip(metadatas, texts):
+            metadata[vectorstore._text_key] = text
+        vectorstore.index.upsert(
+            vectors=list(zip(ids, vectors, metadatas)),
+            namespace=getattr(vectorstore, "_namespace", None),
+        )
+        return ids
+
+    # 🔹 langchain_core 의 InMemoryVectorStore
+    if isinstance(getattr(vectorstore, "store", None), dict):
+        for _id, text, vector, metadata in zip(ids, texts, vectors, metadatas):
+            vectorstore.store[_id] = {"id": _id, "vector": vector, "text": text, "metadata": metadata}
+        return ids
+
+    return vectorstore.add_documents(list(documents), ids=ids)
+
+
+# 📌 스트리밍 임베딩 파이프라인 실행 함수
+def ingest_documents(
+    documents: Iterable[Document],
+    text_splitter,
+    embeddings: Embeddings,
+    vectorstore: VectorStore,
+    batch_size: int = 64,
+    max_workers: int = 4,
+    upsert_workers: int = 1,
+    id_fn: Optional[Callable[[Document], str]] = None,
+    lexical_index=None,
+) -> IngestionStats:
+    """
+    - documents: 지연 로딩되는 문서 이터러블 (예: iter_text_documents 결과)
+    - batch_size: 한 번의 embed_documents 호출에 들어가는 청크 수
+    - max_workers: 동시에 임베딩하는 배치 수 (느린 요청 하나가 전체를 막지 않도록)
+    - upsert_workers: 백그라운드 업서트 스레드 수 (FAISS 처럼 스레드 안전하지 않은 스토어는 1 유지)
+    - id_fn: 청크별 id 생성 함수 (없으면 uuid4)
+    - lexical_index: 같은 청크를 함께 넣을 키워드 색인 (예: rag_utils.hybrid.BM25Index)
+    - 메모리 사용량을 일정하게 유지하기 위해 대기 중인 배치는 max_workers * 2 개로 제한.
+    """
+    stats = IngestionStats()
+    max_pending = max_workers * 2
+
+    def counted_documents() -> Iterator[Document]:
+        for document in documents:
+            stats.documents += 1
+            yield document
+
+    def embed_batch(batch: List[Document]):
+        start = time.perf_counter()
+        vectors = embeddings.embed_documents([doc.page_content for doc in batch])
+        stats.add_stage_time("embed", time.perf_counter() - start)
+        return batch, vectors
+
+    def upsert_batch(batch: List[Document], vectors: List[List[float]]) -> List[str]:
+        start = time.perf_counter()
+        ids = [id_fn(doc) for doc in batch] if id_fn else None
+        added = add_embedded_documents(vectorstore, batch, vectors, ids=ids)
+        if lexical_index is not None:
+            lexical_index.add_documents(batch, added)
+        stats.add_stage_time("upsert", time.perf_counter() - start)
+        return added
+
+    started = time.perf_counter()
+    batches = batched(iter_chunks(counted_documents(), text_splitter), batch_size)
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="embed") as embed_pool, \
+            ThreadPoolExecutor(max_workers=upsert_workers, thread_name_prefix="upsert") as upsert_pool:
+        pending_embeds: set = set()
+        pending_upserts: List[Future] = []
+
+        def drain(done: Iterable[Future]) -> None:
+            for future in done:
+                batch, vectors = future.result()  # 임베딩 실패 시 여기서 예외 전파
+                pending_upserts.append(upsert_pool.submit(upsert_batch, batch, vectors))
+
+        while True:
+            # 🔹 다음 배치를 읽는 시간 = 파일 로딩 + 분할 시간
+            load_start = time.perf_counter()
+            batch = next(batches, None)
+            stats.add_stage_time("load_split", time.perf_counter() - load_start)
+            if batch is None:
+                break
+
+            stats.chunks += len(batch)
+            stats.batches += 1
+            pending_embeds.add(embed_pool.submit(embed_batch, batch))
+
+            # 🔹 대기 중인 배치가 너무 많으면 하나가 끝날 때까지 기다림 (backpressure)
+            if len(pending_embeds) >= max_pending:
+                done, pending_embeds = wait(pending_embeds, return_when=FIRST_COMPLETED)
+                drain(done)
+
+        drain(wait(pending_embeds).done)
+        for future in pending_upserts:
+            future.result()  # 업서트 실패 시 예외 전파
+
+    stats.elapsed = time.perf_counter() - started
+    return stats
+
+
+# 🔹 직접 실행하는 경우: 가짜 임베딩 + 메모리 벡터 스토어로 동작 확인 및 처리량 측정
+if __name__ == "__main__":
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+    from langchain_core.vectorstores import InMemoryVectorStore
+    from langchain_text_splitters import CharacterTextSplitter
+
+    class SlowFakeEmbeddings(DeterministicFakeEmbedding):
+        """네트워크 지연을 흉내 내는 가짜 임베딩 (배치마다 50ms)"""
+
+        def embed_documents(self, texts: List[str]) -> List[List[float]]:
+            time.sleep(0.05)
+            return super().embed_documents(texts)
+
+    sample = os.path.join(os.path.dirname(__file__), "..", "intro-to-vector-dbs", "mediumblog1.txt")
+    splitter = CharacterTextSplitter(chunk_size=200, chunk_overlap=0, separator=" ")
+    for workers in (1, 4, 8):
+        store = InMemoryVectorStore(SlowFakeEmbeddings(size=1536))
+        result = ingest_documents(
+            iter_text_documents([sample] * 20),
+            splitter,
+            store.embeddings,
+            store,
+            batch_size=16,
+            max_workers=workers,
+        )
+        print(f"max_workers={workers}: {result.report()}")
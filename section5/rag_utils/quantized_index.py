@@ -0,0 +1,408 @@
+# 양자화(quantized) 코드로 후보를 고르고 float32 벡터로 다시 정렬하는 mmap 인덱스
+# - MmapVectorStore 는 검색마다 vectors.f32 (청크당 1536 x 4 = 6KB) 를 전부 읽으므로
+#   인덱스 전체가 RAM(페이지 캐시)에 올라가 있어야 빠르고, 한 노드에 올릴 수 있는 문서 수가 RAM 으로 제한됨.
+# - 이 인덱스는 벡터마다 작은 코드를 따로 저장하고 검색할 때는 코드만 훑음:
+#   - int8 (scalar quantization): 차원마다 최솟값 / 간격으로 0~255 에 대응 (청크당 D 바이트, 1/4)
+#   - pq (product quantization): D 차원을 m 개 구간으로 나누고 구간마다 256 개 중심점 번호 (청크당 m 바이트)
+# - 코드로 구한 근사 거리 상위 rerank_k 개만 vectors.f32 에서 읽어서 정확한 L2 거리로 다시 정렬
+#   (점수는 MmapVectorStore 와 같은 정확한 L2 거리, rerank_k=0 이면 근사 거리를 그대로 반환)
+# - float32 벡터 / 문서 파일은 MmapVectorStore 와 같으므로 같은 폴더를 두 클래스로 모두 열 수 있음
+#
+# 추가 파일
+#   codes-<세대>.u8 : N x code_size uint8 (행 번호 순서, 추가할 때 이어 씀)
+#   quantizer.npz   : 양자화 방식 / 파라미터 / 학습에 쓴 벡터 수 / 세대(generation) 번호 (np.savez, pickle 없음)
+#   다시 학습하면 새 세대 번호로 코드 파일을 새로 쓰고 quantizer.npz 를 os.replace 로 바꿈 (= 커밋 지점)
+#   → 이미 열려 있는 mmap 은 예전 파일을 그대로 보고 (잘리지 않음), 읽기 프로세스는 검색할 때 바뀐 것을 알아채고 refresh()
+import io
+import os
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document  # LangChain 문서 객체
+from langchain_core.embeddings import Embeddings  # 임베딩 인터페이스
+
+from rag_utils.mmap_index import MmapVectorStore
+
+
+# 📌 scalar quantization: 차원마다 [최솟값, 최댓값] 을 0~255 로 나눔
+class ScalarQuantizer:
+    kind = "int8"
+
+    def __init__(self, low: np.ndarray, step: np.ndarray):
+        self.low = low.astype(np.float32)
+        self.step = step.astype(np.float32)
+        self.dimension = len(low)
+        self.code_size = len(low)
+
+    @classmethod
+    def train(cls, sample: np.ndarray) -> "ScalarQuantizer":
+        low, high = sample.min(axis=0), sample.max(axis=0)
+        step = (high - low) / 255.0
+        step[step == 0] = 1.0  # 값이 하나뿐인 차원
+        return cls(low, step)
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        # 학습 범위를 벗어난 값은 양 끝으로 자름 (나중에 추가된 벡터)
+        return np.clip(np.rint((vectors - self.low) / self.step), 0, 255).astype(np.uint8)
+
+    def distance_fn(self, query: np.ndarray) -> Callable[[np.ndarray, np.ndarray], np.ndarray]:
+        # ||x - q||^2 ≈ ||x||^2 - 2 x̂·q + ||q||^2,  x̂·q = low·q + codes @ (step * q)
+        scaled = self.step * query
+        offset = float(self.low @ query)
+        query_norm = float(query @ query)
+        return lambda codes, norms: norms - 2.0 * (codes @ scaled + offset) + query_norm
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        return {"low": self.low, "step": self.step}
+
+    @classmethod
+    def from_arrays(cls, arrays) -> "ScalarQuantizer":
+        return cls(arrays["low"], arrays["step"])
+
+
+# 📌 product quantization: D 차원을 m 개 구간으로 나누고, 구간마다 k-means 중심점 256 개 중 가장 가까운 번호
+class ProductQuantizer:
+    kind = "pq"
+
+    def __init__(self, centroids: np.ndarray):
+        self.centroids = centroids.astype(np.float32)  # m x 256 x (D / m)
+        self.m, self.k, self.sub_dimension = centroids.shape
+        self.dimension = self.m * self.sub_dimension
+        self.code_size = self.m
+
+    @classmethod
+    def train(cls, sample: np.ndarray, m: int, iterations: int = 10, seed: int = 0) -> "ProductQuantizer":
+        dimension = sample.shape[1]
+        if dimension % m:
+            raise ValueError(f"pq_m={m} must divide the vector dimension {dimension}")
+        rng = np.random.default_rng(seed)
+        k = min(256, len(sample))
+        sub = dimension // m
+        centroids = np.zeros((m, 256, sub), dtype=np.float32)
+        for j in range(m):
+            x = np.ascontiguousarray(sample[:, j * sub : (j + 1) * sub])
+            c = x[rng.choice(len(x), k, replace=False)].copy()
+            for _ in range(iterations):
+                assign = np.argmin((c * c).sum(axis=1) - 2.0 * (x @ c.T), axis=1)
+                counts = np.bincount(assign, minlength=k)
+                sums = np.stack([np.bincount(assign, weights=x[:, d], minlength=k) for d in range(sub)], axis=1)
+                filled = counts > 0  # 빈 중심점은 그대로 둠
+                c[filled] = (sums[filled] / counts[filled, None]).astype(np.float32)
+            centroids[j, :k] = c
+            centroids[j, k:] = c[0]  # 학습 벡터가 256 개보다 적으면 남는 번호는 쓰이지 않음
+        return cls(centroids)
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        codes = np.empty((len(vectors), self.m), dtype=np.uint8)
+        sub = self.sub_dimension
+        for j in range(self.m):
+            c = self.centroids[j]
+            x = vectors[:, j * sub : (j + 1) * sub]
+            codes[:, j] = np.argmin((c * c).sum(axis=1) - 2.0 * (x @ c.T), axis=1)
+        return codes
+
+    def distance_fn(self, query: np.ndarray) -> Callable[[np.ndarray, np.ndarray], np.ndarray]:
+        # 구간마다 질문 ~ 256 개 중심점 거리표를 한 번 만들고, 코드 번호로 찾아서 더함 (ADC)
+        table = ((self.centroids - query.reshape(self.m, 1, self.sub_dimension)) ** 2).sum(axis=2)
+        flat = table.ravel()
+        offsets = np.arange(self.m, dtype=np.intp) * self.k
+        return lambda codes, norms: flat[codes + offsets].sum(axis=1)
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        return {"centroids": self.centroids}
+
+    @classmethod
+    def from_arrays(cls, arrays) -> "ProductQuantizer":
+        return cls(arrays["centroids"])
+
+
+_QUANTIZERS = {ScalarQuantizer.kind: ScalarQuantizer, ProductQuantizer.kind: ProductQuantizer}
+_CODES_RE = re.compile(r"codes-(\d+)\.u8$")  # 세대별 코드 파일 이름
+
+
+# 📌 양자화 코드로 검색하는 mmap 벡터 스토어
+class QuantizedMmapVectorStore(MmapVectorStore):
+    """
+    - quantization: "int8" (청크당 D 바이트) 또는 "pq" (청크당 pq_m 바이트, 기본 D / 16)
+    - rerank_k: 근사 거리 상위 몇 개를 float32 벡터로 다시 계산할지 (k / fetch_k 보다 작으면 그 값 사용)
+    - train_size: 양자화 파라미터 학습에 쓰는 최대 벡터 수.
+      처음 추가한 벡터로 학습하고, 벡터 수가 학습할 때의 두 배가 될 때마다 (train_size 까지) 다시 학습해서 코드를 새로 씀.
+    - 코드가 없거나 다른 방식으로 만든 폴더 (MmapVectorStore 로 만든 인덱스 등) 를 열면 그 자리에서 코드를 만듦.
+    - 다른 프로세스가 다시 학습하면 (quantizer.npz 가 바뀜) 다음 검색 전에 refresh() 로 새 세대를 엶.
+    """
+
+    # 세대별 코드 파일 (codes-<세대>.u8) 은 _train 에서 정리
+    _FILES = MmapVectorStore._FILES + ("quantizer.npz",)
+
+    def __init__(
+        self,
+        folder_path: str,
+        embedding: Embeddings,
+        quantization: str = "int8",
+        rerank_k: int = 64,
+        pq_m: Optional[int] = None,
+        train_size: int = 20_000,
+    ):
+        if quantization not in _QUANTIZERS:
+            raise ValueError(f"quantization must be one of {sorted(_QUANTIZERS)}, got {quantization!r}")
+        self.quantization = quantization
+        self.rerank_k = rerank_k
+        self.pq_m = pq_m
+        self.train_size = train_size
+        self._quantizer = None
+        self._trained_on = 0
+        self._generation = 0
+        self._quantizer_stamp = None
+        super().__init__(folder_path, embedding)
+
+    # 📌 디스크 상태로 다시 열고, 코드가 없거나 모자라면 만듦
+    def refresh(self) -> None:
+        self._load_quantizer()
+        super().refresh()
+        if self._quantizer is not None and self._quantizer.dimension != self.dimension:
+            self._quantizer, self._codes = None, None
+        if self.count and self._codes is None:
+            with self._lock:
+                self._sync_codes()
+                self._remap()
+
+    def _load_quantizer(self) -> None:
+        self._quantizer, self._trained_on, self._generation = None, 0, 0
+        self._quantizer_stamp = self._stamp()
+        if self._quantizer_stamp is None:
+            return
+        with np.load(self._path("quantizer.npz"), allow_pickle=False) as saved:
+            if str(saved["kind"]) != self.quantization or "generation" not in saved.files:
+                return
+            self._quantizer = _QUANTIZERS[self.quantization].from_arrays(saved)
+            self._trained_on = int(saved["trained_on"])
+            self._generation = int(saved["generation"])
+
+    def _save_quantizer(self) -> None:
+        buffer = io.BytesIO()
+        np.savez(buffer, kind=np.array(self.quantization), trained_on=np.array(self._trained_on),
+                 generation=np.array(self._generation), **self._quantizer.arrays())
+        tmp_path = self._path("quantizer.npz.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(buffer.getvalue())
+        os.replace(tmp_path, self._path("quantizer.npz"))
+        self._quantizer_stamp = self._stamp()
+
+    # 🔹 quantizer.npz 가 바뀌었는지 확인하는 값 (os.replace 마다 inode 가 바뀜, 검색마다 stat 한 번)
+    def _stamp(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self._path("quantizer.npz"))
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+    def _codes_name(self, generation: Optional[int] = None) -> str:
+        return f"codes-{self._generation if generation is None else generation}.u8"
+
+    # 🔹 폴더에 남아 있는 코드 파일의 세대 번호
+    def _code_generations(self) -> List[int]:
+        return [int(m.group(1)) for m in map(_CODES_RE.match, os.listdir(self.folder_path)) if m]
+
+    def _code_rows(self) -> int:
+        if self._quantizer is None or not os.path.exists(self._path(self._codes_name())):
+            return 0
+        return os.path.getsize(self._path(self._codes_name())) // self._quantizer.code_size
+
+    # 🔹 코드는 전부 있을 때만 mmap 으로 열고, 모자라면 None (refresh / _on_append 에서 채움)
+    def _remap(self) -> None:
+        super()._remap()
+        if not self.count:
+            self._codes = np.zeros((0, self._quantizer.code_size if self._quantizer else 0), dtype=np.uint8)
+        elif self._code_rows() >= self.count:
+            self._codes = np.memmap(self._path(self._codes_name()), dtype=np.uint8, mode="r",
+                                    shape=(self.count, self._quantizer.code_size))
+        else:
+            self._codes = None
+
+    def _committed_sizes(self) -> Dict[str, int]:
+        sizes = super()._committed_sizes()
+        if self._quantizer is not None:
+            sizes[self._codes_name()] = self.count * self._quantizer.code_size
+        return sizes
+
+    # 📌 현재 벡터로 양자화 파라미터를 (다시) 학습하고 전체 코드를 새 세대 파일로 씀
+    def _train(self, vectors: np.ndarray) -> None:
+        """
+        - 예전 코드 파일은 그대로 두고 codes-<새 세대>.u8 에 쓴 뒤 quantizer.npz 를 바꿔서 커밋.
+          (제자리에서 다시 쓰면 열려 있는 읽기 프로세스가 새 코드 + 예전 파라미터를 보거나, 잘린 mmap 을 읽다가 SIGBUS)
+        - 바로 이전 세대는 quantizer.npz 를 막 읽은 프로세스가 열 수 있도록 남기고, 그보다 오래된 파일만 지움.
+        """
+        rows = np.setdiff1d(np.arange(len(vectors)), np.fromiter(self._deleted, dtype=np.int64))
+        if len(rows) > self.train_size:
+            rows = np.sort(np.random.default_rng(0).choice(rows, self.train_size, replace=False))
+        sample = np.asarray(vectors[rows if len(rows) else slice(None)], dtype=np.float32)
+        if self.quantization == "pq":
+            self._quantizer = ProductQuantizer.train(sample, self.pq_m or max(1, vectors.shape[1] // 16))
+        else:
+            self._quantizer = ScalarQuantizer.train(sample)
+        self._trained_on = len(vectors)
+        self._generation = max([self._generation, *self._code_generations()]) + 1
+        self._write_codes(vectors, 0, "wb")
+        self._save_quantizer()
+        for generation in self._code_generations():
+            if generation < self._generation - 1:
+                os.remove(self._path(self._codes_name(generation)))
+
+    # 🔹 vectors[start:] 를 블록 단위로 인코딩해서 현재 세대 코드 파일에 씀 (mode="wb" 면 새 파일, "ab" 면 이어서)
+    def _write_codes(self, vectors: np.ndarray, start: int, mode: str) -> None:
+        block = max(1024, 4_000_000 // vectors.shape[1])
+        with open(self._path(self._codes_name()), mode) as f:
+            for offset in range(start, len(vectors), block):
+                chunk = np.asarray(vectors[offset : offset + block], dtype=np.float32)
+                f.write(self._quantizer.encode(chunk).tobytes())
+
+    # 📌 코드가 벡터 수보다 모자라면 채움 (파라미터가 없거나 오래됐으면 다시 학습)
+    def _sync_codes(self) -> None:
+        vectors = np.memmap(self._path("vectors.f32"), dtype=np.float32, mode="r",
+                            shape=(self.count, self.dimension))
+        stale = self._trained_on < self.train_size and self.count >= 2 * self._trained_on
+        if self._quantizer is None or stale:
+            self._train(vectors)
+            return
+        done = self._code_rows()
+        if done > self.count:
+            done = self.count
+        # 커밋되지 않은 끝부분만 자름 (읽기 프로세스의 mmap 은 커밋된 행까지만 봄)
+        path = self._path(self._codes_name())
+        with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+            f.truncate(done * self._quantizer.code_size)
+        self._write_codes(vectors, done, "ab")
+
+    # 🔹 MmapVectorStore.add_embeddings 가 새 행을 쓴 뒤 (커밋 전) 호출
+    def _on_append(self, matrix: np.ndarray) -> None:
+        self._sync_codes()
+
+    # 📌 검색 전에 다른 프로세스가 다시 학습했는지 확인 (세대가 바뀌었으면 refresh)
+    def similarity_search_with_score_by_vector(
+        self, embedding: List[float], k: int = 4, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        if self._stamp() != self._quantizer_stamp:
+            self.refresh()
+        return super().similarity_search_with_score_by_vector(embedding, k, **kwargs)
+
+    # 📌 근사 거리로 후보를 고르고, 후보만 float32 벡터로 정확한 거리 계산
+    def _nearest(self, query: np.ndarray, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        distance = self._quantizer.distance_fn(query)
+        approx = np.empty(self.count, dtype=np.float32)
+        block = max(64, 262_144 // self._quantizer.code_size)  # 임시 배열이 CPU 캐시에 들어가는 크기 (약 1MB)
+        for start in range(0, self.count, block):
+            approx[start : start + block] = distance(self._codes[start : start + block],
+                                                     self._norms[start : start + block])
+        if self._deleted:
+            approx[list(self._deleted)] = np.inf
+
+        candidates = min(max(n, self.rerank_k), self.count)
+        top = np.argpartition(approx, candidates - 1)[:candidates]
+        if not self.rerank_k:
+            top = top[np.argsort(approx[top])]
+            return top, approx[top]
+
+        top = np.sort(top[np.isfinite(approx[top])])
+        exact = self._norms[top] - 2.0 * (self._read_rows(top) @ query) + float(query @ query)
+        order = np.argsort(exact)[:n]
+        return top[order], exact[order]
+
+    # 🔹 후보 행의 float32 벡터만 pread 로 읽음
+    #   (mmap 으로 읽으면 커널이 주변 페이지까지 함께 매핑해서 후보 몇십 개만 읽어도 파일 대부분이 RSS 에 올라감)
+    def _read_rows(self, rows: np.ndarray) -> np.ndarray:
+        row_bytes = self.dimension * 4
+        with open(self._path("vectors.f32"), "rb") as f:
+            data = b"".join(os.pread(f.fileno(), row_bytes, int(row) * row_bytes) for row in rows)
+        return np.frombuffer(data, dtype=np.float32).reshape(len(rows), self.dimension)
+
+    # 📌 검색할 때 RAM 에 올라가는 바이트 수 (코드 + 노름, 후보 벡터 제외)
+    def scan_bytes(self) -> int:
+        return self.count * (self._quantizer.code_size + 4) if self._quantizer else 0
+
+
+# 🔹 직접 실행하는 경우: float32 전체 검색(MmapVectorStore)과 recall@k / 메모리 / 지연 시간 비교
+#   python -m rag_utils.quantized_index [문서 수] [차원]
+if __name__ == "__main__":
+    import json
+    import subprocess
+    import sys
+    import tempfile
+    import time
+
+    from rag_utils.fake_embeddings import HashingEmbeddings
+
+    def rss_mb() -> float:
+        # 프로세스가 실제로 올린 메모리 (전용 + mmap 파일 페이지)
+        total = 0
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(("RssAnon:", "RssFile:")):
+                    total += int(line.split()[1])
+        return total / 1024
+
+    def open_store(folder: str, config: str, dimension: int):
+        embeddings = HashingEmbeddings(size=dimension)
+        if config == "flat":
+            return MmapVectorStore(folder, embeddings)
+        quantization, rerank_k = config.split(":")
+        return QuantizedMmapVectorStore(folder, embeddings, quantization=quantization, rerank_k=int(rerank_k))
+
+    # 🔹 자식 프로세스: 새 프로세스에서 인덱스를 열고 질문을 검색 (RSS / 지연 시간 / 결과 행 번호)
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        folder, config, dimension, k = sys.argv[2], sys.argv[3], int(sys.argv[4]), int(sys.argv[5])
+        queries = np.load(os.path.join(os.path.dirname(folder), "queries.npy"))
+        before = rss_mb()
+        store = open_store(folder, config, dimension)
+        started = time.perf_counter()
+        hits = [[int(doc.page_content.split()[1]) for doc in store.similarity_search_by_vector(q, k)]
+                for q in queries]
+        elapsed = time.perf_counter() - started
+        print(json.dumps({"ms": elapsed / len(queries) * 1000, "rss_mb": rss_mb() - before, "hits": hits}))
+        sys.exit(0)
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    dimension = int(sys.argv[2]) if len(sys.argv) > 2 else 1536
+    k = 10
+    rng = np.random.default_rng(0)
+    # 🔹 주제(군집) 1000 개 주변에 흩어진 길이 1 벡터 (OpenAI 임베딩처럼 비슷한 문서끼리 모여 있는 분포)
+    topics = rng.standard_normal((1000, dimension), dtype=np.float32)
+    vectors = topics[rng.integers(0, 1000, count)] + 0.6 * rng.standard_normal((count, dimension), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries = vectors[rng.choice(count, 100, replace=False)] + 0.02 * rng.standard_normal((100, dimension),
+                                                                                          dtype=np.float32)
+    texts = [f"chunk {i}" for i in range(count)]
+
+    configs = ["flat", "int8:0", "int8:64", "pq:0", "pq:64", "pq:256"]
+    child_cwd = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    with tempfile.TemporaryDirectory() as tmp:
+        np.save(os.path.join(tmp, "queries.npy"), queries)
+        folders = {"flat": os.path.join(tmp, "flat")}
+        MmapVectorStore(folders["flat"], HashingEmbeddings(size=dimension)).add_embeddings(zip(texts, vectors))
+        del vectors
+        print(f"{count} chunks x {dimension} dims, recall@{k} vs exact float32 search, 100 queries")
+
+        # 🔹 float32 인덱스 파일을 하드 링크한 폴더를 양자화 스토어로 열면 그 자리에서 학습 + 인코딩
+        for quantization in ("int8", "pq"):
+            folders[quantization] = os.path.join(tmp, quantization)
+            os.makedirs(folders[quantization])
+            for name in MmapVectorStore._FILES:
+                if os.path.exists(os.path.join(folders["flat"], name)):
+                    os.link(os.path.join(folders["flat"], name), os.path.join(folders[quantization], name))
+            started = time.perf_counter()
+            store = open_store(folders[quantization], f"{quantization}:64", dimension)
+            print(f"{quantization:>5}: build {time.perf_counter() - started:.1f}s, "
+                  f"codes {store._quantizer.code_size} B/chunk, "
+                  f"scanned per query {store.scan_bytes() / 2 ** 20:.1f}MB "
+                  f"(float32: {count * (dimension + 1) * 4 / 2 ** 20:.1f}MB)")
+
+        exact = None
+        print(f"{'config':>10} {'recall':>7} {'ms/query':>9} {'RSS':>9}")
+        for config in configs:
+            folder = folders[config.split(":")[0]]
+            out = subprocess.run([sys.executable, "-m", "rag_utils.quantized_index", "--child", folder, config,
+                                  str(dimension), str(k)], capture_output=True, text=True, check=True, cwd=child_cwd)
+            result = json.loads(out.stdout)
+            exact = exact or result["hits"]
+            recall = np.mean([len(set(a) & set(b)) / k for a, b in zip(result["hits"], exact)])
+            print(f"{config:>10} {recall:7.3f} {result['ms']:9.2f} {result['rss_mb']:7.1f}MB")
@@ -0,0 +1,217 @@
+# 검색 체인 앞의 의미 기반(semantic) 답변 캐시
+# - 질문을 임베딩해서 예전에 답한 질문 중 충분히 비슷한 것(코사인 유사도 >= threshold)이 있으면
+#   retrieval_chain 을 실행하지 않고 저장된 답변과 근거 문서를 바로 반환
+# - 항목 수 제한(LRU) + TTL, 벡터 인덱스가 바뀌면(재수집 / 재구축) 캐시 전체 무효화
+# - 캐시는 작게(수천 개) 유지하므로 ANN 대신 정규화된 벡터 행렬과의 내적 한 번으로 정확하게 검색
+import os
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings  # 임베딩 인터페이스
+
+
+# 📌 벡터 인덱스 버전 (바뀌면 캐시된 답변의 근거가 달라졌을 수 있음)
+def index_version(vectorstore) -> Optional[Hashable]:
+    """
+    - MmapVectorStore: index.json (예전 형식은 deleted.json 도) 수정 시각 (추가 / 삭제 / compact 마다 커밋되면서 바뀌고,
+      다른 프로세스가 다시 수집한 경우도 감지)
+    - FAISS: 벡터 수 + docstore id 수
+    - NumpyVectorStore: 추가 / 삭제마다 증가하는 version
+    - 그 외 (Pinecone 등): None → 자동 무효화 없음, 재수집 후 cache.clear() 호출
+    """
+    if hasattr(vectorstore, "folder_path"):
+        paths = [os.path.join(vectorstore.folder_path, name) for name in ("index.json", "deleted.json")]
+        return tuple(os.stat(path).st_mtime_ns if os.path.exists(path) else 0 for path in paths)
+    if isinstance(getattr(vectorstore, "version", None), int):
+        return vectorstore.version
+    if hasattr(vectorstore, "index_to_docstore_id"):
+        return vectorstore.index.ntotal, len(vectorstore.index_to_docstore_id)
+    return None
+
+
+# 📌 의미 기반 답변 캐시
+class SemanticAnswerCache:
+    """
+    - embeddings: 질문 임베딩 모델 (CachedEmbeddings 를 쓰면 미스 후 검색기가 같은 질문을 다시 임베딩할 때 API 호출 없음)
+    - threshold: 이 코사인 유사도 이상이면 같은 질문으로 취급 (너무 낮추면 다른 질문에 틀린 답을 줄 수 있음)
+    - ttl / max_entries: 답변 보관 시간(초) / 최대 항목 수 (넘으면 가장 오래 사용되지 않은 항목부터 제거)
+    - version_fn: 인덱스 버전을 돌려주는 함수 (예: lambda: index_version(vectorstore)).
+      값이 바뀌면 다음 조회 때 캐시를 비움. 버전 확인은 version_check_interval 초에 한 번만.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        threshold: float = 0.92,
+        ttl: float = 24 * 3600,
+        max_entries: int = 1000,
+        version_fn: Optional[Callable[[], Optional[Hashable]]] = None,
+        version_check_interval: float = 5.0,
+    ):
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.version_fn = version_fn
+        self.version_check_interval = version_check_interval
+        self._lock = Lock()
+        self._entries: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()  # 슬롯 번호 → 항목 (LRU 순서)
+        self._vectors: Optional[np.ndarray] = None  # max_entries x D 정규화 벡터
+        self._valid = np.zeros(max_entries, dtype=bool)
+        self._free = list(range(max_entries - 1, -1, -1))
+        self._version = version_fn() if version_fn else None
+        self._version_checked = time.monotonic()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.saved_seconds = 0.0  # 캐시 덕분에 실행하지 않은 체인 시간 합계
+        self.lookup_seconds = 0.0  # 캐시 조회(임베딩 + 검색) 시간 합계
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._valid[:] = False
+            self._free = list(range(self.max_entries - 1, -1, -1))
+
+    def _check_version(self) -> None:
+        if self.version_fn is None or time.monotonic() - self._version_checked < self.version_check_interval:
+            return
+        self._version_checked = time.monotonic()
+        version = self.version_fn()
+        if version != self._version:
+            self.clear()
+            self._version = version
+            self.invalidations += 1
+
+    def _embed(self, query: str) -> np.ndarray:
+        vector = np.asarray(self.embeddings.embed_query(query), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _drop(self, slot: int) -> None:
+        del self._entries[slot]
+        self._valid[slot] = False
+        self._free.append(slot)
+
+    def lookup(self, query: str) -> Tuple[Optional[Dict[str, Any]], float, np.ndarray]:
+        """
+        - return: (저장된 결과 또는 None, 가장 비슷한 질문의 유사도, 질문 벡터)
+        - 질문 벡터는 미스 후 store() 에 다시 넘겨서 임베딩을 한 번만 하도록 함.
+        """
+        self._check_version()
+        vector = self._embed(query)
+        with self._lock:
+            if self._vectors is None or not self._entries:
+                return None, 0.0, vector
+            similarities = np.where(self._valid, self._vectors @ vector, -1.0)
+            slot = int(np.argmax(similarities))
+            similarity = float(similarities[slot])
+            if similarity < self.threshold:
+                return None, similarity, vector
+            entry = self._entries[slot]
+            if entry["expires_at"] < time.time():
+                self._drop(slot)
+                return None, similarity, vector
+            self._entries.move_to_end(slot)
+            return entry, similarity, vector
+
+    def store(self, query: str, vector: np.ndarray, result: Any, elapsed: float) -> None:
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros((self.max_entries, len(vector)), dtype=np.float32)
+            if not self._free:
+                self._drop(next(iter(self._entries)))  # 가장 오래 사용되지 않은 항목 제거
+            slot = self._free.pop()
+            self._vectors[slot] = vector
+            self._valid[slot] = True
+            self._entries[slot] = {
+                "query": query,
+                "result": result,
+                "elapsed": elapsed,
+                "expires_at": time.time() + self.ttl,
+            }
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "invalidations": self.invalidations,
+            "saved_seconds": round(self.saved_seconds, 3),
+            "avg_lookup_ms": round(self.lookup_seconds / total * 1000, 2) if total else 0.0,
+        }
+
+
+# 📌 retrieval_chain 앞에 캐시를 두는 래퍼
+class SemanticCachedChain:
+    """
+    - chain: create_retrieval_chain 결과처럼 {"input": 질문} 을 받아 {"input", "context", "answer"} 를 반환하는 체인
+    - invoke 결과에 cache_hit / cached_query / similarity 를 추가로 넣어 반환.
+    """
+
+    def __init__(self, chain, cache: SemanticAnswerCache, input_key: str = "input"):
+        self.chain = chain
+        self.cache = cache
+        self.input_key = input_key
+
+    def invoke(self, inputs: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+        query = inputs[self.input_key]
+        started = time.perf_counter()
+        entry, similarity, vector = self.cache.lookup(query)
+        self.cache.lookup_seconds += time.perf_counter() - started
+        if entry is not None:
+            self.cache.hits += 1
+            self.cache.saved_seconds += entry["elapsed"]
+            return {**entry["result"], self.input_key: query, "cache_hit": True,
+                    "cached_query": entry["query"], "similarity": round(similarity, 4)}
+
+        self.cache.misses += 1
+        started = time.perf_counter()
+        result = self.chain.invoke(inputs, **kwargs)
+        self.cache.store(query, vector, {k: v for k, v in result.items() if k != self.input_key},
+                         time.perf_counter() - started)
+        return {**result, "cache_hit": False, "similarity": round(similarity, 4)}
+
+
+# 🔹 직접 실행하는 경우: 말만 조금 바꾼 질문이 반복될 때 적중률과 절약된 시간 확인
+#   (가짜 임베딩 + 0.5초 걸리는 가짜 검색 체인)
+if __name__ == "__main__":
+    import random
+
+    from langchain_core.runnables import RunnableLambda
+
+    from rag_utils.fake_embeddings import HashingEmbeddings
+
+    def slow_chain(inputs: Dict[str, Any]) -> Dict[str, Any]:
+        time.sleep(0.5)
+        return {"input": inputs["input"], "context": [], "answer": f"answer to: {inputs['input']}"}
+
+    questions = [
+        "Give me the gist of ReAct in 3 sentences",
+        "What tools does the ReAct agent use",
+        "How does ReAct compare to chain of thought prompting",
+        "What benchmarks were used to evaluate ReAct",
+    ]
+    variants = ["{q}", "{q}?", "please {q}", "{q} please", "Could you tell me: {q}"]
+
+    rng = random.Random(0)
+    cache = SemanticAnswerCache(HashingEmbeddings(size=512), threshold=0.8)
+    chain = SemanticCachedChain(RunnableLambda(slow_chain), cache)
+    started = time.perf_counter()
+    for _ in range(30):
+        question = rng.choice(variants).format(q=rng.choice(questions).lower() if rng.random() < 0.5 else rng.choice(questions))
+        chain.invoke({"input": question})
+    print(f"30 questions in {time.perf_counter() - started:.2f}s (uncached: {30 * 0.5:.1f}s)")
+    print(cache.stats())
+
+    # 🔹 다른 주제의 질문은 캐시되지 않아야 함
+    result = chain.invoke({"input": "Who founded Pinecone"})
+    print(f"unrelated question: cache_hit={result['cache_hit']} similarity={result['similarity']}")
@@ -0,0 +1,278 @@
+# 여러 로컬 인덱스(샤드)를 프로세스 풀에서 동시에 검색하는 검색기
+# - 문서 컬렉션마다 인덱스 폴더(MmapVectorStore / QuantizedMmapVectorStore 형식)를 하나씩 두고,
+#   질문 하나를 모든 샤드에 나눠 보낸 뒤 샤드별 top-k 를 heap 으로 합쳐서 전체 top-k 를 만듦
+# - 질문 벡터는 공유 메모리(SharedMemory)에 한 번 쓰고 워커는 이름으로 붙어서 읽음 (작업마다 벡터를 pickle 하지 않음)
+# - 샤드 인덱스는 mmap 이라 워커 프로세스끼리 같은 페이지 캐시를 공유하고, 워커마다 한 번만 엶
+# - budget(초)이 지나면 끝난 샤드의 결과만 합쳐서 반환 (아직 시작하지 않은 샤드 작업은 건너뜀)
+import heapq
+import itertools
+import logging
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, wait
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document  # LangChain 문서 객체
+from langchain_core.embeddings import Embeddings  # 임베딩 인터페이스
+from langchain_core.retrievers import BaseRetriever  # 검색기 인터페이스
+
+from rag_utils.mmap_index import MmapVectorStore
+from rag_utils.quantized_index import QuantizedMmapVectorStore
+
+logger = logging.getLogger(__name__)
+
+Hits = List[Tuple[Document, float]]
+
+_pool: Optional[ProcessPoolExecutor] = None
+_shards: Dict[Tuple[str, str], Tuple[int, MmapVectorStore]] = {}  # 프로세스마다 (폴더, 양자화) → (index.json 수정 시각, 스토어)
+
+
+# 🔹 프로세스 풀은 처음 사용할 때 한 번만 만들어서 모든 검색기가 함께 사용
+#   SHARD_WORKERS=1 (또는 CPU 하나) 이면 풀 없이 현재 프로세스에서 샤드를 차례로 검색
+def _shared_pool() -> Optional[ProcessPoolExecutor]:
+    global _pool
+    workers = int(os.environ.get("SHARD_WORKERS", os.cpu_count() or 1))
+    if _pool is None and workers > 1:
+        _pool = ProcessPoolExecutor(max_workers=workers)
+    return _pool
+
+
+# 🔹 샤드는 프로세스마다 한 번만 열고, 다시 수집되면 (index.json 이 바뀌면) 새로 엶
+def _open_shard(path: str, quantization: str) -> MmapVectorStore:
+    header = os.path.join(path, "index.json")
+    mtime = os.stat(header).st_mtime_ns if os.path.exists(header) else 0
+    key = (path, quantization)
+    if key not in _shards or _shards[key][0] != mtime:
+        # 질문은 벡터로 받으므로 임베딩 모델은 필요 없음
+        if quantization:
+            store = QuantizedMmapVectorStore(path, None, quantization=quantization)
+        else:
+            store = MmapVectorStore(path, None)
+        _shards[key] = (mtime, store)
+    return _shards[key][1]
+
+
+# 🔹 다른 프로세스가 만든 공유 메모리에 붙기만 함 (resource_tracker 에 등록하지 않음 = Python 3.13 의 track=False)
+#   - 3.12 까지는 붙기만 해도 등록되는데, 풀 워커는 부모와 같은 tracker 를 쓰므로
+#     부모가 unlink 한 뒤에 등록되면 종료할 때 "leaked shared_memory" 경고 + 없는 세그먼트 unlink 시도가 생김.
+#   - 붙은 뒤 unregister 하면 tracker 의 이름 집합에서 부모의 등록까지 지워져서, 부모의 unlink 때 KeyError 가 남.
+#   - 워커 프로세스는 작업을 한 번에 하나씩 실행하므로 register 를 잠깐 바꿔도 다른 스레드와 겹치지 않음.
+def _attach(name: str, owner_pid: int) -> SharedMemory:
+    if os.getpid() == owner_pid:  # 스레드 풀 등 만든 프로세스 안에서 실행 → 이미 등록됨
+        return SharedMemory(name=name)
+    try:
+        return SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13
+        pass
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: None
+    try:
+        return SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+def _search_store(store: MmapVectorStore, queries: np.ndarray, k: int) -> List[Hits]:
+    return [store.similarity_search_with_score_by_vector(query, k) for query in queries]
+
+
+# 📌 워커 프로세스에서 실행: 공유 메모리의 질문 벡터로 샤드 하나를 검색
+def _search_shard(path: str, quantization: str, shm_name: str, shape: Tuple[int, int], k: int,
+                  deadline: Optional[float], owner_pid: int) -> Optional[List[Hits]]:
+    # 큐에서 기다리는 동안 budget 이 지났으면 검색하지 않음 (호출한 쪽은 이미 결과를 반환함)
+    if deadline is not None and time.time() >= deadline:
+        return None
+    store = _open_shard(path, quantization)
+    shm = _attach(shm_name, owner_pid)
+    try:
+        queries = np.ndarray(shape, dtype=np.float32, buffer=shm.buf)
+        hits = _search_store(store, queries, k)
+        del queries  # 공유 메모리를 닫기 전에 버퍼 참조를 놓음
+    finally:
+        shm.close()
+    return hits
+
+
+# 📌 샤드별 (거리 오름차순) 결과를 heap 으로 합쳐서 상위 k 개
+def merge_hits(per_shard: Sequence[Hits], k: int) -> Hits:
+    return list(itertools.islice(heapq.merge(*per_shard, key=lambda hit: hit[1]), k))
+
+
+# 📌 샤드 검색기
+class ShardedRetriever(BaseRetriever):
+    """
+    - shard_paths: 샤드 인덱스 폴더 목록 (모든 샤드가 같은 임베딩 모델로 만들어져 있어야 거리를 비교할 수 있음)
+    - embedding: 질문을 벡터로 바꿀 임베딩 모델 (search_by_vectors 만 쓰면 None)
+    - k: 반환할 문서 수 (샤드마다 k 개씩 가져와서 합침)
+    - budget: 질문 하나에 쓸 최대 시간 (초). 지나면 그때까지 끝난 샤드의 결과만 합쳐서 반환. None 이면 모두 기다림.
+    - quantization: "" (float32 전체 검색) / "int8" / "pq" (QuantizedMmapVectorStore 로 열기)
+    - executor: 샤드 검색을 실행할 프로세스 풀. None 이면 SHARD_WORKERS (기본 CPU 수) 개의 공유 풀.
+    - stats: 검색 횟수, budget 때문에 일부 샤드 없이 반환한 횟수, 빠진 샤드 수
+    - 점수는 L2 거리 (낮을수록 유사), 문서 메타데이터에 "shard" (shard_paths 의 번호) 를 추가.
+    """
+
+    shard_paths: List[str]
+    embedding: Optional[Embeddings] = None
+    k: int = 4
+    budget: Optional[float] = None
+    quantization: str = ""
+    executor: Optional[Executor] = None
+    stats: Dict[str, int] = {}
+
+    def model_post_init(self, __context: Any) -> None:
+        self.stats = {"queries": 0, "partial": 0, "shards_missed": 0}
+        if self.quantization:
+            # 코드가 없는 샤드는 열 때 코드를 만들므로, 워커들이 동시에 만들지 않도록 여기서 먼저 한 번 엶
+            for path in self.shard_paths:
+                _open_shard(path, self.quantization)
+
+    # 📌 여러 질문 벡터를 한 번에 모든 샤드에서 검색
+    def search_by_vectors(self, embeddings: Sequence[List[float]], k: Optional[int] = None,
+                          budget: Optional[float] = None) -> List[Hits]:
+        """
+        - return: 질문마다 [(문서, L2 거리)] 거리 오름차순
+        - budget: 이 호출 전체(질문 여러 개면 모두 합쳐서)에 쓸 최대 시간 (초, 없으면 self.budget)
+        """
+        k = k or self.k
+        budget = self.budget if budget is None else budget
+        queries = np.ascontiguousarray(np.atleast_2d(np.asarray(embeddings, dtype=np.float32)))
+        deadline = time.time() + budget if budget is not None else None
+        executor = self.executor or _shared_pool()
+        per_shard: Dict[int, List[Hits]] = {}
+
+        if executor is None:
+            # 🔹 풀이 없으면 현재 프로세스에서 차례로 검색, budget 이 지나면 남은 샤드는 건너뜀
+            for shard, path in enumerate(self.shard_paths):
+                if deadline is not None and time.time() >= deadline:
+                    break
+                per_shard[shard] = _search_store(_open_shard(path, self.quantization), queries, k)
+        else:
+            # 🔹 질문 벡터를 공유 메모리에 한 번 쓰고, 샤드마다 작업 하나씩 보냄
+            shm = SharedMemory(create=True, size=max(1, queries.nbytes))
+            try:
+                np.ndarray(queries.shape, dtype=np.float32, buffer=shm.buf)[:] = queries
+                futures = {
+                    executor.submit(_search_shard, path, self.quantization, shm.name, queries.shape, k, deadline,
+                                    os.getpid()): shard
+                    for shard, path in enumerate(self.shard_paths)
+                }
+                timeout = max(0.0, deadline - time.time()) if deadline is not None else None
+                done, not_done = wait(futures, timeout=timeout)
+                for future in not_done:
+                    future.cancel()  # 아직 시작하지 않은 작업만 취소됨
+                for future in done:
+                    try:
+                        hits = future.result()
+                    except Exception:
+                        logger.exception("search on shard %s failed", self.shard_paths[futures[future]])
+                        continue
+                    if hits is not None:
+                        per_shard[futures[future]] = hits
+            finally:
+                # 아직 실행 중인 워커는 이미 붙어 있으므로 계속 읽을 수 있고, 시작 전인 작업은 위에서 건너뜀
+                shm.close()
+                shm.unlink()
+
+        self.stats["queries"] += len(queries)
+        missed = len(self.shard_paths) - len(per_shard)
+        if missed:
+            self.stats["partial"] += len(queries)
+            self.stats["shards_missed"] += missed
+            logger.warning("returned results from %d of %d shards within %.3fs",
+                           len(per_shard), len(self.shard_paths), budget)
+
+        results = []
+        for i in range(len(queries)):
+            # 🔹 샤드 번호를 메타데이터에 남김 (같은 id 가 여러 컬렉션에 있을 수 있음)
+            shard_hits = [
+                [(Document(id=doc.id, page_content=doc.page_content, metadata={**doc.metadata, "shard": shard}),
+                  score) for doc, score in hits[i]]
+                for shard, hits in sorted(per_shard.items())
+            ]
+            results.append(merge_hits(shard_hits, k))
+        return results
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        hits = self.search_by_vectors([self.embedding.embed_query(query)])[0]
+        return [doc for doc, _ in hits]
+
+
+# 🔹 직접 실행하는 경우: 샤드 수(= 전체 문서 수)를 늘리면서 질문 하나의 지연 시간 측정
+#   python -m rag_utils.sharded [샤드당 문서 수] [차원] [최대 샤드 수]
+if __name__ == "__main__":
+    import statistics
+    import sys
+    import tempfile
+
+    per_shard_count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    dimension = int(sys.argv[2]) if len(sys.argv) > 2 else 384
+    max_shards = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+    k, repeat = 10, 30
+    logger.setLevel(logging.ERROR)  # budget 측정에서 나오는 부분 결과 경고는 아래 stats 로 보고
+    rng = np.random.default_rng(0)
+    queries = rng.standard_normal((repeat, dimension), dtype=np.float32)
+
+    def median_ms(fn) -> float:
+        fn(queries[:1])  # 워밍업 (워커가 샤드를 열고 페이지를 읽음)
+        times = []
+        for query in queries:
+            started = time.perf_counter()
+            fn(query[None])
+            times.append(time.perf_counter() - started)
+        return statistics.median(times) * 1000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for shard in range(max_shards):
+            path = os.path.join(tmp, f"shard{shard}")
+            vectors = rng.standard_normal((per_shard_count, dimension), dtype=np.float32)
+            MmapVectorStore(path, None).add_embeddings(
+                zip([f"shard {shard} chunk {i}" for i in range(per_shard_count)], vectors))
+            paths.append(path)
+        cpus = len(os.sched_getaffinity(0))
+        print(f"{per_shard_count} chunks x {dimension} dims per shard, k={k}, {cpus} CPU, median of {repeat} queries")
+
+        worker_counts = sorted({1, 2, 4, cpus})
+        print(f"{'shards':>6} {'chunks':>8} {'slowest shard':>13} " +
+              " ".join(f"{f'{w} worker(s)':>12}" for w in worker_counts))
+        pools = {workers: ProcessPoolExecutor(workers) for workers in worker_counts if workers > 1}
+        shards = 1
+        while shards <= max_shards:
+            # 🔹 샤드 하나만 검색하는 시간 (CPU 가 샤드 수만큼 있을 때 지연 시간의 하한)
+            slowest = max(median_ms(lambda q, path=path: _search_store(_open_shard(path, ""), q, k))
+                          for path in paths[:shards])
+            row = []
+            for workers in worker_counts:
+                os.environ["SHARD_WORKERS"] = "1"  # executor 가 없을 때 현재 프로세스에서 검색
+                retriever = ShardedRetriever(shard_paths=paths[:shards], embedding=None, k=k,
+                                             executor=pools.get(workers))
+                row.append(median_ms(lambda q: retriever.search_by_vectors(q)))
+            print(f"{shards:>6} {shards * per_shard_count:>8} {slowest:11.1f}ms " +
+                  " ".join(f"{ms:10.1f}ms" for ms in row))
+            shards *= 2
+
+        # 🔹 budget: 전체 샤드를 다 기다리는 시간의 절반만 쓰고 best-so-far 반환
+        executor = pools.get(max(worker_counts)) if len(worker_counts) > 1 else None
+        full = ShardedRetriever(shard_paths=paths, embedding=None, k=k, executor=executor)
+        full_ms = median_ms(lambda q: full.search_by_vectors(q))
+        limited = ShardedRetriever(shard_paths=paths, embedding=None, k=k, executor=executor,
+                                   budget=full_ms / 2000)
+        recall, elapsed = [], []
+        for query in queries:
+            expected = {doc.page_content for doc, _ in full.search_by_vectors(query[None])[0]}
+            started = time.perf_counter()
+            hits = limited.search_by_vectors(query[None])[0]
+            elapsed.append(time.perf_counter() - started)
+            recall.append(len(expected & {doc.page_content for doc, _ in hits}) / k)
+        print(f"\nbudget {full_ms / 2:.1f}ms ({max_shards} shards, full search {full_ms:.1f}ms): "
+              f"median {statistics.median(elapsed) * 1000:.1f}ms, recall@{k} {np.mean(recall):.2f}, "
+              f"partial {limited.stats['partial']}/{limited.stats['queries']}, "
+              f"shards missed {limited.stats['shards_missed']}")
+        for pool in pools.values():
+            pool.shutdown()
@@ -0,0 +1,249 @@
+# 토큰 수 기준, 문장 / 문단 경계 우선 텍스트 분할기
+# - CharacterTextSplitter 는 글자 수로 자르기 때문에 임베딩 모델 입장에서 청크가 넘치거나 모자람
+#   (한국어는 한 글자가 1~3 토큰, 영어는 4~5 글자가 1 토큰)
+# - 문단 / 줄 / 문장 경계를 정규식 한 번으로 찾고, 문장마다 한 번만 토큰화 (tiktoken, 반복되는 짧은 문장은 캐시)
+# - 청크는 원문 문자열의 [시작, 끝) 구간을 한 번 잘라서 만듦 (조각을 이어 붙이지 않음)
+# - 빠른 경로: UTF-8 바이트 수가 chunk_size 이하인 텍스트는 토큰화하지 않고 그대로 반환
+#   (바이트 단위 BPE 에서 토큰 수 <= 바이트 수)
+import re
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Iterator, List, Optional, Tuple, Union
+
+from langchain_text_splitters import TextSplitter  # LangChain 분할기 인터페이스 (split_documents 등 제공)
+
+# 경계: 문단(빈 줄) / 문장 끝(. ! ? 。 ！ ？ 뒤 닫는 따옴표·괄호 + 공백) / 줄바꿈
+_BOUNDARY_RE = re.compile(r"\n[^\S\n]*\n\s*|(?<=[.!?。！？])[\"'”’)\]]*\s+|\n")
+_PARAGRAPH, _SENTENCE = 2, 1
+
+
+@lru_cache(maxsize=None)
+def get_encoding(encoding_name: str = "cl100k_base"):
+    """tiktoken 인코딩은 만들 때 어휘 파일을 읽으므로 프로세스마다 한 번만 생성"""
+    import tiktoken
+
+    return tiktoken.get_encoding(encoding_name)
+
+
+# 📌 토큰 기준 분할기
+class SentenceTokenSplitter(TextSplitter):
+    """
+    - chunk_size / chunk_overlap: 토큰 수 (text-embedding-3-* / ada-002 는 cl100k_base)
+    - encoding: tiktoken 인코딩 이름 또는 Encoding 객체
+    - min_fill: 청크가 넘칠 때, 이 비율 이상 채운 지점에 문단 경계가 있으면 문장 대신 문단 경계에서 자름
+    - 문장 하나가 chunk_size 보다 길면 그 문장만 토큰 단위로 자름.
+    - 토큰 수는 문장별 토큰 수의 합 (문장을 이어서 토큰화할 때와 거의 같고, 넘치는 쪽으로만 어긋남).
+    - 짧은 문장(머리글 / 바닥글 등 반복되는 줄)의 토큰 수는 LRU 로 캐시.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = 256,
+        chunk_overlap: int = 0,
+        encoding: Union[str, Any] = "cl100k_base",
+        min_fill: float = 0.5,
+        batch_size: int = 2048,
+        cache_size: int = 65536,
+        **kwargs: Any,
+    ):
+        super().__init__(chunk_size=chunk_size, chunk_overlap=chunk_overlap, **kwargs)
+        self._encoding_name = encoding if isinstance(encoding, str) else None
+        self._encoding = None if isinstance(encoding, str) else encoding
+        self.min_fill = min_fill
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+        self._counts: "OrderedDict[str, int]" = OrderedDict()
+
+    @property
+    def encoding(self):
+        if self._encoding is None:
+            self._encoding = get_encoding(self._encoding_name)
+        return self._encoding
+
+    # 🔹 pdf_loader 처럼 워커 프로세스로 보낼 때는 인코딩 이름만 전달 (워커에서 다시 불러옴)
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state["_counts"] = OrderedDict()
+        if self._encoding_name is not None:
+            state["_encoding"] = None
+        return state
+
+    def count_tokens(self, text: str) -> int:
+        return len(self.encoding.encode_ordinary(text))
+
+    # 📌 (시작, 끝, 경계 종류) 구간을 원문 순서대로 (정규식 한 번으로 전체를 훑음)
+    @staticmethod
+    def _segments(text: str) -> Iterator[Tuple[int, int, int]]:
+        start = 0
+        for match in _BOUNDARY_RE.finditer(text):
+            end = match.end()
+            if end > start:
+                kind = _PARAGRAPH if match.group().count("\n") >= 2 else _SENTENCE
+                yield start, end, kind
+            start = end
+        if start < len(text):
+            yield start, len(text), _PARAGRAPH
+
+    # 🔹 구간 여러 개의 토큰 수를 한 번에 계산 (캐시에 없는 것만 토큰화)
+    #   encode_ordinary_batch 는 문장마다 스레드 풀 작업을 만들어서 짧은 문장에는 오히려 느리므로 직접 반복
+    def _count_batch(self, pieces: List[str]) -> List[int]:
+        counts: List[Optional[int]] = [self._counts.get(piece) for piece in pieces]
+        encode = self.encoding.encode_ordinary
+        for i, count in enumerate(counts):
+            if count is None:
+                counts[i] = count = len(encode(pieces[i]))
+                if len(pieces[i]) <= 200:
+                    self._counts[pieces[i]] = count
+        while len(self._counts) > self.cache_size:
+            self._counts.popitem(last=False)
+        return counts
+
+    def _counted_segments(self, text: str) -> Iterator[Tuple[int, int, int, int]]:
+        batch: List[Tuple[int, int, int]] = []
+        for segment in self._segments(text):
+            batch.append(segment)
+            if len(batch) >= self.batch_size:
+                counts = self._count_batch([text[s:e] for s, e, _ in batch])
+                yield from ((s, e, kind, n) for (s, e, kind), n in zip(batch, counts))
+                batch = []
+        if batch:
+            counts = self._count_batch([text[s:e] for s, e, _ in batch])
+            yield from ((s, e, kind, n) for (s, e, kind), n in zip(batch, counts))
+
+    # 🔹 chunk_size 보다 긴 문장: 토큰 단위로 자르고, 토큰의 글자 위치로 원문을 자름
+    def _split_long(self, text: str, start: int, end: int) -> List[str]:
+        segment = text[start:end]
+        tokens = self.encoding.encode_ordinary(segment)
+        _, offsets = self.encoding.decode_with_offsets(tokens)
+        offsets.append(len(segment))
+        step = max(1, self._chunk_size - self._chunk_overlap)
+        pieces = []
+        for i in range(0, len(tokens), step):
+            piece = segment[offsets[i] : offsets[min(i + self._chunk_size, len(tokens))]].strip()
+            if piece:
+                pieces.append(piece)
+            if i + self._chunk_size >= len(tokens):
+                break
+        return pieces
+
+    # 📌 분할 (한 번의 선형 패스)
+    def split_text(self, text: str) -> List[str]:
+        if len(text.encode("utf-8")) <= self._chunk_size:  # 빠른 경로
+            stripped = text.strip()
+            return [stripped] if stripped else []
+
+        chunks: List[str] = []
+        current: List[Tuple[int, int, int, int]] = []  # 현재 청크의 (시작, 끝, 경계 종류, 토큰 수)
+        current_tokens = 0
+
+        def emit(upto: int) -> int:
+            # current[:upto] 를 청크로 내보내고, 그중 뒤쪽 chunk_overlap 토큰만큼의 문장을 다음 청크 앞에 남김
+            # (current[upto:] 는 아직 내보내지 않은 구간이므로 그대로 이어짐)
+            # return: 앞에 남긴 겹침 구간 수
+            nonlocal current, current_tokens
+            piece = text[current[0][0] : current[upto - 1][1]].strip()
+            if piece:
+                chunks.append(piece)
+            overlap, overlap_tokens = upto, 0
+            while overlap > 0 and overlap_tokens + current[overlap - 1][3] <= self._chunk_overlap:
+                overlap -= 1
+                overlap_tokens += current[overlap][3]
+            current = current[overlap:]
+            current_tokens = sum(segment[3] for segment in current)
+            return upto - overlap
+
+        for segment in self._counted_segments(text):
+            start, end, kind, n_tokens = segment
+            if n_tokens > self._chunk_size:
+                if current:
+                    emit(len(current))
+                    current, current_tokens = [], 0
+                chunks.extend(self._split_long(text, start, end))
+                continue
+            if current and current_tokens + n_tokens > self._chunk_size:
+                # 🔹 min_fill 이상 채운 지점 중 마지막 문단 경계에서 자르고, 없으면 지금 문장 앞에서 자름
+                cut, filled = len(current), 0
+                for i, (_, _, boundary, count) in enumerate(current):
+                    filled += count
+                    if boundary == _PARAGRAPH and filled >= self.min_fill * self._chunk_size:
+                        cut = i + 1
+                overlapped = emit(cut)
+                while current_tokens + n_tokens > self._chunk_size:
+                    if overlapped:
+                        # 겹침 때문에 넘치면 겹침을 줄임
+                        current_tokens -= current.pop(0)[3]
+                        overlapped -= 1
+                    else:
+                        # 문단 경계 뒤의 남은 구간만으로도 넘치면 그 구간을 따로 청크로 내보냄
+                        overlapped = emit(len(current))
+            current.append(segment)
+            current_tokens += n_tokens
+        if current:
+            emit(len(current))
+        return chunks
+
+
+# 🔹 직접 실행하는 경우: 한국어 + 영어가 섞인 생성 텍스트로 CharacterTextSplitter 와 속도 / 토큰 분포 비교
+#   python -m rag_utils.token_splitter [MB]
+#   - 네트워크 없이 실행할 수 있도록 바이트 단위 BPE 인코딩을 사용 (TIKTOKEN_ENCODING 으로 cl100k_base 등 지정 가능)
+if __name__ == "__main__":
+    import os
+    import random
+    import statistics
+    import sys
+    import time
+
+    import tiktoken
+    from langchain_text_splitters import CharacterTextSplitter, RecursiveCharacterTextSplitter
+
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 100
+    if os.environ.get("TIKTOKEN_ENCODING"):
+        encoding = get_encoding(os.environ["TIKTOKEN_ENCODING"])
+    else:
+        cl100k_pattern = r"""'(?i:[sdmt]|ll|ve|re)|[^\r\n\p{L}\p{N}]?+\p{L}++|\p{N}{1,3}+| ?[^\s\p{L}\p{N}]++[\r\n]*+|\s++$|\s*[\r\n]|\s+(?!\S)|\s"""
+        encoding = tiktoken.Encoding(name="bytes", pat_str=cl100k_pattern,
+                                     mergeable_ranks={bytes([i]): i for i in range(256)}, special_tokens={})
+
+    rng = random.Random(0)
+    english = "the retrieval model splits long documents into chunks before embedding each one".split()
+    korean = "검색 모델은 긴 문서를 임베딩하기 전에 여러 조각으로 나누고 각 조각을 벡터로 변환합니다".split()
+
+    def paragraph() -> str:
+        words = english if rng.random() < 0.5 else korean
+        sentences = [" ".join(rng.choice(words) for _ in range(rng.randint(6, 20))) + rng.choice([".", ".", "?", "!"])
+                     for _ in range(rng.randint(2, 8))]
+        return " ".join(sentences) if rng.random() < 0.7 else "\n".join(sentences)
+
+    parts, size = [], 0
+    while size < megabytes * 1e6:
+        parts.append(paragraph())
+        size += len(parts[-1].encode("utf-8")) + 2
+    text = "\n\n".join(parts)
+    del parts
+    print(f"{len(text.encode('utf-8')) / 1e6:.0f} MB text ({len(text) / 1e6:.0f}M chars), encoding={encoding.name}")
+
+    def report(label: str, chunks: List[str], elapsed: float) -> None:
+        sample = chunks[:: max(1, len(chunks) // 20000)]
+        tokens = [len(t) for t in encoding.encode_ordinary_batch(sample)]
+        over = sum(t > 256 for t in tokens) / len(tokens)
+        print(f"{label:>42}: {elapsed:6.1f}s ({len(text) / elapsed / 1e6:5.1f}M chars/s), {len(chunks)} chunks, "
+              f"tokens/chunk mean {statistics.mean(tokens):5.1f} stdev {statistics.pstdev(tokens):5.1f}, "
+              f"over 256: {over:.1%}")
+
+    # 🔹 기존 방식 (글자 수) / 같은 토큰 예산의 LangChain 분할기 (from_tiktoken_encoder 와 같은 length_function)
+    def token_length(chunk: str) -> int:
+        return len(encoding.encode_ordinary(chunk))
+
+    baselines = [
+        ("CharacterTextSplitter(1000 chars)", CharacterTextSplitter(chunk_size=1000, chunk_overlap=0)),
+        ("CharacterTextSplitter(256 tokens)",
+         CharacterTextSplitter(chunk_size=256, chunk_overlap=0, separator="\n", length_function=token_length)),
+        ("RecursiveCharacterTextSplitter(256 tokens)",
+         RecursiveCharacterTextSplitter(chunk_size=256, chunk_overlap=0, length_function=token_length)),
+        ("SentenceTokenSplitter(256 tokens)", SentenceTokenSplitter(chunk_size=256, encoding=encoding)),
+    ]
+    for label, splitter in baselines:
+        started = time.perf_counter()
+        chunks = splitter.split_text(text)
+        report(label, chunks, time.perf_counter() - started)
+        del chunks
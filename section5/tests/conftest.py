@@ -0,0 +1,8 @@
+# section5 폴더를 import 경로에 추가 (rag_utils 를 section5 에서 실행할 때와 같은 이름으로 import)
+# intro-to-vector-dbs 도 추가 (main.py 처럼 async_agent 를 폴더 안에서 import)
+import os
+import sys
+
+SECTION_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SECTION_DIR)
+sys.path.insert(0, os.path.join(SECTION_DIR, "intro-to-vector-dbs"))
@@ -0,0 +1,121 @@
+import asyncio
+import time
+
+from async_agent import AsyncRateLimiter
+
+
+async def hold(limiter: AsyncRateLimiter, seconds: float, active: list, peak: list, starts: list) -> None:
+    async with limiter:
+        starts.append(time.monotonic())
+        active.append(1)
+        peak.append(len(active))
+        await asyncio.sleep(seconds)
+        active.pop()
+
+
+def test_caps_concurrent_calls():
+    async def main():
+        limiter = AsyncRateLimiter(3)
+        active, peak, starts = [], [], []
+        started = time.monotonic()
+        await asyncio.gather(*(hold(limiter, 0.1, active, peak, starts) for _ in range(9)))
+        return limiter, max(peak), time.monotonic() - started
+
+    limiter, peak, elapsed = asyncio.run(main())
+    assert peak == 3
+    assert 0.3 <= elapsed < 0.6  # 9 개를 3 개씩 세 번
+    assert limiter.stats()["calls"] == 9
+    assert limiter.stats()["waited"] == 6  # 처음 세 개는 기다리지 않음
+    assert limiter.stats()["avg_wait_ms"] >= 100
+
+
+def test_paces_call_starts():
+    async def main():
+        limiter = AsyncRateLimiter(10, requests_per_second=20)
+        active, peak, starts = [], [], []
+        await asyncio.gather(*(hold(limiter, 0, active, peak, starts) for _ in range(5)))
+        return starts
+
+    starts = asyncio.run(main())
+    gaps = [b - a for a, b in zip(starts, starts[1:])]
+    assert all(gap >= 0.045 for gap in gaps)  # 1 / 20 초 간격
+    assert starts[-1] - starts[0] < 0.4
+
+
+def test_cancelled_waiter_releases_slot():
+    async def main():
+        limiter = AsyncRateLimiter(1)
+        holder_in = asyncio.Event()
+        release = asyncio.Event()
+
+        async def holder():
+            async with limiter:
+                holder_in.set()
+                await release.wait()
+
+        async def enter():
+            async with limiter:
+                return "entered"
+
+        first = asyncio.create_task(holder())
+        await holder_in.wait()
+        waiter = asyncio.create_task(enter())
+        await asyncio.sleep(0.05)
+        waiter.cancel()  # 자리를 기다리는 중 취소
+        await asyncio.gather(waiter, return_exceptions=True)
+
+        release.set()
+        await first
+        return await asyncio.wait_for(enter(), timeout=1), limiter
+
+    result, limiter = asyncio.run(main())
+    assert result == "entered"
+    assert limiter._semaphore._value == 1
+
+
+def test_cancelled_while_pacing_releases_slot():
+    async def main():
+        limiter = AsyncRateLimiter(2, requests_per_second=2)
+        release = asyncio.Event()
+
+        async def holder():
+            async with limiter:
+                await release.wait()
+
+        first = asyncio.create_task(holder())
+        await asyncio.sleep(0)  # 첫 호출 시작 → 다음 호출은 0.5초 뒤
+        paced = asyncio.create_task(holder())
+        await asyncio.sleep(0.05)
+        assert limiter._semaphore._value == 0  # 두 번째는 자리를 잡고 간격을 기다리는 중
+        paced.cancel()
+        await asyncio.gather(paced, return_exceptions=True)
+        assert limiter._semaphore._value == 1
+
+        # 첫 호출이 자리를 잡고 있어도 반납된 자리로 들어갈 수 있음
+        await asyncio.wait_for(limiter.__aenter__(), timeout=2)
+        await limiter.__aexit__(None, None, None)
+        release.set()
+        await first
+        return limiter
+
+    limiter = asyncio.run(main())
+    assert limiter._semaphore._value == 2
+    assert limiter.calls == 2  # 취소된 호출은 세지 않음
+
+
+def test_cancelled_inside_body_releases_slot():
+    async def main():
+        limiter = AsyncRateLimiter(1)
+
+        async def slow():
+            async with limiter:
+                await asyncio.sleep(10)
+
+        task = asyncio.create_task(slow())
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        async with limiter:
+            return limiter._semaphore._value
+
+    assert asyncio.run(main()) == 0
@@ -0,0 +1,84 @@
+import math
+import random
+from typing import Any, List
+
+import pytest
+
+from rag_utils.calculator import VECTORIZE_MIN, CalculatorError, calculate, evaluate, evaluate_many
+
+# 🔹 '#' 자리에 숫자를 채우는 템플릿 (같은 템플릿이 VECTORIZE_MIN 개 이상이면 NumPy 경로로 계산됨)
+TEMPLATES = [
+    "(# + #) - #",
+    "# * # % #",
+    "# * # - # * #",
+    "# // # + #",
+    "-# % # * #",
+    "# ** # - #",
+    "abs(# - #) * #",
+    "max(#, #) * # + #",
+    "min(#, # * #) - #",
+    "floor(# / #) * #",
+    "round(#, #) + #",
+    "(# + #) / # + sqrt(#)",
+]
+
+
+def random_number(rng: random.Random) -> str:
+    roll = rng.random()
+    if roll < 0.3:
+        return str(rng.randint(0, 99))
+    if roll < 0.55:
+        return str(rng.randint(2 ** 50, 2 ** 70))  # 2**53 근처의 큰 정수
+    if roll < 0.7:
+        return str(rng.randint(10 ** 10, 10 ** 12))  # 곱하면 2**53 을 넘는 정수
+    if roll < 0.85:
+        return f"{rng.uniform(0, 1000):.3f}"
+    return str(rng.randint(0, 3))
+
+
+def fill(rng: random.Random, template: str) -> str:
+    return "".join(random_number(rng) if c == "#" else c for c in template)
+
+
+def single(expression: str) -> Any:
+    try:
+        return evaluate(expression)
+    except CalculatorError as e:
+        return e
+
+
+def assert_same(expressions: List[str]) -> None:
+    for expression, result in zip(expressions, evaluate_many(expressions)):
+        expected = single(expression)
+        if isinstance(expected, CalculatorError):
+            assert isinstance(result, CalculatorError), expression
+            continue
+        # 타입(int / float)까지 같아야 함
+        assert type(result) is type(expected), (expression, result, expected)
+        if isinstance(expected, float):
+            assert math.isclose(result, expected, rel_tol=1e-12, abs_tol=1e-12), (expression, result, expected)
+        else:
+            assert result == expected, (expression, result, expected)
+
+
+@pytest.mark.parametrize("template", TEMPLATES)
+def test_evaluate_many_matches_evaluate(template):
+    rng = random.Random(template)
+    assert_same([fill(rng, template) for _ in range(VECTORIZE_MIN * 8)])
+
+
+def test_large_int_intermediates_are_exact():
+    assert evaluate_many(["(2**60+%d)-2**60" % i for i in range(VECTORIZE_MIN)]) == list(range(VECTORIZE_MIN))
+    expression = "12345678901 * 98765432101 % 7"
+    assert evaluate_many([expression] * VECTORIZE_MIN) == [evaluate(expression)] * VECTORIZE_MIN
+
+
+def test_int_rows_stay_int_in_mixed_group():
+    results = evaluate_many(["2*3"] + [f"{i}.5*3" for i in range(VECTORIZE_MIN)])
+    assert results[0] == 6 and type(results[0]) is int
+    assert all(type(result) is float for result in results[1:])
+
+
+def test_calculate_batches_multi_line_input():
+    lines = [f"{2 ** 60 + i} - {2 ** 60}" for i in range(VECTORIZE_MIN)]
+    assert calculate("\n".join(lines)).splitlines() == [f"{line} = {i}" for i, line in enumerate(lines)]
@@ -0,0 +1,102 @@
+import threading
+from typing import List
+
+import pytest
+
+from rag_utils.embedding_cache import CachedEmbeddings, LRUCache, SQLiteEmbeddingStore
+from rag_utils.fake_embeddings import HashingEmbeddings
+
+
+class CountingEmbeddings(HashingEmbeddings):
+    """모델로 보낸 텍스트를 기록하는 HashingEmbeddings"""
+
+    def __init__(self, model: str = "hashing-16"):
+        super().__init__(size=16)
+        self.model = model
+        self.sent: List[str] = []
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with self._lock:
+            self.sent.extend(texts)
+        return super().embed_documents(texts)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SQLiteEmbeddingStore(str(tmp_path / "cache.sqlite"))
+    yield store
+    store.close()
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.put("a", [1.0])
+    cache.put("b", [2.0])
+    assert cache.get("a") == [1.0]  # a 를 최근 사용으로
+    cache.put("c", [3.0])
+    assert cache.get("b") is None and cache.get("a") == [1.0] and cache.get("c") == [3.0]
+    assert len(cache) == 2
+
+
+def test_misses_go_to_model_once(store):
+    model = CountingEmbeddings()
+    cached = CachedEmbeddings(model, store=store)
+    vectors = cached.embed_documents(["a b", "c d", "a b"])
+    assert model.sent == ["a b", "c d"]  # 같은 텍스트는 한 번만
+    assert vectors[0] == vectors[2] == model._embed("a b")
+    assert (cached.hits, cached.misses) == (1, 2)
+
+    assert cached.embed_query("c d") == vectors[1]
+    assert model.sent == ["a b", "c d"]
+    assert (cached.hits, cached.misses) == (2, 2) and cached.hit_rate == 0.5
+
+
+def test_sqlite_hits_are_promoted_to_memory(store, monkeypatch):
+    model = CountingEmbeddings()
+    CachedEmbeddings(model, store=store).embed_documents(["a b", "c d"])
+
+    # 🔹 새 프로세스처럼 메모리가 빈 캐시: SQLite 에서 읽고 메모리 LRU 로 올림
+    fresh = CachedEmbeddings(model, store=store)
+    assert len(fresh.memory) == 0
+    vectors = fresh.embed_documents(["a b", "c d"])
+    assert model.sent == ["a b", "c d"]  # 모델 호출 없음
+    for vector, text in zip(vectors, ["a b", "c d"]):
+        assert vector == pytest.approx(model._embed(text), rel=1e-6)  # float32 로 저장
+    assert len(fresh.memory) == 2
+
+    # 메모리에 올라간 뒤에는 SQLite 를 조회하지 않음
+    monkeypatch.setattr(store, "mget", lambda keys: pytest.fail(f"unexpected SQLite lookup {keys}"))
+    assert fresh.embed_documents(["a b"]) == [vectors[0]]
+    assert (fresh.hits, fresh.misses) == (3, 0)
+
+
+def test_keys_are_separated_by_model(store):
+    small, large = CountingEmbeddings("small-model"), CountingEmbeddings("large-model")
+    CachedEmbeddings(small, store=store).embed_documents(["same text"])
+    other = CachedEmbeddings(large, store=store)
+    other.embed_documents(["same text"])
+    assert large.sent == ["same text"]  # 다른 모델의 벡터를 재사용하지 않음
+    assert other.misses == 1
+
+    same = CachedEmbeddings(CountingEmbeddings("small-model"), store=store)
+    same.embed_documents(["same text"])
+    assert same.underlying.sent == [] and same.hits == 1
+    assert CachedEmbeddings(small, store=store, model_name="override").model_name == "override"
+
+
+def test_counters_are_consistent_across_threads(store):
+    cached = CachedEmbeddings(CountingEmbeddings(), store=store)
+    texts = [f"text {i}" for i in range(50)]
+
+    def worker():
+        for _ in range(20):
+            cached.embed_documents(texts)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert cached.hits + cached.misses == 8 * 20 * len(texts)
+    assert cached.misses >= len(texts)
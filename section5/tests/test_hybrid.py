@@ -0,0 +1,96 @@
+import math
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.vectorstores import InMemoryVectorStore
+
+from rag_utils.fake_embeddings import HashingEmbeddings
+from rag_utils.hybrid import BM25Index, HybridRetriever, reciprocal_rank_fusion
+
+TEXTS = {
+    "a": "pinecone is a managed vector database",
+    "b": "faiss is a library for vector similarity search",
+    "c": "langchain connects llms with vector stores and tools",
+    "d": "bm25 ranks documents by keyword overlap",
+}
+
+
+def doc(_id: str) -> Document:
+    return Document(id=_id, page_content=TEXTS[_id])
+
+
+@pytest.fixture
+def index():
+    bm25 = BM25Index()
+    bm25.add_documents([doc(_id) for _id in TEXTS], list(TEXTS))
+    return bm25
+
+
+def test_rrf_with_fixed_rankings():
+    lexical = [doc("a"), doc("b"), doc("c")]
+    dense = [doc("c"), doc("a"), doc("d")]
+    fused = reciprocal_rank_fusion([lexical, dense], k=4, rrf_k=60)
+    # a: 1/61 + 1/62, c: 1/63 + 1/61, b: 1/62, d: 1/63
+    assert [d.id for d in fused] == ["a", "c", "b", "d"]
+    assert [d.id for d in reciprocal_rank_fusion([lexical, dense], k=2)] == ["a", "c"]
+    # rrf_k 가 작으면 한쪽 1등의 영향이 커짐: rrf_k=0 에서는 a / b (1/1) 가 c (1/3 + 1/3) 보다 앞,
+    # rrf_k=60 에서는 두 목록에 모두 있는 c (2/63) 가 a / b (1/61) 보다 앞
+    rankings = [[doc("b"), Document(id="x", page_content="x"), doc("c")],
+                [doc("a"), Document(id="y", page_content="y"), doc("c")]]
+    fused = [d.id for d in reciprocal_rank_fusion(rankings, k=3, rrf_k=0)]
+    assert set(fused[:2]) == {"a", "b"} and fused[2] == "c"
+    assert [d.id for d in reciprocal_rank_fusion(rankings, k=1, rrf_k=60)] == ["c"]
+
+    # id 가 없는 문서는 chunk_id 메타데이터 (없으면 본문) 로 같은 청크를 맞춤
+    first = Document(page_content="same chunk", metadata={"chunk_id": "x"})
+    second = Document(page_content="same chunk (other store)", metadata={"chunk_id": "x"})
+    assert reciprocal_rank_fusion([[first], [second]]) == [first]
+
+
+def test_bm25_scores_match_formula(index):
+    hits = index.search("vector database", k=4)
+    assert hits[0][0].id == "a"  # 두 단어가 모두 들어 있는 유일한 문서
+
+    n_docs, k1, b = 4, index.k1, index.b
+    lengths = {_id: len(text.split()) for _id, text in TEXTS.items()}
+    avg = sum(lengths.values()) / n_docs
+
+    def term_score(term: str, _id: str) -> float:
+        df = sum(term in text.split() for text in TEXTS.values())
+        tf = TEXTS[_id].split().count(term)
+        idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+        return idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * lengths[_id] / avg))
+
+    expected = {_id: term_score("vector", _id) + term_score("database", _id) for _id in TEXTS if "vector" in TEXTS[_id]}
+    assert {d.id: s for d, s in hits} == pytest.approx(expected)
+    assert [s for _, s in hits] == sorted(expected.values(), reverse=True)
+    assert index.search("unknown words", k=4) == []
+
+
+def test_bm25_upsert_delete_and_reload(index, tmp_path):
+    index.add_documents([Document(page_content="keyword overlap only")], ["a"])  # 같은 id → 교체
+    assert len(index) == 4
+    assert [d.id for d, _ in index.search("pinecone", k=4)] == []
+    index.delete(["d", "missing"])
+    assert [d.id for d, _ in index.search("keyword overlap", k=4)] == ["a"]
+
+    path = str(tmp_path / "bm25.json")
+    index.save(path)
+    reloaded = BM25Index(path)
+    assert len(reloaded) == 3
+    assert [(d.id, s) for d, s in reloaded.search("vector search", k=4)] == \
+        [(d.id, s) for d, s in index.search("vector search", k=4)]
+
+
+def test_hybrid_retriever_fuses_and_skips_vector_search(index):
+    store = InMemoryVectorStore(HashingEmbeddings(size=64))
+    store.add_documents([doc(_id) for _id in TEXTS], ids=list(TEXTS))
+
+    retriever = HybridRetriever(vectorstore=store, lexical_index=index, k=2)
+    assert [d.id for d in retriever.invoke("managed vector database")][0] == "a"
+    assert retriever.stats == {"queries": 1, "vector_skipped": 0}
+
+    skipping = HybridRetriever(vectorstore=store, lexical_index=index, k=2,
+                               skip_vector_margin=1.5, skip_vector_min_score=0.5)
+    assert [d.id for d in skipping.invoke("bm25 keyword")] == ["d"]  # BM25 가 확실 → 벡터 검색 없이 반환
+    assert skipping.stats == {"queries": 1, "vector_skipped": 1}
@@ -0,0 +1,45 @@
+import os
+
+from rag_utils.manifest import FileRecord, IngestionManifest
+
+
+def write(path, text: str) -> str:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return os.path.abspath(path)
+
+
+def recorded(tmp_path, *paths: str) -> IngestionManifest:
+    manifest = IngestionManifest(str(tmp_path / "manifest.json"))
+    for path in paths:
+        stat = os.stat(path) if os.path.exists(path) else None
+        manifest.records[path] = FileRecord(mtime=stat.st_mtime if stat else 0, size=stat.st_size if stat else 0,
+                                            sha256="", chunk_ids=[f"{path}:0"])
+    return manifest
+
+
+def test_file_missing_from_arguments_is_kept(tmp_path):
+    a, b = write(tmp_path / "a.txt", "a"), write(tmp_path / "b.txt", "b")
+    diff = recorded(tmp_path, a, b).diff([a])
+    assert diff.unchanged == [a] and diff.deleted == []
+
+
+def test_file_gone_from_disk_is_deleted(tmp_path):
+    a, b = write(tmp_path / "a.txt", "a"), write(tmp_path / "b.txt", "b")
+    manifest = recorded(tmp_path, a, b)
+    os.remove(b)
+    assert manifest.diff([a]).deleted == [b]
+
+
+def test_file_under_rescanned_root_is_deleted(tmp_path):
+    kept = write(tmp_path / "other" / "kept.txt", "kept")
+    dropped = write(tmp_path / "docs" / "dropped.md", "no longer matches *.txt")
+    current = write(tmp_path / "docs" / "current.txt", "current")
+    diff = recorded(tmp_path, kept, dropped, current).diff([current], roots=[str(tmp_path / "docs")])
+    assert diff.deleted == [dropped]
+
+
+def test_prune_deletes_everything_not_listed(tmp_path):
+    a, b = write(tmp_path / "a.txt", "a"), write(tmp_path / "b.txt", "b")
+    assert recorded(tmp_path, a, b).diff([a], prune=True).deleted == [b]
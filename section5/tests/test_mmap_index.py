@@ -0,0 +1,137 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+import rag_utils.mmap_index as mmap_index
+from rag_utils.fake_embeddings import HashingEmbeddings
+from rag_utils.mmap_index import MmapVectorStore
+
+DIMENSION = 16
+
+
+def vector(seed: int) -> np.ndarray:
+    return np.random.default_rng(seed).standard_normal(DIMENSION).astype(np.float32)
+
+
+def add(store: MmapVectorStore, *seeds: int):
+    return store.add_embeddings([(f"text {seed}", vector(seed)) for seed in seeds],
+                                metadatas=[{"seed": seed} for seed in seeds], ids=[f"id-{seed}" for seed in seeds])
+
+
+def reopen(store: MmapVectorStore) -> MmapVectorStore:
+    return MmapVectorStore(store.folder_path, store.embedding)
+
+
+def nearest(store: MmapVectorStore, seed: int, k: int = 1):
+    return [doc.id for doc in store.similarity_search_by_vector(vector(seed).tolist(), k=k)]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return MmapVectorStore(str(tmp_path / "index"), HashingEmbeddings(size=DIMENSION))
+
+
+def test_append_and_reopen(store):
+    add(store, 0, 1, 2)
+    add(store, 3, 4)
+    for current in (store, reopen(store)):
+        assert len(current) == 5 and current.count == 5
+        assert all(nearest(current, seed) == [f"id-{seed}"] for seed in range(5))
+        [doc] = current.get_by_ids(["id-3"])
+        assert (doc.page_content, doc.metadata) == ("text 3", {"seed": 3})
+    with pytest.raises(ValueError):
+        store.add_embeddings([("wrong", [0.0] * (DIMENSION + 1))])
+
+
+def test_exact_l2_scores(store):
+    add(store, *range(20))
+    query = vector(100)
+    hits = store.similarity_search_with_score_by_vector(query.tolist(), k=3)
+    expected = sorted((float(np.sum((vector(seed) - query) ** 2)), f"id-{seed}") for seed in range(20))[:3]
+    assert [doc.id for doc, _ in hits] == [_id for _, _id in expected]
+    assert [score for _, score in hits] == pytest.approx([distance for distance, _ in expected], rel=1e-5)
+
+
+def test_tombstone_delete_and_upsert(store):
+    add(store, 0, 1, 2)
+    store.delete(["id-1", "missing"])
+    add(store, 2)  # 같은 id 다시 추가 → 예전 행은 tombstone
+    for current in (store, reopen(store)):
+        assert len(current) == 2 and current.count == 4
+        assert current._deleted == {1, 2}
+        assert current.get_by_ids(["id-1"]) == []
+        assert "id-1" not in nearest(current, 1, k=3)
+        assert nearest(current, 2, k=3).count("id-2") == 1
+
+
+def test_compact_drops_tombstones(store):
+    add(store, *range(6))
+    store.delete(["id-0", "id-3"])
+    size_before = os.path.getsize(os.path.join(store.folder_path, "vectors.f32"))
+    store.compact()
+    for current in (store, reopen(store)):
+        assert current.count == len(current) == 4 and not current._deleted
+        assert sorted(current._row_of) == ["id-1", "id-2", "id-4", "id-5"]
+        assert all(nearest(current, seed) == [f"id-{seed}"] for seed in (1, 2, 4, 5))
+    assert os.path.getsize(os.path.join(store.folder_path, "vectors.f32")) == size_before * 4 // 6
+
+
+def test_uncommitted_append_is_ignored_and_truncated(store, monkeypatch):
+    add(store, 0, 1)
+    sizes = {name: os.path.getsize(os.path.join(store.folder_path, name))
+             for name in ("vectors.f32", "norms.f32", "docs.jsonl", "offsets.i64", "ids.txt")}
+
+    # 🔹 파일에 이어 쓴 뒤 index.json 을 쓰기 전에 멈춘 경우
+    def crash(path, value):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(mmap_index, "_write_json_atomic", crash)
+    with pytest.raises(OSError):
+        add(store, 2)
+    monkeypatch.undo()
+
+    # 다시 열면 커밋된 두 행만 보임
+    recovered = reopen(store)
+    assert recovered.count == 2 and sorted(recovered._row_of) == ["id-0", "id-1"]
+    assert nearest(recovered, 1) == ["id-1"]
+
+    # 다음 추가가 남은 부분을 잘라내고 이어 씀
+    add(recovered, 3)
+    assert os.path.getsize(os.path.join(store.folder_path, "vectors.f32")) == sizes["vectors.f32"] * 3 // 2
+    final = reopen(recovered)
+    assert final.count == 3 and final._ids == ["id-0", "id-1", "id-3"]
+    assert [doc.page_content for doc in final.get_by_ids(["id-0", "id-1", "id-3"])] == ["text 0", "text 1", "text 3"]
+    assert all(nearest(final, seed) == [f"id-{seed}"] for seed in (0, 1, 3))
+
+
+def test_interrupted_upsert_keeps_old_row(store, monkeypatch):
+    add(store, 0, 1)
+    write = mmap_index._write_json_atomic
+
+    # 🔹 id-1 교체 중 index.json 만 쓰지 못하고 멈춘 경우 (다른 파일은 모두 씀)
+    def crash_on_header(path, value):
+        if os.path.basename(path) == "index.json":
+            raise OSError("disk full")
+        write(path, value)
+
+    monkeypatch.setattr(mmap_index, "_write_json_atomic", crash_on_header)
+    with pytest.raises(OSError):
+        add(store, 1)
+    monkeypatch.undo()
+
+    recovered = reopen(store)
+    assert len(recovered) == 2 and not recovered._deleted
+    assert [doc.page_content for doc in recovered.get_by_ids(["id-1"])] == ["text 1"]
+
+
+def test_reads_legacy_deleted_file(store):
+    add(store, 0, 1, 2)
+    folder = store.folder_path
+    with open(os.path.join(folder, "index.json"), "w", encoding="utf-8") as f:
+        json.dump({"dimension": DIMENSION, "count": 3}, f)
+    with open(os.path.join(folder, "deleted.json"), "w", encoding="utf-8") as f:
+        json.dump([1], f)
+    legacy = reopen(store)
+    assert len(legacy) == 2 and legacy.get_by_ids(["id-1"]) == []
@@ -0,0 +1,137 @@
+import numpy as np
+import pytest
+
+from rag_utils.fake_embeddings import HashingEmbeddings
+from rag_utils.numpy_store import NumpyVectorStore
+
+DIMENSION = 16
+SOURCES = ["a.pdf", "b.pdf", "c.pdf"]
+
+
+def vectors(count: int, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).standard_normal((count, DIMENSION)).astype(np.float32)
+
+
+def build(count: int = 30) -> NumpyVectorStore:
+    store = NumpyVectorStore(HashingEmbeddings(size=DIMENSION))
+    store.add_embeddings(
+        [(f"text {i}", vector) for i, vector in enumerate(vectors(count))],
+        metadatas=[{"source": SOURCES[i % 3], "page": i // 3} for i in range(count)],
+        ids=[f"id-{i}" for i in range(count)],
+    )
+    return store
+
+
+def brute_force(store: NumpyVectorStore, query: np.ndarray, k: int, keep=lambda metadata: True):
+    # 남아 있는 문서 전체와의 코사인 유사도를 하나씩 계산 → 상위 k 개 id
+    matrix = vectors(30)  # build() 에서 넣은 벡터 (id-i → i 번째 행)
+    scored = []
+    for doc in store.get_by_ids(store._ids):
+        if keep(doc.metadata):
+            vector = matrix[int(doc.id.split("-")[1])]
+            scored.append((float(vector @ query / np.linalg.norm(vector) / np.linalg.norm(query)), doc.id))
+    return [doc_id for _, doc_id in sorted(scored, reverse=True)[:k]]
+
+
+def search_ids(store: NumpyVectorStore, query: np.ndarray, k: int = 4, filter=None):
+    return [doc.id for doc, _ in store.similarity_search_with_score_by_vector(query.tolist(), k=k, filter=filter)]
+
+
+def test_exact_top_k_and_batch():
+    store = build()
+    queries = vectors(5, seed=1)
+    for query in queries:
+        assert search_ids(store, query) == brute_force(store, query, 4)
+    assert len(search_ids(store, queries[0], k=100)) == 30  # k 가 문서 수보다 크면 전부
+
+    batch = store.search_by_vectors(queries, k=4)
+    assert [[doc.id for doc, _ in hits] for hits in batch] == [search_ids(store, query) for query in queries]
+    scores = [score for _, score in batch[0]]
+    assert scores == sorted(scores, reverse=True) and -1.0 <= scores[-1] <= scores[0] <= 1.0
+
+
+def test_dict_and_callable_filters():
+    store = build()
+    query = vectors(1, seed=2)[0]
+
+    hits = store.similarity_search_with_score_by_vector(query.tolist(), k=4, filter={"source": "b.pdf"})
+    assert [doc.id for doc, _ in hits] == brute_force(store, query, 4, lambda m: m["source"] == "b.pdf")
+    assert all(doc.metadata["source"] == "b.pdf" for doc, _ in hits)
+
+    either = {"source": ["a.pdf", "c.pdf"]}  # 값 목록은 OR
+    assert search_ids(store, query, 10, either) == brute_force(store, query, 10, lambda m: m["source"] != "b.pdf")
+
+    both = {"source": "a.pdf", "page": [0, 1, 2]}  # 키끼리는 AND
+    assert sorted(search_ids(store, query, 10, both)) == ["id-0", "id-3", "id-6"]
+
+    assert search_ids(store, query, 10, lambda m: m["page"] >= 8) == \
+        brute_force(store, query, 10, lambda m: m["page"] >= 8)
+    assert search_ids(store, query, 4, {"source": "missing.pdf"}) == []
+
+
+def test_filter_masks_follow_add_and_delete():
+    store = build()
+    query = vectors(1, seed=3)[0]
+    before = set(search_ids(store, query, 100, {"source": "a.pdf"}))
+    assert len(before) == 10 and store._masks  # 마스크가 캐시됨
+
+    store.add_embeddings([("new", query.tolist())], metadatas=[{"source": "a.pdf"}], ids=["new"])
+    assert search_ids(store, query, 1, {"source": "a.pdf"}) == ["new"]
+
+    store.delete(["new", "id-0"])
+    assert set(search_ids(store, query, 100, {"source": "a.pdf"})) == before - {"id-0"}
+
+
+def test_delete_moves_last_row():
+    store = build()
+    version = store.version
+    assert store.delete(["id-3", "id-29", "missing"]) is True  # 없는 id 는 무시
+    assert len(store) == 28 and store.version == version + 1
+
+    assert store.get_by_ids(["id-3", "id-29"]) == []
+    assert [doc.page_content for doc in store.get_by_ids(["id-28", "id-4"])] == ["text 28", "text 4"]
+    assert sorted(store._row_of.values()) == list(range(28))  # 행렬에 빈틈 없음
+    assert all(store._ids[row] == _id for _id, row in store._row_of.items())
+    for query in vectors(5, seed=4):
+        assert search_ids(store, query) == brute_force(store, query, 4)
+
+    store.delete(["missing"])
+    assert store.version == version + 1  # 실제로 지운 것이 없으면 버전 그대로
+
+
+def test_upsert_replaces_same_id():
+    store = build(3)
+    store.add_embeddings([("replaced", [1.0] + [0.0] * (DIMENSION - 1))], metadatas=[{"source": "z.pdf"}], ids=["id-1"])
+    assert len(store) == 3
+    (doc,) = store.get_by_ids(["id-1"])
+    assert (doc.page_content, doc.metadata) == ("replaced", {"source": "z.pdf"})
+    assert search_ids(store, np.eye(DIMENSION, dtype=np.float32)[0], 1) == ["id-1"]
+
+    with pytest.raises(ValueError):
+        store.add_embeddings([("wrong", [1.0, 0.0])])
+
+
+def test_save_and_load_round_trip(tmp_path):
+    store = build()
+    store.delete(["id-5"])
+    folder = str(tmp_path / "numpy_index")
+    store.save_local(folder)
+
+    loaded = NumpyVectorStore.load_local(folder, store.embedding, allow_dangerous_deserialization=True)
+    assert len(loaded) == len(store) == 29
+    assert loaded.get_by_ids(["id-7"])[0].metadata == {"source": "b.pdf", "page": 2}
+    for query in vectors(5, seed=5):
+        assert store.search_by_vectors([query], k=5, filter={"source": "c.pdf"}) == \
+            loaded.search_by_vectors([query], k=5, filter={"source": "c.pdf"})
+
+    # 불러온 스토어에 계속 추가 / 삭제
+    loaded.add_embeddings([("extra", vectors(1, seed=6)[0].tolist())], ids=["extra"])
+    loaded.delete(["id-0"])
+    assert len(loaded) == 29
+    assert search_ids(loaded, vectors(1, seed=6)[0], 1) == ["extra"]
+
+
+def test_load_missing_folder_is_empty(tmp_path):
+    store = NumpyVectorStore.load_local(str(tmp_path / "missing"), HashingEmbeddings(size=DIMENSION))
+    assert len(store) == 0
+    assert store.similarity_search("anything", k=4) == []
@@ -0,0 +1,33 @@
+import pypdf
+import pytest
+from langchain_community.document_loaders import PyPDFLoader
+
+from rag_utils.pdf_loader import ParallelPDFLoader
+
+
+def write_pdf(path: str, pages: int, metadata=None) -> None:
+    writer = pypdf.PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(200, 200)
+    if metadata:
+        writer.add_metadata(metadata)
+    writer.write(path)
+
+
+@pytest.mark.parametrize("metadata", [
+    None,
+    {"/Title": " Manual ", "/Author": "Kim", "/Subject": "RAG", "/CreationDate": "D:20240101120000+09'00'",
+     "/ModDate": "not a date"},
+])
+def test_metadata_matches_pypdf_loader(tmp_path, monkeypatch, metadata):
+    monkeypatch.setenv("PDF_WORKERS", "1")
+    path = str(tmp_path / "manual.pdf")
+    write_pdf(path, 5, metadata)
+
+    expected = [doc.metadata for doc in PyPDFLoader(file_path=path).load()]
+    actual = [doc.metadata for doc in ParallelPDFLoader(path, pages_per_task=2).lazy_load()]
+    assert actual == expected
+    assert "producer" in actual[0] and "creationdate" in actual[0]
+    if metadata:
+        assert actual[0]["title"] == "Manual"
+        assert actual[0]["creationdate"] == "2024-01-01T12:00:00+09:00"
@@ -0,0 +1,139 @@
+import threading
+import time
+from typing import List
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.vectorstores import InMemoryVectorStore
+from langchain_text_splitters import CharacterTextSplitter
+
+from rag_utils.fake_embeddings import HashingEmbeddings
+from rag_utils.pdf_loader import PassthroughSplitter
+from rag_utils.pipeline import IngestionStats, batched, ingest_documents
+
+
+class RecordingEmbeddings(HashingEmbeddings):
+    """embed_documents 호출마다 배치 내용 / 동시 실행 수를 기록하는 HashingEmbeddings"""
+
+    def __init__(self, delay: float = 0.0, fail_on: int = -1):
+        super().__init__(size=64)
+        self.delay = delay
+        self.fail_on = fail_on
+        self.batches: List[List[str]] = []
+        self.completed = 0
+        self.running = self.max_running = 0
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with self._lock:
+            call = len(self.batches)
+            self.batches.append(list(texts))
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(self.delay)
+        with self._lock:
+            self.running -= 1
+        if call == self.fail_on:
+            raise RuntimeError("embedding API error")
+        vectors = super().embed_documents(texts)
+        with self._lock:
+            self.completed += 1
+        return vectors
+
+
+class FailingStore(InMemoryVectorStore):
+    """add_embeddings 경로를 쓰고, fail_on 번째 업서트에서 실패하는 스토어"""
+
+    def __init__(self, fail_on: int):
+        super().__init__(HashingEmbeddings())
+        self.fail_on = fail_on
+        self.upserts = 0
+
+    def add_embeddings(self, text_embeddings, metadatas=None, ids=None):
+        self.upserts += 1
+        if self.upserts == self.fail_on:
+            raise RuntimeError("vector store unavailable")
+        return list(ids)
+
+
+def docs(count: int) -> List[Document]:
+    return [Document(page_content=f"document {i} about retrieval", metadata={"i": i}) for i in range(count)]
+
+
+def test_batched():
+    assert list(batched(range(7), 3)) == [[0, 1, 2], [3, 4, 5], [6]]
+    assert list(batched([], 3)) == []
+    with pytest.raises(ValueError):
+        list(batched(range(3), 0))
+
+
+def test_all_chunks_are_embedded_in_contiguous_batches():
+    embeddings = RecordingEmbeddings(delay=0.01)
+    store = InMemoryVectorStore(embeddings)
+    splitter = CharacterTextSplitter(chunk_size=20, chunk_overlap=0, separator=" ")
+    documents = [Document(page_content=" ".join(f"word{i}-{j}" for j in range(10)), metadata={"i": i})
+                 for i in range(12)]
+    expected_chunks = [chunk.page_content for chunk in splitter.split_documents(documents)]
+
+    stats = ingest_documents(documents, splitter, embeddings, store, batch_size=5, max_workers=3,
+                             id_fn=lambda doc: doc.page_content)
+
+    # 🔹 배치는 청크 순서대로 batch_size 개씩 (마지막만 짧을 수 있음), 완료 순서와 관계없이 모두 저장됨
+    batches = sorted(embeddings.batches, key=lambda batch: expected_chunks.index(batch[0]))
+    assert [text for batch in batches for text in batch] == expected_chunks
+    assert all(len(batch) == 5 for batch in batches[:-1])
+    assert sorted(store.store) == sorted(expected_chunks)
+    for text, record in store.store.items():
+        assert record["vector"] == HashingEmbeddings(size=64).embed_query(text)
+
+    assert (stats.documents, stats.chunks, stats.batches) == (12, len(expected_chunks), len(batches))
+
+
+def test_backpressure_limits_batches_read_ahead():
+    embeddings = RecordingEmbeddings(delay=0.02)
+    max_workers = 2
+    read_ahead = []
+
+    def lazy_documents():
+        for i, document in enumerate(docs(30)):
+            read_ahead.append(i - embeddings.completed)  # 이미 읽었지만 임베딩이 끝나지 않은 배치 수
+            yield document
+
+    ingest_documents(lazy_documents(), PassthroughSplitter(), embeddings, InMemoryVectorStore(embeddings),
+                     batch_size=1, max_workers=max_workers)
+    # 🔹 대기 중인 배치는 max_workers * 2 개까지만 (문서를 미리 다 읽지 않음)
+    assert max(read_ahead) <= max_workers * 2
+    assert embeddings.max_running <= max_workers
+
+
+def test_embedding_error_propagates():
+    embeddings = RecordingEmbeddings(fail_on=2)
+    with pytest.raises(RuntimeError, match="embedding API error"):
+        ingest_documents(docs(10), PassthroughSplitter(), embeddings, InMemoryVectorStore(embeddings), batch_size=2)
+
+
+def test_upsert_error_propagates():
+    store = FailingStore(fail_on=2)
+    with pytest.raises(RuntimeError, match="vector store unavailable"):
+        ingest_documents(docs(10), PassthroughSplitter(), HashingEmbeddings(), store, batch_size=2)
+    assert store.upserts == 5  # 나머지 배치의 업서트도 끝난 뒤 예외 전파
+
+
+def test_ingestion_stats():
+    stats = ingest_documents(docs(9), PassthroughSplitter(), HashingEmbeddings(),
+                             InMemoryVectorStore(HashingEmbeddings()), batch_size=4)
+    assert (stats.documents, stats.chunks, stats.batches) == (9, 9, 3)
+    assert set(stats.stage_seconds) == {"load_split", "embed", "upsert"}
+    assert stats.elapsed > 0 and stats.chunks_per_sec == pytest.approx(9 / stats.elapsed)
+    assert stats.report().startswith("9 docs, 9 chunks, 3 batches in ")
+
+    # 🔹 여러 스레드에서 동시에 더해도 합계가 맞음
+    shared = IngestionStats()
+    threads = [threading.Thread(target=lambda: [shared.add_stage_time("embed", 0.5) for _ in range(1000)])
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert shared.stage_seconds["embed"] == 2000.0
+    assert IngestionStats().chunks_per_sec == 0.0
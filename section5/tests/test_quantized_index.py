@@ -0,0 +1,53 @@
+import os
+
+import numpy as np
+import pytest
+
+from rag_utils.fake_embeddings import HashingEmbeddings
+from rag_utils.quantized_index import QuantizedMmapVectorStore
+
+DIMENSION = 32
+
+
+def add(store: QuantizedMmapVectorStore, rng: np.random.Generator, start: int, count: int) -> None:
+    vectors = rng.standard_normal((count, DIMENSION), dtype=np.float32)
+    store.add_embeddings(zip([f"chunk {i}" for i in range(start, start + count)], vectors))
+
+
+@pytest.mark.parametrize("quantization", ["int8", "pq"])
+def test_retrain_does_not_touch_open_readers(tmp_path, quantization):
+    rng = np.random.default_rng(0)
+    embeddings = HashingEmbeddings(size=DIMENSION)
+    writer = QuantizedMmapVectorStore(str(tmp_path), embeddings, quantization=quantization, pq_m=8)
+    add(writer, rng, 0, 300)
+    reader = QuantizedMmapVectorStore(str(tmp_path), embeddings, quantization=quantization, pq_m=8)
+    codes_before = np.array(reader._codes)
+    quantizer_before = reader._quantizer
+    query = rng.standard_normal(DIMENSION, dtype=np.float32)
+
+    # 🔹 벡터 수가 두 배가 되면 writer 가 다시 학습 → 새 세대 파일
+    add(writer, rng, 300, 300)
+    assert writer._generation == reader._generation + 1
+
+    # 읽기 프로세스가 연 mmap 과 파라미터는 그대로 (제자리에서 다시 쓰지 않음)
+    assert reader._quantizer is quantizer_before
+    assert np.array_equal(reader._codes, codes_before)
+
+    # 다음 검색에서 바뀐 세대를 알아채고 refresh → writer 와 같은 결과
+    hits = reader.similarity_search_with_score_by_vector(query, k=5)
+    assert reader._generation == writer._generation and reader.count == 600
+    assert [(doc.page_content, score) for doc, score in hits] == \
+        [(doc.page_content, score) for doc, score in writer.similarity_search_with_score_by_vector(query, k=5)]
+
+
+def test_old_generations_are_removed(tmp_path):
+    rng = np.random.default_rng(1)
+    store = QuantizedMmapVectorStore(str(tmp_path), HashingEmbeddings(size=DIMENSION), train_size=10_000)
+    start = 0
+    for count in (50, 50, 100, 200):
+        add(store, rng, start, count)
+        start += count
+    # 바로 이전 세대만 남김
+    codes = sorted(name for name in os.listdir(tmp_path) if name.startswith("codes-"))
+    assert codes == [f"codes-{store._generation - 1}.u8", f"codes-{store._generation}.u8"]
+    assert store._trained_on == 400
@@ -0,0 +1,145 @@
+import time
+from typing import Dict, List
+
+import pytest
+from langchain_core.embeddings import Embeddings
+from langchain_core.runnables import RunnableLambda
+
+import rag_utils.semantic_cache as semantic_cache
+from rag_utils.fake_embeddings import HashingEmbeddings
+from rag_utils.mmap_index import MmapVectorStore
+from rag_utils.numpy_store import NumpyVectorStore
+from rag_utils.semantic_cache import SemanticAnswerCache, SemanticCachedChain, index_version
+
+# 🔹 질문별 고정 벡터 (유사도를 직접 정함): "refund" 와의 코사인 유사도는 0.96 / 0.8 / 0
+VECTORS: Dict[str, List[float]] = {
+    "refund": [1.0, 0.0, 0.0],
+    "refund policy": [0.96, 0.28, 0.0],
+    "returns": [0.8, 0.6, 0.0],
+    "shipping": [0.0, 1.0, 0.0],
+    "warranty": [0.0, 0.0, 1.0],
+}
+
+
+class TableEmbeddings(Embeddings):
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [VECTORS[text] for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return VECTORS[text]
+
+
+class FakeClock:
+    """semantic_cache 의 time 대신 쓰는 시계 (TTL / 버전 확인 간격 테스트에서 시간을 직접 움직임)"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self) -> float:
+        return self.now
+
+    monotonic = perf_counter = time
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(semantic_cache, "time", clock)
+    return clock
+
+
+def cached_chain(cache: SemanticAnswerCache):
+    calls = []
+
+    def answer(inputs):
+        calls.append(inputs["input"])
+        return {"input": inputs["input"], "context": [], "answer": f"answer to {inputs['input']}"}
+
+    return SemanticCachedChain(RunnableLambda(answer), cache), calls
+
+
+def test_threshold_decides_hit(clock):
+    chain, calls = cached_chain(SemanticAnswerCache(TableEmbeddings(), threshold=0.9))
+    assert chain.invoke({"input": "refund"})["cache_hit"] is False
+
+    hit = chain.invoke({"input": "refund policy"})
+    assert hit["cache_hit"] is True
+    assert hit["cached_query"] == "refund"
+    assert hit["input"] == "refund policy"  # 질문은 새 질문으로 바꿔서 반환
+    assert hit["answer"] == "answer to refund"
+    assert hit["similarity"] == pytest.approx(0.96)
+
+    miss = chain.invoke({"input": "returns"})  # 0.8 < 0.9
+    assert miss["cache_hit"] is False and miss["similarity"] == pytest.approx(0.8)
+    assert calls == ["refund", "returns"]
+    assert chain.cache.stats()["hits"] == 1 and chain.cache.stats()["misses"] == 2
+
+
+def test_ttl_expires_entries(clock):
+    chain, calls = cached_chain(SemanticAnswerCache(TableEmbeddings(), ttl=60))
+    chain.invoke({"input": "refund"})
+    clock.now += 59
+    assert chain.invoke({"input": "refund"})["cache_hit"] is True
+    clock.now += 2
+    assert chain.invoke({"input": "refund"})["cache_hit"] is False
+    assert calls == ["refund", "refund"]
+    assert len(chain.cache) == 1  # 만료된 항목은 지우고 새 답변을 저장
+
+
+def test_lru_eviction_keeps_recently_used(clock):
+    chain, calls = cached_chain(SemanticAnswerCache(TableEmbeddings(), max_entries=2))
+    chain.invoke({"input": "refund"})
+    chain.invoke({"input": "shipping"})
+    assert chain.invoke({"input": "refund"})["cache_hit"] is True  # refund 가 최근 사용으로 이동
+    chain.invoke({"input": "warranty"})  # 가득 참 → 가장 오래 사용되지 않은 shipping 제거
+
+    assert len(chain.cache) == 2
+    assert chain.invoke({"input": "refund"})["cache_hit"] is True
+    assert chain.invoke({"input": "warranty"})["cache_hit"] is True
+    assert chain.invoke({"input": "shipping"})["cache_hit"] is False
+    assert calls == ["refund", "shipping", "warranty", "shipping"]
+
+
+def test_version_change_clears_cache(clock):
+    version = {"value": 1}
+    cache = SemanticAnswerCache(TableEmbeddings(), version_fn=lambda: version["value"], version_check_interval=5)
+    chain, calls = cached_chain(cache)
+    chain.invoke({"input": "refund"})
+
+    version["value"] = 2
+    assert chain.invoke({"input": "refund"})["cache_hit"] is True  # 확인 간격 전에는 그대로 사용
+    clock.now += 5
+    assert chain.invoke({"input": "refund"})["cache_hit"] is False
+    assert cache.invalidations == 1
+    clock.now += 5
+    assert chain.invoke({"input": "refund"})["cache_hit"] is True  # 같은 버전이면 다시 비우지 않음
+    assert cache.invalidations == 1
+    assert calls == ["refund", "refund"]
+
+
+def test_index_version_numpy_store():
+    store = NumpyVectorStore(HashingEmbeddings(size=8))
+    before = index_version(store)
+    ids = store.add_texts(["a b", "c d"])
+    added = index_version(store)
+    store.delete([ids[0]])
+    assert len({before, added, index_version(store)}) == 3
+
+
+def test_index_version_mmap_store(tmp_path):
+    store = MmapVectorStore(str(tmp_path / "index"), HashingEmbeddings(size=8))
+    versions = [index_version(store)]
+    for change in (lambda: store.add_texts(["a b"], ids=["a"]), lambda: store.delete(["a"])):
+        time.sleep(0.02)  # 파일 시스템 mtime 해상도
+        change()
+        versions.append(index_version(store))
+    assert len(set(versions)) == 3
+
+    # 다른 프로세스에서 다시 수집한 경우 (같은 폴더를 새로 연 스토어) 도 감지
+    time.sleep(0.02)
+    MmapVectorStore(store.folder_path, store.embedding).add_texts(["c d"])
+    assert index_version(store) != versions[-1]
+
+
+def test_index_version_unknown_store():
+    assert index_version(object()) is None
@@ -0,0 +1,63 @@
+import os
+import subprocess
+import sys
+import textwrap
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from rag_utils.mmap_index import MmapVectorStore
+from rag_utils.sharded import ShardedRetriever
+
+SECTION5 = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 🔹 새 프로세스에서 프로세스 풀로 검색 (budget 이 짧아서 부모가 unlink 한 뒤에 붙는 워커도 생김)
+SCRIPT = textwrap.dedent("""
+    import logging, multiprocessing, os, sys, tempfile
+    from concurrent.futures import ProcessPoolExecutor
+    import numpy as np
+    from rag_utils.mmap_index import MmapVectorStore
+    from rag_utils.sharded import ShardedRetriever
+
+    if __name__ == "__main__":
+        multiprocessing.set_start_method(sys.argv[1])
+        logging.getLogger("rag_utils.sharded").setLevel(logging.ERROR)  # 부분 결과 경고는 확인하지 않음
+        rng = np.random.default_rng(0)
+        paths = []
+        for shard in range(3):
+            path = os.path.join(tempfile.mkdtemp(), "shard")
+            MmapVectorStore(path, None).add_embeddings(
+                zip([f"chunk {i}" for i in range(200)], rng.standard_normal((200, 16), dtype=np.float32)))
+            paths.append(path)
+        with ProcessPoolExecutor(2) as pool:
+            for budget, repeat in ((None, 20), (0.0005, 200)):
+                retriever = ShardedRetriever(shard_paths=paths, k=3, executor=pool, budget=budget)
+                for _ in range(repeat):
+                    retriever.search_by_vectors(rng.standard_normal((2, 16)))
+        print("ok")
+""")
+
+
+@pytest.mark.parametrize("start_method", ["fork", "spawn"])
+def test_workers_do_not_leak_shared_memory(start_method):
+    out = subprocess.run([sys.executable, "-c", SCRIPT, start_method], cwd=SECTION5, capture_output=True,
+                         text=True, timeout=120, env={**os.environ, "PYTHONWARNINGS": "always"})
+    assert out.stdout.strip() == "ok", out.stderr
+    assert "resource_tracker" not in out.stderr and "Traceback" not in out.stderr, out.stderr
+
+
+def test_thread_executor_matches_in_process_search(tmp_path):
+    rng = np.random.default_rng(1)
+    paths = []
+    for shard in range(3):
+        path = str(tmp_path / f"shard{shard}")
+        MmapVectorStore(path, None).add_embeddings(
+            zip([f"shard {shard} chunk {i}" for i in range(100)], rng.standard_normal((100, 8), dtype=np.float32)))
+        paths.append(path)
+    queries = rng.standard_normal((4, 8))
+    expected = ShardedRetriever(shard_paths=paths, k=5, executor=None).search_by_vectors(queries)
+    with ThreadPoolExecutor(3) as pool:
+        actual = ShardedRetriever(shard_paths=paths, k=5, executor=pool).search_by_vectors(queries)
+    assert [[(d.page_content, s) for d, s in hits] for hits in actual] == \
+        [[(d.page_content, s) for d, s in hits] for hits in expected]
@@ -0,0 +1,55 @@
+import random
+from typing import List
+
+import pytest
+import tiktoken
+
+from rag_utils.token_splitter import SentenceTokenSplitter
+
+# 네트워크 없이 쓸 수 있는 바이트 단위 인코딩 (토큰 수 = UTF-8 바이트 수)
+BYTES = tiktoken.Encoding(name="bytes", pat_str=r"\S+|\s+", mergeable_ranks={bytes([i]): i for i in range(256)},
+                          special_tokens={})
+
+
+def uncovered(text: str, chunks: List[str]) -> List[int]:
+    # 청크는 원문을 잘라낸 구간이므로 원문에서 차례로 찾아서 덮인 글자를 표시 (겹침 때문에 이전 청크 시작부터 찾음)
+    covered = [False] * len(text)
+    start = 0
+    for chunk in chunks:
+        found = text.find(chunk, start)
+        assert found >= 0, f"chunk not found in order: {chunk[:40]!r}"
+        covered[found : found + len(chunk)] = [True] * len(chunk)
+        start = found
+    return [i for i, c in enumerate(text) if not covered[i] and not c.isspace()]
+
+
+def words(rng: random.Random, size: int) -> str:
+    # 원문에서 청크 위치를 하나로 찾을 수 있도록 겹치지 않는 단어로 채움
+    text = ""
+    while len(text) < size:
+        text += f"w{rng.getrandbits(40):x} "
+    return text[:size].rstrip()
+
+
+def test_paragraph_cut_keeps_remaining_sentences():
+    # 130 토큰 문단 A, 60 토큰 문장 B / C, 199 토큰 D: D 를 넣을 때 A 뒤 문단 경계에서 잘리고 B, C 가 남음
+    text = "a" * 126 + ".\n\n" + "b" * 58 + ". " + "c" * 58 + ". " + "d" * 198 + "."
+    chunks = SentenceTokenSplitter(chunk_size=256, encoding=BYTES).split_text(text)
+    assert uncovered(text, chunks) == []
+    assert all(len(chunk.encode()) <= 256 for chunk in chunks)
+
+
+@pytest.mark.parametrize("overlap", [0, 16, 64])
+def test_every_character_ends_up_in_a_chunk(overlap):
+    rng = random.Random(overlap)
+    for _ in range(200):
+        paragraphs = []
+        for _ in range(rng.randint(1, 8)):
+            sentences = [words(rng, rng.randint(3, 140)) + "." for _ in range(rng.randint(1, 6))]
+            paragraphs.append((" " if rng.random() < 0.7 else "\n").join(sentences))
+        if rng.random() < 0.2:
+            paragraphs.append(words(rng, rng.randint(257, 700)))  # chunk_size 보다 긴 문장
+        text = "\n\n".join(paragraphs)
+        chunks = SentenceTokenSplitter(chunk_size=256, chunk_overlap=overlap, encoding=BYTES).split_text(text)
+        assert uncovered(text, chunks) == []
+        assert all(len(chunk.encode()) <= 256 for chunk in chunks)